@@ -44,6 +44,14 @@ SCRAPER_ALERT_GROUPS = [
 SCRAPER_ALERT_NOTIFY_COOLDOWN_MINUTES = int(
     os.getenv("SCRAPER_ALERT_NOTIFY_COOLDOWN_MINUTES", "180")
 )
+# Parser HTML de scrapers: auto (lxml si está instalado) | lxml | html.parser
+SCRAPER_HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER", "auto")
+# Construye solo los subárboles que leen los scrapers (SoupStrainer)
+SCRAPER_HTML_TARGETED_PARSING = os.getenv("SCRAPER_HTML_TARGETED_PARSING", "1") == "1"
+# Redirige los fetch de scrapers a un upstream local (simulate_upstreams), ej: http://127.0.0.1:8765
+SCRAPER_UPSTREAM_OVERRIDE = os.getenv("SCRAPER_UPSTREAM_OVERRIDE", "")
+# benchmark_scrapers: tolerancia sobre el baseline antes de fallar (0.25 = 25% más lento)
+SCRAPER_BENCHMARK_MAX_REGRESSION = float(os.getenv("SCRAPER_BENCHMARK_MAX_REGRESSION", "0.25"))
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -148,22 +156,105 @@ CELERY_ENABLE_UTC = os.getenv("CELERY_ENABLE_UTC", "0") == "1"
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://127.0.0.1:6379/2")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://127.0.0.1:6379/3")
 
+# Scheduler guiado por calendario de sorteos (ver ScrapeScheduleService).
+# SCRAPER_ADAPTIVE_SCHEDULING=0 vuelve a las corridas horarias fijas.
+SCRAPER_ADAPTIVE_SCHEDULING = os.getenv("SCRAPER_ADAPTIVE_SCHEDULING", "1") == "1"
+SCRAPER_SCHEDULER_TICK_SECONDS = int(os.getenv("SCRAPER_SCHEDULER_TICK_SECONDS", "30"))
+SCRAPER_POLL_SECONDS = int(os.getenv("SCRAPER_POLL_SECONDS", "45"))
+SCRAPER_POLL_GRACE_SECONDS = int(os.getenv("SCRAPER_POLL_GRACE_SECONDS", "60"))
+SCRAPER_POLL_WINDOW_MINUTES = int(os.getenv("SCRAPER_POLL_WINDOW_MINUTES", "45"))
+SCRAPER_IDLE_SWEEP_MINUTES = int(os.getenv("SCRAPER_IDLE_SWEEP_MINUTES", "60"))
+# Días de horarios aprendidos (ResultObservation + archivo); acotado por SCRAPER_OBSERVATION_RETENTION_DAYS.
+SCRAPER_CALENDAR_LOOKBACK_DAYS = int(os.getenv("SCRAPER_CALENDAR_LOOKBACK_DAYS", "7"))
+# Fan-out por página fuente (chord scrape_unit -> finalize_scrape); 0 = un task por scraper.
+SCRAPER_FANOUT_ENABLED = os.getenv("SCRAPER_FANOUT_ENABLED", "1") == "1"
+SCRAPER_UNIT_MAX_RETRIES = int(os.getenv("SCRAPER_UNIT_MAX_RETRIES", "3"))
+SCRAPER_UNIT_RETRY_BACKOFF_SECONDS = int(os.getenv("SCRAPER_UNIT_RETRY_BACKOFF_SECONDS", "15"))
+SCRAPER_UNIT_RETRY_BACKOFF_MAX_SECONDS = int(os.getenv("SCRAPER_UNIT_RETRY_BACKOFF_MAX_SECONDS", "300"))
+# Lease por scraper_key (ScraperLockService); el heartbeat lo renueva cada lease/3.
+SCRAPER_LOCK_LEASE_SECONDS = int(os.getenv("SCRAPER_LOCK_LEASE_SECONDS", "120"))
+# Cache compartido de páginas upstream (zlib + single-flight); 0 lo apaga.
+SCRAPER_PAGE_CACHE_TTL_SECONDS = int(os.getenv("SCRAPER_PAGE_CACHE_TTL_SECONDS", "60"))
+# Procesos para parsear HTML fuera del worker (ParsePoolService); 0 = inline.
+SCRAPER_PARSE_POOL_SIZE = int(os.getenv("SCRAPER_PARSE_POOL_SIZE", "0"))
+SCRAPER_PARSE_TIMEOUT_SECONDS = int(os.getenv("SCRAPER_PARSE_TIMEOUT_SECONDS", "60"))
+# Circuit breaker por host upstream: N fallas seguidas -> fail fast durante el cooldown; 0 lo apaga.
+SCRAPER_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("SCRAPER_CIRCUIT_FAILURE_THRESHOLD", "3"))
+SCRAPER_CIRCUIT_COOLDOWN_SECONDS = int(os.getenv("SCRAPER_CIRCUIT_COOLDOWN_SECONDS", "120"))
+# Misma lotería con otro nombre en otra web: "Alias=Nombre canónico;Alias 2=Otro".
+SCRAPER_PROVIDER_ALIASES = dict(
+    (alias.strip(), canonical.strip())
+    for alias, _, canonical in (
+        item.partition("=") for item in os.getenv("SCRAPER_PROVIDER_ALIASES", "").split(";")
+    )
+    if alias.strip() and canonical.strip()
+)
+# Días de ResultObservation (publish lag / desacuerdos entre fuentes) a conservar.
+SCRAPER_OBSERVATION_RETENTION_DAYS = int(os.getenv("SCRAPER_OBSERVATION_RETENTION_DAYS", "30"))
+# Días de historial ScraperRun (tendencias en admin) a conservar.
+SCRAPER_RUN_RETENTION_DAYS = int(os.getenv("SCRAPER_RUN_RETENTION_DAYS", "30"))
+# Borrados de retención / purga por lotes de PK (BatchedDeleteService); pausa entre lotes fuera de transacción.
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "5000"))
+DELETE_BATCH_SLEEP_SECONDS = float(os.getenv("DELETE_BATCH_SLEEP_SECONDS", "0"))
+# Tablas de resultados particionadas por día (Postgres): días futuros con partición creada.
+RESULT_PARTITION_DAYS_AHEAD = int(os.getenv("RESULT_PARTITION_DAYS_AHEAD", "7"))
+# Telemetry events: días que se conservan (purga / DROP de particiones) y particionado por created_at (Postgres).
+TELEMETRY_EVENT_KEEP_DAYS = int(os.getenv("TELEMETRY_EVENT_KEEP_DAYS", "30"))
+TELEMETRY_PARTITION_INTERVAL = os.getenv("TELEMETRY_PARTITION_INTERVAL", "day")  # day | week
+TELEMETRY_PARTITION_DAYS_AHEAD = int(os.getenv("TELEMETRY_PARTITION_DAYS_AHEAD", "7"))
+# Contadores horarios por dispositivo / tipo (DeviceTelemetryRollup): días que se conservan.
+TELEMETRY_ROLLUP_RETENTION_DAYS = int(os.getenv("TELEMETRY_ROLLUP_RETENTION_DAYS", "400"))
+# Snapshots de telemetría: ventana en que se juntan los cambios por dispositivo (0 = escribir en el momento)
+# y antigüedad mínima de last_heartbeat_at guardado para volver a escribirlo (menor que DeviceRedisService.TTL_SECONDS).
+TELEMETRY_SNAPSHOT_FLUSH_SECONDS = float(os.getenv("TELEMETRY_SNAPSHOT_FLUSH_SECONDS", "10"))
+TELEMETRY_SNAPSHOT_HEARTBEAT_SECONDS = float(os.getenv("TELEMETRY_SNAPSHOT_HEARTBEAT_SECONDS", "30"))
+# Histórico largo (segmentos NDJSON gzip por mes) que recibe lo que borra la retención; vacío lo apaga.
+RESULT_HISTORY_DIR = os.getenv("RESULT_HISTORY_DIR", str(BASE_DIR / "history"))
+# /api/stats/numbers/: TTL del cache (las estadísticas cambian al archivar) y "no sale hace N días" por defecto.
+NUMBER_STATS_CACHE_TTL_SECONDS = int(os.getenv("NUMBER_STATS_CACHE_TTL_SECONDS", "3600"))
+NUMBER_STATS_COLD_DAYS = int(os.getenv("NUMBER_STATS_COLD_DAYS", "7"))
+
+if SCRAPER_ADAPTIVE_SCHEDULING:
+    SCRAPER_BEAT_SCHEDULE = {
+        "scrape_scheduler_tick": {
+            "task": "core.tasks.scrape_scheduler_tick",
+            "schedule": float(SCRAPER_SCHEDULER_TICK_SECONDS),
+            "options": {"expires": SCRAPER_SCHEDULER_TICK_SECONDS},
+        },
+    }
+else:
+    SCRAPER_BEAT_SCHEDULE = {
+        "scrape_triples_hourly": {
+            "task": "core.tasks.scrape_triples",
+            "schedule": crontab(minute=2, hour="8-22"),
+        },
+        "scrape_tuazar_triples_hourly": {
+            "task": "core.tasks.scrape_tuazar_triples",
+            "schedule": crontab(minute=4, hour="8-22"),
+        },
+        "scrape_animalitos_hourly": {
+            "task": "core.tasks.scrape_animalitos",
+            "schedule": crontab(minute=5, hour="8-22"),
+        },
+        "scrape_condor_animalitos_hourly": {
+            "task": "core.tasks.scrape_condor_animalitos",
+            "schedule": crontab(minute=7, hour="8-22"),
+        },
+    }
+
 CELERY_BEAT_SCHEDULE = {
-    "scrape_triples_hourly": {
-        "task": "core.tasks.scrape_triples",
-        "schedule": crontab(minute=2, hour="8-22"),
-    },
-    "scrape_tuazar_triples_hourly": {
-        "task": "core.tasks.scrape_tuazar_triples",
-        "schedule": crontab(minute=4, hour="8-22"),
+    **SCRAPER_BEAT_SCHEDULE,
+    "ensure_result_partitions": {
+        "task": "core.tasks.ensure_result_partitions",
+        "schedule": crontab(minute=5, hour=0),
     },
-    "scrape_animalitos_hourly": {
-        "task": "core.tasks.scrape_animalitos",
-        "schedule": crontab(minute=5, hour="8-22"),
+    "flush_telemetry_rollups": {
+        "task": "core.tasks.flush_telemetry_rollups",
+        "schedule": crontab(minute="*/5"),
     },
-    "scrape_condor_animalitos_hourly": {
-        "task": "core.tasks.scrape_condor_animalitos",
-        "schedule": crontab(minute=7, hour="8-22"),
+    "ensure_telemetry_partitions": {
+        "task": "core.tasks.ensure_telemetry_partitions",
+        "schedule": crontab(minute=20, hour=0),
     },
     "archive_daily": {
         "task": "core.tasks.archive_daily",
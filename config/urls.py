@@ -11,6 +11,8 @@ from core.api.views import (
     DeviceStatusAPIView,
     DeviceTelemetryAPIView,
     AnimalitosResultsAPIView,
+    NumberHistoryAPIView,
+    NumberStatsAPIView,
 )
 from django.contrib import admin
 
@@ -24,6 +26,8 @@ urlpatterns = [
 
     path("api/results/", CurrentResultsAPIView.as_view()),
     path("api/animalitos/", AnimalitosResultsAPIView.as_view()),
+    path("api/stats/numbers/", NumberStatsAPIView.as_view()),
+    path("api/history/number/<str:number>/", NumberHistoryAPIView.as_view()),
 
     path("api/devices/register/", DeviceRegisterView.as_view()),
     path("api/devices/heartbeat/", DeviceHeartbeatAPIView.as_view()),
@@ -10,6 +10,7 @@ from .branch import *  # noqa: F401,F403
 from .device import *  # noqa: F401,F403
 from .device_telemetry_snapshot import *  # noqa: F401,F403
 from .device_telemetry_event import *  # noqa: F401,F403
+from .device_telemetry_rollup import *  # noqa: F401,F403
 from .provider import *  # noqa: F401,F403
 from .current_result import *  # noqa: F401,F403
 from .result_archive import *  # noqa: F401,F403
@@ -17,3 +18,7 @@ from .animalito_result import *  # noqa: F401,F403
 from .animalito_archive import *  # noqa: F401,F403
 from .transmission import *  # noqa: F401,F403
 from .scraper_health import *  # noqa: F401,F403
+from .scraper_unit_health import *  # noqa: F401,F403
+from .result_observation import *  # noqa: F401,F403
+from .scraper_run import *  # noqa: F401,F403
+from .number_stats import *  # noqa: F401,F403
@@ -7,6 +7,7 @@ from django.utils import timezone
 
 from core.models import Device, DeviceTelemetryEvent
 from core.services.device_telemetry_service import DeviceTelemetryService
+from core.services.telemetry_rollup_service import TelemetryRollupService
 
 
 class DeviceOnlineStatusFilter(admin.SimpleListFilter):
@@ -53,7 +54,13 @@ class DeviceAdmin(admin.ModelAdmin):
         "branch__client__name",
         "telemetry_snapshot__last_ip_address",
     )
-    readonly_fields = ("last_seen", "telemetry_summary", "recent_telemetry_events", "shared_ip_devices")
+    readonly_fields = (
+        "last_seen",
+        "telemetry_summary",
+        "telemetry_counts_24h",
+        "recent_telemetry_events",
+        "shared_ip_devices",
+    )
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related("branch", "telemetry_snapshot")
@@ -110,9 +117,18 @@ class DeviceAdmin(admin.ModelAdmin):
 
     telemetry_summary.short_description = "Resumen telemetria"
 
+    def telemetry_counts_24h(self, obj):
+        totals = TelemetryRollupService.totals(since=timezone.now() - timedelta(hours=24), device_id=obj.pk)
+        if not totals:
+            return "Sin eventos en las ultimas 24h."
+        return "\n".join(f"{event_type}: {total}" for event_type, total in totals.items())
+
+    telemetry_counts_24h.short_description = "Eventos 24h (rollup)"
+
     def recent_telemetry_events(self, obj):
         events = obj.telemetry_events.filter(
-            event_type__in=DeviceTelemetryService.INCIDENT_EVENT_TYPES
+            DeviceTelemetryService.window_q(),
+            event_type__in=DeviceTelemetryService.INCIDENT_EVENT_TYPES,
         )[:10]
         if not events:
             return "Sin incidentes de telemetria."
@@ -26,10 +26,13 @@ class DeviceTelemetryEventAdmin(admin.ModelAdmin):
     )
     readonly_fields = ("device", "event_type", "ip_address", "message", "metadata", "created_at")
     autocomplete_fields = ("device",)
+    date_hierarchy = "created_at"
+    # Sin COUNT(*) sobre toda la tabla (todas las particiones) en cada listado.
+    show_full_result_count = False
 
     def get_queryset(self, request):
         qs = super().get_queryset(request).select_related("device", "device__branch")
-        return qs.filter(DeviceTelemetryService.incident_events_q())
+        return qs.filter(DeviceTelemetryService.incident_events_q(), DeviceTelemetryService.window_q())
 
     def activation_code(self, obj):
         return obj.device.activation_code
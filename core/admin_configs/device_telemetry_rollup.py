@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.contrib import admin
+
+from core.models import DeviceTelemetryRollup
+
+
+@admin.register(DeviceTelemetryRollup)
+class DeviceTelemetryRollupAdmin(admin.ModelAdmin):
+    list_display = ("hour", "device", "event_type", "count")
+    list_filter = ("event_type", "hour")
+    search_fields = ("device__activation_code", "device__device_id")
+    list_select_related = ("device",)
+    readonly_fields = [field.name for field in DeviceTelemetryRollup._meta.fields]
+    date_hierarchy = "hour"
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,40 @@
+from django.contrib import admin
+
+from core.models import NumberFrequency, NumberLastSeen, NumberOccurrence
+
+
+@admin.register(NumberFrequency)
+class NumberFrequencyAdmin(admin.ModelAdmin):
+    list_display = ("period_start", "period", "provider", "result_kind", "number", "count")
+    list_filter = ("result_kind", "period", "period_start")
+    search_fields = ("provider__name", "number")
+    list_select_related = ("provider",)
+    readonly_fields = [field.name for field in NumberFrequency._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(NumberLastSeen)
+class NumberLastSeenAdmin(admin.ModelAdmin):
+    list_display = ("provider", "result_kind", "number", "last_seen", "total_count")
+    list_filter = ("result_kind",)
+    search_fields = ("provider__name", "number")
+    list_select_related = ("provider",)
+    readonly_fields = [field.name for field in NumberLastSeen._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(NumberOccurrence)
+class NumberOccurrenceAdmin(admin.ModelAdmin):
+    list_display = ("number", "result_kind", "provider", "draw_date", "draw_time")
+    list_filter = ("result_kind",)
+    search_fields = ("=number",)
+    list_select_related = ("provider",)
+    readonly_fields = [field.name for field in NumberOccurrence._meta.fields]
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
@@ -3,6 +3,7 @@ from core.models import Provider
 
 @admin.register(Provider)
 class ProviderAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "is_active")  # ajusta a tus campos reales
+    list_display = ("id", "name", "normalized_name", "is_active")  # ajusta a tus campos reales
     list_filter = ("is_active",)
-    search_fields = ("name",)
+    search_fields = ("name", "normalized_name")
+    readonly_fields = ("normalized_name",)
@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from core.models import ResultObservation
+
+
+@admin.register(ResultObservation)
+class ResultObservationAdmin(admin.ModelAdmin):
+    list_display = (
+        "draw_date",
+        "draw_time",
+        "provider",
+        "result_kind",
+        "source",
+        "value",
+        "observed_at",
+        "publish_lag_seconds",
+        "accepted",
+        "disagrees",
+    )
+    list_filter = ("result_kind", "source", "accepted", "disagrees", "draw_date")
+    search_fields = ("provider__name", "source", "value")
+    list_select_related = ("provider",)
+    readonly_fields = [field.name for field in ResultObservation._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
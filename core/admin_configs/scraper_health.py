@@ -2,13 +2,16 @@ from __future__ import annotations
 
 from django.contrib import admin, messages
 from django.utils import timezone
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
 
-from core.models import ScraperHealth
+from core.models import ScraperHealth, ScraperRun
+from core.services.circuit_breaker_service import CircuitBreakerService
 from core.services.scraper_health_service import ScraperHealthService
 from core.services.scraper_notification_service import ScraperNotificationService
 
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
 
 class ScraperAlertStateFilter(admin.SimpleListFilter):
     title = "alerta"
@@ -21,12 +24,13 @@ class ScraperAlertStateFilter(admin.SimpleListFilter):
             ("failed_today", "Fallo hoy"),
             ("missing_today", "Sin OK hoy"),
             ("stale", "Stale"),
+            ("circuit_open", "Circuito abierto"),
             ("never", "Nunca corrio"),
         )
 
     def queryset(self, request, queryset):
         value = self.value()
-        if value not in {"active", "ok", "failed_today", "missing_today", "stale", "never"}:
+        if value not in {"active", "ok", "failed_today", "missing_today", "stale", "circuit_open", "never"}:
             return queryset
 
         now = timezone.now()
@@ -43,6 +47,8 @@ class ScraperAlertStateFilter(admin.SimpleListFilter):
                 matched_ids.append(obj.pk)
             elif value == "stale" and alert and alert["alert_kind"] == "stale":
                 matched_ids.append(obj.pk)
+            elif value == "circuit_open" and alert and alert["alert_kind"] == "circuit_open":
+                matched_ids.append(obj.pk)
             elif value == "never" and obj.last_status == ScraperHealth.Status.NEVER:
                 matched_ids.append(obj.pk)
         return queryset.filter(pk__in=matched_ids)
@@ -56,7 +62,11 @@ class ScraperHealthAdmin(admin.ModelAdmin):
         "health_badge",
         "alert_kind_badge",
         "freshness_summary",
+        "circuit_summary",
         "last_success_at",
+        "duration_trend",
+        "phase_trend",
+        "rows_trend",
         "last_error_short",
         "consecutive_failures",
         "last_notified_at",
@@ -74,10 +84,17 @@ class ScraperHealthAdmin(admin.ModelAdmin):
         "last_finished_at",
         "last_success_at",
         "current_alert_summary",
+        "circuit_summary",
         "notification_recipient_summary",
         "last_error_message",
         "last_error_traceback",
         "consecutive_failures",
+        "last_pages_skipped",
+        "last_blocks_skipped",
+        "last_run_timings",
+        "recent_runs_summary",
+        "skipped_runs",
+        "last_skipped_at",
         "last_notified_at",
         "last_notified_signature",
         "created_at",
@@ -93,7 +110,19 @@ class ScraperHealthAdmin(admin.ModelAdmin):
         (
             "Ejecucion",
             {
-                "fields": ("last_started_at", "last_finished_at", "last_success_at", "current_alert_summary"),
+                "fields": (
+                    "last_started_at",
+                    "last_finished_at",
+                    "last_success_at",
+                    "current_alert_summary",
+                    "circuit_summary",
+                    "last_pages_skipped",
+                    "last_blocks_skipped",
+                    "last_run_timings",
+                    "recent_runs_summary",
+                    "skipped_runs",
+                    "last_skipped_at",
+                ),
             },
         ),
         (
@@ -162,6 +191,7 @@ class ScraperHealthAdmin(admin.ModelAdmin):
             "failed_today": ("#9d1c1c", "#fff0f0", "FAILED TODAY"),
             "missing_today": ("#a04300", "#fff2e8", "MISSING TODAY"),
             "stale": ("#8a5a00", "#fff6df", "STALE"),
+            "circuit_open": ("#9d1c1c", "#fff0f0", "CIRCUIT OPEN"),
         }
         color, bg, label = palette.get(alert["alert_kind"], ("#5f6b7a", "#f2f5f8", alert["alert_kind"].upper()))
         return format_html(
@@ -192,6 +222,93 @@ class ScraperHealthAdmin(admin.ModelAdmin):
 
     last_error_short.short_description = "Ultimo error"
 
+    def circuit_summary(self, obj):
+        definition = ScraperHealthService.REGISTRY.get(obj.scraper_key)
+        if definition is None or not definition.hosts:
+            return "-"
+        palette = {
+            CircuitBreakerService.CLOSED: "#177245",
+            CircuitBreakerService.HALF_OPEN: "#8a5a00",
+            CircuitBreakerService.OPEN: "#9d1c1c",
+        }
+        return format_html_join(
+            mark_safe("<br>"),
+            '<span style="color:{};font-weight:700;">{}</span> {}{}',
+            (
+                (
+                    palette.get(circuit.state, "#5f6b7a"),
+                    circuit.state.upper(),
+                    circuit.host,
+                    f" ({circuit.failures} fallas)" if circuit.failures else "",
+                )
+                for circuit in (CircuitBreakerService.get_state(host) for host in definition.hosts)
+            ),
+        )
+
+    circuit_summary.short_description = "Circuito upstream"
+
+    def duration_trend(self, obj):
+        trend = ScraperHealthService.get_run_trend(obj.scraper_key)
+        if not trend["runs"]:
+            return "-"
+        peak = max(trend["durations_ms"]) or 1
+        sparkline = "".join(SPARK_CHARS[min(7, int(ms / peak * 7))] for ms in trend["durations_ms"])
+        change = trend["change_pct"]
+        if change is None:
+            return format_html("{} {} s", sparkline, f"{trend['avg_duration_ms'] / 1000:.1f}")
+        color = "#9d1c1c" if change > 20 else "#177245" if change < -20 else "#5f6b7a"
+        return format_html(
+            '{} {} s <span style="color:{};font-weight:700;">{}</span>',
+            sparkline,
+            f"{trend['avg_duration_ms'] / 1000:.1f}",
+            color,
+            f"{change:+.0f}%",
+        )
+
+    duration_trend.short_description = "Duracion (ultimas 10)"
+
+    def phase_trend(self, obj):
+        trend = ScraperHealthService.get_run_trend(obj.scraper_key)
+        if not trend["runs"]:
+            return "-"
+        phase = trend["slowest_phase"]
+        return f"{phase} {trend['phase_avgs_ms'][phase]:.0f} ms"
+
+    phase_trend.short_description = "Fase mas lenta"
+
+    def rows_trend(self, obj):
+        trend = ScraperHealthService.get_run_trend(obj.scraper_key)
+        if not trend["runs"]:
+            return "-"
+        text = f"{trend['avg_rows_written']:.1f} filas/corrida"
+        if trend["failures"]:
+            text += f" · {trend['failures']} fallos"
+        return text
+
+    rows_trend.short_description = "Escritura"
+
+    def recent_runs_summary(self, obj):
+        runs = ScraperRun.objects.filter(scraper_key=obj.scraper_key).order_by("-started_at")[:10]
+        lines = [
+            format_html(
+                "{} {} {} s · fetch {} / parse {} / db {} ms · {} KB · +{} ~{} -{}",
+                timezone.localtime(run.started_at).strftime("%Y-%m-%d %H:%M"),
+                run.outcome.upper(),
+                f"{run.duration_ms / 1000:.1f}",
+                f"{run.fetch_ms:.0f}",
+                f"{run.parse_ms:.0f}",
+                f"{run.transaction_ms:.0f}",
+                run.bytes_downloaded // 1024,
+                run.rows_inserted,
+                run.rows_changed,
+                run.rows_deleted,
+            )
+            for run in runs
+        ]
+        return format_html_join(mark_safe("<br>"), "{}", ((line,) for line in lines)) if lines else "-"
+
+    recent_runs_summary.short_description = "Ultimas corridas"
+
     def current_alert_summary(self, obj):
         alert = ScraperHealthService.get_alert(obj.scraper_key, now=timezone.now())
         if not alert:
@@ -0,0 +1,27 @@
+from django.contrib import admin
+
+from core.models import ScraperRun
+
+
+@admin.register(ScraperRun)
+class ScraperRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "started_at",
+        "scraper_key",
+        "outcome",
+        "duration_ms",
+        "fetch_ms",
+        "parse_ms",
+        "transaction_ms",
+        "bytes_downloaded",
+        "rows_inserted",
+        "rows_changed",
+        "rows_deleted",
+    )
+    list_filter = ("scraper_key", "outcome")
+    search_fields = ("scraper_key", "error_message")
+    date_hierarchy = "started_at"
+    readonly_fields = [field.name for field in ScraperRun._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from core.models import ScraperUnitHealth
+
+
+@admin.register(ScraperUnitHealth)
+class ScraperUnitHealthAdmin(admin.ModelAdmin):
+    list_display = (
+        "label",
+        "scraper_key",
+        "last_status",
+        "last_success_at",
+        "consecutive_failures",
+        "last_attempts",
+        "last_rows_written",
+    )
+    list_filter = ("scraper_key", "last_status")
+    search_fields = ("label", "unit_key", "providers", "last_error_message")
+    readonly_fields = [field.name for field in ScraperUnitHealth._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
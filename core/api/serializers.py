@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from core.models import CurrentResult
+from core.services.provider_registry import ProviderRegistry
 
 
 class CurrentResultSerializer(serializers.ModelSerializer):
-    provider = serializers.CharField(source="provider.name")
+    provider = serializers.SerializerMethodField()
 
     class Meta:
         model = CurrentResult
@@ -13,3 +14,11 @@ class CurrentResultSerializer(serializers.ModelSerializer):
             "winning_number",
             "image_url",
         )
+
+    def get_provider(self, obj) -> str:
+        # Mapa id -> Provider del registry (una verificación por listado, sin JOIN).
+        providers = self.context.get("providers")
+        if providers is None:
+            providers = self.context["providers"] = ProviderRegistry.by_id()
+        provider = providers.get(obj.provider_id) or obj.provider
+        return provider.name
@@ -27,6 +27,10 @@ from core.models import (
 from core.services.device_redis_service import DeviceRedisService
 from core.services.device_service import DeviceService
 from core.services.device_telemetry_service import DeviceTelemetryService
+from core.services.number_index_service import NumberIndexService, OccurrenceCursor
+from core.services.number_stats_service import STATS_SOURCES, NumberStatsService
+from core.services.provider_registry import ProviderRegistry
+from core.services.results_cache_service import TRIPLES
 
 
 # -----------------------------------------------------------------------------
@@ -73,6 +77,26 @@ def _parse_date(value: Optional[str]) -> Union[date, None, str]:
         return "INVALID"
 
 
+def _parse_month(value: Optional[str]) -> Union[date, None, str]:
+    """Igual que _parse_date pero para YYYY-MM (primer día del mes)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        return "INVALID"
+
+
+def _parse_bounded_int(value: Optional[str], *, default: int, minimum: int, maximum: int) -> Optional[int]:
+    if value in (None, ""):
+        return default
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if minimum <= parsed <= maximum else None
+
+
 def _resolve_target_date_for_triples() -> Optional[date]:
     """
     Preferencia:
@@ -132,7 +156,13 @@ def _extract_signo(extra: Any) -> str:
     return (extra.get("signo") or "").strip()
 
 
-def _serialize_triple_result(r) -> Dict[str, str]:
+def _provider_for(r, providers: Optional[Dict[int, Any]]):
+    """Provider desde el registry en memoria; cae a la FK si no está (evita N+1 / JOIN)."""
+    provider = (providers or {}).get(r.provider_id)
+    return provider if provider is not None else r.provider
+
+
+def _serialize_triple_result(r, providers: Optional[Dict[int, Any]] = None) -> Dict[str, str]:
     """
     Contrato legacy para TVs:
       { "provider": str, "time": "HH:MM AM/PM", "number": str, "image": "" }
@@ -147,14 +177,14 @@ def _serialize_triple_result(r) -> Dict[str, str]:
     number = f"{winning} {signo}".strip() if signo else winning
 
     return {
-        "provider": r.provider.name,
+        "provider": _provider_for(r, providers).name,
         "time": _format_time_12h(r.draw_time),
         "number": number,
         "image": r.image_url or "",
     }
 
 
-def _serialize_animalito_result(r) -> Dict[str, str]:
+def _serialize_animalito_result(r, providers: Optional[Dict[int, Any]] = None) -> Dict[str, str]:
     """
     Contrato legacy animalitos:
       { "provider": str, "time": "HH:MM AM/PM", "number": str, "animal": str, "image": str }
@@ -162,14 +192,15 @@ def _serialize_animalito_result(r) -> Dict[str, str]:
     Se agregan campos opcionales de compatibilidad progresiva para la PWA:
       - provider_logo_url
     """
+    provider = _provider_for(r, providers)
     provider_logo_url = ""
     if getattr(r, "provider_logo_url", ""):
         provider_logo_url = r.provider_logo_url
-    elif getattr(r, "provider", None) and getattr(r.provider, "logo_url", ""):
-        provider_logo_url = r.provider.logo_url or ""
+    elif provider is not None and getattr(provider, "logo_url", ""):
+        provider_logo_url = provider.logo_url or ""
 
     return {
-        "provider": (r.provider.name or "").strip(),
+        "provider": (provider.name or "").strip(),
         "time": _format_time_12h(r.draw_time),
         "number": str(r.animal_number),
         "animal": r.animal_name or "",
@@ -251,18 +282,19 @@ class CurrentResultsAPIView(APIView):
         # -------------------------
         if use_archive:
             qs = (
-                ResultArchive.objects.select_related("provider")
+                ResultArchive.objects
                 .filter(draw_date=target_date, provider__is_active=True)
                 .order_by("provider__name", "draw_time")
             )
         else:
             qs = (
-                CurrentResult.objects.select_related("provider")
+                CurrentResult.objects
                 .filter(draw_date=target_date, provider__is_active=True)
                 .order_by("provider__name", "draw_time")
             )
 
-        data = [_serialize_triple_result(r) for r in qs]
+        providers = ProviderRegistry.by_id()
+        data = [_serialize_triple_result(r, providers) for r in qs]
 
         if not bypass_cache and ttl > 0:
             DeviceRedisService.set_cache(cache_key, data, ttl_seconds=ttl)
@@ -325,18 +357,19 @@ class AnimalitosResultsAPIView(APIView):
         # -------------------------
         if use_archive:
             qs = (
-                AnimalitoArchive.objects.select_related("provider")
+                AnimalitoArchive.objects
                 .filter(draw_date=target_date)
                 .order_by("provider__name", "draw_time")
             )
         else:
             qs = (
-                AnimalitoResult.objects.select_related("provider")
+                AnimalitoResult.objects
                 .filter(draw_date=target_date)
                 .order_by("provider__name", "draw_time")
             )
 
-        data = [_serialize_animalito_result(r) for r in qs]
+        providers = ProviderRegistry.by_id()
+        data = [_serialize_animalito_result(r, providers) for r in qs]
 
         if not bypass_cache and ttl > 0:
             DeviceRedisService.set_cache(cache_key, data, ttl_seconds=ttl)
@@ -344,6 +377,189 @@ class AnimalitosResultsAPIView(APIView):
         return _apply_no_cache_headers(Response(data, status=status.HTTP_200_OK))
 
 
+class NumberStatsAPIView(APIView):
+    """
+    /api/stats/numbers/?code=...&provider=<id|nombre>[&kind=animalitos&month=YYYY-MM&days=7&limit=10]
+    Números más salidos del mes ("hot") y los que no salen hace `days` días
+    ("cold") de un provider. Lee las tablas precalculadas por
+    NumberStatsService (se actualizan al archivar cada día).
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        activation_code = request.query_params.get("code")
+        ip_address = get_client_ip(request)
+
+        if not activation_code:
+            return _apply_no_cache_headers(
+                Response({"detail": "Missing activation code"}, status=status.HTTP_400_BAD_REQUEST)
+            )
+
+        try:
+            DeviceService.validate_device(activation_code=activation_code, ip_address=ip_address)
+        except PermissionError as e:
+            return _apply_no_cache_headers(Response({"detail": str(e)}, status=status.HTTP_403_FORBIDDEN))
+
+        kind = request.query_params.get("kind") or TRIPLES
+        if kind not in STATS_SOURCES:
+            return _apply_no_cache_headers(
+                Response(
+                    {"detail": "Invalid kind", "allowed": sorted(STATS_SOURCES)},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            )
+
+        raw_provider = (request.query_params.get("provider") or "").strip()
+        if not raw_provider:
+            return _apply_no_cache_headers(
+                Response({"detail": "Missing provider"}, status=status.HTTP_400_BAD_REQUEST)
+            )
+        if raw_provider.isdigit():
+            provider = ProviderRegistry.get_by_id(int(raw_provider))
+        else:
+            provider = ProviderRegistry.get(raw_provider)
+        if provider is None:
+            return _apply_no_cache_headers(
+                Response({"detail": "Unknown provider"}, status=status.HTTP_404_NOT_FOUND)
+            )
+
+        today = timezone.localdate()
+        month = _parse_month(request.query_params.get("month"))
+        if month == "INVALID":
+            return _apply_no_cache_headers(
+                Response({"detail": "Invalid month format. Use YYYY-MM"}, status=status.HTTP_400_BAD_REQUEST)
+            )
+        month = month or today.replace(day=1)
+        days = _parse_bounded_int(
+            request.query_params.get("days"),
+            default=int(getattr(settings, "NUMBER_STATS_COLD_DAYS", 7)),
+            minimum=1,
+            maximum=3650,
+        )
+        limit = _parse_bounded_int(request.query_params.get("limit"), default=10, minimum=1, maximum=100)
+        if days is None or limit is None:
+            return _apply_no_cache_headers(
+                Response({"detail": "days must be 1..3650 and limit 1..100"}, status=status.HTTP_400_BAD_REQUEST)
+            )
+
+        # -------------------------
+        # CACHE (opcional)
+        # -------------------------
+        # Las estadísticas cambian una vez por día (archivo); NumberStatsService
+        # invalida stats:numbers:* al actualizarlas.
+        ttl = int(getattr(settings, "NUMBER_STATS_CACHE_TTL_SECONDS", 3600))
+        bypass_cache = ttl <= 0 or request.query_params.get("nocache") in ("1", "true", "yes")
+        cache_key = f"stats:numbers:v1:{kind}:{provider.id}:{month:%Y-%m}:{today.isoformat()}:{days}:{limit}"
+
+        if not bypass_cache:
+            cached = DeviceRedisService.get_cache(cache_key)
+            if cached is not None:
+                return _apply_no_cache_headers(Response(cached, status=status.HTTP_200_OK))
+
+        data = {
+            "provider": provider.name,
+            "kind": kind,
+            "month": f"{month:%Y-%m}",
+            "hot": NumberStatsService.hot(kind, provider.id, month, limit=limit),
+            "cold_days": days,
+            "cold": NumberStatsService.cold(kind, provider.id, days=days, today=today, limit=limit),
+        }
+
+        if not bypass_cache:
+            DeviceRedisService.set_cache(cache_key, data, ttl_seconds=ttl)
+
+        return _apply_no_cache_headers(Response(data, status=status.HTTP_200_OK))
+
+
+class NumberHistoryAPIView(APIView):
+    """
+    /api/history/number/<n>/?code=...[&kind=animalitos&provider=<id|nombre>&limit=20&cursor=...]
+    Sorteos en que salió el número, del más reciente al más viejo, desde el
+    índice NumberOccurrence (archivo + histórico largo; hoy no entra hasta
+    archivarse). Paginado por keyset: `next` es el cursor de la página siguiente.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, number: str):
+        activation_code = request.query_params.get("code")
+        ip_address = get_client_ip(request)
+
+        if not activation_code:
+            return _apply_no_cache_headers(
+                Response({"detail": "Missing activation code"}, status=status.HTTP_400_BAD_REQUEST)
+            )
+
+        try:
+            DeviceService.validate_device(activation_code=activation_code, ip_address=ip_address)
+        except PermissionError as e:
+            return _apply_no_cache_headers(Response({"detail": str(e)}, status=status.HTTP_403_FORBIDDEN))
+
+        kind = request.query_params.get("kind") or TRIPLES
+        if kind not in STATS_SOURCES:
+            return _apply_no_cache_headers(
+                Response(
+                    {"detail": "Invalid kind", "allowed": sorted(STATS_SOURCES)},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            )
+
+        number = number.strip()
+        if not number or len(number) > 10:
+            return _apply_no_cache_headers(Response({"detail": "Invalid number"}, status=status.HTTP_400_BAD_REQUEST))
+
+        provider = None
+        raw_provider = (request.query_params.get("provider") or "").strip()
+        if raw_provider:
+            if raw_provider.isdigit():
+                provider = ProviderRegistry.get_by_id(int(raw_provider))
+            else:
+                provider = ProviderRegistry.get(raw_provider)
+            if provider is None:
+                return _apply_no_cache_headers(
+                    Response({"detail": "Unknown provider"}, status=status.HTTP_404_NOT_FOUND)
+                )
+
+        limit = _parse_bounded_int(request.query_params.get("limit"), default=20, minimum=1, maximum=100)
+        if limit is None:
+            return _apply_no_cache_headers(
+                Response({"detail": "limit must be 1..100"}, status=status.HTTP_400_BAD_REQUEST)
+            )
+
+        cursor = None
+        raw_cursor = request.query_params.get("cursor")
+        if raw_cursor:
+            cursor = OccurrenceCursor.decode(raw_cursor)
+            if cursor is None:
+                return _apply_no_cache_headers(
+                    Response({"detail": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+                )
+
+        page = NumberIndexService.lookup(
+            kind,
+            number,
+            provider_id=provider.id if provider is not None else None,
+            after=cursor,
+            limit=limit,
+        )
+        providers = ProviderRegistry.by_id()
+        data = {
+            "number": number,
+            "kind": kind,
+            "results": [
+                {
+                    "provider": _provider_for(row, providers).name,
+                    "date": row.draw_date.isoformat(),
+                    "time": _format_time_12h(row.draw_time),
+                }
+                for row in page.rows
+            ],
+            "next": page.next_cursor.encode() if page.next_cursor else None,
+        }
+        return _apply_no_cache_headers(Response(data, status=status.HTTP_200_OK))
+
+
 class DeviceRegisterView(APIView):
     authentication_classes = []
     permission_classes = []
@@ -458,7 +674,7 @@ class DeviceTelemetryAPIView(APIView):
             message=message,
             metadata=metadata,
         )
-        snapshot = device.telemetry_snapshot
+        snapshot = DeviceTelemetryService.current_snapshot(device=device)
 
         return _apply_no_cache_headers(
             Response(
@@ -5,6 +5,9 @@ from urllib.parse import urlparse
 
 from django.core.management.base import CommandError
 
+from core.services.batched_delete_service import BatchedDeleteService
+from core.services.dedupe_service import DedupeService
+
 
 def raise_database_connection_help(*, command_name: str, exc: Exception) -> None:
     database_url = os.getenv("DATABASE_URL", "")
@@ -35,3 +38,102 @@ def raise_database_connection_help(*, command_name: str, exc: Exception) -> None
     )
 
     raise CommandError("\n".join(lines)) from exc
+
+
+def add_batched_delete_arguments(parser) -> None:
+    """Flags comunes de los comandos que borran con BatchedDeleteService."""
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Filas por lote de DELETE (default: DELETE_BATCH_SIZE).",
+    )
+    parser.add_argument(
+        "--sleep",
+        type=float,
+        default=None,
+        help="Segundos de pausa entre lotes (default: DELETE_BATCH_SLEEP_SECONDS).",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=0,
+        help="Corta tras N segundos y deja checkpoint para la próxima corrida (default: 0 = sin límite).",
+    )
+
+
+def batched_delete_kwargs(command, options) -> dict:
+    """kwargs para BatchedDeleteService.delete; con -v 2 imprime cada lote."""
+    kwargs = {
+        "batch_size": options.get("batch_size"),
+        "sleep_seconds": options.get("sleep"),
+        "deadline": BatchedDeleteService.deadline_for(options.get("time_budget")),
+    }
+    if int(options.get("verbosity", 1)) >= 2:
+        kwargs["progress"] = lambda result: command.stdout.write(
+            f"  {result.label}: batch {result.batches} -> {result.deleted} rows (last_pk={result.last_pk})"
+        )
+    return kwargs
+
+
+def add_dedupe_arguments(parser) -> None:
+    """Flags comunes de dedupe_current_results / dedupe_animalitos."""
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print what would be deleted, but do not delete anything.",
+    )
+    parser.add_argument(
+        "--keep",
+        choices=["newest", "oldest"],
+        default="newest",
+        help="Which row to keep within duplicates group.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Ids borrados por transacción (default: DELETE_BATCH_SIZE).",
+    )
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=20,
+        help="En --dry-run, cuántos grupos listar (default: 20).",
+    )
+
+
+def run_dedupe(command, model, options) -> None:
+    """Dedupe de `model` por (provider, draw_date, draw_time) con DedupeService."""
+    summary = DedupeService.summary(model)
+
+    if options["dry_run"]:
+        for group in DedupeService.groups(model)[: max(0, options["sample"])]:
+            key = (group["provider_id"], group["draw_date"], group["draw_time"])
+            command.stdout.write(f"[DRY] key={key} rows={group['rows']}")
+        command.stdout.write(
+            command.style.WARNING(
+                f"DRY RUN: groups_with_dupes={summary.groups}, would_delete={summary.rows}"
+            )
+        )
+        return
+
+    if not summary.rows:
+        command.stdout.write(command.style.SUCCESS("No duplicates found."))
+        return
+
+    progress = None
+    if int(options.get("verbosity", 1)) >= 2:
+        progress = lambda deleted: command.stdout.write(f"  deleted {deleted}/{summary.rows}")  # noqa: E731
+    deleted = DedupeService.delete(
+        model,
+        keep=options["keep"],
+        chunk_size=options["chunk_size"] or BatchedDeleteService.default_batch_size(),
+        progress=progress,
+    )
+
+    command.stdout.write(
+        command.style.SUCCESS(
+            f"Done. groups_with_dupes={summary.groups}, deleted_rows={deleted}"
+        )
+    )
@@ -2,7 +2,8 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
 
-from core.models import AnimalitoResult, AnimalitoArchive
+from core.services.result_archive_service import ResultArchiveService
+from core.services.results_cache_service import ANIMALITOS
 
 
 class Command(BaseCommand):
@@ -21,34 +22,10 @@ class Command(BaseCommand):
 
         keep_current = bool(opts.get("keep_current", False))
 
-        qs = AnimalitoResult.objects.select_related("provider").filter(draw_date=target_date)
-        total = qs.count()
-
-        created = 0
-        updated = 0
-
-        for a in qs.iterator():
-            _, was_created = AnimalitoArchive.objects.update_or_create(
-                provider=a.provider,
-                draw_date=a.draw_date,
-                draw_time=a.draw_time,
-                defaults={
-                    "animal_number": a.animal_number,
-                    "animal_name": a.animal_name,
-                    "animal_image_url": a.animal_image_url or "",
-                    "provider_logo_url": a.provider_logo_url or "",
-                },
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
-
-        if not keep_current:
-            qs.delete()
+        summary = ResultArchiveService.archive_day(ANIMALITOS, target_date, keep_current=keep_current)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Archivado ANIMALITOS {target_date}: created={created}, updated={updated}, total_src={total}, keep_current={keep_current}"
+                f"Archivado ANIMALITOS {target_date}: created={summary.created}, updated={summary.updated}, total_src={summary.total}, keep_current={keep_current}"
             )
         )
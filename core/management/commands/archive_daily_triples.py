@@ -2,7 +2,8 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
 
-from core.models import CurrentResult, ResultArchive
+from core.services.result_archive_service import ResultArchiveService
+from core.services.results_cache_service import TRIPLES
 
 
 class Command(BaseCommand):
@@ -21,33 +22,10 @@ class Command(BaseCommand):
 
         keep_current = bool(opts.get("keep_current", False))
 
-        qs = CurrentResult.objects.select_related("provider").filter(draw_date=target_date)
-        total = qs.count()
-
-        created = 0
-        updated = 0
-
-        for r in qs.iterator():
-            _, was_created = ResultArchive.objects.update_or_create(
-                provider=r.provider,
-                draw_date=r.draw_date,
-                draw_time=r.draw_time,
-                defaults={
-                    "winning_number": r.winning_number,
-                    "image_url": r.image_url or "",
-                    "extra": r.extra, 
-                },
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
-
-        if not keep_current:
-            qs.delete()
+        summary = ResultArchiveService.archive_day(TRIPLES, target_date, keep_current=keep_current)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Archivado TRIPLES {target_date}: created={created}, updated={updated}, total_src={total}, keep_current={keep_current}"
+                f"Archivado TRIPLES {target_date}: created={summary.created}, updated={summary.updated}, total_src={summary.total}, keep_current={keep_current}"
             )
         )
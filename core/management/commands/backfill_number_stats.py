@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import date, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+from core.management.command_helpers import raise_database_connection_help
+from core.services.number_index_service import NumberIndexService
+from core.services.number_stats_service import STATS_SOURCES, NumberStatsService
+from core.services.result_history_store import ResultHistoryStore
+
+# {día: [(provider_id, hora, número), ...]}
+DrawsByDay = dict[date, list[tuple[int, time, str]]]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde cero las estadísticas de números (frecuencia por día / mes y último visto) "
+        "y el índice número -> sorteos con el histórico largo (RESULT_HISTORY_DIR) más lo que queda "
+        "en las tablas de archivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=sorted(STATS_SOURCES), help="Solo triples o animalitos.")
+
+    def handle(self, *args, **options):
+        kinds = [options["kind"]] if options.get("kind") else sorted(STATS_SOURCES)
+        try:
+            for kind in kinds:
+                draws = self._from_history(kind)
+                history_days = len(draws)
+                # El archivo manda sobre el histórico para los días que tiene
+                # (un export repetido no debe contar dos veces).
+                draws.update(self._from_archive(kind))
+
+                daily = {
+                    day: Counter((provider_id, number) for provider_id, _, number in rows)
+                    for day, rows in draws.items()
+                }
+                result = NumberStatsService.rebuild(kind, daily)
+                indexed = NumberIndexService.rebuild(
+                    kind,
+                    (
+                        (provider_id, day, draw_time, number)
+                        for day, rows in sorted(draws.items())
+                        for provider_id, draw_time, number in rows
+                    ),
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{kind}: days={result['days']} (history={history_days}) "
+                        f"months={result['months']} numbers={result['numbers']} indexed={indexed}"
+                    )
+                )
+        except OperationalError as exc:
+            raise_database_connection_help(command_name="backfill_number_stats", exc=exc)
+
+    @staticmethod
+    def _from_history(kind: str) -> DrawsByDay:
+        draws: DrawsByDay = defaultdict(list)
+        if not ResultHistoryStore.enabled():
+            return draws
+        number_field = STATS_SOURCES[kind].number_field
+        for month in ResultHistoryStore.months(kind):
+            first = date.fromisoformat(f"{month}-01")
+            last = date(first.year + first.month // 12, first.month % 12 + 1, 1) - timedelta(days=1)
+            for row in ResultHistoryStore.query(kind, first, last):
+                number = str(row.get(number_field) or "").strip()
+                if number:
+                    draws[date.fromisoformat(row["draw_date"])].append(
+                        (row["provider_id"], time.fromisoformat(row["draw_time"]), number)
+                    )
+        return draws
+
+    @staticmethod
+    def _from_archive(kind: str) -> DrawsByDay:
+        source = STATS_SOURCES[kind]
+        rows = (
+            source.model.objects.exclude(**{source.number_field: ""})
+            .values_list("draw_date", "provider_id", "draw_time", source.number_field)
+            .order_by()
+        )
+        draws: DrawsByDay = defaultdict(list)
+        for draw_date, provider_id, draw_time, number in rows.iterator():
+            draws[draw_date].append((provider_id, draw_time, str(number).strip()))
+        return draws
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.html_parser_service import HTML_PARSER, available_backends, get_parser_backend, parser_options
+from core.services.scraper_fixtures import get_scraper_fixtures
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara backends de parseo HTML (html.parser / lxml, completo vs dirigido) sobre los "
+        "fixtures de scrapers y verifica que el resultado sea idéntico al baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Parseos por combinación (default: 20).")
+        parser.add_argument("--fixtures-dir", type=str, default="", help="Directorio alternativo de fixtures HTML.")
+        parser.add_argument("--only", type=str, default="", help="Procesa solo un fixture por nombre.")
+
+    def handle(self, *args, **options):
+        iterations = max(1, int(options["iterations"]))
+        fixtures_dir = (options["fixtures_dir"] or "").strip() or None
+        only = (options["only"] or "").strip()
+
+        fixtures = [f for f in get_scraper_fixtures() if not only or f.name == only]
+        if not fixtures:
+            raise CommandError(f"Fixture desconocido: {only}")
+
+        combos = [(backend, targeted) for backend in available_backends() for targeted in (False, True)]
+        self.stdout.write(f"backend_activo={get_parser_backend()} iterations={iterations}")
+
+        mismatches: list[str] = []
+        for fixture in fixtures:
+            html = fixture.read_html(fixtures_dir)
+
+            # Baseline: comportamiento previo (html.parser sobre la página completa).
+            with parser_options(backend=HTML_PARSER, targeted=False):
+                expected = fixture.parse(html)
+                baseline_ms = self._time_ms(fixture.parse, html, iterations)
+
+            for backend, targeted in combos:
+                with parser_options(backend=backend, targeted=targeted):
+                    same = fixture.parse(html) == expected
+                    elapsed_ms = self._time_ms(fixture.parse, html, iterations)
+                if not same:
+                    mismatches.append(f"{fixture.name}[{backend},targeted={targeted}]")
+                speedup = baseline_ms / elapsed_ms if elapsed_ms else 0.0
+                self.stdout.write(
+                    f"{fixture.name} backend={backend} targeted={'yes' if targeted else 'no'} "
+                    f"ms_per_parse={elapsed_ms:.3f} speedup={speedup:.2f}x equal={'yes' if same else 'NO'}"
+                )
+
+        if mismatches:
+            raise CommandError(f"Salida distinta al baseline: {', '.join(mismatches)}")
+        self.stdout.write(self.style.SUCCESS(f"OK: {len(fixtures)} fixtures equivalentes en {len(combos)} combinaciones."))
+
+    @staticmethod
+    def _time_ms(parse, html: str, iterations: int) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            parse(html)
+        return (time.perf_counter() - started) * 1000 / iterations
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import time as datetime_time
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from core.services.parse_pool_service import ParsePoolService
+from core.services.provider_registry import ProviderRegistry
+from core.services.result_window_service import pinned_business_cutoff
+from core.services.scraper_fetch_service import ScraperFetchService
+from core.services.scraper_fixtures import (
+    count_rows,
+    get_scraper_command_fixtures,
+    get_scraper_fixtures,
+    to_jsonable,
+)
+from core.services.scraper_run_stats import collect_run_stats
+
+# Cache / channel layer aislados: el benchmark no debe tocar cooldowns,
+# estado de páginas ni snapshots reales.
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "scraper-benchmark",
+    }
+}
+BENCHMARK_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+# Fin del día: todos los sorteos del corpus cuentan como ya ocurridos,
+# sin importar a qué hora corra el benchmark.
+BENCHMARK_CUTOFF = datetime_time(23, 59)
+
+
+class _SqlTimer:
+    """execute_wrapper que acumula el tiempo pasado en la BD."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark/regresión offline de scrapers sobre el corpus HTML sintético: valida la salida "
+        "de parse_page contra el JSON esperado, mide parseo (ms, filas/seg) y corridas completas "
+        "de los comandos (tiempo total y tiempo en BD) dentro de una transacción que se revierte. "
+        "Los tiempos solo sirven para comparar contra un baseline del mismo corpus y máquina."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Parseos por fixture (default: 20).")
+        parser.add_argument("--runs", type=int, default=3, help="Corridas repetidas por comando (default: 3).")
+        parser.add_argument("--fixtures-dir", type=str, default="", help="Directorio alternativo del corpus.")
+        parser.add_argument("--only", type=str, default="", help="Procesa solo un fixture / comando por nombre.")
+        parser.add_argument("--skip-commands", action="store_true", help="Solo parseo, sin corridas en BD.")
+        parser.add_argument("--baseline", type=str, default="", help="JSON de baseline para detectar regresiones.")
+        parser.add_argument("--save-baseline", action="store_true", help="Escribe las métricas actuales en --baseline.")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=None,
+            help="Tolerancia sobre el baseline (0.25 = 25%% más lento). Default: SCRAPER_BENCHMARK_MAX_REGRESSION.",
+        )
+        parser.add_argument(
+            "--compare-parse-pool",
+            type=int,
+            default=0,
+            help="Parsea el corpus completo con N scrapers concurrentes (threads), inline vs pool de N procesos.",
+        )
+        parser.add_argument(
+            "--update-expected",
+            action="store_true",
+            help="Regenera el JSON esperado desde la salida actual (revisar el diff antes de commitear).",
+        )
+
+    def handle(self, *args, **options):
+        iterations = max(1, int(options["iterations"]))
+        runs = max(1, int(options["runs"]))
+        base_dir = (options["fixtures_dir"] or "").strip() or None
+        only = (options["only"] or "").strip()
+        max_regression = options["max_regression"]
+        if max_regression is None:
+            max_regression = float(getattr(settings, "SCRAPER_BENCHMARK_MAX_REGRESSION", 0.25))
+
+        fixtures = [f for f in get_scraper_fixtures() if not only or f.name == only]
+        commands = []
+        if not options["skip_commands"]:
+            commands = [c for c in get_scraper_command_fixtures() if not only or c.name == only]
+        if not fixtures and not commands:
+            raise CommandError(f"Fixture desconocido: {only}")
+
+        vendor = connection.vendor
+        self.stdout.write(f"db={vendor} iterations={iterations} runs={runs} corpus=sintético")
+
+        metrics: dict[str, float] = {}
+        failures: list[str] = []
+
+        for fixture in fixtures:
+            html = fixture.read_html(base_dir)
+            parsed = fixture.parse(html)
+            if options["update_expected"]:
+                fixture.write_expected(parsed, base_dir)
+            elif not fixture.expected_path(base_dir).exists():
+                failures.append(f"{fixture.name}: falta el JSON esperado")
+            elif to_jsonable(parsed) != fixture.load_expected(base_dir):
+                failures.append(f"{fixture.name}: salida distinta al JSON esperado")
+
+            rows = count_rows(parsed)
+            ms = self._time_ms(fixture.parse, html, iterations)
+            metrics[f"parse:{fixture.name}"] = ms
+            self.stdout.write(
+                f"parse {fixture.name} rows={rows} ms_per_parse={ms:.3f} rows_per_sec={self._rate(rows, ms)}"
+            )
+
+        pool_size = int(options["compare_parse_pool"] or 0)
+        if pool_size > 0:
+            for label, ms in self._compare_parse_pool(fixtures, base_dir, pool_size, iterations).items():
+                metrics[f"parse_suite:{label}"] = ms
+            self.stdout.write(
+                f"parse_suite concurrency={pool_size} inline_ms={metrics['parse_suite:inline']:.1f} "
+                f"pool_ms={metrics['parse_suite:pool']:.1f} "
+                f"speedup={metrics['parse_suite:inline'] / max(metrics['parse_suite:pool'], 0.001):.2f}x"
+            )
+
+        for spec in commands:
+            pages = spec.read_pages(base_dir)
+            for label, result in self._run_command(spec, pages, runs).items():
+                if result["error"]:
+                    failures.append(f"{spec.name}: {result['error']}")
+                    continue
+                metrics[f"{label}:{spec.name}"] = result["ms"]
+                self.stdout.write(
+                    f"{label} {spec.name} rows={result['rows']} written={result['written']} "
+                    f"ms={result['ms']:.2f} db_ms={result['db_ms']:.2f} queries={result['queries']} "
+                    f"rows_per_sec={self._rate(result['rows'], result['ms'])} "
+                    + " ".join(f"{phase}_ms={ms}" for phase, ms in sorted(result["timings"].items()))
+                )
+
+        baseline_path = (options["baseline"] or "").strip()
+        if baseline_path:
+            if options["save_baseline"]:
+                self._save_baseline(Path(baseline_path), vendor, metrics)
+                self.stdout.write(f"Baseline guardado en {baseline_path} ({vendor}).")
+            else:
+                failures.extend(self._compare_baseline(Path(baseline_path), vendor, metrics, max_regression))
+        elif options["save_baseline"]:
+            raise CommandError("--save-baseline requiere --baseline.")
+
+        if failures:
+            raise CommandError("Regresión en scrapers:\n  " + "\n  ".join(failures))
+        self.stdout.write(
+            self.style.SUCCESS(f"OK: {len(fixtures)} fixtures y {len(commands)} comandos sin regresiones.")
+        )
+
+    # -------------------------
+    # Corridas de comandos
+    # -------------------------
+    def _run_command(self, spec, pages: dict[str, str], runs: int) -> dict[str, dict]:
+        """
+        Primera corrida = inserción (BD vacía para esa fecha); las siguientes =
+        caso habitual en producción (mismas filas, sin cambios). Todo se revierte.
+        """
+        results: dict[str, dict] = {}
+        with self._isolated():
+            with transaction.atomic():
+                try:
+                    results["insert"] = self._timed_call(spec, pages)
+                    if results["insert"]["error"]:
+                        return results
+                    warm = [self._timed_call(spec, pages) for _ in range(runs)]
+                    results["rerun"] = {
+                        "ms": min(r["ms"] for r in warm),
+                        "db_ms": min(r["db_ms"] for r in warm),
+                        "queries": warm[-1]["queries"],
+                        "rows": warm[-1]["rows"],
+                        "written": warm[-1]["written"],
+                        "timings": warm[-1]["timings"],
+                        "error": next((r["error"] for r in warm if r["error"]), ""),
+                    }
+                finally:
+                    transaction.set_rollback(True)
+        return results
+
+    def _timed_call(self, spec, pages: dict[str, str]) -> dict:
+        timer = _SqlTimer()
+        error = ""
+        started = time.perf_counter()
+        with collect_run_stats() as stats, connection.execute_wrapper(timer), ScraperFetchService.serve_offline(pages):
+            try:
+                call_command(spec.command_name, stdout=StringIO(), stderr=StringIO(), **spec.options)
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        rows = stats.rows_inserted + stats.rows_changed + stats.rows_unchanged
+        if not error and rows == 0:
+            error = "el comando no produjo filas"
+        return {
+            "ms": elapsed_ms,
+            "db_ms": timer.seconds * 1000,
+            "queries": timer.queries,
+            "rows": rows,
+            "written": stats.rows_inserted + stats.rows_changed + stats.rows_deleted,
+            "timings": stats.rounded_timings(),
+            "error": error,
+        }
+
+    @staticmethod
+    @contextmanager
+    def _isolated():
+        with (
+            override_settings(CACHES=BENCHMARK_CACHES, CHANNEL_LAYERS=BENCHMARK_CHANNEL_LAYERS),
+            pinned_business_cutoff(BENCHMARK_CUTOFF),
+        ):
+            ProviderRegistry.invalidate()
+            try:
+                yield
+            finally:
+                # Providers creados en la transacción revertida no deben quedar en memoria.
+                ProviderRegistry.invalidate()
+
+    # -------------------------
+    # Pool de parseo
+    # -------------------------
+    @staticmethod
+    def _compare_parse_pool(fixtures, base_dir, size: int, iterations: int) -> dict[str, float]:
+        """
+        Tiempo total de parsear todo el corpus `iterations` veces con `size`
+        scrapers concurrentes en threads (como un worker Celery con threads),
+        primero inline (GIL) y después contra un pool de `size` procesos.
+        """
+        jobs = [(fixture.parse, fixture.read_html(base_dir)) for fixture in fixtures] * iterations
+
+        def run(job):
+            parse, html = job
+            return ParsePoolService.result(ParsePoolService.submit(parse, html))
+
+        results: dict[str, float] = {}
+        for label, pool_size in (("inline", 0), ("pool", size)):
+            with override_settings(SCRAPER_PARSE_POOL_SIZE=pool_size):
+                ParsePoolService.shutdown()
+                ParsePoolService.get_executor()  # arranque + precarga fuera de la medición
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=size) as threads:
+                    list(threads.map(run, jobs))
+                results[label] = (time.perf_counter() - started) * 1000
+        ParsePoolService.shutdown()
+        return results
+
+    # -------------------------
+    # Baseline
+    # -------------------------
+    @staticmethod
+    def _save_baseline(path: Path, vendor: str, metrics: dict[str, float]) -> None:
+        data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        data[vendor] = {key: round(value, 4) for key, value in sorted(metrics.items())}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+    @staticmethod
+    def _compare_baseline(path: Path, vendor: str, metrics: dict[str, float], max_regression: float) -> list[str]:
+        if not path.exists():
+            raise CommandError(f"No existe el baseline {path}.")
+        baseline = json.loads(path.read_text(encoding="utf-8")).get(vendor) or {}
+        regressions = []
+        for key, current_ms in metrics.items():
+            base_ms = baseline.get(key)
+            if base_ms and current_ms > base_ms * (1 + max_regression):
+                regressions.append(
+                    f"{key}: {current_ms:.3f}ms vs baseline {base_ms:.3f}ms (+{(current_ms / base_ms - 1) * 100:.0f}%)"
+                )
+        return regressions
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @staticmethod
+    def _time_ms(parse, html: str, iterations: int) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            parse(html)
+        return (time.perf_counter() - started) * 1000 / iterations
+
+    @staticmethod
+    def _rate(rows: int, ms: float) -> str:
+        return f"{rows / (ms / 1000):.0f}" if ms else "0"
@@ -1,16 +1,23 @@
 from django.core.management.base import BaseCommand
+
+from core.management.command_helpers import add_batched_delete_arguments, batched_delete_kwargs
 from core.models import CurrentResult
+from core.services.batched_delete_service import BatchedDeleteService
 
 
 class Command(BaseCommand):
     help = "Clear all daily lottery results (CurrentResult table)"
 
+    def add_arguments(self, parser):
+        add_batched_delete_arguments(parser)
+
     def handle(self, *args, **options):
-        count = CurrentResult.objects.count()
-        CurrentResult.objects.all().delete()
+        result = BatchedDeleteService.delete(CurrentResult.objects.all(), **batched_delete_kwargs(self, options))
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Daily results cleared successfully ({count} records deleted)"
+                f"Daily results cleared successfully ({result.deleted} records deleted)"
             )
         )
+        if not result.complete:
+            self.stdout.write(self.style.WARNING("Time budget reached: run again to finish."))
@@ -1,18 +1,30 @@
 from __future__ import annotations
 
 from datetime import timedelta
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import OperationalError
 from django.db import connection, transaction
 from django.utils import timezone
 
-from core.management.command_helpers import raise_database_connection_help
+from core.management.command_helpers import (
+    add_batched_delete_arguments,
+    batched_delete_kwargs,
+    raise_database_connection_help,
+)
 from core.models import (
     CurrentResult,
     ResultArchive,
     AnimalitoResult,
     AnimalitoArchive,
+    ResultObservation,
+    ScraperRun,
+    DeviceTelemetryRollup,
 )
+from core.services.batched_delete_service import BatchedDeleteService
+from core.services.result_history_store import ResultHistoryStore
+from core.services.result_partition_service import ResultPartitionService
+from core.services.results_cache_service import ANIMALITOS, TRIPLES
 
 
 class Command(BaseCommand):
@@ -39,6 +51,7 @@ class Command(BaseCommand):
             action="store_true",
             help="Skip safety checks that require yesterday rows to exist in archive tables.",
         )
+        add_batched_delete_arguments(parser)
 
     def handle(self, *args, **options):
         dry_run: bool = options["dry_run"]
@@ -53,6 +66,9 @@ class Command(BaseCommand):
         # archive window: keep [today - keep_archive_days, today - 1]
         archive_start = today - timedelta(days=keep_archive_days)
         archive_end = today - timedelta(days=1)
+        observations_start = today - timedelta(days=int(getattr(settings, "SCRAPER_OBSERVATION_RETENTION_DAYS", 30)))
+        runs_start = timezone.now() - timedelta(days=int(getattr(settings, "SCRAPER_RUN_RETENTION_DAYS", 30)))
+        rollups_start = timezone.now() - timedelta(days=int(getattr(settings, "TELEMETRY_ROLLUP_RETENTION_DAYS", 400)))
 
         self.stdout.write(f"today={today} | keep archive range: {archive_start}..{archive_end}")
         self.stdout.write(f"dry_run={dry_run} vacuum={vacuum} skip_safety_checks={skip_safety_checks}")
@@ -77,10 +93,35 @@ class Command(BaseCommand):
                 ("AnimalitoResult", AnimalitoResult.objects.exclude(draw_date=today)),
                 ("ResultArchive", ResultArchive.objects.exclude(draw_date__range=(archive_start, archive_end))),
                 ("AnimalitoArchive", AnimalitoArchive.objects.exclude(draw_date__range=(archive_start, archive_end))),
+                ("ResultObservation", ResultObservation.objects.filter(draw_date__lt=observations_start)),
+                ("ScraperRun", ScraperRun.objects.filter(started_at__lt=runs_start)),
+                ("DeviceTelemetryRollup", DeviceTelemetryRollup.objects.filter(hour__lt=rollups_start)),
+            ]
+
+            # Tablas particionadas por día (Postgres): los días fuera de la
+            # ventana se van con DROP PARTITION; el delete de abajo solo
+            # barre lo que quede en la partición DEFAULT.
+            to_drop = [
+                (CurrentResult, today),
+                (AnimalitoResult, today),
+                (ResultArchive, archive_start),
+                (AnimalitoArchive, archive_start),
             ]
+            to_drop = [(model, before) for model, before in to_drop if ResultPartitionService.is_partitioned(model)]
+            for model, before in to_drop:
+                expired = ResultPartitionService.expired_partitions(model, before)
+                self.stdout.write(f"{model.__name__}: would drop {len(expired)} partitions")
 
             for name, qs in to_delete:
                 self.stdout.write(f"{name}: would delete {qs.count()} rows")
+
+            # Lo que sale del archivo pasa antes al histórico largo (RESULT_HISTORY_DIR).
+            to_export = []
+            if ResultHistoryStore.enabled():
+                querysets = dict(to_delete)
+                to_export = [(TRIPLES, querysets["ResultArchive"]), (ANIMALITOS, querysets["AnimalitoArchive"])]
+            if to_export:
+                self.stdout.write(f"history: export to {ResultHistoryStore.root()}")
         except OperationalError as exc:
             raise_database_connection_help(command_name="enforce_retention --dry-run", exc=exc)
 
@@ -89,9 +130,22 @@ class Command(BaseCommand):
             return
 
         with transaction.atomic():
-            for name, qs in to_delete:
-                deleted_count, _ = qs.delete()
-                self.stdout.write(self.style.SUCCESS(f"{name}: deleted {deleted_count} rows"))
+            for kind, qs in to_export:
+                exported = ResultHistoryStore.export(kind, qs)
+                self.stdout.write(
+                    self.style.SUCCESS(f"history {kind}: exported {exported.rows} rows to {exported.segments} segments")
+                )
+            for model, before in to_drop:
+                dropped = ResultPartitionService.drop_partitions(model, before)
+                self.stdout.write(self.style.SUCCESS(f"{model.__name__}: dropped {len(dropped)} partitions"))
+
+        # Fuera del atomic: cada lote es su propia transacción (locks y WAL
+        # acotados) y puede haber pausa entre lotes.
+        delete_kwargs = batched_delete_kwargs(self, options)
+        for name, qs in to_delete:
+            result = BatchedDeleteService.delete(qs, label=f"retention:{name}", **delete_kwargs)
+            suffix = "" if result.complete else " (time budget reached, resumes next run)"
+            self.stdout.write(self.style.SUCCESS(f"{name}: deleted {result.deleted} rows{suffix}"))
 
         if vacuum:
             if connection.vendor == "sqlite":
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+from core.management.command_helpers import raise_database_connection_help
+from core.services.telemetry_rollup_service import TelemetryRollupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Vuelca los contadores horarios de telemetría acumulados en Redis "
+        "(telemetry:rollup:*) a DeviceTelemetryRollup."
+    )
+
+    def handle(self, *args, **options):
+        try:
+            summary = TelemetryRollupService.flush()
+        except OperationalError as exc:
+            raise_database_connection_help(command_name="flush_telemetry_rollups", exc=exc)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rollups volcados: hashes={summary.hashes} rows={summary.rows} events={summary.events} "
+                f"skipped={summary.skipped}"
+            )
+        )
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.utils import timezone
+
+from core.management.command_helpers import raise_database_connection_help
+from core.services.result_partition_service import PARTITION_PAIRS, ResultPartitionService
+
+
+class Command(BaseCommand):
+    help = (
+        "Particiones diarias (draw_date) de resultados y archivo en Postgres: crea las de los "
+        "próximos días (las tablas se particionan en la migración 0035)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days-ahead",
+            type=int,
+            default=int(getattr(settings, "RESULT_PARTITION_DAYS_AHEAD", 7)),
+            help="Días futuros con partición ya creada (default: RESULT_PARTITION_DAYS_AHEAD).",
+        )
+
+    def handle(self, *args, **options):
+        if not ResultPartitionService.supported():
+            self.stdout.write(self.style.WARNING("Particionado no disponible: la base no es Postgres."))
+            return
+
+        days_ahead = max(0, int(options["days_ahead"]))
+        today = timezone.localdate()
+        try:
+            for pair in PARTITION_PAIRS.values():
+                if ResultPartitionService.is_partitioned(pair.current):
+                    created = ResultPartitionService.ensure_partitions(
+                        pair.current, today, today + timedelta(days=days_ahead)
+                    )
+                    if created:
+                        self.stdout.write(self.style.SUCCESS(f"{pair.current.__name__}: creadas {', '.join(created)}"))
+
+                for model in (pair.current, pair.archive):
+                    if not ResultPartitionService.is_partitioned(model):
+                        self.stdout.write(f"{model.__name__}: sin particionar")
+                        continue
+                    days = sorted(ResultPartitionService.partitions(model))
+                    span = f"{days[0]}..{days[-1]}" if days else "-"
+                    self.stdout.write(f"{model.__name__}: {len(days)} particiones ({span})")
+        except OperationalError as exc:
+            raise_database_connection_help(command_name="manage_result_partitions", exc=exc)
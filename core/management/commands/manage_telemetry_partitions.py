@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.utils import timezone
+
+from core.management.command_helpers import raise_database_connection_help
+from core.services.device_telemetry_service import DeviceTelemetryService
+from core.services.result_partition_service import ResultPartitionService
+from core.services.telemetry_partition_service import TelemetryPartitionService
+
+
+class Command(BaseCommand):
+    help = (
+        "Particiones de DeviceTelemetryEvent por created_at en Postgres: crea las próximas "
+        "y hace DROP de las vencidas. La conversión a particionada la hace la migración 0036."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days-ahead",
+            type=int,
+            default=int(getattr(settings, "TELEMETRY_PARTITION_DAYS_AHEAD", 7)),
+            help="Días futuros con partición ya creada (default: TELEMETRY_PARTITION_DAYS_AHEAD).",
+        )
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=DeviceTelemetryService.keep_days(),
+            help="DROP de particiones enteras más viejas que N días (default: TELEMETRY_EVENT_KEEP_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        if not ResultPartitionService.supported():
+            self.stdout.write(self.style.WARNING("Particionado no disponible: la base no es Postgres."))
+            return
+
+        days_ahead = max(0, int(options["days_ahead"]))
+        cutoff = timezone.now() - timedelta(days=max(1, int(options["keep_days"])))
+        try:
+            if not TelemetryPartitionService.is_partitioned():
+                self.stdout.write("DeviceTelemetryEvent: sin particionar")
+                return
+
+            today = timezone.localdate()
+            created = TelemetryPartitionService.ensure_partitions(today, today + timedelta(days=days_ahead))
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"Creadas {', '.join(created)}"))
+            dropped = TelemetryPartitionService.drop_partitions(cutoff)
+            if dropped:
+                self.stdout.write(self.style.SUCCESS(f"Expiradas (DROP) {', '.join(dropped)}"))
+
+            starts = sorted(TelemetryPartitionService.partitions())
+            span = f"{starts[0]}..{starts[-1]}" if starts else "-"
+            self.stdout.write(f"DeviceTelemetryEvent: {len(starts)} particiones ({span})")
+        except OperationalError as exc:
+            raise_database_connection_help(command_name="manage_telemetry_partitions", exc=exc)
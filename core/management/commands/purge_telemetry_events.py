@@ -3,11 +3,13 @@ from __future__ import annotations
 from datetime import timedelta
 
 from django.core.management.base import BaseCommand
-from django.db.models import Q
 from django.utils import timezone
 
+from core.management.command_helpers import add_batched_delete_arguments, batched_delete_kwargs
 from core.models import DeviceTelemetryEvent
+from core.services.batched_delete_service import BatchedDeleteService
 from core.services.device_telemetry_service import DeviceTelemetryService
+from core.services.telemetry_partition_service import TelemetryPartitionService
 
 
 class Command(BaseCommand):
@@ -21,9 +23,10 @@ class Command(BaseCommand):
         parser.add_argument(
             "--keep-incident-days",
             type=int,
-            default=30,
-            help="Mantiene incidentes recientes por N dias (default: 30).",
+            default=DeviceTelemetryService.keep_days(),
+            help="Mantiene incidentes recientes por N dias (default: TELEMETRY_EVENT_KEEP_DAYS).",
         )
+        add_batched_delete_arguments(parser)
 
     def handle(self, *args, **options):
         dry_run = bool(options["dry_run"])
@@ -39,6 +42,12 @@ class Command(BaseCommand):
             f"custom_severities={sorted(DeviceTelemetryService.INCIDENT_SEVERITIES)}"
         )
         self.stdout.write(f"keep_incident_days={keep_days} cutoff={cutoff.isoformat()}")
+        # Con la tabla particionada, lo que quede entero antes del cutoff se va
+        # con DROP de la partición; el resto sigue por DELETE por lotes.
+        partitioned = TelemetryPartitionService.is_partitioned()
+        if partitioned:
+            expired = TelemetryPartitionService.expired_partitions(cutoff)
+            self.stdout.write(f"expired_partitions={len(expired)}")
         self.stdout.write(f"non_incident_events={info_qs.count()}")
         self.stdout.write(f"stale_incident_events={stale_incident_qs.count()}")
 
@@ -46,11 +55,19 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Dry-run: no changes applied."))
             return
 
-        deleted_info, _ = info_qs.delete()
-        deleted_stale, _ = stale_incident_qs.delete()
+        dropped = TelemetryPartitionService.drop_partitions(cutoff) if partitioned else []
+        delete_kwargs = batched_delete_kwargs(self, options)
+        deleted_info = BatchedDeleteService.delete(info_qs, label="telemetry:non_incident", **delete_kwargs)
+        deleted_stale = BatchedDeleteService.delete(
+            stale_incident_qs, label="telemetry:stale_incident", **delete_kwargs
+        )
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Purga completada: non_incident_deleted={deleted_info} stale_incident_deleted={deleted_stale}"
+                f"Purga completada: dropped_partitions={len(dropped)} "
+                f"non_incident_deleted={deleted_info.deleted} "
+                f"stale_incident_deleted={deleted_stale.deleted}"
             )
         )
+        if not (deleted_info.complete and deleted_stale.complete):
+            self.stdout.write(self.style.WARNING("Time budget agotado: la próxima corrida sigue desde el checkpoint."))
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.result_archive_service import ARCHIVE_SPECS
+from core.services.result_history_store import ResultHistoryStore
+from core.services.results_cache_service import TRIPLES
+
+
+class Command(BaseCommand):
+    help = "Consulta el histórico largo (RESULT_HISTORY_DIR) por rango de fechas y provider."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=sorted(ARCHIVE_SPECS), default=TRIPLES)
+        parser.add_argument("--from", dest="start", required=True, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="end", help="YYYY-MM-DD (default: igual a --from).")
+        parser.add_argument("--provider-id", type=int, help="Solo un provider.")
+
+    def handle(self, *args, **options):
+        if not ResultHistoryStore.enabled():
+            raise CommandError("RESULT_HISTORY_DIR vacío: el histórico largo está apagado.")
+        try:
+            start = date.fromisoformat(options["start"])
+            end = date.fromisoformat(options["end"]) if options.get("end") else start
+        except ValueError as exc:
+            raise CommandError(f"Fecha inválida: {exc}") from exc
+
+        kind = options["kind"]
+        fields = ARCHIVE_SPECS[kind].fields
+        rows = ResultHistoryStore.query(kind, start, end, provider_id=options.get("provider_id"))
+        for row in rows:
+            values = " ".join(str(row.get(name) or "") for name in fields)
+            self.stdout.write(f"{row['draw_date']} {row['draw_time']} {row['provider'][:24]:<24} {values}")
+        self.stdout.write(self.style.SUCCESS(f"{len(rows)} filas ({kind} {start}..{end})"))
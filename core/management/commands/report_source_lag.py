@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.utils import timezone
+
+from core.management.command_helpers import raise_database_connection_help
+from core.models import ResultObservation
+from core.services.provider_registry import ProviderRegistry
+from core.services.source_reconciliation_service import SourceReconciliationService
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish lag por fuente y provider (ResultObservation): quién publica primero "
+        "cada lotería, cuántos sorteos ganó y en cuántos hubo desacuerdo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Ventana en días hacia atrás (default: 7).")
+        parser.add_argument("--kind", choices=ResultObservation.Kind.values, help="Solo triples o animalitos.")
+
+    def handle(self, *args, **options):
+        since = timezone.localdate() - timedelta(days=max(0, int(options["days"])))
+        try:
+            rows = SourceReconciliationService.lag_report(since=since, kind=options.get("kind"))
+        except OperationalError as exc:
+            raise_database_connection_help(command_name="report_source_lag", exc=exc)
+
+        if not rows:
+            self.stdout.write(self.style.WARNING(f"Sin observaciones desde {since}."))
+            return
+
+        providers = ProviderRegistry.by_id()
+        self.stdout.write(f"since={since}")
+        self.stdout.write(
+            f"{'provider':<24} {'source':<20} {'obs':>5} {'wins':>5} {'disag':>5} "
+            f"{'avg_lag_s':>9} {'min':>6} {'max':>6}"
+        )
+        fastest: dict[int, str] = {}
+        for row in rows:
+            provider = providers.get(row.provider_id)
+            name = provider.name if provider else str(row.provider_id)
+            fastest.setdefault(row.provider_id, row.source)
+            avg = "-" if row.avg_lag_seconds is None else f"{row.avg_lag_seconds:.0f}"
+            self.stdout.write(
+                f"{name[:24]:<24} {row.source[:20]:<20} {row.observations:>5} {row.wins:>5} "
+                f"{row.disagreements:>5} {avg:>9} {row.min_lag_seconds!s:>6} {row.max_lag_seconds!s:>6}"
+            )
+
+        # Solo tiene sentido "la más rápida" donde compiten dos o más fuentes.
+        sources = Counter(row.provider_id for row in rows)
+        for provider_id in sorted(pid for pid, count in sources.items() if count > 1):
+            provider = providers.get(provider_id)
+            name = provider.name if provider else str(provider_id)
+            self.stdout.write(self.style.SUCCESS(f"FASTEST {name}: {fastest[provider_id]}"))
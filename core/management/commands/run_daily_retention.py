@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from django.core.management import call_command
+from django.db import transaction
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
@@ -32,9 +33,14 @@ class Command(BaseCommand):
         keep_archive_days = int(options["keep_archive_days"])
         skip_safety_checks = bool(options["skip_safety_checks"])
 
-        self.stdout.write(f"[1] Archive yesterday={target_date}")
-        call_command("archive_daily_triples", date=target_date)
-        call_command("archive_daily_animalitos", date=target_date)
+        # El archivado es una transacción corta y se confirma antes de la
+        # retención: cuando enforce_retention borra de current, la copia en
+        # archive ya está commiteada. La retención corre fuera de ese atomic
+        # para que sus borrados por lotes commiteen lote a lote.
+        with transaction.atomic():
+            self.stdout.write(f"[1] Archive yesterday={target_date}")
+            call_command("archive_daily_triples", date=target_date)
+            call_command("archive_daily_animalitos", date=target_date)
 
         self.stdout.write("[2] Enforce retention")
         enforce_kwargs = {"keep_archive_days": keep_archive_days}
@@ -43,4 +49,3 @@ class Command(BaseCommand):
         call_command("enforce_retention", **enforce_kwargs)
 
         self.stdout.write(self.style.SUCCESS("OK"))
-
@@ -3,6 +3,7 @@ from __future__ import annotations
 from django.core.management.base import BaseCommand, CommandError
 
 from core.services.scraper_health_service import ScraperHealthService
+from core.services.scraper_lock_service import ScraperLockBusy
 from core.services.scraper_notification_service import ScraperNotificationService
 
 
@@ -44,6 +45,9 @@ class Command(BaseCommand):
             self.stdout.write(f"Running {definition.key} ({definition.command_name})...")
             try:
                 ScraperHealthService.run_registered(definition.key)
+            except ScraperLockBusy as exc:
+                self.stdout.write(self.style.WARNING(f"SKIP {definition.key}: {exc}"))
+                continue
             except Exception as exc:
                 failures.append(f"{definition.key}: {exc}")
                 self.stderr.write(self.style.ERROR(f"FAIL {definition.key}: {exc}"))
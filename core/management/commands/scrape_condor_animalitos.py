@@ -7,23 +7,31 @@ from datetime import datetime
 from typing import Optional
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
-
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 
 from core.models import Provider
 from core.models.animalito_result import AnimalitoResult
-from core.services.device_redis_service import DeviceRedisService
-from core.services.result_window_service import (
-    delete_future_rows_for_provider,
-    get_business_cutoff_time,
-)
-
-
+from core.services.html_parser_service import Subtree, make_soup
+from core.services.parse_pool_service import ParsedBlock, ParsePoolService
+from core.services.provider_registry import ProviderRegistry
+from core.services.results_cache_service import ANIMALITOS, ResultsCacheService
+from core.services.result_window_service import get_business_cutoff_time
+from core.services.result_write_service import ResultWriteBatch, ResultWriteService
+from core.services.scraper_fetch_service import ScraperFetchService, next_recheck_time
+from core.services.scraper_run_stats import PHASE_FETCH, PHASE_PARSE, PHASE_TRANSACTION, record_run_stats, run_phase
+
+
+# scraper_key: fuente de ResultObservation al reconciliar con otras webs.
+SOURCE_KEY = "condor_animalitos"
 SOURCE_URL = "https://www.lottoresultados.com/resultados/animalitos/condor-gana"
 BASE_URL = "https://www.lottoresultados.com"
+TODAY_BLOCK_ID = "resultado-de-condor-gana-de-hoy"
+
+# Parseo dirigido: los bloques HOY / AYER son columnas de un mismo `.row`
+# (el de HOY también se acepta suelto por su id).
+CONDOR_SUBTREES = (Subtree(css_class="row"), Subtree(ids=(TODAY_BLOCK_ID,)))
 
 
 TIME_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*(am|pm)\s*$", re.IGNORECASE)
@@ -50,18 +58,69 @@ def _parse_time_12h(text: str):
 
 
 def _get_or_create_provider() -> Provider:
-    provider, _ = Provider.objects.get_or_create(
-        name="Condor Gana",
-        defaults={"source_url": SOURCE_URL, "is_active": True},
-    )
-    # Asegura source_url requerido
-    if not provider.source_url:
-        provider.source_url = SOURCE_URL
-        provider.save(update_fields=["source_url"])
-    if provider.is_active is False:
-        provider.is_active = True
-        provider.save(update_fields=["is_active"])
-    return provider
+    # El registry asegura source_url requerido y reactiva el provider si hace falta.
+    return ProviderRegistry.ensure_one("Condor Gana", source_url=SOURCE_URL)
+
+
+def _find_day_block(soup, *, is_today: bool):
+    if is_today:
+        return soup.select_one(f"#{TODAY_BLOCK_ID}")
+    # “Resultados de Ayer” está en el segundo .col-sm-6 del mismo row
+    # (el de ayer no tiene id fijo).
+    cols = soup.select(".row > .col-sm-6")
+    return cols[1] if len(cols) >= 2 else None
+
+
+def _parse_step_list(container) -> list[dict]:
+    """
+    Formato observado:
+    - <ul class="step">
+        <li class="step-item">
+          <h4>9:00 am</h4>
+          <p class="step-text ...">62 Cachicamo</p>
+          <img src="/img/.../CondorGana/62.webp" alt="...">
+    La fila final puede ser "Próximo" y se ignora. :contentReference[oaicite:2]{index=2}
+    """
+    out: list[dict] = []
+
+    items = container.select("ul.step li.step-item")
+    for it in items:
+        time_txt = it.select_one("h4")
+        line_txt = it.select_one("p.step-text")
+        img = it.select_one("img")
+
+        t_raw = time_txt.get_text(" ", strip=True) if time_txt else ""
+        line_raw = line_txt.get_text(" ", strip=True) if line_txt else ""
+
+        # Ignorar "Próximo" o vacíos
+        if not line_raw or "próximo" in line_raw.lower() or "proximo" in line_raw.lower():
+            continue
+
+        draw_time = _parse_time_12h(t_raw)
+        if not draw_time:
+            continue
+
+        m = LINE_RE.match(line_raw)
+        if not m:
+            continue
+
+        number = m.group(1)  # "62" / "5"
+        animal = m.group(2).strip()  # "Cachicamo" / "León"
+
+        src = (img.get("src") if img else "") or ""
+        image_url = urljoin(BASE_URL, src)
+
+        out.append(
+            {
+                "time": t_raw,
+                "draw_time_obj": draw_time,
+                "number": number,
+                "animal": animal,
+                "image": image_url,
+            }
+        )
+
+    return out
 
 
 class Command(BaseCommand):
@@ -76,10 +135,16 @@ class Command(BaseCommand):
             help="YYYY-MM-DD. Solo soporta HOY o AYER (porque la página trae ambos bloques).",
         )
         parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Procesa el bloque aunque la página no haya cambiado.",
+        )
 
     def handle(self, *args, **opts):
         timeout: int = opts["timeout"]
         dry_run: bool = bool(opts["dry_run"])
+        force: bool = bool(opts.get("force")) or dry_run
         target_date = self._parse_date(opts.get("date"))
 
         today = timezone.localdate()
@@ -91,31 +156,44 @@ class Command(BaseCommand):
                 f"Hoy={today.isoformat()} Ayer={yesterday.isoformat()}."
             )
 
-        html = self._fetch_html(timeout=timeout)
-        soup = BeautifulSoup(html, "html.parser")
+        cutoff_time = get_business_cutoff_time() if target_date == today else None
+        with run_phase(PHASE_FETCH):
+            page = ScraperFetchService.fetch(
+                SOURCE_URL,
+                timeout=timeout,
+                max_age=0 if force else None,
+                conditional=not force and ScraperFetchService.is_page_fresh(
+                    SOURCE_URL,
+                    draw_date=target_date,
+                    cutoff_time=cutoff_time,
+                ),
+            )
+        if page.unchanged:
+            record_run_stats(pages_skipped=1, blocks_skipped=1)
+            self.stdout.write(self.style.SUCCESS(f"OK Condor Gana (lottoresultados): date={target_date} sin cambios"))
+            return
 
-        # Bloques: hoy / ayer
-        block_id = (
-            "resultado-de-condor-gana-de-hoy"
-            if target_date == today
-            else None  # el de ayer no tiene id fijo en tu dump, pero es el siguiente col-sm-6
-        )
+        with run_phase(PHASE_PARSE):
+            blocks = ParsePoolService.result(ParsePoolService.submit(extract_day_blocks, page.html))
+            block = blocks["hoy" if target_date == today else "ayer"]
+        if not block:
+            label = "HOY" if target_date == today else "AYER"
+            raise CommandError(f"No se encontró el bloque de {label} en el HTML.")
+
+        scope = f"condor_animalitos:{target_date.isoformat()}"
+        fragment = block.fragment
+        if not force and ScraperFetchService.is_block_unchanged(
+            scope,
+            fragment,
+            draw_date=target_date,
+            cutoff_time=cutoff_time,
+        ):
+            record_run_stats(blocks_skipped=1)
+            self.stdout.write(self.style.SUCCESS(f"OK Condor Gana (lottoresultados): date={target_date} bloque sin cambios"))
+            return
 
-        rows = []
-        if target_date == today:
-            block = soup.select_one(f"#{block_id}")
-            if not block:
-                raise CommandError("No se encontró el bloque de HOY en el HTML.")
-            rows = self._parse_step_list(block)
-        else:
-            # “Resultados de Ayer” está en el segundo .col-sm-6 del mismo row.
-            cols = soup.select(".row > .col-sm-6")
-            if len(cols) < 2:
-                raise CommandError("No se encontró el bloque de AYER en el HTML.")
-            rows = self._parse_step_list(cols[1])
-
-        # invalidación cache ANIMALITOS (para TVs)
-        DeviceRedisService.delete_pattern("results:animalitos:*")
+        rows = block.rows
+        recheck_after = next_recheck_time((row["draw_time_obj"] for row in rows), cutoff_time)
 
         if dry_run:
             self.stdout.write(self.style.SUCCESS(f"DRY RUN: parsed={len(rows)}"))
@@ -123,106 +201,37 @@ class Command(BaseCommand):
                 self.stdout.write(f"{r['time']} -> {r['number']} {r['animal']} ({r['image']})")
             return
 
-        provider = _get_or_create_provider()
-        future_purged = 0
-        if target_date == today:
-            cutoff_time = get_business_cutoff_time()
+        if cutoff_time is not None:
             rows = [row for row in rows if row["draw_time_obj"] <= cutoff_time]
-            future_purged = delete_future_rows_for_provider(
-                model=AnimalitoResult,
-                provider=provider,
-                draw_date=target_date,
-                cutoff_time=cutoff_time,
-            )
-
-        created = 0
-        updated = 0
-
-        for r in rows:
-            obj, was_created = AnimalitoResult.objects.update_or_create(
-                provider=provider,
-                draw_date=target_date,
-                draw_time=r["draw_time_obj"],
-                defaults={
-                    "animal_number": r["number"],        # Django coerces si es IntegerField
-                    "animal_name": r["animal"],
-                    "animal_image_url": r["image"],
-                    "provider_logo_url": provider.logo_url or "",
-                },
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
 
-        self.stdout.write(self.style.SUCCESS(
-            f"OK Condor Gana (lottoresultados): date={target_date} parsed={len(rows)} created={created} updated={updated} future_purged={future_purged}"
-        ))
+        def remember_processed():
+            ScraperFetchService.remember_block(scope, fragment, draw_date=target_date, recheck_after=recheck_after)
+            ScraperFetchService.remember_page(page, draw_date=target_date, block_scopes=[scope])
 
-    def _fetch_html(self, timeout: int) -> str:
-        resp = requests.get(
-            SOURCE_URL,
-            timeout=timeout,
-            headers={
-                "User-Agent": (
-                    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+        with run_phase(PHASE_TRANSACTION), transaction.atomic():
+            provider = _get_or_create_provider()
+            batch = ResultWriteBatch(model=AnimalitoResult, draw_date=target_date, source=SOURCE_KEY)
+            if cutoff_time is not None:
+                batch.window(provider, cutoff_time=cutoff_time)
+            for r in rows:
+                batch.add(
+                    provider,
+                    r["draw_time_obj"],
+                    animal_number=r["number"],
+                    animal_name=r["animal"],
+                    animal_image_url=r["image"],
+                    provider_logo_url=provider.logo_url or "",
                 )
-            },
-        )
-        resp.raise_for_status()
-        return resp.text
-
-    def _parse_step_list(self, container) -> list[dict]:
-        """
-        Formato observado:
-        - <ul class="step">
-            <li class="step-item">
-              <h4>9:00 am</h4>
-              <p class="step-text ...">62 Cachicamo</p>
-              <img src="/img/.../CondorGana/62.webp" alt="...">
-        La fila final puede ser "Próximo" y se ignora. :contentReference[oaicite:2]{index=2}
-        """
-        out: list[dict] = []
-
-        items = container.select("ul.step li.step-item")
-        for it in items:
-            time_txt = it.select_one("h4")
-            line_txt = it.select_one("p.step-text")
-            img = it.select_one("img")
-
-            t_raw = time_txt.get_text(" ", strip=True) if time_txt else ""
-            line_raw = line_txt.get_text(" ", strip=True) if line_txt else ""
-
-            # Ignorar "Próximo" o vacíos
-            if not line_raw or "próximo" in line_raw.lower() or "proximo" in line_raw.lower():
-                continue
-
-            draw_time = _parse_time_12h(t_raw)
-            if not draw_time:
-                continue
-
-            m = LINE_RE.match(line_raw)
-            if not m:
-                continue
-
-            number = m.group(1)  # "62" / "5"
-            animal = m.group(2).strip()  # "Cachicamo" / "León"
-
-            src = (img.get("src") if img else "") or ""
-            image_url = urljoin(BASE_URL, src)
-
-            out.append(
-                {
-                    "time": t_raw,
-                    "draw_time_obj": draw_time,
-                    "number": number,
-                    "animal": animal,
-                    "image": image_url,
-                }
-            )
+            summary = ResultWriteService.apply(batch)
+            transaction.on_commit(remember_processed)
+
+        # invalidación cache ANIMALITOS (para TVs), ya con los datos escritos
+        ResultsCacheService.invalidate(ANIMALITOS)
 
-        return out
+        self.stdout.write(self.style.SUCCESS(
+            f"OK Condor Gana (lottoresultados): date={target_date} parsed={len(rows)} created={summary.inserted} "
+            f"updated={summary.changed} unchanged={summary.unchanged} future_purged={summary.deleted}"
+        ))
 
     def _parse_date(self, raw: Optional[str]):
         if not raw:
@@ -231,3 +240,18 @@ class Command(BaseCommand):
             return datetime.strptime(raw.strip(), "%Y-%m-%d").date()
         except ValueError:
             raise CommandError("Formato date inválido. Usa YYYY-MM-DD.")
+
+
+def extract_day_blocks(html: str) -> dict[str, Optional[ParsedBlock]]:
+    """Bloques HOY / AYER con sus filas (None si falta). Corre en ParsePoolService."""
+    soup = make_soup(html, subtrees=CONDOR_SUBTREES)
+    out: dict[str, Optional[ParsedBlock]] = {}
+    for label, is_today in (("hoy", True), ("ayer", False)):
+        block = _find_day_block(soup, is_today=is_today)
+        out[label] = ParsedBlock(label, str(block), _parse_step_list(block)) if block else None
+    return out
+
+
+def parse_page(html: str) -> dict[str, list[dict]]:
+    """Filas de los bloques HOY / AYER, sin tocar la BD (equivalencia / benchmark)."""
+    return {label: block.rows if block else [] for label, block in extract_day_blocks(html).items()}
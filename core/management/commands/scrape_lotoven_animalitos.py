@@ -17,7 +17,7 @@ Extrae por cada proveedor y horario:
 - draw_time_obj
 
 Guarda en BD:
-- Provider (upsert por name)
+- Provider (upsert por nombre normalizado, vía ProviderRegistry)
 - AnimalitoResult (upsert por provider + draw_date + draw_time)
 """
 
@@ -26,17 +26,22 @@ import time
 from datetime import datetime, date as date_cls, timedelta
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
-
 from django.core.cache import cache
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 
-from core.models import Provider
 from core.models.animalito_result import AnimalitoResult
-from core.services.device_redis_service import DeviceRedisService
+from core.services.results_cache_service import ANIMALITOS, ResultsCacheService
+from core.services.html_parser_service import Subtree, make_soup
+from core.services.parse_pool_service import ParsedBlock, ParsePoolService
+from core.services.provider_registry import ProviderRef, ProviderRegistry
+from core.services.result_write_service import ResultWriteBatch, ResultWriteService, ResultWriteSummary
+from core.services.scraper_fetch_service import FetchedPage, ScraperFetchService
+from core.services.scraper_run_stats import PHASE_FETCH, PHASE_PARSE, PHASE_TRANSACTION, record_run_stats, run_phase
 
+# scraper_key: fuente de ResultObservation al reconciliar con otras webs.
+SOURCE_KEY = "lotoven_animalitos"
 
 
 # -----------------------------------------------------------------------------
@@ -59,44 +64,16 @@ def normalize_provider_name(raw: str) -> str:
 # 2) UPSERT DE PROVIDERS
 # -----------------------------------------------------------------------------
 def upsert_providers(provider_rows: list[dict]) -> tuple[int, int]:
-    created = 0
-    updated = 0
-
-    for p in provider_rows:
-        name = normalize_provider_name(p.get("provider_name") or "")
-        if not name:
-            continue
-
-        logo_url = p.get("provider_logo_url") or None
-        source_url = p.get("provider_source_url") or None
-
-        existing = Provider.objects.filter(name=name).first()
-
-        if existing:
-            changed = False
-            if logo_url and existing.logo_url != logo_url:
-                existing.logo_url = logo_url
-                changed = True
-            if source_url and existing.source_url != source_url:
-                existing.source_url = source_url
-                changed = True
-            if existing.is_active is False:
-                existing.is_active = True
-                changed = True
-
-            if changed:
-                existing.save(update_fields=["logo_url", "source_url", "is_active"])
-                updated += 1
-        else:
-            Provider.objects.create(
-                name=name,
-                logo_url=logo_url,
-                source_url=source_url,
-                is_active=True,
-            )
-            created += 1
-
-    return created, updated
+    result = ProviderRegistry.sync(
+        ProviderRef(
+            name=normalize_provider_name(p.get("provider_name") or ""),
+            source_url=p.get("provider_source_url") or "",
+            logo_url=p.get("provider_logo_url") or "",
+            update_source_url=True,
+        )
+        for p in provider_rows
+    )
+    return result.created, result.updated
 
 
 # -----------------------------------------------------------------------------
@@ -108,14 +85,23 @@ class Command(BaseCommand):
     BASE_URL = "https://lotoven.com"
     ANIMALITOS_URL = "https://lotoven.com/animalitos/"
 
-    HTML_CACHE_TTL_SECONDS = 10 * 60
     GLOBAL_COOLDOWN_SECONDS = 10 * 60
+    # Sondeo post-sorteo del scheduler: la detección de cambios evita escrituras.
+    POLL_COOLDOWN_SECONDS = 20
 
     USER_AGENT = (
         "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
         "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
     )
 
+    # Parseo dirigido: solo se construyen los contenedores que lee _parse_blocks
+    # (camino normal y fallback invest-table-area).
+    PAGE_SUBTREES = (
+        Subtree(tag="section", ids=("ani-res",)),
+        Subtree(tag="div", css_class="container"),
+        Subtree(css_class="invest-table-area"),
+    )
+
     def _animalitos_url_for_date(self, target_date: date_cls) -> str:
         today = timezone.localdate()
         if target_date == today:
@@ -129,11 +115,17 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--dry-run", action="store_true", help="No guarda en BD.")
         parser.add_argument("--date", type=str, default=None, help="Fecha YYYY-MM-DD.")
-        parser.add_argument("--force", action="store_true", help="Ignora cooldown.")
+        parser.add_argument("--force", action="store_true", help="Ignora cooldown, cache de páginas y detección de cambios.")
+        parser.add_argument(
+            "--poll",
+            action="store_true",
+            help="Sondeo post-sorteo: cooldown corto y copia compartida de la página con antigüedad <= cooldown.",
+        )
 
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
         force = options["force"]
+        poll = bool(options.get("poll"))
         verbosity = int(options.get("verbosity") or 1)
 
         target_date = self._parse_date(options.get("date"))
@@ -141,22 +133,21 @@ class Command(BaseCommand):
             self.stderr.write("Fecha inválida. Usa YYYY-MM-DD")
             return
 
-        if not force and self._is_in_global_cooldown(target_date):
+        cooldown = self.POLL_COOLDOWN_SECONDS if poll else self.GLOBAL_COOLDOWN_SECONDS
+        if not force and self._is_in_global_cooldown(target_date, cooldown):
             secs = self._seconds_since_last_run(target_date)
             self.stdout.write(
                 self.style.WARNING(
                     f"Saltando: último scrape animalitos hace {secs}s "
-                    f"(< {self.GLOBAL_COOLDOWN_SECONDS}s)."
+                    f"(< {cooldown}s)."
                 )
             )
             return
-        
-        DeviceRedisService.delete_pattern("results:animalitos:*")
-
-        html = self._fetch_html(target_date=target_date, force=force)
-        rows = self._parse_html(html, target_date=target_date, verbosity=verbosity)
 
         if dry_run:
+            page = self._fetch_page(target_date=target_date, max_age=0 if force else None)
+            rows = self._parse_html(page.html, target_date=target_date, verbosity=verbosity)
+
             self.stdout.write(self.style.SUCCESS(f"DRY RUN: {len(rows)} resultados detectados."))
             for r in rows[:200]:
                 # IMPORTANTE: NO :02d, NO int(), NO zfill() — preservar "0" vs "00"
@@ -165,19 +156,59 @@ class Command(BaseCommand):
                 )
             return
 
-        provider_rows = self._providers_from_rows(rows)
-        prov_created, prov_updated = upsert_providers(provider_rows)
-        self.stdout.write(self.style.SUCCESS(f"Providers upsert: created={prov_created} updated={prov_updated}"))
+        with run_phase(PHASE_FETCH):
+            page = self._fetch_page(
+                target_date=target_date,
+                max_age=0 if force else (self.POLL_COOLDOWN_SECONDS if poll else None),
+                conditional=not force and ScraperFetchService.is_page_fresh(
+                    self._animalitos_url_for_date(target_date),
+                    draw_date=target_date,
+                ),
+            )
+        if page.unchanged:
+            record_run_stats(pages_skipped=1)
+            self._set_last_run(target_date)
+            self.stdout.write(self.style.SUCCESS("OK animalitos: página sin cambios."))
+            return
+
+        def is_unchanged(scope: str, fragment: str) -> bool:
+            return not force and ScraperFetchService.is_block_unchanged(scope, fragment, draw_date=target_date)
 
-        created, updated = self._upsert_results(rows, target_date)
+        with run_phase(PHASE_PARSE):
+            extracted = ParsePoolService.result(ParsePoolService.submit(extract_blocks, page.html, target_date))
+            blocks = [
+                (block.key, block.fragment, None if is_unchanged(block.key, block.fragment) else block.rows)
+                for block in extracted
+            ]
+        rows = [r for _, _, block_rows in blocks if block_rows is not None for r in block_rows]
+        skipped_blocks = sum(1 for _, _, block_rows in blocks if block_rows is None)
+        record_run_stats(blocks_skipped=skipped_blocks)
+
+        provider_rows = self._providers_from_rows(rows)
+        with run_phase(PHASE_TRANSACTION), transaction.atomic():
+            prov_created, prov_updated = upsert_providers(provider_rows)
+            summary = self._upsert_results(rows, target_date)
+            transaction.on_commit(lambda: self._remember_processed(page, blocks, target_date))
         self._set_last_run(target_date)
+        ResultsCacheService.invalidate(ANIMALITOS)
+        self.stdout.write(self.style.SUCCESS(f"Providers upsert: created={prov_created} updated={prov_updated}"))
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"OK animalitos: {len(rows)} parseados | results created={created} updated={updated}"
+                f"OK animalitos: {len(rows)} parseados | results created={summary.inserted} "
+                f"updated={summary.changed} unchanged={summary.unchanged} | bloques sin cambios={skipped_blocks}"
             )
         )
 
+    def _remember_processed(self, page: FetchedPage, blocks, target_date: date_cls) -> None:
+        scopes = []
+        for scope, fragment, block_rows in blocks:
+            scopes.append(scope)
+            if block_rows is not None:
+                ScraperFetchService.remember_block(scope, fragment, draw_date=target_date)
+        if not page.unchanged:
+            ScraperFetchService.remember_page(page, draw_date=target_date, block_scopes=scopes)
+
     # -------------------------------------------------------------------------
     # Helpers: providers únicos
     # -------------------------------------------------------------------------
@@ -209,8 +240,8 @@ class Command(BaseCommand):
             return 10**9
         return int(timezone.now().timestamp() - float(ts))
 
-    def _is_in_global_cooldown(self, target_date: date_cls) -> bool:
-        return self._seconds_since_last_run(target_date) < self.GLOBAL_COOLDOWN_SECONDS
+    def _is_in_global_cooldown(self, target_date: date_cls, cooldown: int) -> bool:
+        return self._seconds_since_last_run(target_date) < cooldown
 
     # -------------------------------------------------------------------------
     # FECHA
@@ -224,38 +255,42 @@ class Command(BaseCommand):
             return None
 
     # -------------------------------------------------------------------------
-    # FETCH HTML CON CACHE
+    # FETCH HTML (cache compartido de ScraperFetchService)
     # -------------------------------------------------------------------------
-    def _html_cache_key(self, target_date: date_cls) -> str:
-        return f"scrape:animalitos:html:{target_date.isoformat()}"
-
-    def _fetch_html(self, *, target_date: date_cls, force: bool) -> str:
-        cache_key = self._html_cache_key(target_date)
-
-        if not force:
-            cached = cache.get(cache_key)
-            if cached:
-                return cached
-
-        time.sleep(0.8)
-        headers = {"User-Agent": self.USER_AGENT}
-
+    def _fetch_page(self, *, target_date: date_cls, max_age: int | None, conditional: bool = False) -> FetchedPage:
         url = self._animalitos_url_for_date(target_date)
-        resp = requests.get(url, headers=headers, timeout=20)
-        resp.raise_for_status()
-
-        html = resp.text
-        cache.set(cache_key, html, timeout=self.HTML_CACHE_TTL_SECONDS)
-        return html
+        if not ScraperFetchService.is_offline():
+            time.sleep(0.8)
+        return ScraperFetchService.fetch(
+            url,
+            headers={"User-Agent": self.USER_AGENT},
+            timeout=20,
+            conditional=conditional,
+            max_age=max_age,
+        )
 
     # -------------------------------------------------------------------------
     # PARSER HTML
     # -------------------------------------------------------------------------
     def _parse_html(self, html: str, *, target_date: date_cls, verbosity: int = 1) -> list[dict]:
-        soup = BeautifulSoup(html, "html.parser")
+        rows: list[dict] = []
+        for _, _, block_rows in self._parse_blocks(html, target_date=target_date, verbosity=verbosity):
+            rows.extend(block_rows or [])
+        return rows
+
+    def _parse_blocks(
+        self,
+        html: str,
+        *,
+        target_date: date_cls,
+        verbosity: int = 1,
+    ) -> list[tuple[str, str, list[dict]]]:
+        """Devuelve (scope, fragmento_html, rows) por proveedor."""
+        soup = make_soup(html, subtrees=self.PAGE_SUBTREES)
         source_url = self._animalitos_url_for_date(target_date)
+        scope_prefix = f"lotoven_animalitos:{target_date.isoformat()}"
 
-        rows: list[dict] = []
+        blocks: list[tuple[str, str, list[dict]]] = []
 
         # 1) Camino “normal”: contenedores con header + cards
         section = soup.select_one("section#ani-res")
@@ -267,6 +302,8 @@ class Command(BaseCommand):
                 continue
 
             provider_name = normalize_provider_name(self._safe_text(header.select_one("p.title.one")))
+            scope = f"{scope_prefix}:{provider_name}"
+            fragment = str(container)
 
             logo_img = header.select_one("img.logo-result")
             provider_logo_url = self._abs_url(logo_img.get("src") if logo_img else "")
@@ -274,6 +311,7 @@ class Command(BaseCommand):
             provider_link = header.select_one("a.logo-ani-header")
             provider_source_url = self._abs_url(provider_link.get("href") if provider_link else "") or source_url
 
+            rows: list[dict] = []
             for card in container.select(".counter-wrapper"):
                 animal_img = card.select_one(".counter-item img")
                 animal_image_url = self._abs_url(animal_img.get("src") if animal_img else "")
@@ -298,9 +336,10 @@ class Command(BaseCommand):
                         "draw_time_obj": draw_time_obj,
                     }
                 )
+            blocks.append((scope, fragment, rows))
 
         # 2) Fallback: layout tipo /animalitos/ayer/ que viene como invest-table-area
-        if not rows:
+        if not any(block_rows for _, _, block_rows in blocks):
             fallback_cards = soup.select(".invest-table-area .counter-wrapper")
             if verbosity >= 2:
                 self.stdout.write(f"[debug] section#ani-res={'OK' if section else 'NO'} containers={len(containers)} fallback_cards={len(fallback_cards)}")
@@ -309,6 +348,10 @@ class Command(BaseCommand):
             provider_logo_url = ""
             provider_source_url = source_url
 
+            scope = f"{scope_prefix}:{provider_name}"
+            fragment = "".join(str(card) for card in fallback_cards)
+
+            rows = []
             for card in fallback_cards:
                 animal_img = card.select_one(".counter-item img")
                 animal_image_url = self._abs_url(animal_img.get("src") if animal_img else "")
@@ -333,8 +376,10 @@ class Command(BaseCommand):
                         "draw_time_obj": draw_time_obj,
                     }
                 )
+            if rows:
+                blocks.append((scope, fragment, rows))
 
-        return rows
+        return blocks
 
     def _safe_text(self, el) -> str:
         if not el:
@@ -386,37 +431,38 @@ class Command(BaseCommand):
     # -------------------------------------------------------------------------
     # UPSERT RESULTS
     # -------------------------------------------------------------------------
-    def _upsert_results(self, rows: list[dict], target_date: date_cls) -> tuple[int, int]:
-        created = 0
-        updated = 0
+    def _upsert_results(self, rows: list[dict], target_date: date_cls) -> ResultWriteSummary:
+        providers = ProviderRegistry.ensure(
+            ProviderRef(
+                name=normalize_provider_name(r["provider_name"]),
+                source_url=r.get("provider_source_url") or self.ANIMALITOS_URL,
+                logo_url=r.get("provider_logo_url") or "",
+            )
+            for r in rows
+        )
+        batch = ResultWriteBatch(model=AnimalitoResult, draw_date=target_date, source=SOURCE_KEY)
 
         for r in rows:
-            provider_name = normalize_provider_name(r["provider_name"])
-
-            provider = Provider.objects.filter(name=provider_name).first()
-            if not provider:
-                provider = Provider.objects.create(
-                    name=provider_name,
-                    logo_url=r.get("provider_logo_url") or None,
-                    source_url=r.get("provider_source_url") or self.ANIMALITOS_URL,
-                    is_active=True,
-                )
-
-            _, was_created = AnimalitoResult.objects.update_or_create(
-                provider=provider,
-                draw_date=target_date,
-                draw_time=r["draw_time_obj"],
-                defaults={
-                    "animal_number": r["animal_number"],  # string exacto "0"/"00"
-                    "animal_name": r["animal_name"],
-                    "animal_image_url": r["animal_image_url"],
-                    "provider_logo_url": r.get("provider_logo_url") or "",
-                },
+            batch.add(
+                providers[normalize_provider_name(r["provider_name"])],
+                r["draw_time_obj"],
+                animal_number=r["animal_number"],  # string exacto "0"/"00"
+                animal_name=r["animal_name"],
+                animal_image_url=r["animal_image_url"],
+                provider_logo_url=r.get("provider_logo_url") or "",
             )
 
-            if was_created:
-                created += 1
-            else:
-                updated += 1
+        return ResultWriteService.apply(batch)
+
+
+def extract_blocks(html: str, target_date: date_cls) -> list[ParsedBlock]:
+    """Bloques por proveedor (key = scope) con sus filas. Corre en ParsePoolService."""
+    return [
+        ParsedBlock(scope, fragment, rows)
+        for scope, fragment, rows in Command()._parse_blocks(html, target_date=target_date, verbosity=0)
+    ]
+
 
-        return created, updated
+def parse_page(html: str, *, target_date: date_cls | None = None) -> list[dict]:
+    """Filas de todos los proveedores, sin tocar la BD (equivalencia / benchmark)."""
+    return Command()._parse_html(html, target_date=target_date or timezone.localdate(), verbosity=0)
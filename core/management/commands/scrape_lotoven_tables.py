@@ -18,19 +18,23 @@ from dataclasses import dataclass
 from datetime import time
 from typing import Iterable, Optional, Tuple
 
-import requests
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.utils import timezone
 
 from core.models import CurrentResult, Provider
-from core.services.device_redis_service import DeviceRedisService
-from core.services.result_window_service import (
-    delete_future_rows_for_provider,
-    get_business_cutoff_time,
-)
-
+from core.services.html_parser_service import Subtree, make_soup
+from core.services.parse_pool_service import ParsedBlock, ParsePoolService
+from core.services.provider_registry import ProviderRef, ProviderRegistry
+from core.services.results_cache_service import TRIPLES, ResultsCacheService
+from core.services.result_window_service import get_business_cutoff_time
+from core.services.result_write_service import ResultWriteBatch, ResultWriteService
+from core.services.scraper_fetch_service import FetchedPage, ScraperFetchService, next_recheck_time
+from core.services.scraper_run_stats import PHASE_FETCH, PHASE_PARSE, PHASE_TRANSACTION, record_run_stats, run_phase
+
+# scraper_key: fuente de ResultObservation al reconciliar con otras webs.
+SOURCE_KEY = "lotoven_triples"
 LOTERIAS_URL = "https://lotoven.com/loterias/"
 TRIPLE_CHANCE_URL = "https://lotoven.com/loteria/triplechance/resultados/"
 TRIPLE_ZULIA_URL = "https://lotoven.com/loteria/triplezulia/resultados/"
@@ -143,49 +147,83 @@ def _iter_pairs(xs: list[str], ys: list[str]) -> Iterable[tuple[int, str, str]]:
         yield idx, xs[idx], ys[idx]
 
 
-def _save_result(*, provider: Provider, draw_date, draw_time: time, winning_number: str, extra: Optional[dict]) -> None:
-    CurrentResult.objects.update_or_create(
-        provider=provider,
-        draw_date=draw_date,
-        draw_time=draw_time,
-        defaults={"winning_number": winning_number, "extra": extra},
-    )
-
-
-def _cleanup_unexpected_times(provider: Provider, draw_date, expected_hhmm: set[tuple[int, int]]) -> None:
-    if not expected_hhmm:
-        return
-    allowed = [time(h, m) for h, m in sorted(expected_hhmm)]
-    CurrentResult.objects.filter(
-        provider=provider,
-        draw_date=draw_date,
-    ).exclude(draw_time__in=allowed).delete()
+def _row_draw_time(row) -> time:
+    return row[0] if isinstance(row[0], time) else row[1]
 
 
 def _filter_due_current_rows(rows, cutoff_time: time):
     filtered = []
     for row in rows:
-        draw_time = row[0] if isinstance(row[0], time) else row[1]
-        if draw_time <= cutoff_time:
+        if _row_draw_time(row) <= cutoff_time:
             filtered.append(row)
     return filtered
 
 
-def _get_or_create_provider(name: str, source_url: str) -> Provider:
-    provider, _ = Provider.objects.get_or_create(
-        name=name,
-        defaults={"source_url": source_url, "is_active": True, "logo_url": ""},
+def _group_provider_names(spec: ProviderSpec) -> dict[str, str]:
+    """{grupo: nombre de provider}; table_simple usa un único provider (grupo "")."""
+    if spec.kind == "triple_chance":
+        groups = ("A", "B", "C")
+    elif spec.kind == "triple_abc":
+        groups = ("A", "C") if spec.name == "Triple Zamorano" else ("A", "B", "C")
+    else:
+        return {"": spec.name}
+    return {group: f"{spec.name} {group}" for group in groups}
+
+
+def provider_pages() -> dict[str, tuple[ProviderSpec, ...]]:
+    """{source_url: specs}: cada página es una unidad independiente de scraping."""
+    pages: dict[str, list[ProviderSpec]] = {}
+    for spec in PROVIDERS:
+        pages.setdefault(spec.source_url, []).append(spec)
+    return {url: tuple(specs) for url, specs in pages.items()}
+
+
+def expected_draw_calendar() -> dict[str, set[time]]:
+    """{nombre de provider: horarios esperados} para los triples con calendario fijo."""
+    calendar: dict[str, set[time]] = {}
+    for spec in PROVIDERS:
+        if spec.kind == "triple_chance":
+            expected = EXPECTED_TRIPLE_CHANCE_TIMES
+        elif spec.kind == "triple_abc":
+            expected = EXPECTED_TRIPLE_ABC_TIMES.get(spec.name) or set()
+        else:
+            continue
+        for name in _group_provider_names(spec).values():
+            calendar[name] = {time(hour, minute) for hour, minute in expected}
+    return calendar
+
+
+def _add_spec_rows(batch: ResultWriteBatch, spec: ProviderSpec, parsed: list, providers, cutoff_time) -> int:
+    """Agrega al batch las filas parseadas de un spec; devuelve cuántas traen signo."""
+    group_providers = {group: providers[name] for group, name in _group_provider_names(spec).items()}
+    with_signo = 0
+    if spec.kind == "table_simple":
+        provider = group_providers[""]
+        for t, winning_number, extra in parsed:
+            batch.add(provider, t, winning_number=winning_number, extra=extra)
+        batch.window(provider, cutoff_time=cutoff_time)
+    elif spec.kind in {"triple_chance", "triple_abc"}:
+        if spec.kind == "triple_chance":
+            expected_times = EXPECTED_TRIPLE_CHANCE_TIMES
+        else:
+            expected_times = EXPECTED_TRIPLE_ABC_TIMES.get(spec.name)
+        for group, t, winning_number, extra in parsed:
+            batch.add(group_providers[group], t, winning_number=winning_number, extra=extra)
+            if extra and extra.get("signo"):
+                with_signo += 1
+        if expected_times:
+            allowed_times = [time(h, m) for h, m in sorted(expected_times)]
+            for p in group_providers.values():
+                batch.window(p, cutoff_time=cutoff_time, allowed_times=allowed_times)
+    return with_signo
+
+
+def _resolve_providers(specs: Iterable[ProviderSpec]) -> dict[str, Provider]:
+    return ProviderRegistry.ensure(
+        ProviderRef(name=name, source_url=spec.source_url)
+        for spec in specs
+        for name in _group_provider_names(spec).values()
     )
-    updates = []
-    if not provider.source_url:
-        provider.source_url = source_url
-        updates.append("source_url")
-    if provider.is_active is False:
-        provider.is_active = True
-        updates.append("is_active")
-    if updates:
-        provider.save(update_fields=updates)
-    return provider
 
 
 def _parse_table_simple(block) -> list[Tuple[time, str, Optional[dict]]]:
@@ -299,6 +337,56 @@ def _parse_triple_abc(block) -> list[Tuple[str, time, str, Optional[dict]]]:
     return out
 
 
+def _page_subtrees(url: str) -> tuple[Subtree, ...]:
+    """Subárboles que leen los specs de `url` (parseo dirigido)."""
+    specs = [s for s in PROVIDERS if s.source_url == url]
+    subtrees: list[Subtree] = []
+    ids = tuple(s.dom_id for s in specs if s.kind in {"table_simple", "triple_chance"} and s.dom_id)
+    if ids:
+        subtrees.append(Subtree(tag="div", ids=ids))
+    if any(s.kind == "triple_abc" for s in specs):
+        subtrees.append(Subtree(tag="div", css_class="plan-item"))
+    return tuple(subtrees)
+
+
+def _find_spec_block(soup: BeautifulSoup, spec: ProviderSpec):
+    if spec.kind == "triple_abc":
+        return _find_triple_abc_block(soup, spec.name)
+    return soup.select_one(f"div#{spec.dom_id}") if spec.dom_id else soup
+
+
+def _parse_spec_block(spec: ProviderSpec, block) -> list[tuple]:
+    """Filas crudas del bloque (antes del corte horario)."""
+    if spec.kind == "table_simple":
+        return _parse_table_simple(block)
+    if spec.kind == "triple_chance":
+        return _filter_expected_triple_chance_times(_parse_triple_chance(block))
+    if spec.kind == "triple_abc":
+        return _filter_expected_triple_abc_times(spec.name, _parse_triple_abc(block))
+    return []
+
+
+def extract_page_blocks(url: str, html: str, names: Optional[Iterable[str]] = None) -> dict[str, Optional[ParsedBlock]]:
+    """
+    Bloque + filas crudas por spec de `url` (None si el bloque no está).
+    Corre en ParsePoolService: sin BD, resultado picklable.
+    """
+    wanted = set(names) if names is not None else None
+    soup = make_soup(html, subtrees=_page_subtrees(url))
+    out: dict[str, Optional[ParsedBlock]] = {}
+    for spec in PROVIDERS:
+        if spec.source_url != url or (wanted is not None and spec.name not in wanted):
+            continue
+        block = _find_spec_block(soup, spec)
+        out[spec.name] = ParsedBlock(spec.name, str(block), _parse_spec_block(spec, block)) if block else None
+    return out
+
+
+def parse_page(url: str, html: str) -> dict[str, list[tuple]]:
+    """Filas crudas por spec de `url`, sin tocar la BD (equivalencia / benchmark)."""
+    return {name: block.rows if block else [] for name, block in extract_page_blocks(url, html).items()}
+
+
 def _filter_expected_triple_abc_times(
     provider_name: str,
     rows: list[Tuple[str, time, str, Optional[dict]]],
@@ -328,29 +416,24 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("--only", help="Procesa solo un dom_id (ej: tripletachira).")
+        parser.add_argument("--url", help="Procesa solo los providers de una página fuente (unidad de fan-out).")
         parser.add_argument("--debug", action="store_true", help="Imprime detalles de parsing (conteos y preview).")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Procesa todos los bloques aunque la página o el bloque no hayan cambiado.",
+        )
 
     def handle(self, *args, **opts):
         only = _clean(opts.get("only") or "")
+        source_url = _clean(opts.get("url") or "")
         debug = bool(opts.get("debug"))
-
-        soup_cache: dict[str, BeautifulSoup] = {}
-
-        def load_soup(url: str) -> BeautifulSoup:
-            s = soup_cache.get(url)
-            if s is not None:
-                return s
-            resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=25)
-            resp.raise_for_status()
-            s = BeautifulSoup(resp.text, "html.parser")
-            soup_cache[url] = s
-            return s
+        force = bool(opts.get("force"))
 
         draw_date = timezone.localdate()
         cutoff_time = get_business_cutoff_time()
-        total_saved = 0
         total_with_signo = 0
-        total_future_purged = 0
+        batch = ResultWriteBatch(model=CurrentResult, draw_date=draw_date, source=SOURCE_KEY)
 
         specs = PROVIDERS
         if only:
@@ -359,110 +442,77 @@ class Command(BaseCommand):
                 s for s in PROVIDERS
                 if needle in {s.dom_id.lower(), s.name.lower().replace(" ", ""), s.name.lower()}
             )
+        if source_url:
+            specs = tuple(s for s in specs if s.source_url == source_url)
+            if not specs:
+                raise CommandError(f"URL sin providers configurados: {source_url}")
+
+        # 1) Fetch: todas las páginas antes de abrir la transacción (sin locks durante la red).
+        pages: dict[str, FetchedPage] = {}
+        with run_phase(PHASE_FETCH):
+            for url in dict.fromkeys(spec.source_url for spec in specs):
+                pages[url] = ScraperFetchService.fetch(
+                    url,
+                    timeout=25,
+                    headers={"User-Agent": "Mozilla/5.0"},
+                    max_age=0 if force else None,
+                    conditional=not force and ScraperFetchService.is_page_fresh(
+                        url,
+                        draw_date=draw_date,
+                        cutoff_time=cutoff_time,
+                    ),
+                )
+
+        # 2) Parse: registros planos por spec; nada toca la BD.
+        page_scopes: dict[str, list[str]] = {}
+        processed_blocks: list[tuple[str, str, Optional[time]]] = []
+        parsed_specs: list[tuple[ProviderSpec, list]] = []
+        with run_phase(PHASE_PARSE):
+            futures = {}
+            for url, page in pages.items():
+                if page.unchanged:
+                    record_run_stats(pages_skipped=1)
+                    continue
+                names = [spec.name for spec in specs if spec.source_url == url]
+                futures[url] = ParsePoolService.submit(extract_page_blocks, url, page.html, names)
+            extracted = {url: ParsePoolService.result(future) for url, future in futures.items()}
 
-        with transaction.atomic():
             for spec in specs:
-                soup = load_soup(spec.source_url)
-                if spec.kind == "triple_abc":
-                    block = _find_triple_abc_block(soup, spec.name)
-                else:
-                    block = soup.select_one(f"div#{spec.dom_id}") if spec.dom_id else soup
-                if not block:
+                if spec.source_url not in extracted:
+                    record_run_stats(blocks_skipped=1)
+                    if debug:
+                        self.stdout.write(f"[debug] {spec.name}: página sin cambios ({spec.source_url})")
+                    continue
+                block = extracted[spec.source_url].get(spec.name)
+                if block is None:
                     if debug:
                         self.stdout.write(f"[debug] missing block for {spec.name} ({spec.source_url})")
                     continue
 
-                if spec.kind == "table_simple":
-                    parsed = _filter_due_current_rows(_parse_table_simple(block), cutoff_time)
-                    provider = _get_or_create_provider(spec.name, spec.source_url)
-                    for t, winning_number, extra in parsed:
-                        _save_result(
-                            provider=provider,
-                            draw_date=draw_date,
-                            draw_time=t,
-                            winning_number=winning_number,
-                            extra=extra,
-                        )
-                        total_saved += 1
-                    total_future_purged += delete_future_rows_for_provider(
-                        model=CurrentResult,
-                        provider=provider,
-                        draw_date=draw_date,
-                        cutoff_time=cutoff_time,
-                    )
-                elif spec.kind == "triple_chance":
-                    parsed = _filter_due_current_rows(
-                        _filter_expected_triple_chance_times(_parse_triple_chance(block)),
-                        cutoff_time,
-                    )
-                    chance_providers = {
-                        group: _get_or_create_provider(f"{spec.name} {group}", spec.source_url)
-                        for group in ("A", "B", "C")
-                    }
-                    for group, t, winning_number, extra in parsed:
-                        provider = chance_providers[group]
-                        _save_result(
-                            provider=provider,
-                            draw_date=draw_date,
-                            draw_time=t,
-                            winning_number=winning_number,
-                            extra=extra,
-                        )
-                        total_saved += 1
-                        if extra and extra.get("signo"):
-                            total_with_signo += 1
-                    for _, p in chance_providers.items():
-                        _cleanup_unexpected_times(p, draw_date, EXPECTED_TRIPLE_CHANCE_TIMES)
-                        total_future_purged += delete_future_rows_for_provider(
-                            model=CurrentResult,
-                            provider=p,
-                            draw_date=draw_date,
-                            cutoff_time=cutoff_time,
-                        )
-                elif spec.kind == "triple_abc":
-                    parsed = _filter_due_current_rows(
-                        _filter_expected_triple_abc_times(spec.name, _parse_triple_abc(block)),
-                        cutoff_time,
-                    )
-                    expected_abc = EXPECTED_TRIPLE_ABC_TIMES.get(spec.name)
-                    expected_groups = ("A", "C") if spec.name == "Triple Zamorano" else ("A", "B", "C")
-                    abc_providers = {
-                        group: _get_or_create_provider(f"{spec.name} {group}", spec.source_url)
-                        for group in expected_groups
-                    }
-                    for group, t, winning_number, extra in parsed:
-                        provider = abc_providers[group]
-                        _save_result(
-                            provider=provider,
-                            draw_date=draw_date,
-                            draw_time=t,
-                            winning_number=winning_number,
-                            extra=extra,
-                        )
-                        total_saved += 1
-                        if extra and extra.get("signo"):
-                            total_with_signo += 1
-                    if expected_abc:
-                        for _, p in abc_providers.items():
-                            _cleanup_unexpected_times(p, draw_date, expected_abc)
-                            total_future_purged += delete_future_rows_for_provider(
-                                model=CurrentResult,
-                                provider=p,
-                                draw_date=draw_date,
-                                cutoff_time=cutoff_time,
-                            )
-                else:
-                    parsed = []
+                scope = f"lotoven_triples:{spec.dom_id}"
+                fragment = block.fragment
+                page_scopes.setdefault(spec.source_url, []).append(scope)
+                if not force and ScraperFetchService.is_block_unchanged(
+                    scope,
+                    fragment,
+                    draw_date=draw_date,
+                    cutoff_time=cutoff_time,
+                ):
+                    record_run_stats(blocks_skipped=1)
+                    if debug:
+                        self.stdout.write(f"[debug] {spec.name}: bloque sin cambios")
+                    continue
+
+                raw_rows = block.rows
+                parsed = _filter_due_current_rows(raw_rows, cutoff_time)
+                parsed_specs.append((spec, parsed))
+                processed_blocks.append(
+                    (scope, fragment, next_recheck_time((_row_draw_time(r) for r in raw_rows), cutoff_time))
+                )
 
                 if debug:
-                    uls = len(block.select("ul.plan-invest-limit"))
-                    signo_count = 0
-                    if spec.kind == "triple_abc":
-                        signo_count = sum(1 for _, _, _, e in parsed if e and e.get("signo"))
-                    elif spec.kind == "triple_chance":
-                        signo_count = sum(1 for _, _, _, e in parsed if e and e.get("signo"))
-                    else:
-                        signo_count = sum(1 for _, _, e in parsed if e and e.get("signo"))
+                    uls = len(make_soup(fragment).select("ul.plan-invest-limit"))
+                    signo_count = sum(1 for r in parsed if r[-1] and r[-1].get("signo"))
                     self.stdout.write(
                         f"[debug] {spec.name} kind={spec.kind} saved={len(parsed)} "
                         f"uls={uls} has_signo={signo_count}"
@@ -470,10 +520,36 @@ class Command(BaseCommand):
                     if parsed[:2]:
                         self.stdout.write(f"[debug] sample={parsed[:2]}")
 
-        DeviceRedisService.delete_cache("results:current:all")
+        # 3) Apply: una transacción corta con providers + escritura diff-based.
+        with run_phase(PHASE_TRANSACTION), transaction.atomic():
+            providers = _resolve_providers(specs)
+            for spec, parsed in parsed_specs:
+                total_with_signo += _add_spec_rows(batch, spec, parsed, providers, cutoff_time)
+
+            summary = ResultWriteService.apply(batch)
+            transaction.on_commit(
+                lambda: self._remember_processed(
+                    pages=pages,
+                    page_scopes=page_scopes if not only else {},
+                    processed_blocks=processed_blocks,
+                    draw_date=draw_date,
+                )
+            )
+
+        ResultsCacheService.invalidate(TRIPLES)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Guardados {total_saved} resultados (con signo={total_with_signo}, futuras_limpiadas={total_future_purged})"
+                f"Guardados {summary.saved} resultados (nuevos={summary.inserted}, cambiados={summary.changed}, "
+                f"sin_cambios={summary.unchanged}, con signo={total_with_signo}, limpiadas={summary.deleted})"
             )
         )
+
+    @staticmethod
+    def _remember_processed(*, pages, page_scopes, processed_blocks, draw_date) -> None:
+        for scope, fragment, recheck_after in processed_blocks:
+            ScraperFetchService.remember_block(scope, fragment, draw_date=draw_date, recheck_after=recheck_after)
+        for url, scopes in page_scopes.items():
+            page = pages.get(url)
+            if page is not None:
+                ScraperFetchService.remember_page(page, draw_date=draw_date, block_scopes=scopes)
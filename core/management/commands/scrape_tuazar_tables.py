@@ -28,21 +28,29 @@ from dataclasses import dataclass
 from datetime import datetime, time
 from typing import Dict, Iterable, List, Optional, Tuple
 
-import requests
 from bs4 import BeautifulSoup
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
-from django.core.cache import cache
 
 from core.models import Provider, CurrentResult
-from core.services.result_window_service import (
-    delete_future_rows_for_provider,
-    get_business_cutoff_time,
-)
+from core.services.html_parser_service import Subtree, make_soup
+from core.services.parse_pool_service import ParsedBlock, ParsePoolService
+from core.services.provider_registry import ProviderRegistry
+from core.services.results_cache_service import TRIPLES, ResultsCacheService
+from core.services.result_window_service import get_business_cutoff_time
+from core.services.result_write_service import ResultWriteBatch, ResultWriteService
+from core.services.scraper_fetch_service import FetchedPage, ScraperFetchService, next_recheck_time
+from core.services.scraper_run_stats import PHASE_FETCH, PHASE_PARSE, PHASE_TRANSACTION, record_run_stats, run_phase
+
+# scraper_key: fuente de ResultObservation al reconciliar con otras webs.
+SOURCE_KEY = "tuazar_triples"
 TUAZAR_URL = "https://www.tuazar.com/loteria/resultados/"
 
+# Parseo dirigido: todos los bloques de TARGETS viven dentro de <div class="resultados">.
+TUAZAR_SUBTREES = (Subtree(tag="div", css_class="resultados"),)
+
 
 # -----------------------------
 # Normalización
@@ -258,62 +266,60 @@ def _find_block_by_title(soup: BeautifulSoup, title_contains: str) -> Optional[B
 # -----------------------------
 
 def _get_or_create_provider(name: str) -> Provider:
-    provider, _ = Provider.objects.get_or_create(
-        name=name,
-        defaults={"source_url": TUAZAR_URL, "is_active": True},
-    )
-    return provider
+    return ProviderRegistry.ensure_one(name, source_url=TUAZAR_URL)
 
 
-def _save_row(*, provider: Provider, draw_date, row: ParsedRow) -> bool:
+def _add_row(batch: ResultWriteBatch, *, provider: Provider, row: ParsedRow) -> bool:
     """
-    Upsert de CurrentResult por (provider, draw_date, draw_time).
-    Devuelve True si guardó algo.
+    Agrega la fila al batch de CurrentResult por (provider, draw_date, draw_time).
+    Devuelve True si hay algo que guardar.
     """
     if not row.number:
         return False
 
-    # extra con signo cuando aplique.
-    defaults = {"winning_number": row.number, "image_url": ""}
-
-    # IMPORTANTE: tu modelo real tiene extra JSONField según tu resumen.
-    # Si en algún entorno no existe, esto fallará y debes alinear el modelo.
+    # extra con signo cuando aplique (sin signo, `extra` existente no se toca).
+    values = {"winning_number": row.number, "image_url": ""}
     if row.signo:
-        defaults["extra"] = {"signo": row.signo}
-
-    CurrentResult.objects.update_or_create(
-        provider=provider,
-        draw_date=draw_date,
-        draw_time=row.draw_time,
-        defaults=defaults,
-    )
+        values["extra"] = {"signo": row.signo}
+
+    batch.add(provider, row.draw_time, **values)
     return True
 
 
-def _invalidate_results_cache() -> None:
-    """
-    Invalida cache de resultados por patrón.
-    El backend suele ser django-redis, que expone cache.delete_pattern(pattern).
-    Si no existe, degradamos de forma segura sin reventar el comando.
-    """
-    patterns = [
-        "results:triples:*",
-        "results:current:*",
-    ]
+def _filter_due_rows(rows: List[ParsedRow], cutoff_time: time) -> List[ParsedRow]:
+    return [row for row in rows if row.draw_time <= cutoff_time]
 
-    delete_pattern = getattr(cache, "delete_pattern", None)
-    if callable(delete_pattern):
-        for p in patterns:
-            delete_pattern(p)
-        return
 
-    # Fallback: si no hay soporte de pattern delete, al menos limpiamos la clave global si existe.
-    for k in ["results:current:all"]:
-        cache.delete(k)
+def _remember_processed(*, page: FetchedPage, block_scopes, processed_blocks, draw_date) -> None:
+    for scope, fragment, recheck_after in processed_blocks:
+        ScraperFetchService.remember_block(scope, fragment, draw_date=draw_date, recheck_after=recheck_after)
+    ScraperFetchService.remember_page(page, draw_date=draw_date, block_scopes=block_scopes)
 
 
-def _filter_due_rows(rows: List[ParsedRow], cutoff_time: time) -> List[ParsedRow]:
-    return [row for row in rows if row.draw_time <= cutoff_time]
+# Mapeo de targets (títulos tal como suelen aparecer en la web).
+# Si TuAzar cambia acentos/mayúsculas, _find_block_by_title lo tolera.
+TARGETS: Dict[str, str] = {
+    "Chance Astral": "CHANCE ASTRAL",
+    "Triple Gana": "TRIPLE GANA",
+    "Super Gana": "SUPER GANA",
+}
+
+
+def extract_blocks(html: str) -> Dict[str, Optional[ParsedBlock]]:
+    """Bloque + filas por provider de TARGETS (None si falta). Corre en ParsePoolService."""
+    soup = make_soup(html, subtrees=TUAZAR_SUBTREES)
+    out: Dict[str, Optional[ParsedBlock]] = {}
+    for provider_name, title in TARGETS.items():
+        block = _find_block_by_title(soup, title)
+        out[provider_name] = (
+            ParsedBlock(provider_name, str(block), _parse_block_triple_and_signo(block)) if block else None
+        )
+    return out
+
+
+def parse_page(html: str) -> Dict[str, List[ParsedRow]]:
+    """Filas por provider de TARGETS, sin tocar la BD (equivalencia / benchmark)."""
+    return {name: block.rows if block else [] for name, block in extract_blocks(html).items()}
 
 
 # -----------------------------
@@ -331,105 +337,112 @@ class Command(BaseCommand):
             default="",
             help="Ruta a un archivo HTML local para pruebas offline (si se define, no hace HTTP).",
         )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Procesa todos los bloques aunque la página o el bloque no hayan cambiado.",
+        )
 
     def handle(self, *args, **opts):
         timeout: int = opts["timeout"]
         html_file: str = (opts["html_file"] or "").strip()
+        force: bool = bool(opts.get("force"))
 
+        today = timezone.localdate()
+        cutoff_time = get_business_cutoff_time()
+
+        page: Optional[FetchedPage] = None
         if html_file:
             with open(html_file, "r", encoding="utf-8", errors="ignore") as f:
                 html = f.read()
+            # Un archivo local es siempre una prueba explícita: no se salta nada.
+            force = True
         else:
-            resp = requests.get(
-                TUAZAR_URL,
-                timeout=timeout,
-                headers={"User-Agent": "loteria-tv-bot/1.0 (+contact: admin@local)"},
-            )
-            resp.raise_for_status()
-            html = resp.text
-
-        soup = BeautifulSoup(html, "html.parser")
-        today = timezone.localdate()
-        cutoff_time = get_business_cutoff_time()
-
-        # Mapeo de targets (títulos tal como suelen aparecer en la web).
-        # Si TuAzar cambia acentos/mayúsculas, _find_block_by_title lo tolera.
-        targets = {
-            "Chance Astral": {"type": "triple_signo", "title": "CHANCE ASTRAL"},
-            "Triple Gana": {"type": "triple_signo", "title": "TRIPLE GANA"},
-            "Super Gana": {"type": "triple_signo", "title": "SUPER GANA"},
-        }
+            with run_phase(PHASE_FETCH):
+                page = ScraperFetchService.fetch(
+                    TUAZAR_URL,
+                    timeout=timeout,
+                    headers={"User-Agent": "loteria-tv-bot/1.0 (+contact: admin@local)"},
+                    max_age=0 if force else None,
+                    conditional=not force and ScraperFetchService.is_page_fresh(
+                        TUAZAR_URL,
+                        draw_date=today,
+                        cutoff_time=cutoff_time,
+                    ),
+                )
+            if page.unchanged:
+                record_run_stats(pages_skipped=1, blocks_skipped=len(TARGETS))
+                self.stdout.write(self.style.SUCCESS("TuAzar scrape finalizado: página sin cambios."))
+                return
+            html = page.html
 
-        saved = 0
         saved_with_signo = 0
-        future_purged = 0
+        batch = ResultWriteBatch(model=CurrentResult, draw_date=today, source=SOURCE_KEY)
+        skipped_blocks = 0
         missing_blocks: List[str] = []
-
-        with transaction.atomic():
-            # 1) Chance Astral (con signo)
-            b = _find_block_by_title(soup, targets["Chance Astral"]["title"])
-            if not b:
-                missing_blocks.append("Chance Astral")
-            else:
-                provider = _get_or_create_provider("Chance Astral")
-                rows = _filter_due_rows(_parse_block_triple_and_signo(b), cutoff_time)
-                for r in rows:
-                    if _save_row(provider=provider, draw_date=today, row=r):
-                        saved += 1
-                        if r.signo:
-                            saved_with_signo += 1
-                future_purged += delete_future_rows_for_provider(
-                    model=CurrentResult,
-                    provider=provider,
+        block_scopes: List[str] = []
+        processed_blocks: List[Tuple[str, str, Optional[time]]] = []
+        parsed_blocks: List[Tuple[str, List[ParsedRow]]] = []
+
+        # Parseo fuera de la transacción: registros planos por provider.
+        with run_phase(PHASE_PARSE):
+            # Todos los targets actuales son triple + signo.
+            extracted = ParsePoolService.result(ParsePoolService.submit(extract_blocks, html))
+            for provider_name, b in extracted.items():
+                if b is None:
+                    missing_blocks.append(provider_name)
+                    continue
+
+                scope = f"tuazar_triples:{provider_name}"
+                fragment = b.fragment
+                block_scopes.append(scope)
+                if not force and ScraperFetchService.is_block_unchanged(
+                    scope,
+                    fragment,
                     draw_date=today,
                     cutoff_time=cutoff_time,
+                ):
+                    skipped_blocks += 1
+                    continue
+
+                parsed = b.rows
+                parsed_blocks.append((provider_name, _filter_due_rows(parsed, cutoff_time)))
+                processed_blocks.append(
+                    (scope, fragment, next_recheck_time((r.draw_time for r in parsed), cutoff_time))
                 )
 
-            # 2) Triple Gana (con signo)
-            b = _find_block_by_title(soup, targets["Triple Gana"]["title"])
-            if not b:
-                missing_blocks.append("Triple Gana")
-            else:
-                provider = _get_or_create_provider("Triple Gana")
-                rows = _filter_due_rows(_parse_block_triple_and_signo(b), cutoff_time)
+        with run_phase(PHASE_TRANSACTION), transaction.atomic():
+            for provider_name, rows in parsed_blocks:
+                provider = _get_or_create_provider(provider_name)
                 for r in rows:
-                    if _save_row(provider=provider, draw_date=today, row=r):
-                        saved += 1
-                        if r.signo:
-                            saved_with_signo += 1
-                future_purged += delete_future_rows_for_provider(
-                    model=CurrentResult,
-                    provider=provider,
-                    draw_date=today,
-                    cutoff_time=cutoff_time,
+                    if _add_row(batch, provider=provider, row=r) and r.signo:
+                        saved_with_signo += 1
+                batch.window(provider, cutoff_time=cutoff_time)
+
+            summary = ResultWriteService.apply(batch)
+            if page is not None:
+                transaction.on_commit(
+                    lambda: _remember_processed(
+                        page=page,
+                        block_scopes=block_scopes,
+                        processed_blocks=processed_blocks,
+                        draw_date=today,
+                    )
                 )
 
-            # 3) Super Gana (con signo)
-            b = _find_block_by_title(soup, targets["Super Gana"]["title"])
-            if not b:
-                missing_blocks.append("Super Gana")
-            else:
-                provider = _get_or_create_provider("Super Gana")
-                rows = _filter_due_rows(_parse_block_triple_and_signo(b), cutoff_time)
-                for r in rows:
-                    if _save_row(provider=provider, draw_date=today, row=r):
-                        saved += 1
-                        if r.signo:
-                            saved_with_signo += 1
-                future_purged += delete_future_rows_for_provider(
-                    model=CurrentResult,
-                    provider=provider,
-                    draw_date=today,
-                    cutoff_time=cutoff_time,
-                )
+        record_run_stats(blocks_skipped=skipped_blocks)
 
         # Cache invalidation al final (crítico por tu keyspace results:triples:v4:...:{YYYY-MM-DD})
-        _invalidate_results_cache()
+        ResultsCacheService.invalidate(TRIPLES)
 
         # Resumen
         self.stdout.write(self.style.SUCCESS("TuAzar scrape finalizado."))
-        self.stdout.write(f"- Guardados/upsert: {saved}")
+        self.stdout.write(
+            f"- Guardados: {summary.saved} (nuevos={summary.inserted}, cambiados={summary.changed}, "
+            f"sin_cambios={summary.unchanged})"
+        )
         self.stdout.write(f"- Guardados con signo: {saved_with_signo}")
-        self.stdout.write(f"- Filas futuras limpiadas: {future_purged}")
+        self.stdout.write(f"- Filas futuras limpiadas: {summary.deleted}")
+        self.stdout.write(f"- Bloques sin cambios: {skipped_blocks}")
         if missing_blocks:
             self.stdout.write(self.style.WARNING(f"- Bloques no encontrados en HTML: {', '.join(missing_blocks)}"))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.upstream_simulator import STATS_PATH, FaultProfile, UpstreamSimulator
+
+
+class Command(BaseCommand):
+    help = (
+        "Levanta un upstream local (lotoven / tuazar / lottoresultados) sobre el corpus sintético, "
+        "con latencia, ancho de banda, 503 / timeouts y timeline de publicación configurables. "
+        "Los scrapers lo usan con SCRAPER_UPSTREAM_OVERRIDE=http://host:port."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", type=str, default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=int, default=0, help="Latencia fija por request.")
+        parser.add_argument("--jitter-ms", type=int, default=0, help="Latencia extra aleatoria (0..N ms).")
+        parser.add_argument("--bandwidth-kbps", type=int, default=0, help="Límite de ancho de banda (0 = sin límite).")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 503 (0..1).")
+        parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fracción de requests que cuelgan (0..1).")
+        parser.add_argument("--hang-seconds", type=float, default=30.0, help="Cuánto cuelga un timeout inyectado.")
+        parser.add_argument(
+            "--timeline",
+            type=str,
+            default="",
+            help='JSON {url: [{"at": segundos, "file": "fixture.html"}, ...]}: publicación de resultados en el tiempo.',
+        )
+        parser.add_argument("--fixtures-dir", type=str, default="", help="Directorio alternativo del corpus.")
+        parser.add_argument("--seed", type=int, default=None, help="Semilla para fallas reproducibles.")
+        parser.add_argument("--duration", type=float, default=0, help="Segundos a servir (0 = hasta Ctrl+C).")
+
+    def handle(self, *args, **opts):
+        for name in ("error_rate", "timeout_rate"):
+            if not 0 <= opts[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} debe estar entre 0 y 1.")
+
+        timeline = None
+        if opts["timeline"]:
+            path = Path(opts["timeline"])
+            if not path.exists():
+                raise CommandError(f"No existe el timeline {path}.")
+            timeline = json.loads(path.read_text(encoding="utf-8"))
+
+        profile = FaultProfile(
+            latency_ms=opts["latency_ms"],
+            jitter_ms=opts["jitter_ms"],
+            bandwidth_kbps=opts["bandwidth_kbps"],
+            error_rate=opts["error_rate"],
+            timeout_rate=opts["timeout_rate"],
+            hang_seconds=opts["hang_seconds"],
+        )
+        simulator = UpstreamSimulator.from_corpus(
+            timeline=timeline,
+            profile=profile,
+            base_dir=(opts["fixtures_dir"] or "").strip() or None,
+            host=opts["host"],
+            port=opts["port"],
+            seed=opts["seed"],
+        )
+
+        with simulator:
+            self.stdout.write(f"Simulador en {simulator.base_url} ({len(simulator.routes)} rutas)")
+            self.stdout.write(f"  export SCRAPER_UPSTREAM_OVERRIDE={simulator.base_url}")
+            self.stdout.write(f"  stats: {simulator.base_url}{STATS_PATH}")
+            try:
+                if opts["duration"]:
+                    time.sleep(opts["duration"])
+                else:
+                    while True:
+                        time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+
+        self.stdout.write(json.dumps(simulator.stats.as_dict(), indent=2))
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_scraperhealth_notification_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scraperhealth",
+            name="last_pages_skipped",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scraperhealth",
+            name="last_blocks_skipped",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
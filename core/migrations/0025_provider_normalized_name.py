@@ -0,0 +1,70 @@
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize(name):
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+RESULT_MODELS = ("CurrentResult", "ResultArchive", "AnimalitoResult", "AnimalitoArchive")
+
+
+def merge_duplicate_providers(apps, schema_editor):
+    """
+    Agrupa providers por nombre normalizado. Se conserva el de menor id; las
+    filas de resultados de los duplicados se reasignan (o se descartan si el
+    conservado ya tiene ese mismo sorteo) y luego se borran los duplicados.
+    """
+    Provider = apps.get_model("core", "Provider")
+
+    groups = {}
+    for provider in Provider.objects.order_by("id"):
+        groups.setdefault(_normalize(provider.name), []).append(provider)
+
+    for key, providers in groups.items():
+        keeper, duplicates = providers[0], providers[1:]
+        for duplicate in duplicates:
+            if not keeper.logo_url and duplicate.logo_url:
+                keeper.logo_url = duplicate.logo_url
+            keeper.is_active = keeper.is_active or duplicate.is_active
+
+            for model_name in RESULT_MODELS:
+                model = apps.get_model("core", model_name)
+                taken = set(
+                    model.objects.filter(provider_id=keeper.id).values_list("draw_date", "draw_time")
+                )
+                for row in model.objects.filter(provider_id=duplicate.id):
+                    if (row.draw_date, row.draw_time) in taken:
+                        row.delete()
+                    else:
+                        model.objects.filter(pk=row.pk).update(provider_id=keeper.id)
+
+            duplicate.delete()
+
+        keeper.normalized_name = key or f"provider {keeper.id}"
+        keeper.save(update_fields=["normalized_name", "logo_url", "is_active"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0024_scraperhealth_skip_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provider",
+            name="normalized_name",
+            field=models.CharField(max_length=100, null=True, editable=False),
+        ),
+        migrations.RunPython(merge_duplicate_providers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="provider",
+            name="normalized_name",
+            field=models.CharField(max_length=100, unique=True, editable=False),
+        ),
+    ]
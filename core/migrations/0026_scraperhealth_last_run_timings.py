@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0025_provider_normalized_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scraperhealth",
+            name="last_run_timings",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0026_scraperhealth_last_run_timings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScraperUnitHealth",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("scraper_key", models.CharField(db_index=True, max_length=64)),
+                ("unit_key", models.CharField(max_length=120, unique=True)),
+                ("label", models.CharField(max_length=160)),
+                ("providers", models.CharField(blank=True, default="", max_length=255)),
+                (
+                    "last_status",
+                    models.CharField(
+                        choices=[
+                            ("never", "Never"),
+                            ("running", "Running"),
+                            ("success", "Success"),
+                            ("failed", "Failed"),
+                        ],
+                        default="never",
+                        max_length=16,
+                    ),
+                ),
+                ("last_started_at", models.DateTimeField(blank=True, null=True)),
+                ("last_finished_at", models.DateTimeField(blank=True, null=True)),
+                ("last_success_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error_message", models.TextField(blank=True, default="")),
+                ("consecutive_failures", models.PositiveIntegerField(default=0)),
+                ("last_attempts", models.PositiveIntegerField(default=0)),
+                ("last_rows_written", models.PositiveIntegerField(default=0)),
+                ("last_run_timings", models.JSONField(blank=True, default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Scraper unit health",
+                "verbose_name_plural": "Scraper unit health",
+                "ordering": ["scraper_key", "unit_key"],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0027_scraperunithealth"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scraperhealth",
+            name="skipped_runs",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scraperhealth",
+            name="last_skipped_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0028_scraperhealth_skipped_runs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResultObservation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "result_kind",
+                    models.CharField(
+                        choices=[("triples", "Triples"), ("animalitos", "Animalitos")],
+                        max_length=16,
+                    ),
+                ),
+                ("source", models.CharField(max_length=64)),
+                ("draw_date", models.DateField()),
+                ("draw_time", models.TimeField()),
+                ("value", models.CharField(max_length=120)),
+                ("observed_at", models.DateTimeField()),
+                ("publish_lag_seconds", models.IntegerField(blank=True, null=True)),
+                ("accepted", models.BooleanField(default=False)),
+                ("disagrees", models.BooleanField(db_index=True, default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="observations",
+                        to="core.provider",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-draw_date", "-draw_time", "observed_at"],
+                "indexes": [models.Index(fields=["draw_date", "source"], name="result_obs_date_source_idx")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("result_kind", "provider", "draw_date", "draw_time", "source"),
+                        name="uniq_result_observation_source",
+                    )
+                ],
+            },
+        ),
+    ]
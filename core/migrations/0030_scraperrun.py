@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0029_resultobservation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScraperRun",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("scraper_key", models.CharField(max_length=64)),
+                (
+                    "outcome",
+                    models.CharField(choices=[("success", "Success"), ("failed", "Failed")], max_length=16),
+                ),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField()),
+                ("duration_ms", models.FloatField(default=0)),
+                ("fetch_ms", models.FloatField(default=0)),
+                ("connect_ms", models.FloatField(default=0)),
+                ("download_ms", models.FloatField(default=0)),
+                ("parse_ms", models.FloatField(default=0)),
+                ("transaction_ms", models.FloatField(default=0)),
+                ("cache_ms", models.FloatField(default=0)),
+                ("bytes_downloaded", models.PositiveBigIntegerField(default=0)),
+                ("pages_skipped", models.PositiveIntegerField(default=0)),
+                ("rows_inserted", models.PositiveIntegerField(default=0)),
+                ("rows_changed", models.PositiveIntegerField(default=0)),
+                ("rows_unchanged", models.PositiveIntegerField(default=0)),
+                ("rows_deleted", models.PositiveIntegerField(default=0)),
+                ("error_message", models.TextField(blank=True, default="")),
+            ],
+            options={
+                "ordering": ["-started_at"],
+                "indexes": [
+                    models.Index(fields=["scraper_key", "-started_at"], name="scraper_run_key_started_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0030_scraperrun"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NumberFrequency",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "result_kind",
+                    models.CharField(
+                        choices=[("triples", "Triples"), ("animalitos", "Animalitos")],
+                        max_length=16,
+                    ),
+                ),
+                ("number", models.CharField(max_length=10)),
+                ("period", models.CharField(choices=[("day", "Día"), ("month", "Mes")], max_length=8)),
+                ("period_start", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="number_frequencies",
+                        to="core.provider",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-period_start", "-count"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("result_kind", "provider", "period", "period_start", "number"),
+                        name="uniq_number_frequency_period",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="NumberLastSeen",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "result_kind",
+                    models.CharField(
+                        choices=[("triples", "Triples"), ("animalitos", "Animalitos")],
+                        max_length=16,
+                    ),
+                ),
+                ("number", models.CharField(max_length=10)),
+                ("last_seen", models.DateField()),
+                ("total_count", models.PositiveIntegerField(default=0)),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="numbers_last_seen",
+                        to="core.provider",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["last_seen"],
+                "indexes": [
+                    models.Index(fields=["result_kind", "provider", "last_seen"], name="number_last_seen_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("result_kind", "provider", "number"),
+                        name="uniq_number_last_seen",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0031_numberfrequency_numberlastseen"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NumberOccurrence",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "result_kind",
+                    models.CharField(
+                        choices=[("triples", "Triples"), ("animalitos", "Animalitos")],
+                        max_length=16,
+                    ),
+                ),
+                ("number", models.CharField(max_length=10)),
+                ("draw_date", models.DateField()),
+                ("draw_time", models.TimeField()),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="number_occurrences",
+                        to="core.provider",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-draw_date", "-draw_time", "-provider_id"],
+                "indexes": [
+                    models.Index(
+                        fields=["result_kind", "number", "-draw_date", "-draw_time", "-provider"],
+                        name="number_occurrence_keyset_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("result_kind", "provider", "draw_date", "draw_time"),
+                        name="uniq_number_occurrence_draw",
+                    )
+                ],
+            },
+        ),
+    ]
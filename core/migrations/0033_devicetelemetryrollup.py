@@ -0,0 +1,60 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0032_numberoccurrence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceTelemetryRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("hour", models.DateTimeField()),
+                (
+                    "event_type",
+                    models.CharField(
+                        choices=[
+                            ("HEARTBEAT", "Heartbeat"),
+                            ("LOAD_SUCCESS", "Load success"),
+                            ("LOAD_ERROR", "Load error"),
+                            ("LOW_MEMORY", "Low memory"),
+                            ("APP_START", "App start"),
+                            ("APP_RESUME", "App resume"),
+                            ("APP_PAUSE", "App pause"),
+                            ("APP_STOP", "App stop"),
+                            ("WEBVIEW_INFO", "WebView info"),
+                            ("CUSTOM", "Custom"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="telemetry_rollups",
+                        to="core.device",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Device telemetry rollup",
+                "verbose_name_plural": "Device telemetry rollups",
+                "ordering": ["-hour", "device_id", "event_type"],
+                "indexes": [
+                    models.Index(fields=["event_type", "hour"], name="telemetry_rollup_type_hour_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("device", "hour", "event_type"),
+                        name="uniq_telemetry_rollup_device_hour_type",
+                    )
+                ],
+            },
+        ),
+    ]
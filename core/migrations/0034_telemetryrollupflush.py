@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0033_devicetelemetryrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TelemetryRollupFlush",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("key", models.CharField(max_length=120, unique=True)),
+                ("flushed_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "verbose_name": "Telemetry rollup flush",
+                "verbose_name_plural": "Telemetry rollup flushes",
+                "ordering": ["-flushed_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,154 @@
+"""
+Particionado por `draw_date` (un día por partición + DEFAULT) de las tablas
+de resultados y archivo. Solo Postgres; en SQLite no hace nada.
+
+El estado de Django no cambia: Django 5.0 no puede representar la PK física
+(id, draw_date) que Postgres exige en tablas particionadas. Django sigue
+viendo `id` como PK, y sigue siendo único porque cada par current / archive
+toma ids de una secuencia compartida (el rollover mueve filas entre ellas).
+Las constraints, FKs e índices se recrean con los mismos nombres que genera
+Django, así las migraciones posteriores los encuentran. Ver README
+("Particionado") antes de tocar el esquema de estas tablas.
+"""
+
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+# (modelo del día, modelo archivo, secuencia compartida de ids)
+PAIRS = [
+    ("CurrentResult", "ResultArchive", "core_triples_id_seq"),
+    ("AnimalitoResult", "AnimalitoArchive", "core_animalitos_id_seq"),
+]
+# Días futuros con partición; después los crea ensure_result_partitions (beat).
+DAYS_AHEAD = 7
+
+
+def is_partitioned(schema_editor, table):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def add_django_constraints(schema_editor, model):
+    # Mismos nombres que usaría Django (constraints de Meta, FK e índice del FK).
+    for constraint in model._meta.constraints:
+        schema_editor.add_constraint(model, constraint)
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+    for field in model._meta.local_fields:
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s"))
+        for statement in schema_editor._field_indexes_sql(model, field):
+            schema_editor.execute(statement)
+
+
+def column_list(schema_editor, model):
+    return ", ".join(schema_editor.quote_name(field.column) for field in model._meta.concrete_fields)
+
+
+def partition_table(schema_editor, model, *, like=None, days=()):
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    legacy = f"{table}_unpartitioned"
+    columns = column_list(schema_editor, model)
+
+    schema_editor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+    # Sin INCLUDING IDENTITY: el id sale de la secuencia compartida del par.
+    schema_editor.execute(
+        f"CREATE TABLE {qn(table)} (LIKE {qn(like or legacy)} INCLUDING DEFAULTS) PARTITION BY RANGE (draw_date)"
+    )
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id DROP DEFAULT")
+    schema_editor.execute(f"CREATE TABLE {qn(table + '_pdefault')} PARTITION OF {qn(table)} DEFAULT")
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT draw_date FROM {qn(legacy)}")
+        all_days = {row[0] for row in cursor.fetchall()} | set(days)
+    for day in sorted(all_days):
+        schema_editor.execute(
+            f"CREATE TABLE {qn(f'{table}_p{day:%Y%m%d}')} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+            [day, day + timedelta(days=1)],
+        )
+
+    schema_editor.execute(f"INSERT INTO {qn(table)} ({columns}) SELECT {columns} FROM {qn(legacy)}")
+    schema_editor.execute(f"DROP TABLE {qn(legacy)} CASCADE")
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, draw_date)")
+    add_django_constraints(schema_editor, model)
+
+
+def unpartition_table(schema_editor, model):
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    partitioned = f"{table}_partitioned"
+    columns = column_list(schema_editor, model)
+
+    schema_editor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(partitioned)}")
+    schema_editor.execute(f"CREATE TABLE {qn(table)} (LIKE {qn(partitioned)} INCLUDING DEFAULTS)")
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id DROP DEFAULT")
+    schema_editor.execute(f"INSERT INTO {qn(table)} ({columns}) SELECT {columns} FROM {qn(partitioned)}")
+    # Con la tabla particionada se van también sus particiones.
+    schema_editor.execute(f"DROP TABLE {qn(partitioned)} CASCADE")
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id)")
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), GREATEST(1, (SELECT COALESCE(MAX(id), 0) FROM {qn(table)})))",
+        [table],
+    )
+    add_django_constraints(schema_editor, model)
+
+
+def partition_results(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    qn = schema_editor.quote_name
+    today = timezone.localdate()
+    upcoming = [today + timedelta(days=offset) for offset in range(DAYS_AHEAD + 1)]
+    for current_name, archive_name, sequence in PAIRS:
+        current = apps.get_model("core", current_name)
+        archive = apps.get_model("core", archive_name)
+        tables = [current._meta.db_table, archive._meta.db_table]
+        if all(is_partitioned(schema_editor, table) for table in tables):
+            continue
+
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {qn(sequence)}")
+        if not is_partitioned(schema_editor, tables[0]):
+            partition_table(schema_editor, current, days=upcoming)
+        if not is_partitioned(schema_editor, tables[1]):
+            # Mismo orden de columnas que la tabla del día: el rollover (ATTACH) lo exige.
+            partition_table(schema_editor, archive, like=tables[0])
+
+        schema_editor.execute(
+            f"SELECT setval(%s, GREATEST(1, "
+            f"(SELECT COALESCE(MAX(id), 0) FROM {qn(tables[0])}), "
+            f"(SELECT COALESCE(MAX(id), 0) FROM {qn(tables[1])})))",
+            [sequence],
+        )
+        for table in tables:
+            schema_editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval(%s)", [sequence])
+
+
+def unpartition_results(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for current_name, archive_name, sequence in PAIRS:
+        for name in (current_name, archive_name):
+            model = apps.get_model("core", name)
+            if is_partitioned(schema_editor, model._meta.db_table):
+                unpartition_table(schema_editor, model)
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {schema_editor.quote_name(sequence)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0034_telemetryrollupflush"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_results, unpartition_results),
+    ]
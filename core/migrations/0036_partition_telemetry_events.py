@@ -0,0 +1,144 @@
+"""
+Particionado por `created_at` (un día o una semana UTC por partición +
+DEFAULT, según TELEMETRY_PARTITION_INTERVAL) de DeviceTelemetryEvent. Solo
+Postgres; en SQLite no hace nada.
+
+Igual que 0035, el estado de Django no cambia: la PK física es
+(id, created_at) y el id sale de una secuencia propia, pero Django sigue
+viendo `id` como PK. FK, índice del FK e índices de Meta se recrean con los
+nombres que genera Django. El intervalo se fija acá: cambiarlo después deja
+particiones solapadas.
+"""
+
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+SEQUENCE = "core_telemetry_event_id_seq"
+INTERVAL_DAYS = {"day": 1, "week": 7}
+# Días futuros con partición; después los crea ensure_telemetry_partitions (beat).
+DAYS_AHEAD = 7
+
+
+def interval_days():
+    interval = str(getattr(settings, "TELEMETRY_PARTITION_INTERVAL", "day")).strip().lower()
+    return INTERVAL_DAYS.get(interval, 1)
+
+
+def period_start(day):
+    if interval_days() == 7:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def bounds(start):
+    lower = datetime.combine(start, time.min, tzinfo=dt_timezone.utc)
+    return [lower, lower + timedelta(days=interval_days())]
+
+
+def is_partitioned(schema_editor, table):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def add_django_constraints(schema_editor, model):
+    # Mismos nombres que usaría Django (índices de Meta, FK e índice del FK).
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+    for field in model._meta.local_fields:
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s"))
+        for statement in schema_editor._field_indexes_sql(model, field):
+            schema_editor.execute(statement)
+
+
+def column_list(schema_editor, model):
+    return ", ".join(schema_editor.quote_name(field.column) for field in model._meta.concrete_fields)
+
+
+def partition_events(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    model = apps.get_model("core", "DeviceTelemetryEvent")
+    table = model._meta.db_table
+    if is_partitioned(schema_editor, table):
+        return
+
+    qn = schema_editor.quote_name
+    legacy = f"{table}_unpartitioned"
+    columns = column_list(schema_editor, model)
+
+    schema_editor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+    # La secuencia identity de la tabla vieja muere con ella: el id pasa a una
+    # secuencia propia.
+    schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {qn(SEQUENCE)}")
+    schema_editor.execute(
+        f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+    )
+    schema_editor.execute(f"CREATE TABLE {qn(table + '_pdefault')} PARTITION OF {qn(table)} DEFAULT")
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT (created_at AT TIME ZONE 'UTC')::date FROM {qn(legacy)}")
+        periods = {period_start(row[0]) for row in cursor.fetchall()}
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    periods.update(period_start(today + timedelta(days=offset)) for offset in range(DAYS_AHEAD + 1))
+    for period in sorted(periods):
+        schema_editor.execute(
+            f"CREATE TABLE {qn(f'{table}_p{period:%Y%m%d}')} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+            bounds(period),
+        )
+
+    schema_editor.execute(f"INSERT INTO {qn(table)} ({columns}) SELECT {columns} FROM {qn(legacy)}")
+    schema_editor.execute(f"DROP TABLE {qn(legacy)} CASCADE")
+    schema_editor.execute(
+        f"SELECT setval(%s, GREATEST(1, (SELECT COALESCE(MAX(id), 0) FROM {qn(table)})))", [SEQUENCE]
+    )
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval(%s)", [SEQUENCE])
+    # Postgres exige la clave de partición en la PK.
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, created_at)")
+    add_django_constraints(schema_editor, model)
+
+
+def unpartition_events(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    model = apps.get_model("core", "DeviceTelemetryEvent")
+    table = model._meta.db_table
+    qn = schema_editor.quote_name
+    if is_partitioned(schema_editor, table):
+        partitioned = f"{table}_partitioned"
+        columns = column_list(schema_editor, model)
+
+        schema_editor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(partitioned)}")
+        schema_editor.execute(f"CREATE TABLE {qn(table)} (LIKE {qn(partitioned)} INCLUDING DEFAULTS)")
+        schema_editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id DROP DEFAULT")
+        schema_editor.execute(f"INSERT INTO {qn(table)} ({columns}) SELECT {columns} FROM {qn(partitioned)}")
+        # Con la tabla particionada se van también sus particiones.
+        schema_editor.execute(f"DROP TABLE {qn(partitioned)} CASCADE")
+        schema_editor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id)")
+        schema_editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        schema_editor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f"GREATEST(1, (SELECT COALESCE(MAX(id), 0) FROM {qn(table)})))",
+            [table],
+        )
+        add_django_constraints(schema_editor, model)
+    schema_editor.execute(f"DROP SEQUENCE IF EXISTS {qn(SEQUENCE)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0035_partition_result_tables"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_events, unpartition_events),
+    ]
@@ -11,3 +11,11 @@ from .animalito_archive import AnimalitoArchive
 from .device_telemetry_snapshot import DeviceTelemetrySnapshot
 from .device_telemetry_event import DeviceTelemetryEvent
 from .scraper_health import ScraperHealth
+from .scraper_unit_health import ScraperUnitHealth
+from .result_observation import ResultObservation
+from .scraper_run import ScraperRun
+from .number_frequency import NumberFrequency
+from .number_last_seen import NumberLastSeen
+from .number_occurrence import NumberOccurrence
+from .device_telemetry_rollup import DeviceTelemetryRollup
+from .telemetry_rollup_flush import TelemetryRollupFlush
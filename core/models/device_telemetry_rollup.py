@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .device_telemetry_event import DeviceTelemetryEvent
+
+
+class DeviceTelemetryRollup(models.Model):
+    """
+    Conteo por dispositivo, hora (UTC, truncada) y tipo de evento de toda la
+    telemetría, incluidos los eventos que no se guardan como fila. Se
+    acumula en Redis en el request y TelemetryRollupService lo vuelca acá.
+    """
+
+    device = models.ForeignKey(
+        "Device",
+        on_delete=models.CASCADE,
+        related_name="telemetry_rollups",
+    )
+    hour = models.DateTimeField()
+    event_type = models.CharField(max_length=32, choices=DeviceTelemetryEvent.EventType.choices)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-hour", "device_id", "event_type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["device", "hour", "event_type"],
+                name="uniq_telemetry_rollup_device_hour_type",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["event_type", "hour"], name="telemetry_rollup_type_hour_idx"),
+        ]
+        verbose_name = "Device telemetry rollup"
+        verbose_name_plural = "Device telemetry rollups"
+
+    def __str__(self) -> str:
+        return f"{self.device_id} {self.hour:%Y-%m-%d %H}h {self.event_type} x{self.count}"
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .result_observation import ResultObservation
+
+
+class NumberFrequency(models.Model):
+    """
+    Cuántas veces salió cada número por provider, por día y por mes.
+
+    Las filas `day` son el libro mayor: NumberStatsService las reescribe al
+    archivar un día y aplica solo la diferencia a las de `month`, así volver
+    a archivar el mismo día no duplica conteos.
+    """
+
+    class Period(models.TextChoices):
+        DAY = "day", "Día"
+        MONTH = "month", "Mes"
+
+    result_kind = models.CharField(max_length=16, choices=ResultObservation.Kind.choices)
+    provider = models.ForeignKey("core.Provider", on_delete=models.CASCADE, related_name="number_frequencies")
+    number = models.CharField(max_length=10)
+    period = models.CharField(max_length=8, choices=Period.choices)
+    # Día del sorteo o primer día del mes.
+    period_start = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-period_start", "-count"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["result_kind", "provider", "period", "period_start", "number"],
+                name="uniq_number_frequency_period",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.result_kind} {self.provider_id} {self.period} {self.period_start} {self.number}={self.count}"
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .result_observation import ResultObservation
+
+
+class NumberLastSeen(models.Model):
+    """Última fecha en que salió cada número por provider y total histórico (números "fríos")."""
+
+    result_kind = models.CharField(max_length=16, choices=ResultObservation.Kind.choices)
+    provider = models.ForeignKey("core.Provider", on_delete=models.CASCADE, related_name="numbers_last_seen")
+    number = models.CharField(max_length=10)
+    last_seen = models.DateField()
+    total_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["last_seen"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["result_kind", "provider", "number"],
+                name="uniq_number_last_seen",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["result_kind", "provider", "last_seen"], name="number_last_seen_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.result_kind} {self.provider_id} {self.number} @ {self.last_seen}"
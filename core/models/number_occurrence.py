@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .result_observation import ResultObservation
+
+
+class NumberOccurrence(models.Model):
+    """
+    Índice invertido número -> sorteos (provider, fecha, hora) en que salió,
+    sobre archivo + histórico largo. Lo mantiene NumberIndexService al
+    archivar; el índice (kind, number, fecha desc, hora desc, provider desc)
+    deja responder "¿cuándo salió X?" por keyset sin recorrer el histórico.
+    """
+
+    result_kind = models.CharField(max_length=16, choices=ResultObservation.Kind.choices)
+    number = models.CharField(max_length=10)
+    provider = models.ForeignKey("core.Provider", on_delete=models.CASCADE, related_name="number_occurrences")
+    draw_date = models.DateField()
+    draw_time = models.TimeField()
+
+    class Meta:
+        ordering = ["-draw_date", "-draw_time", "-provider_id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["result_kind", "provider", "draw_date", "draw_time"],
+                name="uniq_number_occurrence_draw",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["result_kind", "number", "-draw_date", "-draw_time", "-provider"],
+                name="number_occurrence_keyset_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.result_kind} {self.number} {self.provider_id} {self.draw_date} {self.draw_time}"
@@ -1,14 +1,47 @@
 # core/models/provider.py
+import re
+import unicodedata
+
+from django.core.exceptions import ValidationError
 from django.db import models
 
 
+def normalize_provider_key(name: str) -> str:
+    """
+    Clave estable para deduplicar providers: sin acentos, minúsculas y
+    separadores colapsados ("La-Ricachona" == "la ricachona").
+    """
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
 class Provider(models.Model):
     name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True, editable=False)
     source_url = models.URLField()
     is_active = models.BooleanField(default=True)
-    logo_url = models.URLField(blank=True, null=True)   
+    logo_url = models.URLField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def clean(self):
+        # normalized_name no es editable: el admin no lo valida solo y un
+        # duplicado llegaría a la base como IntegrityError.
+        super().clean()
+        key = normalize_provider_key(self.name)
+        if not key:
+            raise ValidationError({"name": "El nombre tiene que tener al menos una letra o número."})
+        duplicate = Provider.objects.filter(normalized_name=key).exclude(pk=self.pk).first()
+        if duplicate is not None:
+            raise ValidationError({"name": f'Ya existe el provider "{duplicate.name}" con el mismo nombre normalizado.'})
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_provider_key(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "normalized_name"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class ResultObservation(models.Model):
+    """
+    Qué publicó cada fuente (scraper_key) para un sorteo y cuándo lo vimos.
+
+    La primera fuente en publicar gana la fila de CurrentResult /
+    AnimalitoResult (`accepted`); las demás quedan como evidencia de
+    latencia y se marcan `disagrees` si publicaron otro valor.
+    """
+
+    class Kind(models.TextChoices):
+        TRIPLES = "triples", "Triples"
+        ANIMALITOS = "animalitos", "Animalitos"
+
+    result_kind = models.CharField(max_length=16, choices=Kind.choices)
+    source = models.CharField(max_length=64)
+    provider = models.ForeignKey("core.Provider", on_delete=models.CASCADE, related_name="observations")
+    draw_date = models.DateField()
+    draw_time = models.TimeField()
+    value = models.CharField(max_length=120)
+    observed_at = models.DateTimeField()
+    # observed_at - hora del sorteo; negativo si el reloj del upstream adelanta.
+    publish_lag_seconds = models.IntegerField(null=True, blank=True)
+    accepted = models.BooleanField(default=False)
+    disagrees = models.BooleanField(default=False, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-draw_date", "-draw_time", "observed_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["result_kind", "provider", "draw_date", "draw_time", "source"],
+                name="uniq_result_observation_source",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["draw_date", "source"], name="result_obs_date_source_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.source} {self.provider_id} {self.draw_date} {self.draw_time} = {self.value}"
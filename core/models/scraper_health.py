@@ -22,6 +22,11 @@ class ScraperHealth(models.Model):
     consecutive_failures = models.PositiveIntegerField(default=0)
     last_notified_at = models.DateTimeField(null=True, blank=True)
     last_notified_signature = models.CharField(max_length=255, blank=True, default="")
+    last_pages_skipped = models.PositiveIntegerField(default=0)
+    last_blocks_skipped = models.PositiveIntegerField(default=0)
+    last_run_timings = models.JSONField(default=dict, blank=True)
+    skipped_runs = models.PositiveIntegerField(default=0)
+    last_skipped_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
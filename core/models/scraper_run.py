@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class ScraperRun(models.Model):
+    """
+    Historial por corrida de scraper (ScraperHealth solo guarda la última):
+    ms por fase, bytes bajados y filas escritas. Lo poda enforce_retention
+    (SCRAPER_RUN_RETENTION_DAYS).
+    """
+
+    class Outcome(models.TextChoices):
+        SUCCESS = "success", "Success"
+        FAILED = "failed", "Failed"
+
+    scraper_key = models.CharField(max_length=64)
+    outcome = models.CharField(max_length=16, choices=Outcome.choices)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    duration_ms = models.FloatField(default=0)
+    # ms por fase; connect = DNS + conexión + espera de headers, download = body.
+    fetch_ms = models.FloatField(default=0)
+    connect_ms = models.FloatField(default=0)
+    download_ms = models.FloatField(default=0)
+    parse_ms = models.FloatField(default=0)
+    transaction_ms = models.FloatField(default=0)
+    cache_ms = models.FloatField(default=0)
+    bytes_downloaded = models.PositiveBigIntegerField(default=0)
+    pages_skipped = models.PositiveIntegerField(default=0)
+    rows_inserted = models.PositiveIntegerField(default=0)
+    rows_changed = models.PositiveIntegerField(default=0)
+    rows_unchanged = models.PositiveIntegerField(default=0)
+    rows_deleted = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["scraper_key", "-started_at"], name="scraper_run_key_started_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.scraper_key} {self.started_at:%Y-%m-%d %H:%M} [{self.outcome}]"
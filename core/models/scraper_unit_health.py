@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .scraper_health import ScraperHealth
+
+
+class ScraperUnitHealth(models.Model):
+    """
+    Salud por unidad de fan-out: una página fuente con su grupo de providers
+    (ej: "lotoven_triples:triplecaracas"). El agregado sigue en ScraperHealth.
+    """
+
+    scraper_key = models.CharField(max_length=64, db_index=True)
+    unit_key = models.CharField(max_length=120, unique=True)
+    label = models.CharField(max_length=160)
+    providers = models.CharField(max_length=255, blank=True, default="")
+    last_status = models.CharField(
+        max_length=16,
+        choices=ScraperHealth.Status.choices,
+        default=ScraperHealth.Status.NEVER,
+    )
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_error_message = models.TextField(blank=True, default="")
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    last_attempts = models.PositiveIntegerField(default=0)
+    last_rows_written = models.PositiveIntegerField(default=0)
+    last_run_timings = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["scraper_key", "unit_key"]
+        verbose_name = "Scraper unit health"
+        verbose_name_plural = "Scraper unit health"
+
+    def __str__(self) -> str:
+        return f"{self.label} [{self.last_status}]"
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class TelemetryRollupFlush(models.Model):
+    """
+    Hash de Redis (`telemetry:rollup:flush:*`) ya sumado a
+    DeviceTelemetryRollup. Se graba en la misma transacción que los conteos:
+    si el proceso se corta antes de borrar la key, el próximo flush la
+    reconoce y no la vuelve a sumar.
+    """
+
+    key = models.CharField(max_length=120, unique=True)
+    flushed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["-flushed_at"]
+        verbose_name = "Telemetry rollup flush"
+        verbose_name_plural = "Telemetry rollup flushes"
+
+    def __str__(self) -> str:
+        return f"{self.key} @ {self.flushed_at:%Y-%m-%d %H:%M:%S}"
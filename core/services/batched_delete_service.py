@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from time import monotonic, sleep
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import QuerySet
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchedDeleteResult:
+    label: str
+    deleted: int = 0
+    batches: int = 0
+    # False si se cortó por time budget: la próxima corrida sigue desde last_pk.
+    complete: bool = True
+    last_pk: Optional[int] = None
+
+
+class BatchedDeleteService:
+    """
+    DELETE por rangos de PK en vez de un `queryset.delete()` gigante.
+
+    - Cada lote lee hasta `batch_size` PKs desde el último borrado y borra el
+      rango (pk > desde, pk <= hasta) con el filtro original: un statement
+      corto, sin cargar todas las PKs en el collector de Django.
+    - Fuera de una transacción cada lote es su propio commit (locks y WAL
+      acotados) y se duerme `sleep_seconds` entre lotes; dentro de un
+      `atomic` del llamador no duerme, para no alargar locks.
+    - Con `deadline` (monotonic) se corta y deja un checkpoint en cache
+      por `label`: la corrida siguiente sigue desde ahí en vez de volver a
+      recorrer lo ya revisado. Al terminar completo el checkpoint se borra.
+    """
+
+    PREFIX = "batched_delete"
+
+    @staticmethod
+    def default_batch_size() -> int:
+        return int(getattr(settings, "DELETE_BATCH_SIZE", 5000))
+
+    @staticmethod
+    def default_sleep_seconds() -> float:
+        return float(getattr(settings, "DELETE_BATCH_SLEEP_SECONDS", 0.0))
+
+    @staticmethod
+    def deadline_for(seconds: Optional[float]) -> Optional[float]:
+        """Deadline absoluto para `delete(..., deadline=)`; None o 0 = sin límite."""
+        return monotonic() + seconds if seconds else None
+
+    @classmethod
+    def delete(
+        cls,
+        queryset: QuerySet,
+        *,
+        label: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        sleep_seconds: Optional[float] = None,
+        deadline: Optional[float] = None,
+        progress: Optional[Callable[[BatchedDeleteResult], None]] = None,
+    ) -> BatchedDeleteResult:
+        label = label or queryset.model._meta.label
+        batch_size = max(1, int(batch_size or cls.default_batch_size()))
+        sleep_seconds = cls.default_sleep_seconds() if sleep_seconds is None else max(0.0, float(sleep_seconds))
+        in_atomic = connections[queryset.db].in_atomic_block
+        if in_atomic:
+            sleep_seconds = 0.0
+
+        result = BatchedDeleteResult(label=label, last_pk=cls._checkpoint(label))
+        queryset = queryset.order_by()
+        while True:
+            if deadline is not None and monotonic() >= deadline:
+                result.complete = False
+                break
+            scan = queryset if result.last_pk is None else queryset.filter(pk__gt=result.last_pk)
+            pks = list(scan.order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic(using=queryset.db):
+                deleted, _ = scan.filter(pk__lte=pks[-1]).delete()
+            result.deleted += deleted
+            result.batches += 1
+            result.last_pk = pks[-1]
+            if progress is not None:
+                progress(result)
+            if len(pks) < batch_size:
+                break
+            if sleep_seconds:
+                sleep(sleep_seconds)
+
+        if result.complete:
+            cls._set_checkpoint(label, None)
+        else:
+            cls._set_checkpoint(label, result.last_pk)
+            logger.info("Borrado por lotes de %s cortado por time budget en pk=%s", label, result.last_pk)
+        return result
+
+    # -------------------------
+    # Checkpoint
+    # -------------------------
+    @classmethod
+    def _checkpoint(cls, label: str) -> Optional[int]:
+        try:
+            return cache.get(f"{cls.PREFIX}:{label}")
+        except Exception as exc:
+            logger.warning("No se pudo leer el checkpoint de %s: %s", label, exc)
+            return None
+
+    @classmethod
+    def _set_checkpoint(cls, label: str, pk: Optional[int]) -> None:
+        try:
+            if pk is None:
+                cache.delete(f"{cls.PREFIX}:{label}")
+            else:
+                cache.set(f"{cls.PREFIX}:{label}", pk, timeout=86400)
+        except Exception as exc:
+            logger.warning("No se pudo guardar el checkpoint de %s: %s", label, exc)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamCircuitOpen(requests.ConnectionError):
+    """
+    El circuito del host está abierto: falla sin salir a la red. Hereda de
+    ConnectionError para que los reintentos / fallas de scraping lo traten
+    igual que un upstream caído.
+    """
+
+
+@dataclass(frozen=True)
+class CircuitState:
+    host: str
+    state: str
+    failures: int = 0
+    opened_at: Optional[float] = None
+    retry_at: Optional[float] = None
+    last_error: str = ""
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == CircuitBreakerService.CLOSED
+
+
+class CircuitBreakerService:
+    """
+    Circuit breaker por host upstream, compartido entre workers vía cache (Redis).
+
+    - closed: requests normales; cada falla (conexión, timeout, 5xx) suma.
+    - open: tras SCRAPER_CIRCUIT_FAILURE_THRESHOLD fallas seguidas, todo
+      request a ese host falla al instante (UpstreamCircuitOpen) durante
+      SCRAPER_CIRCUIT_COOLDOWN_SECONDS, sin ocupar el worker esperando timeouts.
+    - half-open: vencido el cooldown, un solo proceso (cache.add) manda un
+      request de prueba; si responde, el circuito se cierra, si falla vuelve
+      a abrirse otro cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    PREFIX = "scrape:circuit"
+
+    @staticmethod
+    def failure_threshold() -> int:
+        return int(getattr(settings, "SCRAPER_CIRCUIT_FAILURE_THRESHOLD", 3))
+
+    @staticmethod
+    def cooldown_seconds() -> int:
+        return int(getattr(settings, "SCRAPER_CIRCUIT_COOLDOWN_SECONDS", 120))
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls.failure_threshold() > 0
+
+    @staticmethod
+    def host_for(url: str) -> str:
+        host = (urlsplit(url).hostname or "").lower()
+        return host[4:] if host.startswith("www.") else host
+
+    # -------------------------
+    # Estado
+    # -------------------------
+    @classmethod
+    def get_state(cls, host: str) -> CircuitState:
+        current = cache.get_many([cls._key(host, "open"), cls._key(host, "failures")])
+        opened = current.get(cls._key(host, "open"))
+        failures = int(current.get(cls._key(host, "failures")) or 0)
+        if not opened:
+            return CircuitState(host=host, state=cls.CLOSED, failures=failures)
+        retry_at = opened["opened_at"] + cls.cooldown_seconds()
+        return CircuitState(
+            host=host,
+            state=cls.OPEN if time.time() < retry_at else cls.HALF_OPEN,
+            failures=max(failures, int(opened.get("failures") or 0)),
+            opened_at=opened["opened_at"],
+            retry_at=retry_at,
+            last_error=opened.get("last_error") or "",
+        )
+
+    # -------------------------
+    # Uso alrededor de cada request
+    # -------------------------
+    @classmethod
+    def before_request(cls, host: str, *, timeout: int) -> None:
+        """Levanta UpstreamCircuitOpen si el host no acepta requests ahora."""
+        if not cls.enabled():
+            return
+        state = cls.get_state(host)
+        if state.is_closed:
+            return
+        if state.state == cls.HALF_OPEN and cache.add(cls._key(host, "probe"), time.time(), timeout=timeout + 5):
+            logger.info("Circuito de %s half-open: request de prueba.", host)
+            return
+        raise UpstreamCircuitOpen(
+            f"Circuito abierto para {host} ({state.failures} fallas; reintento tras "
+            f"{max(0, int((state.retry_at or 0) - time.time()))} s): {state.last_error}"
+        )
+
+    @classmethod
+    def record_success(cls, host: str) -> None:
+        if not cls.enabled():
+            return
+        keys = [cls._key(host, "failures"), cls._key(host, "open"), cls._key(host, "probe")]
+        current = cache.get_many(keys)
+        if not current:
+            return
+        cache.delete_many(keys)
+        if current.get(keys[1]) is not None:
+            logger.warning("Circuito de %s cerrado: el upstream volvió a responder.", host)
+
+    @classmethod
+    def record_failure(cls, host: str, exc: BaseException) -> CircuitState:
+        if not cls.enabled():
+            return CircuitState(host=host, state=cls.CLOSED)
+        failures_key = cls._key(host, "failures")
+        # add + incr: atómico en Redis aunque varios workers fallen a la vez.
+        cache.add(failures_key, 0, timeout=cls.cooldown_seconds() * 10)
+        failures = cache.incr(failures_key)
+        was_probe = cache.get(cls._key(host, "probe")) is not None
+        if was_probe or failures >= cls.failure_threshold():
+            cache.set(
+                cls._key(host, "open"),
+                {"opened_at": time.time(), "failures": failures, "last_error": cls._describe(exc)},
+                timeout=None,
+            )
+            cache.delete(cls._key(host, "probe"))
+            logger.warning("Circuito de %s abierto tras %s fallas: %s", host, failures, cls._describe(exc))
+        return cls.get_state(host)
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @classmethod
+    def _key(cls, host: str, part: str) -> str:
+        return f"{cls.PREFIX}:{host}:{part}"
+
+    @staticmethod
+    def _describe(exc: BaseException) -> str:
+        return f"{exc.__class__.__name__}: {exc}"[:300]
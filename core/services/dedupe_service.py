@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Model, OuterRef, QuerySet, Subquery, Window
+from django.db.models.functions import RowNumber
+
+# Clave natural de CurrentResult / AnimalitoResult.
+DRAW_KEYS = ("provider_id", "draw_date", "draw_time")
+
+NEWEST = "newest"
+OLDEST = "oldest"
+
+
+@dataclass
+class DedupeSummary:
+    groups: int = 0
+    rows: int = 0
+
+
+class DedupeService:
+    """
+    Deduplicación resuelta en la base: nada de traer la tabla a Python.
+
+    - `duplicates` devuelve las filas sobrantes de cada grupo con
+      ROW_NUMBER() OVER (PARTITION BY claves ORDER BY created_at, id) > 1.
+      Si el motor no soporta window functions (SQLite < 3.25) cae a una
+      subconsulta correlacionada que elige la fila que se queda por grupo.
+    - `summary` cuenta grupos y filas a borrar con GROUP BY ... HAVING.
+    - `delete` borra por lotes de ids, cada uno en su transacción.
+    """
+
+    @staticmethod
+    def _ordering(keep: str) -> list:
+        # La fila que se queda es la primera; created_at nulo cuenta como la más vieja.
+        if keep == OLDEST:
+            return [F("created_at").asc(nulls_first=True), F("pk").asc()]
+        return [F("created_at").desc(nulls_last=True), F("pk").desc()]
+
+    @classmethod
+    def duplicates(cls, model: type[Model], *, keys: Sequence[str] = DRAW_KEYS, keep: str = NEWEST) -> QuerySet:
+        ordering = cls._ordering(keep)
+        connection = connections[router.db_for_read(model)]
+        if connection.features.supports_over_clause:
+            return model.objects.annotate(
+                dedupe_rank=Window(RowNumber(), partition_by=[F(key) for key in keys], order_by=ordering)
+            ).filter(dedupe_rank__gt=1)
+
+        keeper = model.objects.filter(**{key: OuterRef(key) for key in keys}).order_by(*ordering).values("pk")[:1]
+        return model.objects.annotate(dedupe_keeper=Subquery(keeper)).exclude(pk=F("dedupe_keeper"))
+
+    @staticmethod
+    def groups(model: type[Model], *, keys: Sequence[str] = DRAW_KEYS) -> QuerySet:
+        """Grupos con más de una fila: dicts con las claves y `rows`."""
+        return model.objects.values(*keys).annotate(rows=Count("pk")).filter(rows__gt=1).order_by(*keys)
+
+    @classmethod
+    def summary(cls, model: type[Model], *, keys: Sequence[str] = DRAW_KEYS) -> DedupeSummary:
+        groups = cls.groups(model, keys=keys).order_by()
+        return DedupeSummary(groups=groups.count(), rows=cls.duplicates(model, keys=keys).count())
+
+    @classmethod
+    def delete(
+        cls,
+        model: type[Model],
+        *,
+        keys: Sequence[str] = DRAW_KEYS,
+        keep: str = NEWEST,
+        chunk_size: int = 1000,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Borra los duplicados de a `chunk_size` ids. Cada vuelta recalcula el
+        ranking: borrar sobrantes no cambia cuál es la primera fila del grupo.
+        """
+        chunk_size = max(1, int(chunk_size))
+        deleted = 0
+        while True:
+            ids = list(
+                cls.duplicates(model, keys=keys, keep=keep).order_by("pk").values_list("pk", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                count, _ = model.objects.filter(pk__in=ids).delete()
+            deleted += count
+            if progress is not None:
+                progress(deleted)
+            if len(ids) < chunk_size:
+                break
+        return deleted
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from datetime import timedelta
 from typing import Any
 
+from django.conf import settings
 from django.db.models import Q
 from django.utils import timezone
 
 from core.models import Device, DeviceTelemetryEvent, DeviceTelemetrySnapshot
+from core.services.telemetry_rollup_service import TelemetryRollupService
+from core.services.telemetry_snapshot_buffer import TelemetrySnapshotBuffer
 
 
 class DeviceTelemetryService:
@@ -27,14 +31,22 @@ class DeviceTelemetryService:
         return snapshot
 
     @classmethod
-    def record_heartbeat(cls, *, device: Device, ip_address: str | None) -> DeviceTelemetrySnapshot:
-        snapshot = cls.get_or_create_snapshot(device=device)
-        snapshot.last_heartbeat_at = timezone.now()
-        if ip_address:
-            snapshot.last_ip_address = ip_address
-        snapshot.save(update_fields=["last_heartbeat_at", "last_ip_address", "updated_at"])
+    def current_snapshot(cls, *, device: Device) -> DeviceTelemetrySnapshot:
+        """Snapshot de la base con los cambios aún sin volcar aplicados encima (no escribe)."""
+        snapshot = DeviceTelemetrySnapshot.objects.filter(device=device).first() or DeviceTelemetrySnapshot(
+            device=device
+        )
+        for name, value in TelemetrySnapshotBuffer.pending(device.pk).items():
+            setattr(snapshot, name, value)
         return snapshot
 
+    @classmethod
+    def record_heartbeat(cls, *, device: Device, ip_address: str | None) -> None:
+        fields = {"last_heartbeat_at": timezone.now()}
+        if ip_address:
+            fields["last_ip_address"] = ip_address
+        TelemetrySnapshotBuffer.merge(device.pk, fields)
+
     @classmethod
     def record_event(
         cls,
@@ -46,6 +58,8 @@ class DeviceTelemetryService:
         metadata: dict[str, Any] | None = None,
     ) -> DeviceTelemetryEvent | None:
         payload = metadata or {}
+        # Todo evento suma a su contador horario, se guarde como fila o no.
+        TelemetryRollupService.increment(device_id=device.pk, event_type=event_type)
         cls._update_snapshot_from_event(
             device=device,
             event_type=event_type,
@@ -80,6 +94,15 @@ class DeviceTelemetryService:
             metadata__severity__in=sorted(cls.INCIDENT_SEVERITIES),
         )
 
+    @staticmethod
+    def keep_days() -> int:
+        return int(getattr(settings, "TELEMETRY_EVENT_KEEP_DAYS", 30))
+
+    @classmethod
+    def window_q(cls, *, days: int | None = None) -> Q:
+        # Acotar created_at deja que Postgres lea solo las particiones de la ventana.
+        return Q(created_at__gte=timezone.now() - timedelta(days=days or cls.keep_days()))
+
     @classmethod
     def _update_snapshot_from_event(
         cls,
@@ -89,36 +112,27 @@ class DeviceTelemetryService:
         ip_address: str | None,
         message: str,
         metadata: dict[str, Any],
-    ) -> DeviceTelemetrySnapshot:
-        snapshot = cls.get_or_create_snapshot(device=device)
+    ) -> None:
         now = timezone.now()
-        update_fields = {"updated_at", "last_metadata"}
-
-        snapshot.last_metadata = metadata or {}
+        fields: dict[str, Any] = {"last_metadata": metadata or {}}
 
         if ip_address:
-            snapshot.last_ip_address = ip_address
-            update_fields.add("last_ip_address")
+            fields["last_ip_address"] = ip_address
 
         for payload_key, snapshot_field in cls.SNAPSHOT_ENV_FIELDS.items():
             value = str(metadata.get(payload_key) or "").strip()
             if value:
-                setattr(snapshot, snapshot_field, value)
-                update_fields.add(snapshot_field)
+                fields[snapshot_field] = value
 
         if event_type == DeviceTelemetryEvent.EventType.LOAD_SUCCESS:
-            snapshot.last_load_success_at = now
-            update_fields.add("last_load_success_at")
+            fields["last_load_success_at"] = now
         elif event_type == DeviceTelemetryEvent.EventType.LOAD_ERROR:
-            snapshot.last_error_reported_at = now
-            snapshot.last_error_reported_message = (message or "").strip()
-            update_fields.update({"last_error_reported_at", "last_error_reported_message"})
+            fields["last_error_reported_at"] = now
+            fields["last_error_reported_message"] = (message or "").strip()
         elif event_type == DeviceTelemetryEvent.EventType.LOW_MEMORY:
-            snapshot.last_low_memory_at = now
-            update_fields.add("last_low_memory_at")
+            fields["last_low_memory_at"] = now
         elif event_type == DeviceTelemetryEvent.EventType.HEARTBEAT:
-            snapshot.last_heartbeat_at = now
-            update_fields.add("last_heartbeat_at")
+            fields["last_heartbeat_at"] = now
 
-        snapshot.save(update_fields=sorted(update_fields))
-        return snapshot
+        # Se junta con los demás cambios del dispositivo; lo que ya está igual no se escribe.
+        TelemetrySnapshotBuffer.merge(device.pk, fields)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from bs4 import BeautifulSoup
+from django.conf import settings
+
+try:
+    # bs4 >= 4.13: permite decidir qué subárboles se crean durante el parseo.
+    from bs4.filter import ElementFilter
+except Exception:  # pragma: no cover
+    ElementFilter = None
+
+try:
+    import lxml  # noqa: F401
+
+    LXML_AVAILABLE = True
+except Exception:  # pragma: no cover
+    LXML_AVAILABLE = False
+
+
+HTML_PARSER = "html.parser"
+LXML_PARSER = "lxml"
+
+# Override por contexto (benchmark / pruebas de equivalencia): (backend, targeted).
+_parser_override: ContextVar[Optional[tuple[str, bool]]] = ContextVar("html_parser_override", default=None)
+
+
+@dataclass(frozen=True)
+class Subtree:
+    """
+    Regla de parseo dirigido: raíz de un subárbol que el scraper necesita.
+    Todas las condiciones indicadas deben cumplirse (tag, id y/o clase).
+    """
+
+    tag: Optional[str] = None
+    ids: tuple[str, ...] = ()
+    css_class: Optional[str] = None
+
+    def matches(self, name: str, attrs) -> bool:
+        attrs = attrs or {}
+        if self.tag and name != self.tag:
+            return False
+        if self.ids and attrs.get("id") not in self.ids:
+            return False
+        if self.css_class:
+            raw = attrs.get("class") or ""
+            classes = raw.split() if isinstance(raw, str) else list(raw)
+            if self.css_class not in classes:
+                return False
+        return True
+
+
+if ElementFilter is not None:
+
+    class SubtreeStrainer(ElementFilter):
+        """
+        Equivalente a un SoupStrainer con OR entre varias reglas `Subtree`.
+        Solo se crean los subárboles cuya raíz coincide; todo lo demás del
+        documento se descarta sin construir Tags.
+        """
+
+        def __init__(self, *rules: Subtree):
+            self.rules = rules
+
+        def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+            return any(rule.matches(name, attrs) for rule in self.rules)
+
+        def allow_string_creation(self, string) -> bool:
+            return False
+
+else:  # pragma: no cover
+    SubtreeStrainer = None
+
+
+def available_backends() -> list[str]:
+    backends = [HTML_PARSER]
+    if LXML_AVAILABLE:
+        backends.append(LXML_PARSER)
+    return backends
+
+
+def get_parser_backend() -> str:
+    """
+    SCRAPER_HTML_PARSER:
+      - "auto" (default): lxml si está instalado, si no html.parser
+      - "lxml" / "html.parser": fuerza backend (lxml degrada a html.parser si falta)
+    """
+    override = _parser_override.get()
+    configured = override[0] if override else getattr(settings, "SCRAPER_HTML_PARSER", "auto")
+    configured = str(configured or "auto").strip().lower()
+    if configured in {"auto", LXML_PARSER}:
+        return LXML_PARSER if LXML_AVAILABLE else HTML_PARSER
+    return HTML_PARSER
+
+
+def targeted_parsing_enabled() -> bool:
+    if SubtreeStrainer is None:
+        return False
+    override = _parser_override.get()
+    if override:
+        return override[1]
+    return bool(getattr(settings, "SCRAPER_HTML_TARGETED_PARSING", True))
+
+
+@contextmanager
+def parser_options(*, backend: str, targeted: bool):
+    """Fuerza backend / parseo dirigido para el bloque (no toca settings)."""
+    token = _parser_override.set((backend, targeted))
+    try:
+        yield
+    finally:
+        _parser_override.reset(token)
+
+
+def make_soup(html: str, *, subtrees: tuple[Subtree, ...] = ()) -> BeautifulSoup:
+    """
+    Construye el soup que consumen los `_parse_*` de los scrapers.
+
+    `subtrees` lista las raíces que el scraper realmente lee; si el parseo
+    dirigido está activo, el resto del documento ni siquiera se construye.
+    """
+    parse_only = SubtreeStrainer(*subtrees) if (subtrees and targeted_parsing_enabled()) else None
+    return BeautifulSoup(html or "", get_parser_backend(), parse_only=parse_only)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.models import NumberOccurrence
+from core.services.number_stats_service import BATCH_SIZE, STATS_SOURCES
+
+
+@dataclass(frozen=True)
+class OccurrenceCursor:
+    """Posición keyset: el último sorteo devuelto (fecha, hora, provider)."""
+
+    draw_date: date
+    draw_time: time
+    provider_id: int
+
+    def encode(self) -> str:
+        return f"{self.draw_date:%Y%m%d}{self.draw_time:%H%M%S}-{self.provider_id}"
+
+    @classmethod
+    def decode(cls, raw: str) -> Optional["OccurrenceCursor"]:
+        try:
+            stamp, provider_id = raw.split("-", 1)
+            moment = datetime.strptime(stamp, "%Y%m%d%H%M%S")
+            return cls(draw_date=moment.date(), draw_time=moment.time(), provider_id=int(provider_id))
+        except ValueError:
+            return None
+
+
+@dataclass
+class OccurrencePage:
+    rows: list[NumberOccurrence]
+    next_cursor: Optional[OccurrenceCursor]
+
+
+class NumberIndexService:
+    """
+    Mantiene NumberOccurrence (número -> sorteos) y lo consulta por keyset:
+    cada página es un range scan del índice desde el cursor, cuesta lo
+    mismo la primera que la página 500.
+    """
+
+    @classmethod
+    def index_day(cls, kind: str, day: date) -> int:
+        """Reindexa el día archivado `day` (idempotente); devuelve cuántos sorteos quedaron."""
+        source = STATS_SOURCES[kind]
+        rows = (
+            source.model.objects.filter(draw_date=day)
+            .exclude(**{source.number_field: ""})
+            .values_list("provider_id", "draw_time", source.number_field)
+        )
+        occurrences = [
+            NumberOccurrence(
+                result_kind=kind,
+                number=str(number).strip(),
+                provider_id=provider_id,
+                draw_date=day,
+                draw_time=draw_time,
+            )
+            for provider_id, draw_time, number in rows
+        ]
+        with transaction.atomic():
+            NumberOccurrence.objects.filter(result_kind=kind, draw_date=day).delete()
+            NumberOccurrence.objects.bulk_create(occurrences, batch_size=BATCH_SIZE)
+        return len(occurrences)
+
+    @classmethod
+    def rebuild(cls, kind: str, rows: Iterable[tuple[int, date, time, str]]) -> int:
+        """Reemplaza todo el índice de `kind` por `rows` (provider_id, fecha, hora, número)."""
+        total = 0
+        with transaction.atomic():
+            NumberOccurrence.objects.filter(result_kind=kind).delete()
+            batch: list[NumberOccurrence] = []
+            for provider_id, draw_date, draw_time, number in rows:
+                batch.append(
+                    NumberOccurrence(
+                        result_kind=kind,
+                        number=number,
+                        provider_id=provider_id,
+                        draw_date=draw_date,
+                        draw_time=draw_time,
+                    )
+                )
+                if len(batch) >= BATCH_SIZE:
+                    total += len(NumberOccurrence.objects.bulk_create(batch, ignore_conflicts=True))
+                    batch = []
+            if batch:
+                total += len(NumberOccurrence.objects.bulk_create(batch, ignore_conflicts=True))
+        return total
+
+    @staticmethod
+    def lookup(
+        kind: str,
+        number: str,
+        *,
+        provider_id: Optional[int] = None,
+        after: Optional[OccurrenceCursor] = None,
+        limit: int = 20,
+    ) -> OccurrencePage:
+        """Sorteos en que salió `number`, del más reciente al más viejo."""
+        qs = NumberOccurrence.objects.filter(result_kind=kind, number=number)
+        if provider_id is not None:
+            qs = qs.filter(provider_id=provider_id)
+        if after is not None:
+            qs = qs.filter(
+                Q(draw_date__lt=after.draw_date)
+                | Q(draw_date=after.draw_date, draw_time__lt=after.draw_time)
+                | Q(draw_date=after.draw_date, draw_time=after.draw_time, provider_id__lt=after.provider_id)
+            )
+        # Un elemento de más para saber si hay otra página sin COUNT.
+        rows = list(qs.order_by("-draw_date", "-draw_time", "-provider_id")[: limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = OccurrenceCursor(
+                draw_date=last.draw_date, draw_time=last.draw_time, provider_id=last.provider_id
+            )
+        return OccurrencePage(rows=rows, next_cursor=next_cursor)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, Max, Model, Sum
+
+from core.models import AnimalitoArchive, NumberFrequency, NumberLastSeen, ResultArchive
+from core.services.device_redis_service import DeviceRedisService
+from core.services.results_cache_service import ANIMALITOS, TRIPLES
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATTERN = "stats:numbers:*"
+BATCH_SIZE = 1000
+
+DAY = NumberFrequency.Period.DAY
+MONTH = NumberFrequency.Period.MONTH
+
+
+@dataclass(frozen=True)
+class StatsSource:
+    model: type[Model]
+    number_field: str
+
+
+# Los conteos salen del archivo: un día entra cuando se archiva (ayer).
+STATS_SOURCES = {
+    TRIPLES: StatsSource(model=ResultArchive, number_field="winning_number"),
+    ANIMALITOS: StatsSource(model=AnimalitoArchive, number_field="animal_number"),
+}
+
+# (provider_id, number) -> veces que salió
+DayCounts = Counter
+
+
+class NumberStatsService:
+    """
+    Frecuencia de números ("más salidos del mes") y último visto ("no sale
+    hace N días") por provider, precalculados para que la API no recorra
+    el histórico.
+
+    - `record_day` corre al archivar un día: reemplaza las filas `day` de
+      ese día con un GROUP BY del archivo y suma a `month` / NumberLastSeen
+      solo la diferencia contra lo que ya había (idempotente).
+    - `rebuild` recalcula todo de una vez (backfill) a partir de conteos
+      diarios ya agregados.
+    """
+
+    # -------------------------
+    # Incremental
+    # -------------------------
+    @classmethod
+    def record_day(cls, kind: str, day: date) -> int:
+        """Actualiza las estadísticas de `day`; devuelve cuántos (provider, número) cambiaron."""
+        new = cls.day_counts(kind, day)
+        old = Counter(
+            {
+                (row["provider_id"], row["number"]): row["count"]
+                for row in NumberFrequency.objects.filter(result_kind=kind, period=DAY, period_start=day).values(
+                    "provider_id", "number", "count"
+                )
+            }
+        )
+        delta = {key: new[key] - old[key] for key in set(new) | set(old) if new[key] != old[key]}
+        if not delta:
+            return 0
+
+        with transaction.atomic():
+            NumberFrequency.objects.filter(result_kind=kind, period=DAY, period_start=day).delete()
+            cls._write_counts(kind, DAY, {day: new})
+            cls._apply_month_delta(kind, day.replace(day=1), delta)
+            cls._refresh_last_seen(kind, delta.keys())
+        cls.invalidate_cache()
+        return len(delta)
+
+    @classmethod
+    def day_counts(cls, kind: str, day: date) -> DayCounts:
+        source = STATS_SOURCES[kind]
+        rows = (
+            source.model.objects.filter(draw_date=day)
+            .exclude(**{source.number_field: ""})
+            .values("provider_id", source.number_field)
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        counts: DayCounts = Counter()
+        for row in rows:
+            counts[(row["provider_id"], str(row[source.number_field]).strip())] += row["n"]
+        return counts
+
+    @classmethod
+    def _apply_month_delta(cls, kind: str, month: date, delta: dict[tuple[int, str], int]) -> None:
+        provider_ids = {provider_id for provider_id, _ in delta}
+        current = Counter(
+            {
+                (row["provider_id"], row["number"]): row["count"]
+                for row in NumberFrequency.objects.filter(
+                    result_kind=kind, period=MONTH, period_start=month, provider_id__in=provider_ids
+                ).values("provider_id", "number", "count")
+            }
+        )
+        updated = Counter({key: max(0, current[key] + change) for key, change in delta.items()})
+        cls._write_counts(kind, MONTH, {month: +updated}, upsert=True)
+        emptied = [key for key, count in updated.items() if count == 0]
+        if emptied:
+            cls._delete_keys(NumberFrequency.objects.filter(result_kind=kind, period=MONTH, period_start=month), emptied)
+
+    @classmethod
+    def _refresh_last_seen(cls, kind: str, keys: Iterable[tuple[int, str]]) -> None:
+        keys = set(keys)
+        rows = (
+            NumberFrequency.objects.filter(
+                result_kind=kind,
+                period=DAY,
+                provider_id__in={provider_id for provider_id, _ in keys},
+                number__in={number for _, number in keys},
+            )
+            .values("provider_id", "number")
+            .annotate(last_seen=Max("period_start"), total=Sum("count"))
+            .order_by()
+        )
+        seen = {
+            (row["provider_id"], row["number"]): (row["last_seen"], row["total"])
+            for row in rows
+            if (row["provider_id"], row["number"]) in keys
+        }
+        NumberLastSeen.objects.bulk_create(
+            [
+                NumberLastSeen(
+                    result_kind=kind, provider_id=provider_id, number=number, last_seen=last_seen, total_count=total
+                )
+                for (provider_id, number), (last_seen, total) in seen.items()
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["result_kind", "provider", "number"],
+            update_fields=["last_seen", "total_count"],
+        )
+        gone = keys - set(seen)
+        if gone:
+            cls._delete_keys(NumberLastSeen.objects.filter(result_kind=kind), gone)
+
+    # -------------------------
+    # Backfill
+    # -------------------------
+    @classmethod
+    def rebuild(cls, kind: str, daily: dict[date, DayCounts]) -> dict[str, int]:
+        """Reemplaza todas las estadísticas de `kind` por las de `daily` ({día: conteos})."""
+        monthly: dict[date, DayCounts] = defaultdict(Counter)
+        last_seen: dict[tuple[int, str], date] = {}
+        totals: DayCounts = Counter()
+        for day in sorted(daily):
+            counts = daily[day]
+            monthly[day.replace(day=1)].update(counts)
+            totals.update(counts)
+            last_seen.update(dict.fromkeys(counts, day))
+
+        with transaction.atomic():
+            NumberFrequency.objects.filter(result_kind=kind).delete()
+            NumberLastSeen.objects.filter(result_kind=kind).delete()
+            cls._write_counts(kind, DAY, daily)
+            cls._write_counts(kind, MONTH, monthly)
+            NumberLastSeen.objects.bulk_create(
+                [
+                    NumberLastSeen(
+                        result_kind=kind,
+                        provider_id=provider_id,
+                        number=number,
+                        last_seen=seen,
+                        total_count=totals[(provider_id, number)],
+                    )
+                    for (provider_id, number), seen in last_seen.items()
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        cls.invalidate_cache()
+        return {"days": len(daily), "months": len(monthly), "numbers": len(last_seen)}
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    @staticmethod
+    def hot(kind: str, provider_id: int, month: date, *, limit: int = 10) -> list[dict]:
+        rows = (
+            NumberFrequency.objects.filter(
+                result_kind=kind, provider_id=provider_id, period=MONTH, period_start=month.replace(day=1)
+            )
+            .order_by("-count", "number")
+            .values("number", "count")[:limit]
+        )
+        return list(rows)
+
+    @staticmethod
+    def cold(kind: str, provider_id: int, *, days: int, today: date, limit: int = 10) -> list[dict]:
+        """Números que no salen hace al menos `days` días (entre los que salieron alguna vez)."""
+        rows = (
+            NumberLastSeen.objects.filter(
+                result_kind=kind, provider_id=provider_id, last_seen__lte=today - timedelta(days=days)
+            )
+            .order_by("last_seen", "number")
+            .values("number", "last_seen", "total_count")[:limit]
+        )
+        return [
+            {
+                "number": row["number"],
+                "last_seen": row["last_seen"].isoformat(),
+                "days": (today - row["last_seen"]).days,
+                "total": row["total_count"],
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def invalidate_cache() -> None:
+        try:
+            DeviceRedisService.delete_pattern(CACHE_PATTERN)
+        except Exception as exc:
+            # Las estadísticas ya quedaron escritas; el cache vence solo por TTL.
+            logger.warning("No se pudo invalidar el cache de estadísticas: %s", exc)
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @staticmethod
+    def _write_counts(kind: str, period: str, counts: dict[date, DayCounts], *, upsert: bool = False) -> None:
+        objs = (
+            NumberFrequency(
+                result_kind=kind,
+                provider_id=provider_id,
+                number=number,
+                period=period,
+                period_start=start,
+                count=count,
+            )
+            for start, by_key in counts.items()
+            for (provider_id, number), count in by_key.items()
+        )
+        extra = {}
+        if upsert:
+            extra = {
+                "update_conflicts": True,
+                "unique_fields": ["result_kind", "provider", "period", "period_start", "number"],
+                "update_fields": ["count"],
+            }
+        NumberFrequency.objects.bulk_create(objs, batch_size=BATCH_SIZE, **extra)
+
+    @staticmethod
+    def _delete_keys(queryset, keys: Iterable[tuple[int, str]]) -> None:
+        by_provider: dict[int, list[str]] = defaultdict(list)
+        for provider_id, number in keys:
+            by_provider[provider_id].append(number)
+        for provider_id, numbers in by_provider.items():
+            queryset.filter(provider_id=provider_id, number__in=numbers).delete()
+
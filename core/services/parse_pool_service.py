@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Lo que cada proceso del pool importa al arrancar, para que el primer parseo
+# no pague imports de bs4 / lxml / comandos.
+WARM_MODULES = (
+    "bs4",
+    "core.services.html_parser_service",
+    "core.management.commands.scrape_lotoven_tables",
+    "core.management.commands.scrape_tuazar_tables",
+    "core.management.commands.scrape_lotoven_animalitos",
+    "core.management.commands.scrape_condor_animalitos",
+)
+
+
+@dataclass(frozen=True)
+class ParsedBlock:
+    """Bloque del DOM ya parseado: solo datos planos, viaja entre procesos."""
+
+    key: str
+    fragment: str
+    rows: list
+
+
+def _warm_worker(settings_module: str) -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+    for module in WARM_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:  # pragma: no cover - lxml opcional
+            logger.debug("No se pudo precargar %s en el pool de parseo.", module)
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+class ParsePoolService:
+    """
+    Etapa de parseo opcional en procesos aparte (SCRAPER_PARSE_POOL_SIZE > 0).
+
+    BeautifulSoup + los loops de parseo son Python puro: con varios scrapers
+    en threads del mismo worker se serializan en el GIL y frenan el heartbeat
+    de Celery. Con el pool, el HTML va a procesos "spawn" precalentados
+    (django.setup + WARM_MODULES) que devuelven registros planos.
+
+    Con tamaño 0 (default) `submit` corre inline y devuelve un Future resuelto:
+    los comandos usan un solo camino en ambos modos.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _executor_pid: Optional[int] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def pool_size() -> int:
+        return max(0, int(getattr(settings, "SCRAPER_PARSE_POOL_SIZE", 0)))
+
+    @staticmethod
+    def timeout_seconds() -> int:
+        return int(getattr(settings, "SCRAPER_PARSE_TIMEOUT_SECONDS", 60))
+
+    @classmethod
+    def submit(cls, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """`fn` debe ser una función de módulo (picklable) que no toque la BD."""
+        executor = cls.get_executor()
+        if executor is None:
+            return cls._inline(fn, *args, **kwargs)
+        try:
+            return executor.submit(fn, *args, **kwargs)
+        except (BrokenProcessPool, RuntimeError):
+            logger.warning("Pool de parseo roto; se recrea y este parseo corre inline.")
+            cls.shutdown()
+            return cls._inline(fn, *args, **kwargs)
+
+    @classmethod
+    def result(cls, future: Future) -> Any:
+        try:
+            return future.result(timeout=cls.timeout_seconds())
+        except BrokenProcessPool:
+            cls.shutdown()
+            raise
+
+    @classmethod
+    def get_executor(cls) -> Optional[ProcessPoolExecutor]:
+        size = cls.pool_size()
+        if size <= 0:
+            return None
+        with cls._lock:
+            # Un hijo de fork (prefork de Celery) no puede usar el pool del padre.
+            if cls._executor is not None and cls._executor_pid == os.getpid():
+                return cls._executor
+            cls._executor = ProcessPoolExecutor(
+                max_workers=size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+                initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings"),),
+            )
+            cls._executor_pid = os.getpid()
+            executor = cls._executor
+        cls.warm(executor, size)
+        return executor
+
+    @staticmethod
+    def warm(executor: ProcessPoolExecutor, size: int) -> set[int]:
+        """Arranca todos los procesos ya (no en el primer scrape)."""
+        return {f.result() for f in [executor.submit(_worker_pid) for _ in range(size * 2)]}
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            executor, cls._executor, cls._executor_pid = cls._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _inline(fn: Callable[..., Any], *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
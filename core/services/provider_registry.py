@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import Provider
+from core.models.provider import normalize_provider_key
+
+
+@dataclass(frozen=True)
+class ProviderRef:
+    """Provider que un scraper necesita; logo/source vacíos no pisan lo guardado."""
+
+    name: str
+    source_url: str = ""
+    logo_url: str = ""
+    update_source_url: bool = False
+
+
+@dataclass
+class ProviderSyncResult:
+    providers: dict[str, Provider] = field(default_factory=dict)
+    created: int = 0
+    updated: int = 0
+
+
+class ProviderRegistry:
+    """
+    Providers en memoria del proceso, indexados por `normalized_name` (unique
+    en BD) y por id.
+
+    - Se carga con una sola query y se recarga cuando cambia la versión
+      compartida en cache (admin / signals) o tras REFRESH_SECONDS.
+    - `sync()` / `ensure()` resuelven los providers de un scrape con
+      operaciones bulk (ver `sync`).
+    - SCRAPER_PROVIDER_ALIASES ({alias: nombre canónico}) junta en un solo
+      Provider la misma lotería publicada con otro nombre por otra web.
+    """
+
+    VERSION_KEY = "providers:registry:version"
+    REFRESH_SECONDS = 300
+
+    _lock = threading.RLock()
+    _by_key: dict[str, Provider] = {}
+    _by_id: dict[int, Provider] = {}
+    _version = None
+    _loaded_at = 0.0
+    _loaded = False
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    @classmethod
+    def get(cls, name: str) -> Optional[Provider]:
+        cls._ensure_loaded()
+        return cls._by_key.get(cls.canonical_key(name))
+
+    @staticmethod
+    def aliases() -> dict[str, str]:
+        """{clave normalizada del alias: nombre canónico}."""
+        return {
+            normalize_provider_key(alias): canonical
+            for alias, canonical in (getattr(settings, "SCRAPER_PROVIDER_ALIASES", None) or {}).items()
+        }
+
+    @classmethod
+    def canonical_name(cls, name: str) -> str:
+        return cls.aliases().get(normalize_provider_key(name), name)
+
+    @classmethod
+    def canonical_key(cls, name: str) -> str:
+        return normalize_provider_key(cls.canonical_name(name))
+
+    @classmethod
+    def by_id(cls) -> dict[int, Provider]:
+        """Mapa id -> Provider para serializar un listado con una sola verificación."""
+        cls._ensure_loaded()
+        return cls._by_id
+
+    @classmethod
+    def get_by_id(cls, provider_id: int) -> Optional[Provider]:
+        cls._ensure_loaded()
+        provider = cls._by_id.get(provider_id)
+        if provider is None and provider_id is not None:
+            # Provider nuevo creado por otro proceso: recarga una vez.
+            cls.reload()
+            provider = cls._by_id.get(provider_id)
+        return provider
+
+    # -------------------------
+    # Escritura
+    # -------------------------
+    @classmethod
+    def sync(cls, specs: Iterable[ProviderRef]) -> ProviderSyncResult:
+        """
+        Resuelve los providers de un scrape: crea los faltantes con bulk_create
+        (ignore_conflicts cubre corridas concurrentes) y corrige los que
+        cambiaron con un bulk_update.
+
+        La copia local no se toca hasta el commit, así un rollback no deja
+        providers inexistentes en memoria.
+        """
+        specs = list(specs)
+        aliases = cls.aliases()
+        names = {spec.name: aliases.get(normalize_provider_key(spec.name), spec.name) for spec in specs}
+        wanted: dict[str, ProviderRef] = {}
+        for spec in specs:
+            key = normalize_provider_key(names[spec.name])
+            if key:
+                wanted.setdefault(key, spec)
+        result = ProviderSyncResult()
+        if not wanted:
+            return result
+
+        cls._ensure_loaded()
+        missing = [key for key in wanted if key not in cls._by_key]
+        created: dict[str, Provider] = {}
+        if missing:
+            Provider.objects.bulk_create(
+                [
+                    Provider(
+                        name=names[wanted[key].name],
+                        normalized_name=key,
+                        source_url=wanted[key].source_url,
+                        logo_url=wanted[key].logo_url or None,
+                        is_active=True,
+                    )
+                    for key in missing
+                ],
+                ignore_conflicts=True,
+            )
+            created = {p.normalized_name: p for p in Provider.objects.filter(normalized_name__in=missing)}
+            result.created = len(created)
+
+        resolved: dict[str, Provider] = {}
+        to_update: list[Provider] = []
+        update_fields: set[str] = set()
+        for key, spec in wanted.items():
+            provider = created.get(key) or copy.copy(cls._by_key[key])
+            if names[spec.name] != spec.name:
+                # Un alias no le cambia la fuente al provider canónico.
+                spec = replace(spec, update_source_url=False)
+            changed = cls._apply_spec(provider, spec)
+            if changed:
+                to_update.append(provider)
+                update_fields.update(changed)
+            resolved[key] = provider
+        for spec in specs:
+            key = normalize_provider_key(names[spec.name])
+            if key:
+                result.providers[spec.name] = resolved[key]
+        if to_update:
+            Provider.objects.bulk_update(to_update, sorted(update_fields))
+            result.updated = len(to_update)
+
+        if created or to_update:
+            transaction.on_commit(cls.on_provider_changed)
+        return result
+
+    @classmethod
+    def ensure(cls, specs: Iterable[ProviderRef]) -> dict[str, Provider]:
+        """Devuelve {spec.name: Provider}, creando / activando lo necesario."""
+        return cls.sync(specs).providers
+
+    @classmethod
+    def ensure_one(cls, name: str, *, source_url: str = "", logo_url: str = "") -> Provider:
+        return cls.ensure([ProviderRef(name=name, source_url=source_url, logo_url=logo_url)])[name]
+
+    # -------------------------
+    # Invalidación
+    # -------------------------
+    @classmethod
+    def on_provider_changed(cls) -> None:
+        cls.invalidate()
+        cls.bump_version()
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Descarta la copia local; la próxima lectura recarga desde BD."""
+        with cls._lock:
+            cls._loaded = False
+
+    @classmethod
+    def bump_version(cls) -> None:
+        """Avisa al resto de procesos (workers / web) que deben recargar."""
+        try:
+            cache.set(cls.VERSION_KEY, time.time_ns(), timeout=None)
+        except Exception:
+            pass
+
+    @classmethod
+    def reload(cls) -> None:
+        version = cls._shared_version()
+        providers = list(Provider.objects.all())
+        with cls._lock:
+            cls._by_key = {}
+            cls._by_id = {}
+            for provider in providers:
+                cls._store(provider)
+            cls._version = version
+            cls._loaded_at = time.monotonic()
+            cls._loaded = True
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @classmethod
+    def _ensure_loaded(cls) -> None:
+        stale = not cls._loaded or (time.monotonic() - cls._loaded_at) > cls.REFRESH_SECONDS
+        if stale or cls._shared_version() != cls._version:
+            cls.reload()
+
+    @classmethod
+    def _shared_version(cls):
+        try:
+            return cache.get(cls.VERSION_KEY)
+        except Exception:
+            return None
+
+    @classmethod
+    def _store(cls, provider: Provider) -> None:
+        cls._by_key[provider.normalized_name] = provider
+        cls._by_id[provider.pk] = provider
+
+    @staticmethod
+    def _apply_spec(provider: Provider, spec: ProviderRef) -> list[str]:
+        changed = []
+        replace_source = spec.update_source_url or not provider.source_url
+        if spec.source_url and replace_source and provider.source_url != spec.source_url:
+            provider.source_url = spec.source_url
+            changed.append("source_url")
+        if spec.logo_url and provider.logo_url != spec.logo_url:
+            provider.logo_url = spec.logo_url
+            changed.append("logo_url")
+        if provider.is_active is False:
+            provider.is_active = True
+            changed.append("is_active")
+        return changed
+
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+from django.db import connection
+from django.db.models import Model
+from django.utils import timezone
+
+from core.models import AnimalitoArchive, AnimalitoResult, CurrentResult, ResultArchive
+from core.services.number_index_service import NumberIndexService
+from core.services.number_stats_service import NumberStatsService
+from core.services.result_partition_service import ResultPartitionService
+from core.services.results_cache_service import ANIMALITOS, TRIPLES
+
+ARCHIVE_KEY_FIELDS = ("provider", "draw_date", "draw_time")
+
+
+@dataclass(frozen=True)
+class ArchiveSpec:
+    source: type[Model]
+    target: type[Model]
+    fields: tuple[str, ...]
+    # Campos NULL-ables en la fuente que el archivo guarda como "".
+    blank_if_null: frozenset[str] = frozenset()
+
+
+ARCHIVE_SPECS = {
+    TRIPLES: ArchiveSpec(
+        source=CurrentResult,
+        target=ResultArchive,
+        fields=("winning_number", "image_url", "extra"),
+        blank_if_null=frozenset({"image_url"}),
+    ),
+    ANIMALITOS: ArchiveSpec(
+        source=AnimalitoResult,
+        target=AnimalitoArchive,
+        fields=("animal_number", "animal_name", "animal_image_url", "provider_logo_url"),
+        blank_if_null=frozenset({"animal_image_url", "provider_logo_url"}),
+    ),
+}
+
+
+@dataclass
+class ArchiveSummary:
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.created + self.updated
+
+
+class ResultArchiveService:
+    """
+    Rollover diario set-based: un INSERT ... SELECT ... ON CONFLICT DO UPDATE
+    por tabla copia el día completo al archivo (upsert por la unique
+    constraint provider/draw_date/draw_time) y un DELETE limpia la fuente.
+
+    En Postgres el upsert va en un CTE con RETURNING (xmax = 0) y la misma
+    sentencia devuelve creados / actualizados; en SQLite (sin DML en CTE) un
+    COUNT previo de las claves ya archivadas da los actualizados.
+
+    Con las tablas particionadas (ResultPartitionService) el día se mueve
+    entero con DETACH / ATTACH PARTITION, sin copiar filas.
+
+    Cada día archivado actualiza las estadísticas de números (NumberStatsService)
+    y el índice número -> sorteos (NumberIndexService).
+    """
+
+    @classmethod
+    def archive_day(cls, kind: str, target_date: date, *, keep_current: bool = False) -> ArchiveSummary:
+        summary = cls._archive(kind, target_date, keep_current=keep_current)
+        NumberStatsService.record_day(kind, target_date)
+        NumberIndexService.index_day(kind, target_date)
+        return summary
+
+    @classmethod
+    def _archive(cls, kind: str, target_date: date, *, keep_current: bool) -> ArchiveSummary:
+        spec = ARCHIVE_SPECS[kind]
+        if not keep_current and ResultPartitionService.rollover(kind, target_date):
+            moved = spec.target.objects.filter(draw_date=target_date).count()
+            return ArchiveSummary(created=moved, deleted=moved)
+
+        upsert_sql, params = cls._upsert_sql(spec, target_date)
+        summary = ArchiveSummary()
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    f"WITH upserted AS ({upsert_sql} RETURNING (xmax = 0) AS inserted) "
+                    "SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted",
+                    params,
+                )
+                summary.created, summary.updated = cursor.fetchone()
+            else:
+                cursor.execute(*cls._existing_count_sql(spec, target_date))
+                existing = cursor.fetchone()[0]
+                cursor.execute(upsert_sql, params)
+                summary.updated = existing
+                summary.created = max(0, cursor.rowcount - existing)
+        if not keep_current:
+            summary.deleted, _ = spec.source.objects.filter(draw_date=target_date).delete()
+        return summary
+
+    # -------------------------
+    # SQL
+    # -------------------------
+    @staticmethod
+    def _column(model: type[Model], name: str) -> str:
+        return connection.ops.quote_name(model._meta.get_field(name).column)
+
+    @classmethod
+    def _upsert_sql(cls, spec: ArchiveSpec, target_date: date) -> tuple[str, list]:
+        qn = connection.ops.quote_name
+        keys = [cls._column(spec.target, name) for name in ARCHIVE_KEY_FIELDS]
+        target_columns = keys + [cls._column(spec.target, name) for name in spec.fields]
+        selected = [cls._column(spec.source, name) for name in ARCHIVE_KEY_FIELDS]
+        for name in spec.fields:
+            column = cls._column(spec.source, name)
+            selected.append(f"COALESCE({column}, '')" if name in spec.blank_if_null else column)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in target_columns[len(keys):])
+        sql = (
+            f"INSERT INTO {qn(spec.target._meta.db_table)} "
+            f"({', '.join(target_columns)}, {cls._column(spec.target, 'created_at')}) "
+            f"SELECT {', '.join(selected)}, %s FROM {qn(spec.source._meta.db_table)} "
+            f"WHERE {cls._column(spec.source, 'draw_date')} = %s "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+        )
+        ops = connection.ops
+        return sql, [ops.adapt_datetimefield_value(timezone.now()), ops.adapt_datefield_value(target_date)]
+
+    @classmethod
+    def _existing_count_sql(cls, spec: ArchiveSpec, target_date: date) -> tuple[str, list]:
+        qn = connection.ops.quote_name
+        join = " AND ".join(
+            f"a.{cls._column(spec.target, name)} = s.{cls._column(spec.source, name)}" for name in ARCHIVE_KEY_FIELDS
+        )
+        sql = (
+            f"SELECT COUNT(*) FROM {qn(spec.source._meta.db_table)} s "
+            f"JOIN {qn(spec.target._meta.db_table)} a ON {join} "
+            f"WHERE s.{cls._column(spec.source, 'draw_date')} = %s"
+        )
+        return sql, [connection.ops.adapt_datefield_value(target_date)]
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import mmap
+import os
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+from core.services.result_archive_service import ARCHIVE_SPECS
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".ndjson.gz"
+META_SUFFIX = ".meta.json"
+
+
+@dataclass
+class ExportSummary:
+    rows: int = 0
+    segments: int = 0
+
+
+class ResultHistoryStore:
+    """
+    Histórico largo de resultados fuera de Postgres: segmentos append-only
+    por tipo y mes en RESULT_HISTORY_DIR (`<kind>/<YYYY-MM>.ndjson.gz`).
+
+    - `export` agrega las filas como un miembro gzip nuevo al segmento del
+      mes (gzip concatenado sigue siendo un gzip válido; nunca se reescribe).
+    - Cada segmento tiene un `.meta.json` con rango de fechas, providers y
+      sorteos distintos (`rows`), así `query` descarta segmentos sin
+      abrirlos y solo lee (vía mmap) los meses y providers pedidos.
+    - Si una retención se re-ejecuta tras exportar, un sorteo puede quedar
+      dos veces: `query` se queda con la última copia y el meta se recalcula
+      leyendo el segmento en cada export, así `rows` no se infla.
+    """
+
+    @staticmethod
+    def root() -> Optional[Path]:
+        raw = getattr(settings, "RESULT_HISTORY_DIR", "")
+        return Path(raw) if raw else None
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls.root() is not None
+
+    @classmethod
+    def segment_path(cls, kind: str, month: str) -> Path:
+        return cls.root() / kind / f"{month}{SEGMENT_SUFFIX}"
+
+    # -------------------------
+    # Escritura
+    # -------------------------
+    @classmethod
+    def export(cls, kind: str, queryset: QuerySet) -> ExportSummary:
+        """Agrega las filas del queryset (del modelo archivo de `kind`) a sus segmentos."""
+        spec = ARCHIVE_SPECS[kind]
+        columns = ["provider_id", "provider__name", "draw_date", "draw_time", *spec.fields]
+        by_month: dict[str, list[dict]] = {}
+        for row in queryset.order_by("draw_date", "provider_id", "draw_time").values(*columns).iterator():
+            record = cls._to_record(row, spec.fields)
+            by_month.setdefault(record["draw_date"][:7], []).append(record)
+
+        summary = ExportSummary()
+        for month, records in by_month.items():
+            cls._append(kind, month, records)
+            summary.rows += len(records)
+            summary.segments += 1
+        return summary
+
+    @classmethod
+    def _append(cls, kind: str, month: str, records: list[dict]) -> None:
+        path = cls.segment_path(kind, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records)
+        with open(path, "ab") as fh:
+            fh.write(gzip.compress(payload.encode("utf-8")))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        meta = cls._build_meta(path)
+        meta_path = path.with_name(f"{month}{META_SUFFIX}")
+        tmp_path = meta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, meta_path)
+
+    @classmethod
+    def _build_meta(cls, path: Path) -> dict:
+        # Se recuenta el segmento entero: un re-export no suma sorteos que ya estaban.
+        keys = {(record["provider_id"], record["draw_date"], record["draw_time"]) for record in cls._scan(path)}
+        dates = [draw_date for _, draw_date, _ in keys]
+        return {
+            "rows": len(keys),
+            "providers": sorted({provider_id for provider_id, _, _ in keys}),
+            "min_date": min(dates, default=None),
+            "max_date": max(dates, default=None),
+        }
+
+    @staticmethod
+    def _to_record(row: dict, fields: Iterable[str]) -> dict:
+        record = {
+            "provider_id": row["provider_id"],
+            "provider": row["provider__name"],
+            "draw_date": row["draw_date"].isoformat(),
+            "draw_time": row["draw_time"].strftime("%H:%M"),
+        }
+        for name in fields:
+            record[name] = row[name]
+        return record
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    @classmethod
+    def read_meta(cls, kind: str, month: str) -> Optional[dict]:
+        path = cls.root() / kind / f"{month}{META_SUFFIX}"
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def months(cls, kind: str) -> list[str]:
+        folder = cls.root() / kind
+        if not folder.is_dir():
+            return []
+        return sorted(path.name[: -len(SEGMENT_SUFFIX)] for path in folder.glob(f"*{SEGMENT_SUFFIX}"))
+
+    @classmethod
+    def segments_for(cls, kind: str, start: date, end: date, provider_id: Optional[int] = None) -> list[Path]:
+        """Segmentos que pueden tener filas del rango / provider (según nombre y meta)."""
+        folder = cls.root() / kind
+        if not folder.is_dir():
+            return []
+        first, last = f"{start:%Y-%m}", f"{end:%Y-%m}"
+        out = []
+        for path in sorted(folder.glob(f"*{SEGMENT_SUFFIX}")):
+            month = path.name[: -len(SEGMENT_SUFFIX)]
+            if not first <= month <= last:
+                continue
+            meta = cls.read_meta(kind, month)
+            if meta is not None:
+                if meta["max_date"] < start.isoformat() or meta["min_date"] > end.isoformat():
+                    continue
+                if provider_id is not None and provider_id not in meta["providers"]:
+                    continue
+            out.append(path)
+        return out
+
+    @classmethod
+    def query(
+        cls,
+        kind: str,
+        start: date,
+        end: date,
+        *,
+        provider_id: Optional[int] = None,
+    ) -> list[dict]:
+        """Filas de [start, end] (opcionalmente de un provider), ordenadas por fecha / provider / hora."""
+        if not cls.enabled():
+            return []
+        lo, hi = start.isoformat(), end.isoformat()
+        rows: dict[tuple, dict] = {}
+        for path in cls.segments_for(kind, start, end, provider_id):
+            for record in cls._scan(path):
+                if not lo <= record["draw_date"] <= hi:
+                    continue
+                if provider_id is not None and record["provider_id"] != provider_id:
+                    continue
+                rows[(record["provider_id"], record["draw_date"], record["draw_time"])] = record
+        return sorted(rows.values(), key=lambda r: (r["draw_date"], r["provider_id"], r["draw_time"]))
+
+    @staticmethod
+    def _scan(path: Path) -> Iterator[dict]:
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, gzip.GzipFile(fileobj=mm) as gz:
+                try:
+                    for line in gz:
+                        yield json.loads(line)
+                except (EOFError, gzip.BadGzipFile) as exc:
+                    # Último miembro truncado (export cortado a mitad): lo anterior sigue valiendo.
+                    logger.warning("Segmento %s truncado: %s", path, exc)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+from django.db import connection, transaction
+from django.db.models import Model
+
+from core.models import AnimalitoArchive, AnimalitoResult, CurrentResult, ResultArchive
+from core.services.results_cache_service import ANIMALITOS, TRIPLES
+
+logger = logging.getLogger(__name__)
+
+PARTITION_SUFFIX_RE = re.compile(r"_p(\d{8})$")
+
+
+@dataclass(frozen=True)
+class PartitionPair:
+    """Tabla del día + su archivo: comparten columnas y secuencia de ids (migración 0035)."""
+
+    current: type[Model]
+    archive: type[Model]
+
+
+PARTITION_PAIRS = {
+    TRIPLES: PartitionPair(current=CurrentResult, archive=ResultArchive),
+    ANIMALITOS: PartitionPair(current=AnimalitoResult, archive=AnimalitoArchive),
+}
+
+
+class ResultPartitionService:
+    """
+    Particionado declarativo por rango de `draw_date` (un día por partición)
+    para las tablas de resultados y archivo. Solo Postgres: la conversión
+    es la migración 0035; en SQLite todo sigue por el camino de siempre.
+
+    - Cada tabla tiene una partición DEFAULT, así un insert nunca falla por
+      falta de partición; `ensure_partitions` crea los días futuros de las
+      tablas del día y mueve a su partición lo que haya caído en DEFAULT.
+      El archivo solo recibe particiones por ATTACH (o filas en DEFAULT si
+      el rollover cae al upsert).
+    - Retención = DROP de las particiones fuera de la ventana (costo
+      constante, sin tuplas muertas ni VACUUM).
+    - Rollover = DETACH de la partición de ayer de la tabla del día y ATTACH
+      al archivo. Por eso cada par (current, archive) comparte una secuencia
+      de ids: Django sigue viendo `id` como único aunque la PK física sea
+      (id, draw_date), que Postgres exige en tablas particionadas. La
+      migración crea el archivo con el orden de columnas de la tabla del
+      día; si columnas, NOT NULL o defaults no coinciden, el rollover cae
+      al upsert.
+    """
+
+    # -------------------------
+    # Introspección
+    # -------------------------
+    @staticmethod
+    def supported() -> bool:
+        return connection.vendor == "postgresql"
+
+    @classmethod
+    def is_partitioned(cls, model: type[Model]) -> bool:
+        if not cls.supported():
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace",
+                [model._meta.db_table],
+            )
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def partitions(cls, model: type[Model]) -> dict[date, str]:
+        """{día: nombre de partición} (sin la DEFAULT)."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = %s AND p.relnamespace = current_schema()::regnamespace",
+                [model._meta.db_table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        out = {}
+        for name in names:
+            day = cls.partition_day(name)
+            if day is not None:
+                out[day] = name
+        return out
+
+    @staticmethod
+    def partition_name(model: type[Model], day: date) -> str:
+        return f"{model._meta.db_table}_p{day:%Y%m%d}"
+
+    @staticmethod
+    def default_partition_name(model: type[Model]) -> str:
+        return f"{model._meta.db_table}_pdefault"
+
+    @staticmethod
+    def partition_day(name: str) -> Optional[date]:
+        match = PARTITION_SUFFIX_RE.search(name)
+        if not match:
+            return None
+        raw = match.group(1)
+        return date(int(raw[:4]), int(raw[4:6]), int(raw[6:]))
+
+    # -------------------------
+    # Mantenimiento
+    # -------------------------
+    @classmethod
+    def ensure_partitions(cls, model: type[Model], start: date, end: date) -> list[str]:
+        """Crea las particiones diarias [start, end] que falten."""
+        existing = cls.partitions(model)
+        created = []
+        day = start
+        while day <= end:
+            if day not in existing:
+                cls._create_partition(model, day)
+                created.append(cls.partition_name(model, day))
+            day += timedelta(days=1)
+        return created
+
+    @classmethod
+    def expired_partitions(cls, model: type[Model], before: date) -> list[str]:
+        return [name for day, name in sorted(cls.partitions(model).items()) if day < before]
+
+    @classmethod
+    def drop_partitions(cls, model: type[Model], before: date) -> list[str]:
+        """DETACH + DROP de las particiones diarias anteriores a `before`."""
+        qn = connection.ops.quote_name
+        dropped = cls.expired_partitions(model, before)
+        with connection.cursor() as cursor:
+            for name in dropped:
+                cursor.execute(f"ALTER TABLE {qn(model._meta.db_table)} DETACH PARTITION {qn(name)}")
+                cursor.execute(f"DROP TABLE {qn(name)}")
+        return dropped
+
+    @classmethod
+    def rollover(cls, kind: str, day: date) -> bool:
+        """
+        Mueve el día `day` de la tabla del día al archivo con DETACH + ATTACH.
+        False si no aplica (sin particionar, el archivo ya tiene ese día, ...):
+        el llamador usa entonces el upsert set-based.
+        """
+        pair = PARTITION_PAIRS[kind]
+        if not (cls.is_partitioned(pair.current) and cls.is_partitioned(pair.archive)):
+            return False
+        source = cls.partitions(pair.current).get(day)
+        if source is None or day in cls.partitions(pair.archive) or cls._default_has_rows(pair.archive, day):
+            return False
+        if cls.columns(source) != cls.columns(pair.archive._meta.db_table):
+            logger.warning("Rollover %s %s: las columnas de %s no coinciden con el archivo; se usa upsert.", kind, day, source)
+            return False
+
+        qn = connection.ops.quote_name
+        target = cls.partition_name(pair.archive, day)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(pair.current._meta.db_table)} DETACH PARTITION {qn(source)}")
+            cursor.execute(f"ALTER TABLE {qn(source)} RENAME TO {qn(target)}")
+            cursor.execute(
+                f"ALTER TABLE {qn(pair.archive._meta.db_table)} ATTACH PARTITION {qn(target)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [day, day + timedelta(days=1)],
+            )
+        logger.info("Rollover %s %s: %s -> %s", kind, day, source, target)
+        return True
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @classmethod
+    def _create_partition(cls, model: type[Model], day: date) -> None:
+        qn = connection.ops.quote_name
+        table = model._meta.db_table
+        name = cls.partition_name(model, day)
+        bounds = [day, day + timedelta(days=1)]
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not cls._default_has_rows(model, day):
+                cursor.execute(
+                    f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)", bounds
+                )
+                return
+            # Filas del día que cayeron en DEFAULT: se mueven antes del ATTACH
+            # (Postgres no deja crear la partición con DEFAULT violando el rango).
+            default = qn(cls.default_partition_name(model))
+            cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {default} WHERE draw_date = %s RETURNING *) "
+                f"INSERT INTO {qn(name)} SELECT * FROM moved",
+                [day],
+            )
+            cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)", bounds)
+
+    @staticmethod
+    def columns(table: str) -> list[tuple]:
+        """(nombre, tipo, NOT NULL, default) de cada columna, en orden físico."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull, "
+                "pg_get_expr(d.adbin, d.adrelid) "
+                "FROM pg_attribute a "
+                "LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum "
+                "WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped "
+                "ORDER BY a.attnum",
+                [connection.ops.quote_name(table)],
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+
+    @classmethod
+    def _default_has_rows(cls, model: type[Model], day: date) -> bool:
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {qn(cls.default_partition_name(model))} WHERE draw_date = %s)",
+                [day],
+            )
+            return bool(cursor.fetchone()[0])
@@ -1,15 +1,33 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import time
+from typing import Optional
 
 from django.utils import timezone
 
+# Corte fijo para corridas reproducibles (benchmark / regresión con fixtures).
+_pinned_cutoff: ContextVar[Optional[time]] = ContextVar("business_cutoff_time", default=None)
+
 
 def get_business_cutoff_time() -> time:
+    pinned = _pinned_cutoff.get()
+    if pinned is not None:
+        return pinned
     now_local = timezone.localtime(timezone.now())
     return now_local.replace(second=0, microsecond=0).time()
 
 
+@contextmanager
+def pinned_business_cutoff(cutoff: time):
+    token = _pinned_cutoff.set(cutoff)
+    try:
+        yield
+    finally:
+        _pinned_cutoff.reset(token)
+
+
 def delete_future_rows_for_provider(*, model, provider, draw_date, cutoff_time: time) -> int:
     deleted, _ = model.objects.filter(
         provider=provider,
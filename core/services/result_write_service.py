@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, time
+from typing import Iterable, Optional
+
+from django.db.models import Model
+
+from core.services.scraper_run_stats import record_run_stats
+from core.services.source_reconciliation_service import SourceReconciliationService
+
+
+RESULT_UNIQUE_FIELDS = ("provider", "draw_date", "draw_time")
+
+
+@dataclass(frozen=True)
+class ProviderWindow:
+    """
+    Qué filas existentes de un provider deben desaparecer en esta corrida:
+      - cutoff_time: horarios posteriores al corte de negocio (filas futuras);
+      - allowed_times: si se indica, horarios fuera del calendario esperado.
+    """
+
+    cutoff_time: Optional[time] = None
+    allowed_times: Optional[frozenset[time]] = None
+
+    def keeps(self, draw_time: time) -> bool:
+        if self.cutoff_time is not None and draw_time > self.cutoff_time:
+            return False
+        if self.allowed_times is not None and draw_time not in self.allowed_times:
+            return False
+        return True
+
+
+@dataclass
+class ResultWriteSummary:
+    inserted: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    other_source: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.inserted + self.changed + self.unchanged
+
+    def as_stats(self) -> dict:
+        return {
+            "rows_inserted": self.inserted,
+            "rows_changed": self.changed,
+            "rows_unchanged": self.unchanged,
+            "rows_deleted": self.deleted,
+            "rows_other_source": self.other_source,
+        }
+
+
+@dataclass
+class ResultWriteBatch:
+    """
+    Filas deseadas de un modelo de resultados (CurrentResult / AnimalitoResult)
+    para una fecha. Se acumulan durante el scrape y se aplican de una vez con
+    `ResultWriteService.apply`.
+
+    Cada fila solo declara los campos que el scraper controla (mismo criterio
+    que `defaults` en update_or_create): los demás no se tocan.
+
+    `source` (scraper_key) activa la reconciliación entre fuentes: ver
+    SourceReconciliationService.
+    """
+
+    model: type[Model]
+    draw_date: date
+    source: str = ""
+    rows: dict[tuple[int, time], dict] = field(default_factory=dict)
+    windows: dict[int, ProviderWindow] = field(default_factory=dict)
+
+    def add(self, provider, draw_time: time, **values) -> None:
+        self.rows[(provider.pk, draw_time)] = values
+
+    def window(
+        self,
+        provider,
+        *,
+        cutoff_time: Optional[time] = None,
+        allowed_times: Optional[Iterable[time]] = None,
+    ) -> None:
+        current = self.windows.get(provider.pk) or ProviderWindow()
+        self.windows[provider.pk] = ProviderWindow(
+            cutoff_time=cutoff_time if cutoff_time is not None else current.cutoff_time,
+            allowed_times=frozenset(allowed_times) if allowed_times is not None else current.allowed_times,
+        )
+
+    @property
+    def provider_ids(self) -> set[int]:
+        return {provider_id for provider_id, _ in self.rows} | set(self.windows)
+
+
+class ResultWriteService:
+    """
+    Escritura diff-based de resultados scrapeados:
+
+      1. un SELECT de las filas existentes para (providers, draw_date);
+      2. diff en memoria contra las filas deseadas;
+      3. solo cambios reales: un bulk_create (upsert por la unique constraint,
+         por si otra corrida insertó en paralelo), un bulk_update y un DELETE
+         combinado para filas futuras / horarios no esperados.
+
+    Con `batch.source`, las filas que ya publicó primero otra fuente no se
+    pisan ni se borran (SourceReconciliationService).
+    """
+
+    BATCH_SIZE = 500
+
+    @classmethod
+    def apply(cls, batch: ResultWriteBatch) -> ResultWriteSummary:
+        summary = ResultWriteSummary()
+        provider_ids = batch.provider_ids
+        if not provider_ids:
+            return summary
+
+        model = batch.model
+        existing = {
+            (obj.provider_id, obj.draw_time): obj
+            for obj in model.objects.filter(provider_id__in=provider_ids, draw_date=batch.draw_date)
+        }
+        foreign = SourceReconciliationService.reconcile(batch, existing)
+
+        to_create: list[Model] = []
+        to_update: list[Model] = []
+        create_fields: set[str] = set()
+        update_fields: set[str] = set()
+        delete_pks: list[int] = []
+
+        for key, values in batch.rows.items():
+            provider_id, draw_time = key
+            window = batch.windows.get(provider_id)
+            if window is not None and not window.keeps(draw_time):
+                continue
+
+            obj = existing.get(key)
+            if obj is not None and key in foreign:
+                summary.other_source += 1
+                continue
+            if obj is None:
+                to_create.append(
+                    model(provider_id=provider_id, draw_date=batch.draw_date, draw_time=draw_time, **values)
+                )
+                create_fields.update(values)
+                summary.inserted += 1
+                continue
+
+            changed = [name for name, value in values.items() if getattr(obj, name) != value]
+            if not changed:
+                summary.unchanged += 1
+                continue
+            for name in changed:
+                setattr(obj, name, values[name])
+            to_update.append(obj)
+            update_fields.update(changed)
+            summary.changed += 1
+
+        for (provider_id, draw_time), obj in existing.items():
+            window = batch.windows.get(provider_id)
+            if window is not None and not window.keeps(draw_time) and (provider_id, draw_time) not in foreign:
+                delete_pks.append(obj.pk)
+
+        if to_create:
+            model.objects.bulk_create(
+                to_create,
+                batch_size=cls.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=list(RESULT_UNIQUE_FIELDS),
+                update_fields=sorted(create_fields),
+            )
+        if to_update:
+            model.objects.bulk_update(to_update, sorted(update_fields), batch_size=cls.BATCH_SIZE)
+        if delete_pks:
+            summary.deleted, _ = model.objects.filter(pk__in=delete_pks).delete()
+
+        record_run_stats(**summary.as_stats())
+        return summary
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.core.cache import cache
+
+from core.services.device_redis_service import DeviceRedisService
+from core.services.scraper_run_stats import PHASE_CACHE, run_phase
+
+TRIPLES = "triples"
+ANIMALITOS = "animalitos"
+
+# Keys de /api/results y /api/animalitos (ver core/api/views.py).
+CACHE_PATTERNS = {
+    TRIPLES: ("results:triples:*", "results:current:*"),
+    ANIMALITOS: ("results:animalitos:*",),
+}
+
+_deferred_kinds: ContextVar[Optional[set[str]]] = ContextVar("results_cache_deferred", default=None)
+
+
+class ResultsCacheService:
+    """
+    Invalidación del cache de resultados que leen las TVs.
+
+    Dentro de `deferred()` (tareas fan-out de scraping) solo se anotan los
+    tipos a invalidar; el callback del chord los invalida una vez al final.
+    """
+
+    @classmethod
+    def invalidate(cls, *kinds: str) -> None:
+        deferred = _deferred_kinds.get()
+        if deferred is not None:
+            deferred.update(kinds)
+            return
+        with run_phase(PHASE_CACHE):
+            for kind in kinds:
+                for pattern in CACHE_PATTERNS[kind]:
+                    DeviceRedisService.delete_pattern(pattern)
+            if TRIPLES in kinds:
+                # Sin Redis (delete_pattern no disponible) al menos cae la clave global.
+                cache.delete("results:current:all")
+
+    @classmethod
+    @contextmanager
+    def deferred(cls):
+        kinds: set[str] = set()
+        token = _deferred_kinds.set(kinds)
+        try:
+            yield kinds
+        finally:
+            _deferred_kinds.reset(token)
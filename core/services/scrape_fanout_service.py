@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from io import StringIO
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import ScraperHealth, ScraperUnitHealth
+from core.services.results_cache_service import ResultsCacheService
+from core.services.scraper_health_service import ScraperHealthService
+from core.services.scraper_lock_service import ScraperLease, ScraperLockService
+from core.services.scraper_run_stats import PHASE_CACHE, ScraperRunStats, collect_run_stats
+
+# Fallas de red / upstream: se reintentan con backoff. El resto (parser roto,
+# HTML inesperado) no mejora reintentando.
+RETRYABLE_EXCEPTIONS = (requests.RequestException,)
+
+
+@dataclass(frozen=True)
+class ScrapeUnit:
+    """Una página fuente + su grupo de providers, scrapeable por separado."""
+
+    scraper_key: str
+    key: str
+    label: str
+    providers: tuple[str, ...] = ()
+    options: dict = field(default_factory=dict)
+
+
+class ScrapeFanoutService:
+    """
+    Fan-out de scraping por unidad (página fuente, grupo de providers):
+
+      run_scraper_fanout -> chord([scrape_unit, ...]) -> finalize_scrape
+
+    Cada unidad corre el comando acotado a su página (ej: `--url`), registra
+    su propia salud en ScraperUnitHealth y difiere la invalidación de cache;
+    el callback invalida una sola vez y marca el ScraperHealth agregado.
+
+    El lease del scraper (ScraperLockService) se toma al despachar el chord,
+    cada unidad lo renueva mientras corre y finalize lo libera.
+    """
+
+    # -------------------------
+    # Unidades
+    # -------------------------
+    @classmethod
+    def units_for(cls, scraper_key: str) -> list[ScrapeUnit]:
+        from core.management.commands import scrape_lotoven_tables, scrape_tuazar_tables
+
+        ScraperHealthService.get_definition(scraper_key)
+        if scraper_key == "lotoven_triples":
+            units = []
+            for url, specs in scrape_lotoven_tables.provider_pages().items():
+                slug = specs[0].dom_id if len(specs) == 1 else urlsplit(url).path.strip("/").split("/")[-1]
+                units.append(
+                    ScrapeUnit(
+                        scraper_key=scraper_key,
+                        key=f"{scraper_key}:{slug}",
+                        label=f"Lotoven {slug}",
+                        providers=tuple(spec.name for spec in specs),
+                        options={"url": url},
+                    )
+                )
+            return units
+        if scraper_key == "tuazar_triples":
+            return [
+                ScrapeUnit(
+                    scraper_key=scraper_key,
+                    key=f"{scraper_key}:resultados",
+                    label="TuAzar resultados",
+                    providers=tuple(scrape_tuazar_tables.TARGETS),
+                )
+            ]
+        if scraper_key == "lotoven_animalitos":
+            return [ScrapeUnit(scraper_key=scraper_key, key=f"{scraper_key}:animalitos", label="Lotoven animalitos")]
+        return [
+            ScrapeUnit(
+                scraper_key=scraper_key,
+                key=f"{scraper_key}:condor-gana",
+                label="Condor Gana",
+                providers=("Condor Gana",),
+            )
+        ]
+
+    @classmethod
+    def get_unit(cls, unit_key: str) -> ScrapeUnit:
+        scraper_key = unit_key.split(":", 1)[0]
+        for unit in cls.units_for(scraper_key):
+            if unit.key == unit_key:
+                return unit
+        raise KeyError(f"Unknown scrape unit: {unit_key}")
+
+    # -------------------------
+    # Ejecución
+    # -------------------------
+    @classmethod
+    def start(cls, scraper_key: str) -> Optional[tuple[ScraperLease, list[ScrapeUnit]]]:
+        """Toma el lease del scraper y lo marca RUNNING; None (skip contado) si ya corre."""
+        units = cls.units_for(scraper_key)
+        lease = ScraperLockService.acquire(scraper_key, lease_seconds=cls.lease_seconds(scraper_key))
+        if lease is None:
+            ScraperHealthService.mark_skipped(scraper_key)
+            return None
+        ScraperHealthService.mark_running(scraper_key)
+        return lease, units
+
+    @classmethod
+    def lease_seconds(cls, scraper_key: str) -> int:
+        # El chord entero vive bajo un lease: alcanza aunque las unidades corran en serie.
+        return ScraperLockService.lease_seconds() * len(cls.units_for(scraper_key))
+
+    @classmethod
+    def lease_for(cls, key: str, token: str) -> Optional[ScraperLease]:
+        """Reconstruye el lease del chord desde su token (key = scraper_key o unit_key)."""
+        if not token:
+            return None
+        scraper_key = key.split(":", 1)[0]
+        return ScraperLease(scraper_key, token, cls.lease_seconds(scraper_key))
+
+    @classmethod
+    def run_unit(
+        cls,
+        unit_key: str,
+        *,
+        attempt: int = 1,
+        lease: Optional[ScraperLease] = None,
+        **command_options,
+    ) -> dict:
+        """Corre una unidad; relanza la excepción para que la tarea decida si reintenta."""
+        unit = cls.get_unit(unit_key)
+        definition = ScraperHealthService.get_definition(unit.scraper_key)
+        monitor = cls._mark_unit_running(unit, attempt=attempt)
+        with collect_run_stats() as stats, ResultsCacheService.deferred() as cache_kinds:
+            try:
+                if lease is not None:
+                    with ScraperLockService.heartbeat(lease):
+                        call_command(definition.command_name, stdout=StringIO(), **unit.options, **command_options)
+                else:
+                    call_command(definition.command_name, stdout=StringIO(), **unit.options, **command_options)
+            except Exception as exc:
+                cls._mark_unit_failure(monitor, exc)
+                raise
+        cls._mark_unit_success(monitor, stats)
+        return {
+            "unit": unit.key,
+            "ok": True,
+            "attempts": attempt,
+            "cache_kinds": sorted(cache_kinds),
+            "stats": stats.as_dict(),
+        }
+
+    @staticmethod
+    def failed_result(unit_key: str, exc: Exception, *, attempts: int) -> dict:
+        return {
+            "unit": unit_key,
+            "ok": False,
+            "attempts": attempts,
+            "error": f"{exc.__class__.__name__}: {exc}",
+            "cache_kinds": [],
+            "stats": {},
+        }
+
+    @classmethod
+    def finalize(
+        cls,
+        scraper_key: str,
+        results: Iterable[Optional[dict]],
+        *,
+        lease: Optional[ScraperLease] = None,
+    ) -> dict:
+        results = [r for r in results if r]
+        stats = ScraperRunStats()
+        for result in results:
+            counters = dict(result.get("stats") or {})
+            for phase, ms in (counters.pop("timings", None) or {}).items():
+                stats.add_timing(phase, ms)
+            stats.add(**counters)
+
+        kinds = sorted({kind for r in results for kind in r.get("cache_kinds", ())})
+        if kinds:
+            started = time.perf_counter()
+            ResultsCacheService.invalidate(*kinds)
+            stats.add_timing(PHASE_CACHE, (time.perf_counter() - started) * 1000)
+
+        failures = [r for r in results if not r.get("ok")]
+        if failures:
+            errors = [f"{r['unit']}: {r.get('error', '')}" for r in failures]
+            ScraperHealthService.mark_failure(
+                scraper_key,
+                RuntimeError("; ".join(errors)),
+                stats=stats,
+                details="\n".join(errors),
+            )
+        else:
+            ScraperHealthService.mark_success(scraper_key, stats=stats)
+        if lease is not None:
+            ScraperLockService.release(lease)
+        return {
+            "scraper_key": scraper_key,
+            "units": len(results),
+            "failed": [r["unit"] for r in failures],
+            "cache_kinds": kinds,
+        }
+
+    @staticmethod
+    def retry_countdown(retries: int) -> int:
+        """Backoff exponencial con jitter: base * 2^n (tope SCRAPER_UNIT_RETRY_BACKOFF_MAX_SECONDS)."""
+        base = int(getattr(settings, "SCRAPER_UNIT_RETRY_BACKOFF_SECONDS", 15))
+        cap = int(getattr(settings, "SCRAPER_UNIT_RETRY_BACKOFF_MAX_SECONDS", 300))
+        delay = min(cap, base * (2**retries))
+        return delay + random.randint(0, max(1, delay // 4))
+
+    # -------------------------
+    # Salud por unidad
+    # -------------------------
+    @staticmethod
+    def _mark_unit_running(unit: ScrapeUnit, *, attempt: int) -> ScraperUnitHealth:
+        monitor, _ = ScraperUnitHealth.objects.get_or_create(
+            unit_key=unit.key,
+            defaults={"scraper_key": unit.scraper_key, "label": unit.label},
+        )
+        monitor.scraper_key = unit.scraper_key
+        monitor.label = unit.label
+        monitor.providers = ", ".join(unit.providers)[:255]
+        monitor.last_status = ScraperHealth.Status.RUNNING
+        monitor.last_started_at = timezone.now()
+        monitor.last_finished_at = None
+        monitor.last_attempts = attempt
+        monitor.save()
+        return monitor
+
+    @staticmethod
+    def _mark_unit_success(monitor: ScraperUnitHealth, stats: ScraperRunStats) -> None:
+        now = timezone.now()
+        monitor.last_status = ScraperHealth.Status.SUCCESS
+        monitor.last_finished_at = now
+        monitor.last_success_at = now
+        monitor.last_error_message = ""
+        monitor.consecutive_failures = 0
+        monitor.last_rows_written = stats.rows_inserted + stats.rows_changed + stats.rows_deleted
+        monitor.last_run_timings = stats.rounded_timings()
+        monitor.save()
+
+    @staticmethod
+    def _mark_unit_failure(monitor: ScraperUnitHealth, exc: Exception) -> None:
+        monitor.last_status = ScraperHealth.Status.FAILED
+        monitor.last_finished_at = timezone.now()
+        monitor.last_error_message = ScraperHealthService._truncate_error(str(exc) or exc.__class__.__name__)
+        monitor.consecutive_failures += 1
+        monitor.save()
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.models import ResultObservation, ScraperHealth
+from core.services.provider_registry import ProviderRegistry
+from core.services.scraper_health_service import ScraperHealthService
+from core.services.scraper_lock_service import ScraperLockService
+from core.services.source_reconciliation_service import KINDS
+
+
+def _lotoven_triples_calendar() -> dict[str, set[time]]:
+    from core.management.commands.scrape_lotoven_tables import expected_draw_calendar
+
+    return expected_draw_calendar()
+
+
+@dataclass(frozen=True)
+class ScheduledSource:
+    """
+    Fuente que el scheduler sondea. Los providers de la fuente se reconocen por
+    el host de `Provider.source_url`.
+    """
+
+    scraper_key: str
+    result_model: str
+    archive_model: str
+    source_host: str
+    static_calendar: Optional[Callable[[], dict[str, set[time]]]] = None
+    poll_options: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class PollDecision:
+    scraper_key: str
+    due: bool
+    reason: str  # draw_pending | idle_sweep | waiting | running | closed
+    pending_draws: tuple[time, ...] = ()
+
+
+class ScrapeScheduleService:
+    """
+    Scheduler guiado por el calendario de sorteos.
+
+    Cada tick (SCRAPER_SCHEDULER_TICK_SECONDS, vía Celery beat):
+      - arma por provider los horarios esperados del día: calendario fijo del
+        scraper + horarios vistos en los últimos SCRAPER_CALENDAR_LOOKBACK_DAYS.
+        El archivo solo guarda ayer, así que la ventana larga sale de
+        ResultObservation (SCRAPER_OBSERVATION_RETENTION_DAYS);
+      - un sorteo queda "pendiente" desde draw_time + SCRAPER_POLL_GRACE_SECONDS
+        hasta + SCRAPER_POLL_WINDOW_MINUTES mientras su fila no exista hoy;
+      - con sorteos pendientes la fuente se sondea cada SCRAPER_POLL_SECONDS;
+        cuando aparecen (o vence la ventana) vuelve al barrido de seguridad
+        cada SCRAPER_IDLE_SWEEP_MINUTES.
+    """
+
+    SOURCES = {
+        "lotoven_triples": ScheduledSource(
+            scraper_key="lotoven_triples",
+            result_model="CurrentResult",
+            archive_model="ResultArchive",
+            source_host="lotoven.com",
+            static_calendar=_lotoven_triples_calendar,
+        ),
+        "tuazar_triples": ScheduledSource(
+            scraper_key="tuazar_triples",
+            result_model="CurrentResult",
+            archive_model="ResultArchive",
+            source_host="tuazar.com",
+        ),
+        "lotoven_animalitos": ScheduledSource(
+            scraper_key="lotoven_animalitos",
+            result_model="AnimalitoResult",
+            archive_model="AnimalitoArchive",
+            source_host="lotoven.com",
+            poll_options={"poll": True},
+        ),
+        "condor_animalitos": ScheduledSource(
+            scraper_key="condor_animalitos",
+            result_model="AnimalitoResult",
+            archive_model="AnimalitoArchive",
+            source_host="lottoresultados.com",
+        ),
+    }
+
+    LAST_DISPATCH_PREFIX = "scrape:scheduler:last"
+    CALENDAR_PREFIX = "scrape:scheduler:calendar"
+    CALENDAR_TTL_SECONDS = 15 * 60
+    RUNNING_STALE_MINUTES = 10
+
+    # -------------------------
+    # Tick
+    # -------------------------
+    @classmethod
+    def tick(cls, *, dispatch: Callable[[str, dict], None], now: Optional[datetime] = None) -> list[PollDecision]:
+        current = now or timezone.now()
+        running = cls._running_keys(current)
+        decisions = []
+        for source in cls.SOURCES.values():
+            decision = cls.decide(source, now=current, running=source.scraper_key in running)
+            if decision.due:
+                cache.set(cls._last_dispatch_key(source.scraper_key), current.timestamp(), timeout=24 * 3600)
+                dispatch(source.scraper_key, dict(source.poll_options))
+            decisions.append(decision)
+        return decisions
+
+    @classmethod
+    def decide(cls, source: ScheduledSource, *, now: datetime, running: bool = False) -> PollDecision:
+        key = source.scraper_key
+        definition = ScraperHealthService.get_definition(key)
+        local_now = timezone.localtime(now)
+        if not definition.starts_hour <= local_now.hour <= definition.ends_hour:
+            return PollDecision(key, False, "closed")
+        if running:
+            return PollDecision(key, False, "running")
+
+        since_last = cls._seconds_since_dispatch(key, now)
+        pending = cls.pending_draws(source, now=now)
+        if pending:
+            due = since_last >= cls.poll_seconds()
+            return PollDecision(key, due, "draw_pending" if due else "waiting", pending)
+        if since_last >= cls.idle_sweep_minutes() * 60:
+            return PollDecision(key, True, "idle_sweep")
+        return PollDecision(key, False, "waiting")
+
+    # -------------------------
+    # Calendario
+    # -------------------------
+    @classmethod
+    def pending_draws(cls, source: ScheduledSource, *, now: datetime) -> tuple[time, ...]:
+        local_now = timezone.localtime(now)
+        draw_date = local_now.date()
+        calendar = cls.build_calendar(source, draw_date)
+        if not calendar:
+            return ()
+
+        grace = timedelta(seconds=cls.poll_grace_seconds())
+        window = timedelta(minutes=cls.poll_window_minutes())
+        in_window: dict[int, set[time]] = {}
+        for provider_id, draw_times in calendar.items():
+            for draw_time in draw_times:
+                draw_at = datetime.combine(draw_date, draw_time, tzinfo=local_now.tzinfo)
+                if draw_at + grace <= local_now <= draw_at + window:
+                    in_window.setdefault(provider_id, set()).add(draw_time)
+        if not in_window:
+            return ()
+
+        model = apps.get_model("core", source.result_model)
+        present = set(
+            model.objects.filter(
+                provider_id__in=list(in_window),
+                draw_date=draw_date,
+            ).values_list("provider_id", "draw_time")
+        )
+        pending = {
+            draw_time
+            for provider_id, draw_times in in_window.items()
+            for draw_time in draw_times
+            if (provider_id, draw_time) not in present
+        }
+        return tuple(sorted(pending))
+
+    @classmethod
+    def build_calendar(cls, source: ScheduledSource, draw_date) -> dict[int, frozenset[time]]:
+        """{provider_id: horarios esperados en draw_date} (cacheado unos minutos)."""
+        cache_key = f"{cls.CALENDAR_PREFIX}:{source.scraper_key}:{draw_date.isoformat()}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {
+                int(provider_id): frozenset(time.fromisoformat(value) for value in values)
+                for provider_id, values in cached.items()
+            }
+
+        provider_ids = [
+            provider.pk
+            for provider in ProviderRegistry.by_id().values()
+            if provider.is_active and cls._host_matches(provider.source_url, source.source_host)
+        ]
+        calendar: dict[int, set[time]] = {}
+        if provider_ids:
+            archive = apps.get_model("core", source.archive_model)
+            since = draw_date - timedelta(days=cls.lookback_days())
+            window = {"provider_id__in": provider_ids, "draw_date__gte": since, "draw_date__lt": draw_date}
+            # El archivo cubre también filas escritas sin fuente (carga manual).
+            learned = [
+                archive.objects.filter(**window).values_list("provider_id", "draw_time").distinct(),
+                ResultObservation.objects.filter(result_kind=KINDS[source.result_model], **window)
+                .values_list("provider_id", "draw_time")
+                .distinct(),
+            ]
+            for provider_id, draw_time in (row for rows in learned for row in rows):
+                calendar.setdefault(provider_id, set()).add(draw_time)
+
+        for name, draw_times in (source.static_calendar() if source.static_calendar else {}).items():
+            provider = ProviderRegistry.get(name)
+            if provider is not None and provider.is_active:
+                calendar.setdefault(provider.pk, set()).update(draw_times)
+
+        cache.set(
+            cache_key,
+            {str(pid): sorted(t.isoformat(timespec="minutes") for t in times) for pid, times in calendar.items()},
+            timeout=cls.CALENDAR_TTL_SECONDS,
+        )
+        return {provider_id: frozenset(times) for provider_id, times in calendar.items()}
+
+    # -------------------------
+    # Settings
+    # -------------------------
+    @staticmethod
+    def poll_seconds() -> int:
+        return int(getattr(settings, "SCRAPER_POLL_SECONDS", 45))
+
+    @staticmethod
+    def poll_grace_seconds() -> int:
+        return int(getattr(settings, "SCRAPER_POLL_GRACE_SECONDS", 60))
+
+    @staticmethod
+    def poll_window_minutes() -> int:
+        return int(getattr(settings, "SCRAPER_POLL_WINDOW_MINUTES", 45))
+
+    @staticmethod
+    def idle_sweep_minutes() -> int:
+        return int(getattr(settings, "SCRAPER_IDLE_SWEEP_MINUTES", 60))
+
+    @staticmethod
+    def lookback_days() -> int:
+        return int(getattr(settings, "SCRAPER_CALENDAR_LOOKBACK_DAYS", 7))
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @classmethod
+    def _last_dispatch_key(cls, scraper_key: str) -> str:
+        return f"{cls.LAST_DISPATCH_PREFIX}:{scraper_key}"
+
+    @classmethod
+    def _seconds_since_dispatch(cls, scraper_key: str, now: datetime) -> float:
+        ts = cache.get(cls._last_dispatch_key(scraper_key))
+        if not ts:
+            return float("inf")
+        return now.timestamp() - float(ts)
+
+    @classmethod
+    def _running_keys(cls, now: datetime) -> set[str]:
+        # El lease es la fuente de verdad; RUNNING reciente cubre corridas sin lease (deploy en curso).
+        stale_before = now - timedelta(minutes=cls.RUNNING_STALE_MINUTES)
+        running = set(
+            ScraperHealth.objects.filter(
+                scraper_key__in=list(cls.SOURCES),
+                last_status=ScraperHealth.Status.RUNNING,
+                last_started_at__gte=stale_before,
+            ).values_list("scraper_key", flat=True)
+        )
+        return running | {key for key in cls.SOURCES if ScraperLockService.is_locked(key)}
+
+    @staticmethod
+    def _host_matches(url: str, host: str) -> bool:
+        netloc = urlsplit(url or "").netloc.lower()
+        return netloc == host or netloc.endswith(f".{host}")
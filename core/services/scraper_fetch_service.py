@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time as time_module
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, time
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from core.services.circuit_breaker_service import CircuitBreakerService
+from core.services.scraper_run_stats import PHASE_CONNECT, PHASE_DOWNLOAD, record_run_stats, record_timing
+
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+
+# Corpus local {url: html} activo (benchmark / regresión sin red).
+_offline_pages: ContextVar[Optional[dict[str, str]]] = ContextVar("scraper_offline_pages", default=None)
+
+
+def upstream_url(url: str) -> str:
+    """
+    Con SCRAPER_UPSTREAM_OVERRIDE (ej: http://127.0.0.1:8765, ver
+    `simulate_upstreams`) las requests van al simulador local:
+    https://lotoven.com/animalitos/ -> http://127.0.0.1:8765/lotoven.com/animalitos/
+    """
+    override = (getattr(settings, "SCRAPER_UPSTREAM_OVERRIDE", "") or "").rstrip("/")
+    if not override:
+        return url
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{override}/{parts.netloc}{parts.path or '/'}{query}"
+
+
+def content_fingerprint(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def next_recheck_time(draw_times: Iterable[time], cutoff_time: Optional[time]) -> Optional[time]:
+    """
+    Primer horario publicado que todavía está en el futuro respecto al corte.
+    Esas filas se descartan hoy, así que el bloque debe reprocesarse cuando
+    el corte las alcance aunque el HTML no cambie.
+    """
+    if cutoff_time is None:
+        return None
+    pending = [t for t in draw_times if t > cutoff_time]
+    return min(pending) if pending else None
+
+
+@dataclass(frozen=True)
+class FetchedPage:
+    url: str
+    html: str
+    status_code: int = 200
+    etag: str = ""
+    last_modified: str = ""
+    unchanged: bool = False
+
+    @property
+    def fingerprint(self) -> str:
+        return content_fingerprint(self.html)
+
+
+class ScraperFetchService:
+    """
+    Descarga páginas upstream y recuerda, por URL y por bloque del DOM, qué se
+    procesó por última vez:
+
+      - la página guarda ETag / Last-Modified y hash del body para enviar
+        requests condicionales (304) o detectar un body idéntico;
+      - cada bloque (proveedor) guarda el hash de su fragmento HTML para
+        saltar parseo y escrituras cuando no cambió.
+
+    El estado se escribe solo cuando el comando confirma que aplicó los datos
+    (ver `remember_page` / `remember_block`), para no saltar contenido que
+    nunca llegó a la BD.
+
+    Además, cada body 200 queda en un cache compartido por URL (zlib, TTL
+    SCRAPER_PAGE_CACHE_TTL_SECONDS) con single-flight: si otro proceso ya está
+    bajando la misma URL, se espera su resultado en vez de repetir el request.
+    """
+
+    STATE_TTL_SECONDS = 36 * 3600
+    PAGE_STATE_PREFIX = "scrape:page:state"
+    BLOCK_STATE_PREFIX = "scrape:block:state"
+    SHARED_PAGE_PREFIX = "scrape:page:shared"
+    FLIGHT_PREFIX = "scrape:page:flight"
+    FLIGHT_POLL_SECONDS = 0.1
+
+    # -------------------------
+    # HTTP
+    # -------------------------
+    @classmethod
+    def fetch(
+        cls,
+        url: str,
+        *,
+        timeout: int,
+        headers: Optional[dict] = None,
+        conditional: bool = False,
+        max_age: Optional[int] = None,
+    ) -> FetchedPage:
+        """
+        `max_age`: antigüedad máxima aceptable de la copia compartida (None = el
+        TTL completo, 0 = siempre upstream; `--force` / sondeos post-sorteo).
+        """
+        offline = _offline_pages.get()
+        if offline is not None:
+            if url not in offline:
+                raise requests.ConnectionError(f"Modo offline: {url} no está en el corpus local.")
+            return FetchedPage(url=url, html=offline[url])
+
+        state = cls._get_state(cls._page_key(url)) if conditional else None
+        ttl = cls.shared_ttl_seconds()
+        if ttl <= 0:
+            return cls._fetch_upstream(url, timeout=timeout, headers=headers, state=state)
+
+        max_age = ttl if max_age is None else min(max_age, ttl)
+        shared = cls._get_shared(url, fetched_after=time_module.time() - max_age) if max_age > 0 else None
+        if shared is not None:
+            return cls._from_shared(url, shared, state=state)
+
+        # Single-flight: un solo proceso baja la URL; el resto espera su copia.
+        flight_key = cls._flight_key(url)
+        waiting_since = time_module.time()
+        if cache.add(flight_key, waiting_since, timeout=timeout + 5):
+            try:
+                page = cls._fetch_upstream(url, timeout=timeout, headers=headers, state=state)
+                if page.status_code == 200:
+                    cls._store_shared(page, ttl=ttl)
+                return page
+            finally:
+                cache.delete(flight_key)
+
+        deadline = waiting_since + timeout
+        while time_module.time() < deadline:
+            time_module.sleep(cls.FLIGHT_POLL_SECONDS)
+            shared = cls._get_shared(url, fetched_after=min(waiting_since, time_module.time() - max_age))
+            if shared is not None:
+                return cls._from_shared(url, shared, state=state)
+            if cache.get(flight_key) is None:
+                break
+        # El líder falló (o respondió 304 sin body): request propio.
+        return cls._fetch_upstream(url, timeout=timeout, headers=headers, state=state)
+
+    @classmethod
+    def _fetch_upstream(cls, url: str, *, timeout: int, headers: Optional[dict], state: Optional[dict]) -> FetchedPage:
+        request_headers = {"User-Agent": DEFAULT_USER_AGENT}
+        request_headers.update(headers or {})
+        if state:
+            if state.get("etag"):
+                request_headers["If-None-Match"] = state["etag"]
+            if state.get("last_modified"):
+                request_headers["If-Modified-Since"] = state["last_modified"]
+
+        host = CircuitBreakerService.host_for(url)
+        CircuitBreakerService.before_request(host, timeout=timeout)
+        started = time_module.perf_counter()
+        try:
+            resp = requests.get(upstream_url(url), headers=request_headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            CircuitBreakerService.record_failure(host, exc)
+            raise
+        if resp.status_code >= 500:
+            CircuitBreakerService.record_failure(host, requests.HTTPError(f"HTTP {resp.status_code} en {url}"))
+        else:
+            CircuitBreakerService.record_success(host)
+        # elapsed llega hasta los headers (DNS + conexión + TTFB); el resto es el body.
+        total_ms = (time_module.perf_counter() - started) * 1000
+        connect_ms = min(total_ms, resp.elapsed.total_seconds() * 1000)
+        record_timing(PHASE_CONNECT, connect_ms)
+        record_timing(PHASE_DOWNLOAD, total_ms - connect_ms)
+        record_run_stats(bytes_downloaded=len(resp.content or b""))
+        if resp.status_code == 304 and state:
+            return FetchedPage(
+                url=url,
+                html="",
+                status_code=304,
+                etag=state.get("etag") or "",
+                last_modified=state.get("last_modified") or "",
+                unchanged=True,
+            )
+        resp.raise_for_status()
+
+        html = resp.text
+        return FetchedPage(
+            url=url,
+            html=html,
+            status_code=resp.status_code,
+            etag=resp.headers.get("ETag", "") or "",
+            last_modified=resp.headers.get("Last-Modified", "") or "",
+            unchanged=bool(state) and state.get("fingerprint") == content_fingerprint(html),
+        )
+
+    @classmethod
+    @contextmanager
+    def serve_offline(cls, pages: dict[str, str]):
+        """Durante el bloque, `fetch` responde desde `pages` y nunca sale a la red."""
+        token = _offline_pages.set(dict(pages))
+        try:
+            yield
+        finally:
+            _offline_pages.reset(token)
+
+    @staticmethod
+    def is_offline() -> bool:
+        return _offline_pages.get() is not None
+
+    # -------------------------
+    # Estado por página
+    # -------------------------
+    @classmethod
+    def is_page_fresh(cls, url: str, *, draw_date: date, cutoff_time: Optional[time] = None) -> bool:
+        """
+        True si la última versión procesada de la página sigue siendo válida para
+        `draw_date` y ninguno de sus bloques espera un horario que ya venció.
+        Solo en ese caso vale la pena enviar un request condicional.
+        """
+        state = cls._get_state(cls._page_key(url))
+        if not state or state.get("draw_date") != draw_date.isoformat():
+            return False
+
+        scopes = state.get("block_scopes") or []
+        if not scopes:
+            return False
+        block_states = cache.get_many([cls._block_key(scope) for scope in scopes])
+        for scope in scopes:
+            if not cls._is_fresh(block_states.get(cls._block_key(scope)), draw_date=draw_date, cutoff_time=cutoff_time):
+                return False
+        return True
+
+    @classmethod
+    def remember_page(cls, page: FetchedPage, *, draw_date: date, block_scopes: Iterable[str]) -> None:
+        if page.status_code == 304:
+            return
+        cache.set(
+            cls._page_key(page.url),
+            {
+                "etag": page.etag,
+                "last_modified": page.last_modified,
+                "fingerprint": page.fingerprint,
+                "draw_date": draw_date.isoformat(),
+                "block_scopes": sorted(set(block_scopes)),
+            },
+            timeout=cls.STATE_TTL_SECONDS,
+        )
+
+    # -------------------------
+    # Estado por bloque
+    # -------------------------
+    @classmethod
+    def is_block_unchanged(
+        cls,
+        scope: str,
+        fragment: str,
+        *,
+        draw_date: date,
+        cutoff_time: Optional[time] = None,
+    ) -> bool:
+        state = cls._get_state(cls._block_key(scope))
+        if not cls._is_fresh(state, draw_date=draw_date, cutoff_time=cutoff_time):
+            return False
+        return state.get("fingerprint") == content_fingerprint(fragment)
+
+    @classmethod
+    def remember_block(
+        cls,
+        scope: str,
+        fragment: str,
+        *,
+        draw_date: date,
+        recheck_after: Optional[time] = None,
+    ) -> None:
+        cache.set(
+            cls._block_key(scope),
+            {
+                "fingerprint": content_fingerprint(fragment),
+                "draw_date": draw_date.isoformat(),
+                "recheck_after": recheck_after.strftime("%H:%M") if recheck_after else "",
+            },
+            timeout=cls.STATE_TTL_SECONDS,
+        )
+
+    @classmethod
+    def forget(cls, *, urls: Iterable[str] = (), scopes: Iterable[str] = ()) -> None:
+        keys = [cls._page_key(url) for url in urls] + [cls._block_key(scope) for scope in scopes]
+        if keys:
+            cache.delete_many(keys)
+
+    # -------------------------
+    # Cache compartido de páginas
+    # -------------------------
+    @staticmethod
+    def shared_ttl_seconds() -> int:
+        return int(getattr(settings, "SCRAPER_PAGE_CACHE_TTL_SECONDS", 60))
+
+    @classmethod
+    def _store_shared(cls, page: FetchedPage, *, ttl: int) -> None:
+        payload = {
+            "html": page.html,
+            "etag": page.etag,
+            "last_modified": page.last_modified,
+            "fetched_at": time_module.time(),
+        }
+        cache.set(cls._shared_key(page.url), zlib.compress(json.dumps(payload).encode("utf-8"), 6), timeout=ttl)
+
+    @classmethod
+    def _get_shared(cls, url: str, *, fetched_after: float) -> Optional[dict]:
+        raw = cache.get(cls._shared_key(url))
+        if not isinstance(raw, bytes):
+            return None
+        try:
+            payload = json.loads(zlib.decompress(raw))
+        except (zlib.error, ValueError):
+            return None
+        if float(payload.get("fetched_at") or 0) < fetched_after:
+            return None
+        return payload
+
+    @staticmethod
+    def _from_shared(url: str, payload: dict, *, state: Optional[dict]) -> FetchedPage:
+        html = payload.get("html") or ""
+        return FetchedPage(
+            url=url,
+            html=html,
+            etag=payload.get("etag") or "",
+            last_modified=payload.get("last_modified") or "",
+            unchanged=bool(state) and state.get("fingerprint") == content_fingerprint(html),
+        )
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @staticmethod
+    def _is_fresh(state: Optional[dict], *, draw_date: date, cutoff_time: Optional[time]) -> bool:
+        if not state or state.get("draw_date") != draw_date.isoformat():
+            return False
+        recheck_after = state.get("recheck_after") or ""
+        if recheck_after and cutoff_time is not None and cutoff_time.strftime("%H:%M") >= recheck_after:
+            return False
+        return True
+
+    @staticmethod
+    def _get_state(key: str) -> Optional[dict]:
+        value = cache.get(key)
+        return value if isinstance(value, dict) else None
+
+    @classmethod
+    def _page_key(cls, url: str) -> str:
+        return f"{cls.PAGE_STATE_PREFIX}:{content_fingerprint(url)}"
+
+    @classmethod
+    def _block_key(cls, scope: str) -> str:
+        return f"{cls.BLOCK_STATE_PREFIX}:{content_fingerprint(scope)}"
+
+    @classmethod
+    def _shared_key(cls, url: str) -> str:
+        return f"{cls.SHARED_PAGE_PREFIX}:{content_fingerprint(url)}"
+
+    @classmethod
+    def _flight_key(cls, url: str) -> str:
+        return f"{cls.FLIGHT_PREFIX}:{content_fingerprint(url)}"
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+
+# Corpus sintético: HTML escrito a mano con la estructura de cada fuente (no son
+# capturas reales). Sirve para regresión del parseo, no para medir páginas reales.
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "testdata" / "scrapers"
+EXPECTED_DIRNAME = "expected"
+
+
+def to_jsonable(value: Any) -> Any:
+    """Salida de parse_page -> JSON estable (horas HH:MM, dataclasses como dict)."""
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    if isinstance(value, date):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: to_jsonable(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    return value
+
+
+def count_rows(parsed: Any) -> int:
+    if isinstance(parsed, dict):
+        return sum(count_rows(v) for v in parsed.values())
+    return len(parsed or [])
+
+
+def fixtures_dir(override: Optional[Path | str] = None) -> Path:
+    return Path(override or getattr(settings, "SCRAPER_FIXTURES_DIR", "") or FIXTURES_DIR)
+
+
+@dataclass(frozen=True)
+class ScraperFixture:
+    """
+    HTML sintético de una fuente + la función de parseo de página del scraper
+    (picklable: función de módulo o `partial`, para poder mandarla al pool).
+    """
+
+    name: str
+    filename: str
+    parse: Callable[[str], Any]
+
+    def read_html(self, base_dir: Optional[Path | str] = None) -> str:
+        return (fixtures_dir(base_dir) / self.filename).read_text(encoding="utf-8")
+
+    def expected_path(self, base_dir: Optional[Path | str] = None) -> Path:
+        return fixtures_dir(base_dir) / EXPECTED_DIRNAME / f"{self.name}.json"
+
+    def load_expected(self, base_dir: Optional[Path | str] = None) -> Any:
+        return json.loads(self.expected_path(base_dir).read_text(encoding="utf-8"))
+
+    def write_expected(self, parsed: Any, base_dir: Optional[Path | str] = None) -> Path:
+        path = self.expected_path(base_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(to_jsonable(parsed), indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        return path
+
+
+@dataclass(frozen=True)
+class ScraperCommandFixture:
+    """Un comando de scraping completo servido desde el corpus local (sin red)."""
+
+    name: str
+    command_name: str
+    pages: dict[str, str]  # url -> filename
+    options: dict = field(default_factory=dict)
+
+    def read_pages(self, base_dir: Optional[Path | str] = None) -> dict[str, str]:
+        base = fixtures_dir(base_dir)
+        return {url: (base / filename).read_text(encoding="utf-8") for url, filename in self.pages.items()}
+
+
+def get_scraper_fixtures() -> tuple[ScraperFixture, ...]:
+    # Import diferido: los comandos importan modelos y servicios.
+    from core.management.commands import (
+        scrape_condor_animalitos,
+        scrape_lotoven_animalitos,
+        scrape_lotoven_tables,
+        scrape_tuazar_tables,
+    )
+
+    lotoven = scrape_lotoven_tables
+    return (
+        ScraperFixture(
+            "lotoven_loterias",
+            "lotoven_loterias.html",
+            partial(lotoven.parse_page, lotoven.LOTERIAS_URL),
+        ),
+        ScraperFixture(
+            "lotoven_triplechance",
+            "lotoven_triplechance.html",
+            partial(lotoven.parse_page, lotoven.TRIPLE_CHANCE_URL),
+        ),
+        ScraperFixture(
+            "lotoven_triplecaracas",
+            "lotoven_triplecaracas.html",
+            partial(lotoven.parse_page, lotoven.TRIPLE_CARACAS_URL),
+        ),
+        *(
+            ScraperFixture(
+                f"lotoven_{slug}",
+                f"lotoven_{slug}.html",
+                partial(lotoven.parse_page, url),
+            )
+            for slug, url in (
+                ("triplezulia", lotoven.TRIPLE_ZULIA_URL),
+                ("tripletachira", lotoven.TRIPLE_TACHIRA_URL),
+                ("triplecaliente", lotoven.TRIPLE_CALIENTE_URL),
+                ("triplezamorano", lotoven.TRIPLE_ZAMORANO_URL),
+            )
+        ),
+        ScraperFixture("tuazar_resultados", "tuazar_resultados.html", scrape_tuazar_tables.parse_page),
+        ScraperFixture("condor_gana", "condor_gana.html", scrape_condor_animalitos.parse_page),
+        ScraperFixture("lotoven_animalitos", "lotoven_animalitos.html", scrape_lotoven_animalitos.parse_page),
+        ScraperFixture(
+            "lotoven_animalitos_ayer",
+            "lotoven_animalitos_ayer.html",
+            scrape_lotoven_animalitos.parse_page,
+        ),
+    )
+
+
+def get_scraper_command_fixtures() -> tuple[ScraperCommandFixture, ...]:
+    from django.utils import timezone
+
+    from core.management.commands import (
+        scrape_condor_animalitos,
+        scrape_lotoven_animalitos,
+        scrape_lotoven_tables,
+        scrape_tuazar_tables,
+    )
+
+    lotoven = scrape_lotoven_tables
+    animalitos = scrape_lotoven_animalitos.Command
+    yesterday = timezone.localdate() - timedelta(days=1)
+    return (
+        ScraperCommandFixture(
+            "lotoven_tables",
+            "scrape_lotoven_tables",
+            {
+                lotoven.LOTERIAS_URL: "lotoven_loterias.html",
+                lotoven.TRIPLE_CHANCE_URL: "lotoven_triplechance.html",
+                lotoven.TRIPLE_ZULIA_URL: "lotoven_triplezulia.html",
+                lotoven.TRIPLE_CARACAS_URL: "lotoven_triplecaracas.html",
+                lotoven.TRIPLE_TACHIRA_URL: "lotoven_tripletachira.html",
+                lotoven.TRIPLE_CALIENTE_URL: "lotoven_triplecaliente.html",
+                lotoven.TRIPLE_ZAMORANO_URL: "lotoven_triplezamorano.html",
+            },
+            {"force": True},
+        ),
+        ScraperCommandFixture(
+            "tuazar_tables",
+            "scrape_tuazar_tables",
+            {scrape_tuazar_tables.TUAZAR_URL: "tuazar_resultados.html"},
+            {"force": True},
+        ),
+        ScraperCommandFixture(
+            "condor_animalitos",
+            "scrape_condor_animalitos",
+            {scrape_condor_animalitos.SOURCE_URL: "condor_gana.html"},
+            {"force": True},
+        ),
+        ScraperCommandFixture(
+            "lotoven_animalitos",
+            "scrape_lotoven_animalitos",
+            {animalitos.ANIMALITOS_URL: "lotoven_animalitos.html"},
+            {"force": True},
+        ),
+        ScraperCommandFixture(
+            "lotoven_animalitos_ayer",
+            "scrape_lotoven_animalitos",
+            {f"{animalitos.BASE_URL}/animalitos/ayer/": "lotoven_animalitos_ayer.html"},
+            {"force": True, "date": yesterday.isoformat()},
+        ),
+    )
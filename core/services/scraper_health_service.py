@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import logging
+import sys
 import traceback
 from dataclasses import dataclass
 from datetime import timedelta
 
 from django.core.management import call_command
+from django.db.models import F
 from django.utils import timezone
 
-from core.models import ScraperHealth
+from core.models import ScraperHealth, ScraperRun
+from core.services.circuit_breaker_service import CircuitBreakerService, CircuitState
+from core.services.scraper_lock_service import ScraperLockBusy, ScraperLockService
+from core.services.scraper_metrics import ScraperMetrics
+from core.services.scraper_run_stats import RUN_PHASES, ScraperRunStats, collect_run_stats
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(frozen=True)
@@ -18,6 +27,8 @@ class ScraperDefinition:
     stale_after_minutes: int = 150
     starts_hour: int = 8
     ends_hour: int = 22
+    # Hosts upstream (sin "www.") cuyo circuit breaker afecta a este scraper.
+    hosts: tuple[str, ...] = ()
 
 
 class ScraperHealthService:
@@ -26,21 +37,25 @@ class ScraperHealthService:
             key="lotoven_triples",
             label="Triples Lotoven",
             command_name="scrape_lotoven_tables",
+            hosts=("lotoven.com",),
         ),
         "tuazar_triples": ScraperDefinition(
             key="tuazar_triples",
             label="Triples TuAzar",
             command_name="scrape_tuazar_tables",
+            hosts=("tuazar.com",),
         ),
         "lotoven_animalitos": ScraperDefinition(
             key="lotoven_animalitos",
             label="Animalitos Lotoven",
             command_name="scrape_lotoven_animalitos",
+            hosts=("lotoven.com",),
         ),
         "condor_animalitos": ScraperDefinition(
             key="condor_animalitos",
             label="Animalitos Condor Gana",
             command_name="scrape_condor_animalitos",
+            hosts=("lottoresultados.com",),
         ),
     }
 
@@ -96,7 +111,7 @@ class ScraperHealthService:
         return monitor
 
     @classmethod
-    def mark_success(cls, scraper_key: str) -> ScraperHealth:
+    def mark_success(cls, scraper_key: str, *, stats: ScraperRunStats | None = None) -> ScraperHealth:
         now = timezone.now()
         monitor = cls.get_or_create_monitor(scraper_key)
         monitor.last_status = ScraperHealth.Status.SUCCESS
@@ -105,27 +120,42 @@ class ScraperHealthService:
         monitor.last_error_message = ""
         monitor.last_error_traceback = ""
         monitor.consecutive_failures = 0
-        monitor.save(
-            update_fields=[
-                "last_status",
-                "last_finished_at",
-                "last_success_at",
-                "last_error_message",
-                "last_error_traceback",
-                "consecutive_failures",
-                "updated_at",
-            ]
-        )
+        update_fields = [
+            "last_status",
+            "last_finished_at",
+            "last_success_at",
+            "last_error_message",
+            "last_error_traceback",
+            "consecutive_failures",
+            "updated_at",
+        ]
+        if stats is not None:
+            monitor.last_pages_skipped = stats.pages_skipped
+            monitor.last_blocks_skipped = stats.blocks_skipped
+            monitor.last_run_timings = stats.rounded_timings()
+            update_fields.extend(["last_pages_skipped", "last_blocks_skipped", "last_run_timings"])
+        monitor.save(update_fields=update_fields)
+        cls.record_run(monitor, ScraperRun.Outcome.SUCCESS, stats=stats)
         return monitor
 
     @classmethod
-    def mark_failure(cls, scraper_key: str, exc: Exception) -> ScraperHealth:
+    def mark_failure(
+        cls,
+        scraper_key: str,
+        exc: Exception,
+        *,
+        stats: ScraperRunStats | None = None,
+        details: str | None = None,
+    ) -> ScraperHealth:
+        """`details` reemplaza al traceback cuando la falla no viene de un except (ej: fan-out)."""
         now = timezone.now()
         monitor = cls.get_or_create_monitor(scraper_key)
         monitor.last_status = ScraperHealth.Status.FAILED
         monitor.last_finished_at = now
         monitor.last_error_message = cls._truncate_error(str(exc) or exc.__class__.__name__)
-        monitor.last_error_traceback = traceback.format_exc()
+        if details is None:
+            details = traceback.format_exc() if sys.exc_info()[0] is not None else ""
+        monitor.last_error_traceback = details
         monitor.consecutive_failures += 1
         monitor.save(
             update_fields=[
@@ -137,19 +167,111 @@ class ScraperHealthService:
                 "updated_at",
             ]
         )
+        cls.record_run(monitor, ScraperRun.Outcome.FAILED, stats=stats)
         return monitor
 
     @classmethod
-    def run_registered(cls, scraper_key: str):
+    def record_run(
+        cls,
+        monitor: ScraperHealth,
+        outcome: str,
+        *,
+        stats: ScraperRunStats | None = None,
+    ) -> ScraperRun:
+        """Guarda la corrida recién terminada en el historial y la exporta a Prometheus."""
+        stats = stats or ScraperRunStats()
+        timings = stats.timings
+        finished_at = monitor.last_finished_at or timezone.now()
+        started_at = monitor.last_started_at or finished_at
+        run = ScraperRun.objects.create(
+            scraper_key=monitor.scraper_key,
+            outcome=outcome,
+            started_at=started_at,
+            finished_at=finished_at,
+            duration_ms=max(0.0, (finished_at - started_at).total_seconds() * 1000),
+            **{f"{phase}_ms": round(timings.get(phase, 0.0), 1) for phase in RUN_PHASES},
+            bytes_downloaded=stats.bytes_downloaded,
+            pages_skipped=stats.pages_skipped,
+            rows_inserted=stats.rows_inserted,
+            rows_changed=stats.rows_changed,
+            rows_unchanged=stats.rows_unchanged,
+            rows_deleted=stats.rows_deleted,
+            error_message=monitor.last_error_message if outcome == ScraperRun.Outcome.FAILED else "",
+        )
+        ScraperMetrics.observe(run)
+        return run
+
+    @staticmethod
+    def get_run_trend(scraper_key: str, *, window: int = 10) -> dict:
+        """
+        Últimas `window` corridas vs las `window` anteriores: duración media,
+        fase más lenta y filas escritas, para las columnas de tendencia del admin.
+        """
+        runs = list(ScraperRun.objects.filter(scraper_key=scraper_key).order_by("-started_at")[: window * 2])
+        recent, previous = runs[:window], runs[window:]
+
+        def avg(items, attr):
+            values = [getattr(item, attr) for item in items]
+            return sum(values) / len(values) if values else None
+
+        recent_ms = avg(recent, "duration_ms")
+        previous_ms = avg(previous, "duration_ms")
+        phase_avgs = {phase: avg(recent, f"{phase}_ms") or 0.0 for phase in RUN_PHASES}
+        return {
+            "runs": len(recent),
+            "durations_ms": [run.duration_ms for run in reversed(recent)],
+            "avg_duration_ms": recent_ms,
+            "previous_avg_duration_ms": previous_ms,
+            "change_pct": (
+                (recent_ms - previous_ms) / previous_ms * 100 if recent_ms is not None and previous_ms else None
+            ),
+            "slowest_phase": max(phase_avgs, key=phase_avgs.get) if recent else "",
+            "phase_avgs_ms": phase_avgs,
+            "avg_rows_written": avg(recent, "rows_inserted") + avg(recent, "rows_changed") if recent else None,
+            "failures": sum(1 for run in recent if run.outcome == ScraperRun.Outcome.FAILED),
+        }
+
+    @classmethod
+    def mark_skipped(cls, scraper_key: str) -> ScraperHealth:
+        """Corrida descartada porque otra del mismo scraper tiene el lease."""
+        monitor = cls.get_or_create_monitor(scraper_key)
+        ScraperHealth.objects.filter(pk=monitor.pk).update(
+            skipped_runs=F("skipped_runs") + 1,
+            last_skipped_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        monitor.refresh_from_db(fields=["skipped_runs", "last_skipped_at", "updated_at"])
+        return monitor
+
+    @classmethod
+    def run_registered(cls, scraper_key: str, **command_options):
+        """
+        Corre el comando del scraper con el lease de ScraperLockService tomado.
+        Si otra corrida lo tiene, cuenta el skip y levanta ScraperLockBusy: las
+        corridas superpuestas (beat + run_scraper_suite manual) se funden en una.
+        """
         definition = cls.get_definition(scraper_key)
-        cls.mark_running(scraper_key)
         try:
-            result = call_command(definition.command_name)
-        except Exception as exc:
-            cls.mark_failure(scraper_key, exc)
+            with ScraperLockService.hold(scraper_key):
+                cls._warn_if_taken_over(scraper_key)
+                cls.mark_running(scraper_key)
+                with collect_run_stats() as stats:
+                    try:
+                        result = call_command(definition.command_name, **command_options)
+                    except Exception as exc:
+                        cls.mark_failure(scraper_key, exc, stats=stats)
+                        raise
+                cls.mark_success(scraper_key, stats=stats)
+                return result
+        except ScraperLockBusy:
+            cls.mark_skipped(scraper_key)
             raise
-        cls.mark_success(scraper_key)
-        return result
+
+    @classmethod
+    def _warn_if_taken_over(cls, scraper_key: str) -> None:
+        # RUNNING sin lease vigente = la corrida anterior murió sin liberar.
+        if ScraperHealth.objects.filter(scraper_key=scraper_key, last_status=ScraperHealth.Status.RUNNING).exists():
+            logger.warning("Lease vencido de %s tomado: la corrida anterior no terminó.", scraper_key)
 
     @classmethod
     def get_active_alerts(cls, *, now=None) -> list[dict]:
@@ -184,6 +306,7 @@ class ScraperHealthService:
             "failed_today": 0,
             "missing_today": 0,
             "stale": 0,
+            "circuit_open": 0,
             "running": 0,
             "never": 0,
         }
@@ -193,7 +316,7 @@ class ScraperHealthService:
             if alert:
                 summary["active"] += 1
                 alert_kind = alert.get("alert_kind")
-                if alert_kind in {"failed_today", "missing_today", "stale"}:
+                if alert_kind in {"failed_today", "missing_today", "stale", "circuit_open"}:
                     summary[alert_kind] += 1
             else:
                 summary["ok"] += 1
@@ -205,6 +328,16 @@ class ScraperHealthService:
 
         return summary
 
+    @staticmethod
+    def get_open_circuits(definition: ScraperDefinition) -> list[CircuitState]:
+        try:
+            circuits = [CircuitBreakerService.get_state(host) for host in definition.hosts]
+        except Exception:
+            # Sin Redis las alertas de salud tienen que seguir saliendo.
+            logger.warning("No se pudo leer el estado de los circuitos de %s.", definition.key)
+            return []
+        return [circuit for circuit in circuits if not circuit.is_closed]
+
     @classmethod
     def _build_alert_payload(
         cls,
@@ -230,7 +363,16 @@ class ScraperHealthService:
         alert_kind = ""
         severity = "warning"
         message = ""
-        if monitor.last_status == ScraperHealth.Status.FAILED and last_started_date == current_date:
+        open_circuits = cls.get_open_circuits(definition)
+        if open_circuits:
+            # Causa raíz: el upstream está caído, el resto de alertas son consecuencia.
+            alert_kind = "circuit_open"
+            severity = "critical"
+            message = "; ".join(
+                f"Circuito {circuit.state} para {circuit.host} tras {circuit.failures} fallas: {circuit.last_error}"
+                for circuit in open_circuits
+            )
+        elif monitor.last_status == ScraperHealth.Status.FAILED and last_started_date == current_date:
             alert_kind = "failed_today"
             severity = "critical"
             message = monitor.last_error_message or "La ultima corrida fallo."
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import logging
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Compare-and-set en Redis: solo el dueño del lease lo renueva / libera.
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class ScraperLockBusy(RuntimeError):
+    """Otra corrida del mismo scraper tiene el lease vigente."""
+
+
+@dataclass(frozen=True)
+class ScraperLease:
+    scraper_key: str
+    token: str
+    lease_seconds: int
+
+
+class ScraperLockService:
+    """
+    Lease lock por scraper_key sobre el cache (Redis en producción).
+
+    - acquire: SET NX con TTL = SCRAPER_LOCK_LEASE_SECONDS.
+    - heartbeat: un thread renueva el TTL cada lease/3 mientras corre el scrape.
+    - takeover: si el dueño muere sin liberar, el heartbeat se corta y el lease
+      vence solo; la siguiente corrida lo toma sin intervención manual.
+    - renew / release comparan el token (script Lua en django-redis), así un
+      proceso que perdió el lease nunca libera el de otro.
+    """
+
+    PREFIX = "scrape:lock"
+
+    @classmethod
+    def lease_seconds(cls) -> int:
+        return int(getattr(settings, "SCRAPER_LOCK_LEASE_SECONDS", 120))
+
+    @classmethod
+    def acquire(cls, scraper_key: str, *, lease_seconds: Optional[int] = None) -> Optional[ScraperLease]:
+        lease_seconds = int(lease_seconds or cls.lease_seconds())
+        token = f"{socket.gethostname()}:{uuid.uuid4().hex}"
+        if not cache.add(cls._key(scraper_key), token, timeout=lease_seconds):
+            return None
+        return ScraperLease(scraper_key=scraper_key, token=token, lease_seconds=lease_seconds)
+
+    @classmethod
+    def renew(cls, lease: ScraperLease, *, seconds: Optional[int] = None) -> bool:
+        seconds = int(seconds or lease.lease_seconds)
+        key = cls._key(lease.scraper_key)
+        client = cls._redis_client()
+        if client is not None:
+            return bool(client.eval(_RENEW_SCRIPT, 1, cache.make_key(key), cache.client.encode(lease.token), seconds))
+        if cache.get(key) != lease.token:
+            return False
+        return bool(cache.touch(key, timeout=seconds))
+
+    @classmethod
+    def release(cls, lease: ScraperLease) -> bool:
+        key = cls._key(lease.scraper_key)
+        client = cls._redis_client()
+        if client is not None:
+            return bool(client.eval(_RELEASE_SCRIPT, 1, cache.make_key(key), cache.client.encode(lease.token)))
+        if cache.get(key) != lease.token:
+            return False
+        return bool(cache.delete(key))
+
+    @classmethod
+    def holder(cls, scraper_key: str) -> Optional[str]:
+        return cache.get(cls._key(scraper_key))
+
+    @classmethod
+    def is_locked(cls, scraper_key: str) -> bool:
+        return cls.holder(scraper_key) is not None
+
+    @classmethod
+    @contextmanager
+    def heartbeat(cls, lease: ScraperLease):
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(max(1.0, lease.lease_seconds / 3)):
+                if not cls.renew(lease):
+                    logger.warning("Lease de %s perdido durante la corrida.", lease.scraper_key)
+                    return
+
+        thread = threading.Thread(target=beat, name=f"scraper-lease-{lease.scraper_key}", daemon=True)
+        thread.start()
+        try:
+            yield lease
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+
+    @classmethod
+    @contextmanager
+    def hold(cls, scraper_key: str):
+        """Toma el lease con heartbeat durante el bloque; ScraperLockBusy si ya está tomado."""
+        lease = cls.acquire(scraper_key)
+        if lease is None:
+            raise ScraperLockBusy(f"{scraper_key} ya está corriendo ({cls.holder(scraper_key)}).")
+        try:
+            with cls.heartbeat(lease):
+                yield lease
+        finally:
+            cls.release(lease)
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @classmethod
+    def _key(cls, scraper_key: str) -> str:
+        return f"{cls.PREFIX}:{scraper_key}"
+
+    @staticmethod
+    def _redis_client():
+        # Solo django-redis expone el cliente crudo; locmem (tests) usa el fallback.
+        client = getattr(cache, "client", None)
+        if client is None or not hasattr(client, "get_client"):
+            return None
+        return client.get_client(write=True)
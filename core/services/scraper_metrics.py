@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import Histogram
+
+from core.models import ScraperRun
+from core.services.scraper_run_stats import RUN_PHASES
+
+RUN_DURATION = Histogram(
+    "scraper_run_duration_seconds",
+    "Duración total de cada corrida de scraper.",
+    ["scraper_key", "outcome"],
+    namespace=NAMESPACE,
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, float("inf")),
+)
+PHASE_DURATION = Histogram(
+    "scraper_phase_duration_seconds",
+    "Duración por fase (fetch / connect / download / parse / transaction / cache).",
+    ["scraper_key", "phase"],
+    namespace=NAMESPACE,
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf")),
+)
+BYTES_DOWNLOADED = Histogram(
+    "scraper_run_bytes_downloaded",
+    "Bytes bajados del upstream por corrida.",
+    ["scraper_key"],
+    namespace=NAMESPACE,
+    buckets=(0, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000, float("inf")),
+)
+ROWS_WRITTEN = Histogram(
+    "scraper_run_rows",
+    "Filas por corrida según resultado de la escritura.",
+    ["scraper_key", "result"],
+    namespace=NAMESPACE,
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, float("inf")),
+)
+
+
+class ScraperMetrics:
+    """
+    Histogramas Prometheus por `scraper_key` (django_prometheus los expone en
+    /metrics). En workers Celery hace falta PROMETHEUS_MULTIPROC_DIR para que
+    el proceso web vea lo que observan los workers.
+    """
+
+    @staticmethod
+    def observe(run: ScraperRun) -> None:
+        key = run.scraper_key
+        RUN_DURATION.labels(scraper_key=key, outcome=run.outcome).observe(run.duration_ms / 1000)
+        for phase in RUN_PHASES:
+            ms = getattr(run, f"{phase}_ms")
+            if ms:
+                PHASE_DURATION.labels(scraper_key=key, phase=phase).observe(ms / 1000)
+        BYTES_DOWNLOADED.labels(scraper_key=key).observe(run.bytes_downloaded)
+        for result in ("inserted", "changed", "unchanged", "deleted"):
+            ROWS_WRITTEN.labels(scraper_key=key, result=result).observe(getattr(run, f"rows_{result}"))
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields
+
+# Fases del pipeline de scraping: fetch -> parse -> transaction (apply en BD)
+# -> cache (invalidación). connect / download desglosan el fetch contra el upstream.
+PHASE_FETCH = "fetch"
+PHASE_CONNECT = "connect"
+PHASE_DOWNLOAD = "download"
+PHASE_PARSE = "parse"
+PHASE_TRANSACTION = "transaction"
+PHASE_CACHE = "cache"
+# Fases con columna propia en ScraperRun (`<fase>_ms`) e histograma Prometheus.
+RUN_PHASES = (PHASE_FETCH, PHASE_CONNECT, PHASE_DOWNLOAD, PHASE_PARSE, PHASE_TRANSACTION, PHASE_CACHE)
+
+
+@dataclass
+class ScraperRunStats:
+    """
+    Contadores que un comando de scraping reporta mientras corre bajo
+    `ScraperHealthService.run_registered`.
+    """
+
+    pages_skipped: int = 0
+    blocks_skipped: int = 0
+    rows_inserted: int = 0
+    rows_changed: int = 0
+    rows_unchanged: int = 0
+    rows_deleted: int = 0
+    # Filas que ya publicó primero otra fuente (SourceReconciliationService).
+    rows_other_source: int = 0
+    bytes_downloaded: int = 0
+    # ms acumulados por fase; "transaction" = tiempo con locks / conexión tomada.
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def add(self, **counters: int) -> None:
+        for name, value in counters.items():
+            setattr(self, name, getattr(self, name) + int(value or 0))
+
+    def add_timing(self, phase: str, ms: float) -> None:
+        self.timings[phase] = self.timings.get(phase, 0.0) + ms
+
+    def rounded_timings(self) -> dict[str, float]:
+        return {phase: round(ms, 1) for phase, ms in self.timings.items()}
+
+    def as_dict(self) -> dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+_current_stats: ContextVar[ScraperRunStats | None] = ContextVar("scraper_run_stats", default=None)
+
+
+def get_current_run_stats() -> ScraperRunStats | None:
+    return _current_stats.get()
+
+
+def record_run_stats(**counters: int) -> None:
+    """Suma contadores a la corrida activa; fuera de run_registered no hace nada."""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(**counters)
+
+
+@contextmanager
+def collect_run_stats():
+    stats = ScraperRunStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def record_timing(phase: str, ms: float) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add_timing(phase, ms)
+
+
+@contextmanager
+def run_phase(phase: str):
+    """Mide una fase del scrape y la suma a la corrida activa (si la hay)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add_timing(phase, (time.perf_counter() - started) * 1000)
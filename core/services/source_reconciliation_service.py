@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import Optional
+
+from django.db.models import Avg, Count, Max, Min, Model, Q
+from django.utils import timezone
+
+from core.models import ResultObservation
+
+logger = logging.getLogger(__name__)
+
+# Campos que definen "el resultado" de cada modelo; el resto (logos, URLs)
+# es decorado y no cuenta como desacuerdo entre fuentes.
+VALUE_FIELDS = {
+    "CurrentResult": ("winning_number", "extra.signo"),
+    "AnimalitoResult": ("animal_number", "animal_name"),
+}
+KINDS = {
+    "CurrentResult": ResultObservation.Kind.TRIPLES,
+    "AnimalitoResult": ResultObservation.Kind.ANIMALITOS,
+}
+
+
+@dataclass(frozen=True)
+class SourceLag:
+    source: str
+    provider_id: int
+    observations: int
+    wins: int
+    disagreements: int
+    avg_lag_seconds: Optional[float]
+    min_lag_seconds: Optional[int]
+    max_lag_seconds: Optional[int]
+
+
+class SourceReconciliationService:
+    """
+    Carrera entre fuentes que publican la misma lotería (ej: triples en
+    lotoven y tuazar, animalitos en lotoven y lottoresultados).
+
+    - Los providers ya llegan canónicos (ProviderRegistry aplica
+      SCRAPER_PROVIDER_ALIASES), así dos fuentes escriben la misma clave
+      (provider, draw_date, draw_time).
+    - Cada batch con `source` deja una ResultObservation por sorteo con su
+      publish lag (visto - hora del sorteo).
+    - Gana la primera fuente que lo publicó: las demás no pisan ni borran esa
+      fila; si publicaron otro valor, el sorteo queda marcado `disagrees`.
+    """
+
+    @classmethod
+    def reconcile(cls, batch, existing: dict[tuple[int, time], Model]) -> set[tuple[int, time]]:
+        """
+        Registra lo que `batch.source` ve y devuelve las claves cuya fila
+        pertenece a otra fuente (ResultWriteService no las toca).
+        """
+        kind = KINDS.get(batch.model.__name__)
+        if not batch.source or kind is None:
+            return set()
+
+        observed: dict[tuple[int, time], dict[str, ResultObservation]] = defaultdict(dict)
+        for obs in ResultObservation.objects.filter(
+            result_kind=kind,
+            provider_id__in=batch.provider_ids,
+            draw_date=batch.draw_date,
+        ):
+            observed[(obs.provider_id, obs.draw_time)][obs.source] = obs
+
+        now = timezone.now()
+        to_create: list[ResultObservation] = []
+        to_update: dict[int, ResultObservation] = {}
+        for key, values in batch.rows.items():
+            provider_id, draw_time = key
+            window = batch.windows.get(provider_id)
+            if window is not None and not window.keeps(draw_time):
+                continue
+            value = cls.value_of(batch.model, values, existing.get(key))
+            by_source = observed[key]
+            mine = by_source.get(batch.source)
+            if mine is None:
+                mine = ResultObservation(
+                    result_kind=kind,
+                    source=batch.source,
+                    provider_id=provider_id,
+                    draw_date=batch.draw_date,
+                    draw_time=draw_time,
+                    value=value,
+                    observed_at=now,
+                    publish_lag_seconds=cls.publish_lag_seconds(batch.draw_date, draw_time, now),
+                )
+                by_source[batch.source] = mine
+                to_create.append(mine)
+            elif mine.value != value:
+                # La fuente corrigió su publicación.
+                mine.value = value
+                to_update[mine.pk] = mine
+
+        foreign: set[tuple[int, time]] = set()
+        for key, by_source in observed.items():
+            if batch.source not in by_source:
+                continue
+            winner = cls.winner(by_source.values())
+            if winner.source != batch.source:
+                foreign.add(key)
+            for obs in by_source.values():
+                accepted = obs is winner
+                disagrees = any(other.value != obs.value for other in by_source.values())
+                if obs.accepted == accepted and obs.disagrees == disagrees:
+                    continue
+                if disagrees and not obs.disagrees and obs is by_source[batch.source]:
+                    logger.warning(
+                        "Fuentes en desacuerdo para provider=%s %s %s: %s",
+                        key[0],
+                        batch.draw_date,
+                        key[1],
+                        ", ".join(f"{o.source}={o.value}" for o in by_source.values()),
+                    )
+                obs.accepted = accepted
+                obs.disagrees = disagrees
+                if obs.pk is not None:
+                    to_update[obs.pk] = obs
+
+        if to_create:
+            # ignore_conflicts: otra corrida de la misma fuente pudo registrar primero.
+            ResultObservation.objects.bulk_create(to_create, ignore_conflicts=True)
+        if to_update:
+            for obs in to_update.values():
+                obs.updated_at = now
+            ResultObservation.objects.bulk_update(
+                list(to_update.values()), ["value", "accepted", "disagrees", "updated_at"]
+            )
+        return foreign
+
+    @staticmethod
+    def winner(observations) -> ResultObservation:
+        """Primera publicación vista; empate por fuente ya guardada y luego nombre."""
+        return min(observations, key=lambda obs: (obs.observed_at, obs.pk is None, obs.source))
+
+    @staticmethod
+    def value_of(model: type[Model], values: dict, obj: Optional[Model] = None) -> str:
+        parts = []
+        for name in VALUE_FIELDS.get(model.__name__, ()):
+            field_name, _, sub_key = name.partition(".")
+            if field_name in values:
+                value = values[field_name]
+            else:
+                value = getattr(obj, field_name, None) if obj is not None else None
+            if sub_key:
+                value = (value or {}).get(sub_key) if isinstance(value, dict) else None
+            parts.append("" if value is None else str(value).strip())
+        return " ".join(part for part in parts if part)[:120]
+
+    @staticmethod
+    def publish_lag_seconds(draw_date: date, draw_time: time, observed_at: datetime) -> int:
+        drawn_at = timezone.make_aware(datetime.combine(draw_date, draw_time))
+        return int((observed_at - drawn_at).total_seconds())
+
+    # -------------------------
+    # Reportes
+    # -------------------------
+    @staticmethod
+    def lag_report(*, since: date, kind: Optional[str] = None) -> list[SourceLag]:
+        """Lag por (fuente, provider): quién publica primero cada lotería."""
+        qs = ResultObservation.objects.filter(draw_date__gte=since)
+        if kind:
+            qs = qs.filter(result_kind=kind)
+        rows = (
+            qs.values("source", "provider_id")
+            .annotate(
+                observations=Count("id"),
+                wins=Count("id", filter=Q(accepted=True)),
+                disagreements=Count("id", filter=Q(disagrees=True)),
+                avg_lag=Avg("publish_lag_seconds"),
+                min_lag=Min("publish_lag_seconds"),
+                max_lag=Max("publish_lag_seconds"),
+            )
+            .order_by("provider_id", "avg_lag")
+        )
+        return [
+            SourceLag(
+                source=row["source"],
+                provider_id=row["provider_id"],
+                observations=row["observations"],
+                wins=row["wins"],
+                disagreements=row["disagreements"],
+                avg_lag_seconds=row["avg_lag"],
+                min_lag_seconds=row["min_lag"],
+                max_lag_seconds=row["max_lag"],
+            )
+            for row in rows
+        ]
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from core.models import DeviceTelemetryEvent
+from core.services.result_partition_service import ResultPartitionService
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_DAYS = {"day": 1, "week": 7}
+# Secuencia de ids de la tabla particionada (la crea la migración 0036).
+SEQUENCE = "core_telemetry_event_id_seq"
+
+
+class TelemetryPartitionService:
+    """
+    Particionado por rango de `created_at` de DeviceTelemetryEvent (Postgres,
+    convertida por la migración 0036). Mismo esquema que
+    ResultPartitionService: nombre `<tabla>_pYYYYMMDD` (inicio del rango),
+    partición DEFAULT para lo que caiga fuera, PK física (id, created_at).
+
+    - El rango es un día o una semana (lunes a lunes) en UTC según
+      TELEMETRY_PARTITION_INTERVAL; se fija al migrar, cambiarlo después
+      deja particiones solapadas.
+    - Expirar = DROP de las particiones cuyo rango termina antes del cutoff
+      de `--keep-incident-days`; lo que queda (ruido reciente, incidentes
+      del borde) lo sigue borrando purge_telemetry_events por lotes.
+    - Las lecturas acotan created_at (`DeviceTelemetryService.window_q`),
+      así el planner solo abre las particiones de la ventana.
+    """
+
+    model = DeviceTelemetryEvent
+
+    # -------------------------
+    # Rangos
+    # -------------------------
+    @staticmethod
+    def interval_days() -> int:
+        interval = str(getattr(settings, "TELEMETRY_PARTITION_INTERVAL", "day")).strip().lower()
+        return INTERVAL_DAYS.get(interval, 1)
+
+    @classmethod
+    def period_start(cls, day: date) -> date:
+        if cls.interval_days() == 7:
+            return day - timedelta(days=day.weekday())
+        return day
+
+    @classmethod
+    def bounds(cls, start: date) -> tuple[datetime, datetime]:
+        lower = datetime.combine(start, time.min, tzinfo=dt_timezone.utc)
+        return lower, lower + timedelta(days=cls.interval_days())
+
+    # -------------------------
+    # Introspección
+    # -------------------------
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        return ResultPartitionService.is_partitioned(cls.model)
+
+    @classmethod
+    def partitions(cls) -> dict[date, str]:
+        return ResultPartitionService.partitions(cls.model)
+
+    # -------------------------
+    # Mantenimiento
+    # -------------------------
+    @classmethod
+    def ensure_partitions(cls, start: date, end: date) -> list[str]:
+        """Crea las particiones que falten para cubrir [start, end]."""
+        existing = cls.partitions()
+        created = []
+        period = cls.period_start(start)
+        while period <= end:
+            if period not in existing:
+                cls._create_partition(period)
+                created.append(ResultPartitionService.partition_name(cls.model, period))
+            period += timedelta(days=cls.interval_days())
+        return created
+
+    @classmethod
+    def expired_partitions(cls, cutoff: datetime) -> list[str]:
+        """Particiones cuyo rango entero es anterior a `cutoff`."""
+        return [name for start, name in sorted(cls.partitions().items()) if cls.bounds(start)[1] <= cutoff]
+
+    @classmethod
+    def drop_partitions(cls, cutoff: datetime) -> list[str]:
+        qn = connection.ops.quote_name
+        dropped = cls.expired_partitions(cutoff)
+        with connection.cursor() as cursor:
+            for name in dropped:
+                cursor.execute(f"ALTER TABLE {qn(cls.model._meta.db_table)} DETACH PARTITION {qn(name)}")
+                cursor.execute(f"DROP TABLE {qn(name)}")
+        if dropped:
+            logger.info("Telemetry: particiones expiradas %s", ", ".join(dropped))
+        return dropped
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @classmethod
+    def _create_partition(cls, period: date) -> None:
+        qn = connection.ops.quote_name
+        table = cls.model._meta.db_table
+        name = ResultPartitionService.partition_name(cls.model, period)
+        bounds = list(cls.bounds(period))
+        default = qn(ResultPartitionService.default_partition_name(cls.model))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s)", bounds
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(
+                    f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)", bounds
+                )
+                return
+            # Eventos del rango que cayeron en DEFAULT: se mueven antes del ATTACH.
+            cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {default} WHERE created_at >= %s AND created_at < %s RETURNING *) "
+                f"INSERT INTO {qn(name)} SELECT * FROM moved",
+                bounds,
+            )
+            cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)", bounds)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from redis.exceptions import ResponseError
+
+from core.models import Device, DeviceTelemetryRollup, TelemetryRollupFlush
+from core.services.device_redis_service import DeviceRedisService
+
+logger = logging.getLogger(__name__)
+
+# (device_id, hora UTC, event_type) -> cantidad
+RollupCounts = dict[tuple[int, datetime, str], int]
+
+
+@dataclass
+class RollupFlushSummary:
+    hashes: int = 0
+    rows: int = 0
+    events: int = 0
+    skipped: int = 0
+
+
+class TelemetryRollupService:
+    """
+    Contadores por dispositivo / hora / tipo de evento para toda la
+    telemetría (también los eventos que no se guardan como fila).
+
+    - En el request solo hay un HINCRBY sobre el hash de la hora
+      (`telemetry:rollup:h:YYYYMMDDHH`, campo `<device_id>:<TIPO>`).
+    - `flush` (beat cada pocos minutos) renombra cada hash a una key
+      propia antes de leerlo: los incrementos que lleguen mientras tanto
+      caen en un hash nuevo y no se pierden. Suma los conteos a
+      DeviceTelemetryRollup y, en la misma transacción, anota la key en
+      TelemetryRollupFlush; recién después la borra. Si el proceso se corta
+      antes, la próxima corrida retoma las keys `flush:*` que quedaron y
+      salta (solo borra) las que ya estaban anotadas.
+    - Sin cliente Redis real (dev / tests con locmem) o si el HINCRBY falla,
+      el incremento va directo a la base.
+    """
+
+    PREFIX = "telemetry:rollup"
+    # Red de seguridad si el flush deja de correr: los hashes no quedan para siempre.
+    KEY_TTL_SECONDS = 2 * 86400
+    LOCK_TTL_SECONDS = 300
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def hour_for(moment: datetime) -> datetime:
+        return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def _live_key(cls, hour: datetime) -> str:
+        return f"{cls.PREFIX}:h:{hour:%Y%m%d%H}"
+
+    @staticmethod
+    def _client():
+        try:
+            return DeviceRedisService.get_client()
+        except Exception:
+            return None
+
+    # -------------------------
+    # Request path
+    # -------------------------
+    @classmethod
+    def increment(cls, *, device_id: int, event_type: str, at: Optional[datetime] = None) -> None:
+        hour = cls.hour_for(at or timezone.now())
+        client = cls._client()
+        if client is None:
+            cls._apply({(device_id, hour, event_type): 1})
+            return
+        key = cls._live_key(hour)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hincrby(key, f"{device_id}:{event_type}", 1)
+            pipe.expire(key, cls.KEY_TTL_SECONDS)
+            pipe.execute()
+        except Exception as exc:
+            # Con Redis caído el incremento va directo a la base (como sin
+            # cliente Redis) en vez de perderse; el request sigue igual.
+            logger.warning("No se pudo sumar el rollup de telemetría %s en Redis: %s", key, exc)
+            cls._apply({(device_id, hour, event_type): 1})
+
+    # -------------------------
+    # Flush
+    # -------------------------
+    @classmethod
+    def flush(cls) -> RollupFlushSummary:
+        summary = RollupFlushSummary()
+        client = cls._client()
+        if client is None:
+            return summary
+        lock_key = f"{cls.PREFIX}:flush_lock"
+        if not cache.add(lock_key, 1, timeout=cls.LOCK_TTL_SECONDS):
+            logger.info("Flush de rollups de telemetría ya en curso; se omite.")
+            return summary
+        try:
+            pending = [cls._decode(key) for key in client.scan_iter(match=f"{cls.PREFIX}:flush:*", count=500)]
+            for key in client.scan_iter(match=f"{cls.PREFIX}:h:*", count=500):
+                key = cls._decode(key)
+                hour_token = key.rsplit(":", 1)[-1]
+                target = f"{cls.PREFIX}:flush:{hour_token}:{uuid.uuid4().hex}"
+                try:
+                    client.rename(key, target)
+                except ResponseError:
+                    continue  # venció entre el SCAN y el RENAME
+                pending.append(target)
+
+            for key in pending:
+                if TelemetryRollupFlush.objects.filter(key=key).exists():
+                    # Ya sumado; el corte fue entre el commit y el DELETE.
+                    client.delete(key)
+                    summary.skipped += 1
+                    continue
+                hour_token = key.split(":")[3]
+                hour = datetime.strptime(hour_token, "%Y%m%d%H").replace(tzinfo=dt_timezone.utc)
+                counts: RollupCounts = {}
+                for field, value in client.hgetall(key).items():
+                    device_id, event_type = cls._decode(field).split(":", 1)
+                    counts[(int(device_id), hour, event_type)] = int(value)
+                with transaction.atomic():
+                    summary.rows += cls._apply(counts)
+                    TelemetryRollupFlush.objects.create(key=key)
+                summary.events += sum(counts.values())
+                summary.hashes += 1
+                client.delete(key)
+
+            # Pasado el TTL de los hashes ninguna key anotada puede seguir en Redis.
+            TelemetryRollupFlush.objects.filter(
+                flushed_at__lt=timezone.now() - timedelta(seconds=cls.KEY_TTL_SECONDS)
+            ).delete()
+        finally:
+            cache.delete(lock_key)
+        return summary
+
+    @classmethod
+    def _apply(cls, counts: RollupCounts) -> int:
+        """Suma `counts` a DeviceTelemetryRollup; devuelve cuántas filas tocó."""
+        known = set(
+            Device.objects.filter(pk__in={device_id for device_id, _, _ in counts}).values_list("pk", flat=True)
+        )
+        counts = {key: value for key, value in counts.items() if key[0] in known and value > 0}
+        if not counts:
+            return 0
+        with transaction.atomic():
+            current = {
+                (row.device_id, row.hour, row.event_type): row.count
+                for row in DeviceTelemetryRollup.objects.select_for_update().filter(
+                    device_id__in={device_id for device_id, _, _ in counts},
+                    hour__in={hour for _, hour, _ in counts},
+                )
+            }
+            DeviceTelemetryRollup.objects.bulk_create(
+                [
+                    DeviceTelemetryRollup(
+                        device_id=device_id,
+                        hour=hour,
+                        event_type=event_type,
+                        count=current.get((device_id, hour, event_type), 0) + value,
+                    )
+                    for (device_id, hour, event_type), value in counts.items()
+                ],
+                batch_size=cls.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["device", "hour", "event_type"],
+                update_fields=["count"],
+            )
+        return len(counts)
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    @classmethod
+    def totals(cls, *, since: datetime, device_id: Optional[int] = None) -> dict[str, int]:
+        """{event_type: total} desde `since` (toda la flota o un dispositivo)."""
+        qs = DeviceTelemetryRollup.objects.filter(hour__gte=cls.hour_for(since))
+        if device_id is not None:
+            qs = qs.filter(device_id=device_id)
+        rows = qs.values("event_type").annotate(total=Sum("count")).order_by("event_type")
+        return {row["event_type"]: row["total"] for row in rows}
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode() if isinstance(value, bytes) else str(value)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from core.models import DeviceTelemetrySnapshot
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingSnapshot:
+    since: float
+    fields: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SnapshotFlushSummary:
+    devices: int = 0
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+
+class TelemetrySnapshotBuffer:
+    """
+    Junta en memoria (por proceso) los cambios de DeviceTelemetrySnapshot
+    de cada dispositivo y los escribe de a lotes: heartbeats y eventos ya
+    no hacen get_or_create + save por request.
+
+    - `merge` pisa los campos pendientes del dispositivo (gana el último).
+    - Pasados TELEMETRY_SNAPSHOT_FLUSH_SECONDS desde el primer cambio
+      pendiente se vuelcan los vencidos: lo hace el siguiente `merge` de
+      cualquier dispositivo o, si no llega ninguno, un hilo daemon del
+      proceso que revisa cada esa misma ventana. El vuelco es un SELECT de sus snapshots, se descarta lo que ya está
+      igual en la base (IP, versiones, metadata) y un `bulk_update` con lo
+      que cambió. `last_heartbeat_at` solo se escribe si lo guardado tiene
+      más de TELEMETRY_SNAPSHOT_HEARTBEAT_SECONDS.
+    - Con 0 segundos cada `merge` vuelca en el momento (write-through).
+    - Al salir el proceso se vuelca lo pendiente (atexit).
+    """
+
+    # Piso del intervalo del hilo: evita un loop ocupado con ventanas mínimas.
+    MIN_TICK_SECONDS = 0.05
+
+    _lock = threading.Lock()
+    _pending: dict[int, _PendingSnapshot] = {}
+    _flusher: Optional[threading.Thread] = None
+    _stop = threading.Event()
+
+    @staticmethod
+    def flush_seconds() -> float:
+        return float(getattr(settings, "TELEMETRY_SNAPSHOT_FLUSH_SECONDS", 10))
+
+    @staticmethod
+    def heartbeat_seconds() -> float:
+        return float(getattr(settings, "TELEMETRY_SNAPSHOT_HEARTBEAT_SECONDS", 30))
+
+    @classmethod
+    def merge(cls, device_id: int, fields: dict[str, Any]) -> None:
+        now = monotonic()
+        with cls._lock:
+            pending = cls._pending.setdefault(device_id, _PendingSnapshot(since=now))
+            pending.fields.update(fields)
+        seconds = cls.flush_seconds()
+        cls.flush(due_before=now - seconds)
+        if seconds > 0:
+            cls._ensure_flusher()
+
+    @classmethod
+    def pending(cls, device_id: int) -> dict[str, Any]:
+        with cls._lock:
+            pending = cls._pending.get(device_id)
+            return dict(pending.fields) if pending else {}
+
+    @classmethod
+    def flush(cls, *, due_before: Optional[float] = None) -> SnapshotFlushSummary:
+        """Vuelca los dispositivos con cambios desde antes de `due_before` (None = todos)."""
+        with cls._lock:
+            due = {
+                device_id: pending
+                for device_id, pending in cls._pending.items()
+                if due_before is None or pending.since <= due_before
+            }
+            for device_id in due:
+                del cls._pending[device_id]
+        if not due:
+            return SnapshotFlushSummary()
+        try:
+            return cls._write({device_id: pending.fields for device_id, pending in due.items()})
+        except Exception as exc:
+            logger.warning("No se pudieron volcar %s snapshots de telemetría: %s", len(due), exc)
+            cls._requeue(due)
+            return SnapshotFlushSummary()
+
+    @classmethod
+    def stop(cls) -> None:
+        """Detiene el hilo de vuelco (lo pendiente queda; `flush` lo escribe)."""
+        with cls._lock:
+            flusher, cls._flusher = cls._flusher, None
+            cls._stop.set()
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join(timeout=5)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.stop()
+        with cls._lock:
+            cls._pending.clear()
+
+    # -------------------------
+    # Hilo de vuelco
+    # -------------------------
+    @classmethod
+    def _ensure_flusher(cls) -> None:
+        # Tras un fork el hilo del padre no existe en el hijo: is_alive() da False y se arranca otro.
+        with cls._lock:
+            if cls._flusher is not None and cls._flusher.is_alive():
+                return
+            cls._stop = threading.Event()
+            cls._flusher = threading.Thread(
+                target=cls._run_flusher,
+                args=(cls._stop,),
+                name="telemetry-snapshot-flush",
+                daemon=True,
+            )
+            cls._flusher.start()
+
+    @classmethod
+    def _run_flusher(cls, stop: threading.Event) -> None:
+        while not stop.wait(max(cls.flush_seconds(), cls.MIN_TICK_SECONDS)):
+            try:
+                cls.flush(due_before=monotonic() - cls.flush_seconds())
+            except Exception as exc:  # el hilo no puede morir por un vuelco fallido
+                logger.warning("Falló el vuelco periódico de snapshots de telemetría: %s", exc)
+            finally:
+                close_old_connections()
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    @classmethod
+    def _write(cls, changes: dict[int, dict[str, Any]]) -> SnapshotFlushSummary:
+        summary = SnapshotFlushSummary(devices=len(changes))
+        now = timezone.now()
+        heartbeat_resolution = timedelta(seconds=cls.heartbeat_seconds())
+        with transaction.atomic():
+            snapshots = {s.device_id: s for s in DeviceTelemetrySnapshot.objects.filter(device_id__in=changes)}
+            missing = [device_id for device_id in changes if device_id not in snapshots]
+            if missing:
+                # Otro proceso puede crearlo a la vez: se crea vacío y se actualiza abajo.
+                DeviceTelemetrySnapshot.objects.bulk_create(
+                    [DeviceTelemetrySnapshot(device_id=device_id) for device_id in missing],
+                    ignore_conflicts=True,
+                )
+                summary.created = len(missing)
+                snapshots.update(
+                    {s.device_id: s for s in DeviceTelemetrySnapshot.objects.filter(device_id__in=missing)}
+                )
+
+            dirty: list[DeviceTelemetrySnapshot] = []
+            update_fields: set[str] = set()
+            for device_id, fields in changes.items():
+                snapshot = snapshots.get(device_id)
+                if snapshot is None:  # dispositivo borrado mientras tanto
+                    continue
+                changed = {
+                    name: value
+                    for name, value in fields.items()
+                    if getattr(snapshot, name) != value
+                    and not cls._heartbeat_is_fresh(name, getattr(snapshot, name), value, heartbeat_resolution)
+                }
+                if not changed:
+                    summary.skipped += 1
+                    continue
+                for name, value in changed.items():
+                    setattr(snapshot, name, value)
+                # bulk_update no aplica auto_now.
+                snapshot.updated_at = now
+                update_fields.update(changed)
+                dirty.append(snapshot)
+
+            if dirty:
+                DeviceTelemetrySnapshot.objects.bulk_update(dirty, sorted(update_fields | {"updated_at"}))
+                summary.updated = len(dirty)
+        return summary
+
+    @staticmethod
+    def _heartbeat_is_fresh(name: str, stored: Optional[datetime], value: Any, resolution: timedelta) -> bool:
+        if name != "last_heartbeat_at" or stored is None or value is None:
+            return False
+        return value - stored < resolution
+
+    @classmethod
+    def _requeue(cls, due: dict[int, _PendingSnapshot]) -> None:
+        # Lo que llegó después del intento es más nuevo y se respeta.
+        with cls._lock:
+            for device_id, failed in due.items():
+                current = cls._pending.get(device_id)
+                if current is None:
+                    cls._pending[device_id] = failed
+                else:
+                    current.since = min(current.since, failed.since)
+                    current.fields = {**failed.fields, **current.fields}
+
+
+atexit.register(TelemetrySnapshotBuffer.flush)
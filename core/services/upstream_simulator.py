@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from core.services.scraper_fetch_service import content_fingerprint
+from core.services.scraper_fixtures import fixtures_dir, get_scraper_command_fixtures
+
+STATS_PATH = "/__sim/stats"
+
+
+def route_for(url: str) -> str:
+    """https://lotoven.com/animalitos/ -> /lotoven.com/animalitos/ (mismo esquema que upstream_url)."""
+    parts = urlsplit(url)
+    return f"/{parts.netloc}{parts.path or '/'}"
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    latency_ms: int = 0
+    jitter_ms: int = 0
+    bandwidth_kbps: int = 0  # 0 = sin límite
+    error_rate: float = 0.0  # fracción de respuestas 503
+    timeout_rate: float = 0.0  # fracción de requests que cuelgan hang_seconds y cortan
+    hang_seconds: float = 30.0
+
+
+@dataclass(frozen=True)
+class PageVersion:
+    """Versión de una página visible desde `at_seconds` tras arrancar el simulador."""
+
+    at_seconds: float
+    filename: str
+
+
+@dataclass
+class SimulatorStats:
+    requests: int = 0
+    by_status: dict[str, int] = field(default_factory=dict)
+    by_path: dict[str, int] = field(default_factory=dict)
+    # "<path>#<versión>" -> segundos desde el arranque hasta que se sirvió por primera vez.
+    first_served: dict[str, float] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "by_status": dict(self.by_status),
+            "by_path": dict(self.by_path),
+            "first_served": dict(self.first_served),
+        }
+
+
+class UpstreamSimulator:
+    """
+    Servidor HTTP local que reemplaza a lotoven / tuazar / lottoresultados
+    sirviendo el corpus sintético de `core/testdata/scrapers/` (HTML escrito a
+    mano, más chico que las páginas reales: los tiempos de descarga no son
+    representativos, las fallas y reintentos sí).
+
+    - Rutas: /<host original><path original> (ver `route_for`); los scrapers
+      llegan acá con SCRAPER_UPSTREAM_OVERRIDE=http://host:port.
+    - Fallas inyectadas según `FaultProfile`: latencia + jitter, ancho de
+      banda limitado, 503 y timeouts (la conexión se corta sin respuesta).
+    - Timeline: cada ruta puede tener varias `PageVersion`; antes del primer
+      `at_seconds` responde 404 (resultado aún no publicado).
+    - ETag / If-None-Match como un upstream real (304).
+    """
+
+    def __init__(
+        self,
+        routes: dict[str, list[PageVersion]],
+        *,
+        profile: Optional[FaultProfile] = None,
+        base_dir: Optional[Path | str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        self.routes = {path: sorted(versions, key=lambda v: v.at_seconds) for path, versions in routes.items()}
+        self.profile = profile or FaultProfile()
+        self.base_dir = fixtures_dir(base_dir)
+        self.stats = SimulatorStats()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies: dict[str, bytes] = {}
+        self._started_at = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @classmethod
+    def from_corpus(
+        cls,
+        *,
+        timeline: Optional[dict[str, list[dict]]] = None,
+        **kwargs,
+    ) -> "UpstreamSimulator":
+        """
+        Rutas de todos los comandos registrados en scraper_fixtures. `timeline`
+        ({url: [{"at": seg, "file": nombre}, ...]}) reemplaza las versiones de
+        las URLs indicadas.
+        """
+        routes: dict[str, list[PageVersion]] = {}
+        for spec in get_scraper_command_fixtures():
+            for url, filename in spec.pages.items():
+                routes[route_for(url)] = [PageVersion(0.0, filename)]
+        for url, versions in (timeline or {}).items():
+            routes[route_for(url)] = [PageVersion(float(v.get("at", 0)), v["file"]) for v in versions]
+        return cls(routes, **kwargs)
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "UpstreamSimulator":
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="upstream-simulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "UpstreamSimulator":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started_at
+
+    # -------------------------
+    # Respuesta
+    # -------------------------
+    def current_version(self, path: str) -> Optional[tuple[int, PageVersion]]:
+        elapsed = self.elapsed()
+        current = None
+        for index, version in enumerate(self.routes.get(path, ())):
+            if version.at_seconds <= elapsed:
+                current = (index, version)
+        return current
+
+    def _body(self, filename: str) -> bytes:
+        with self._lock:
+            if filename not in self._bodies:
+                self._bodies[filename] = (self.base_dir / filename).read_bytes()
+            return self._bodies[filename]
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _delay(self) -> float:
+        profile = self.profile
+        with self._lock:
+            jitter = self._rng.uniform(0, profile.jitter_ms) if profile.jitter_ms else 0.0
+        return (profile.latency_ms + jitter) / 1000
+
+    def _count(self, path: str, status: int | str) -> None:
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.by_path[path] = self.stats.by_path.get(path, 0) + 1
+            key = str(status)
+            self.stats.by_status[key] = self.stats.by_status.get(key, 0) + 1
+
+    def _mark_served(self, path: str, index: int) -> None:
+        with self._lock:
+            self.stats.first_served.setdefault(f"{path}#{index}", round(self.elapsed(), 3))
+
+    def _handler_class(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if path == STATS_PATH:
+                    self._send(200, json.dumps(simulator.stats.as_dict()).encode(), "application/json")
+                    return
+
+                profile = simulator.profile
+                roll = simulator._roll()
+                if roll < profile.timeout_rate:
+                    simulator._count(path, "timeout")
+                    time.sleep(profile.hang_seconds)
+                    self.close_connection = True
+                    return
+                time.sleep(simulator._delay())
+                if roll < profile.timeout_rate + profile.error_rate:
+                    simulator._count(path, 503)
+                    self._send(503, b"Service Unavailable (simulado)", "text/plain")
+                    return
+
+                current = simulator.current_version(path)
+                if current is None:
+                    simulator._count(path, 404)
+                    self._send(404, b"Not Found", "text/plain")
+                    return
+
+                index, version = current
+                body = simulator._body(version.filename)
+                etag = f'"{content_fingerprint(body.decode("utf-8", "replace"))}"'
+                if self.headers.get("If-None-Match") == etag:
+                    simulator._count(path, 304)
+                    self._send(304, b"", "text/html; charset=utf-8", etag=etag)
+                    return
+                simulator._count(path, 200)
+                simulator._mark_served(path, index)
+                self._send(200, body, "text/html; charset=utf-8", etag=etag)
+
+            def _send(self, status: int, body: bytes, content_type: str, *, etag: str = "") -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                if body:
+                    self._write_throttled(body)
+
+            def _write_throttled(self, body: bytes) -> None:
+                kbps = simulator.profile.bandwidth_kbps
+                if not kbps:
+                    self.wfile.write(body)
+                    return
+                chunk = 4096
+                seconds_per_chunk = chunk / (kbps * 1000 / 8)
+                for start in range(0, len(body), chunk):
+                    self.wfile.write(body[start : start + chunk])
+                    self.wfile.flush()
+                    time.sleep(seconds_per_chunk)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
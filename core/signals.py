@@ -1,8 +1,10 @@
 # core/signals.py
 import logging
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from core.models import Device
+from core.models import Device, Provider
+from core.services.provider_registry import ProviderRegistry
 from core.ws.events import notify_device
 
 logger = logging.getLogger(__name__)
@@ -48,4 +50,12 @@ def device_post_save(sender, instance: Device, created: bool, **kwargs):
         logger.info(
             "SIGNAL sin WS — device no está listo: is_active=%s branch_id=%s",
             instance.is_active, instance.branch_id,
-        )
\ No newline at end of file
+        )
+
+
+@receiver([post_save, post_delete], sender=Provider)
+def provider_post_change(sender, instance: Provider, **kwargs):
+    # Admin / shell: la copia local se descarta ya; el resto de procesos
+    # recarga al ver la nueva versión compartida (solo si la transacción confirma).
+    ProviderRegistry.invalidate()
+    transaction.on_commit(ProviderRegistry.bump_version)
@@ -1,26 +1,112 @@
-from celery import shared_task
+from celery import chord, group, shared_task
+from django.conf import settings
 from django.core.management import call_command
 
+from core.services.scrape_fanout_service import RETRYABLE_EXCEPTIONS, ScrapeFanoutService
+from core.services.scrape_schedule_service import ScrapeScheduleService
 from core.services.scraper_notification_service import ScraperNotificationService
 from core.services.scraper_health_service import ScraperHealthService
+from core.services.scraper_lock_service import ScraperLockBusy, ScraperLockService
+from core.services.telemetry_rollup_service import TelemetryRollupService
+
+
+def _run_registered(scraper_key, **command_options):
+    try:
+        return ScraperHealthService.run_registered(scraper_key, **command_options)
+    except ScraperLockBusy:
+        return {"skipped": scraper_key, "reason": "already_running"}
+
 
 @shared_task
 def scrape_triples():
-    return ScraperHealthService.run_registered("lotoven_triples")
+    return _run_registered("lotoven_triples")
 
 
 @shared_task
 def scrape_tuazar_triples():
-    return ScraperHealthService.run_registered("tuazar_triples")
+    return _run_registered("tuazar_triples")
 
 @shared_task
 def scrape_animalitos():
-    return ScraperHealthService.run_registered("lotoven_animalitos")
+    return _run_registered("lotoven_animalitos")
 
 
 @shared_task
 def scrape_condor_animalitos():
-    return ScraperHealthService.run_registered("condor_animalitos")
+    return _run_registered("condor_animalitos")
+
+
+@shared_task
+def run_scraper(scraper_key, **command_options):
+    return _run_registered(scraper_key, **command_options)
+
+
+@shared_task(bind=True, max_retries=None)
+def scrape_unit(self, unit_key, lease_token="", **command_options):
+    # Nunca propaga la excepción: el chord necesita el resultado de todas las
+    # unidades para que finalize_scrape corra igual con fallas parciales.
+    attempt = self.request.retries + 1
+    lease = ScrapeFanoutService.lease_for(unit_key, lease_token)
+    try:
+        return ScrapeFanoutService.run_unit(unit_key, attempt=attempt, lease=lease, **command_options)
+    except RETRYABLE_EXCEPTIONS as exc:
+        if self.request.retries < int(getattr(settings, "SCRAPER_UNIT_MAX_RETRIES", 3)):
+            countdown = ScrapeFanoutService.retry_countdown(self.request.retries)
+            if lease is not None:
+                # El lease tiene que sobrevivir la espera del reintento.
+                ScraperLockService.renew(lease, seconds=countdown + lease.lease_seconds)
+            raise self.retry(exc=exc, countdown=countdown)
+        return ScrapeFanoutService.failed_result(unit_key, exc, attempts=attempt)
+    except Exception as exc:
+        return ScrapeFanoutService.failed_result(unit_key, exc, attempts=attempt)
+
+
+@shared_task
+def finalize_scrape(results, scraper_key, lease_token=""):
+    lease = ScrapeFanoutService.lease_for(scraper_key, lease_token)
+    return ScrapeFanoutService.finalize(scraper_key, results, lease=lease)
+
+
+@shared_task
+def run_scraper_fanout(scraper_key, **command_options):
+    started = ScrapeFanoutService.start(scraper_key)
+    if started is None:
+        return {"skipped": scraper_key, "reason": "already_running"}
+    lease, units = started
+    header = group(scrape_unit.s(unit.key, lease_token=lease.token, **command_options) for unit in units)
+    chord(header)(finalize_scrape.s(scraper_key, lease_token=lease.token))
+    return [unit.key for unit in units]
+
+
+def _dispatch_scrape(scraper_key, options):
+    if getattr(settings, "SCRAPER_FANOUT_ENABLED", True):
+        run_scraper_fanout.delay(scraper_key, **options)
+    else:
+        run_scraper.delay(scraper_key, **options)
+
+
+@shared_task
+def scrape_scheduler_tick():
+    decisions = ScrapeScheduleService.tick(dispatch=_dispatch_scrape)
+    return {d.scraper_key: d.reason for d in decisions}
+
+
+@shared_task
+def ensure_result_partitions():
+    # No-op fuera de Postgres o con las tablas sin convertir.
+    call_command("manage_result_partitions")
+
+
+@shared_task
+def ensure_telemetry_partitions():
+    # Crea las próximas y hace DROP de las vencidas; no-op sin la migración 0036.
+    call_command("manage_telemetry_partitions")
+
+
+@shared_task
+def flush_telemetry_rollups():
+    summary = TelemetryRollupService.flush()
+    return {"hashes": summary.hashes, "rows": summary.rows, "events": summary.events, "skipped": summary.skipped}
 
 
 @shared_task
@@ -1,19 +1,78 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from unittest.mock import call, patch
+import fnmatch
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from io import StringIO
+from time import sleep
+from unittest import skipUnless
+from unittest.mock import Mock, call, patch
+
+import requests
+from prometheus_client import REGISTRY
+from redis.exceptions import ResponseError as RedisResponseError
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.forms import modelform_factory
 from django.utils import timezone
 
-from core.models import Branch, Client, CurrentResult, Device, DeviceTelemetryEvent, Provider, ScraperHealth
+from core.models import (
+    AnimalitoArchive,
+    AnimalitoResult,
+    Branch,
+    Client,
+    CurrentResult,
+    Device,
+    DeviceTelemetryEvent,
+    DeviceTelemetryRollup,
+    DeviceTelemetrySnapshot,
+    NumberFrequency,
+    NumberLastSeen,
+    NumberOccurrence,
+    Provider,
+    ResultArchive,
+    ResultObservation,
+    ScraperHealth,
+    ScraperRun,
+    ScraperUnitHealth,
+    TelemetryRollupFlush,
+)
+from core.services.batched_delete_service import BatchedDeleteService
+from core.services.circuit_breaker_service import CircuitBreakerService, UpstreamCircuitOpen
+from core.services.dedupe_service import DedupeService
 from core.services.device_telemetry_service import DeviceTelemetryService
-from core.services.result_window_service import delete_future_rows_for_provider
+from core.services.html_parser_service import HTML_PARSER, available_backends, parser_options
+from core.services.parse_pool_service import ParsePoolService
+from core.services.provider_registry import ProviderRef, ProviderRegistry
+from core.services.number_index_service import NumberIndexService
+from core.services.number_stats_service import NumberStatsService
+from core.services.result_history_store import ResultHistoryStore
+from core.services.result_partition_service import PARTITION_PAIRS, ResultPartitionService
+from core.services.result_window_service import delete_future_rows_for_provider, pinned_business_cutoff
+from core.services.result_write_service import ResultWriteBatch, ResultWriteService
+from core.services.results_cache_service import TRIPLES
+from core.services.scrape_fanout_service import ScrapeFanoutService
+from core.services.scrape_schedule_service import ScrapeScheduleService
 from core.services.scraper_notification_service import ScraperNotificationService
 from core.services.scraper_health_service import ScraperHealthService
+from core.services.scraper_lock_service import ScraperLease, ScraperLockBusy, ScraperLockService
+from core.services.scraper_fetch_service import ScraperFetchService
+from core.services.telemetry_partition_service import SEQUENCE as TELEMETRY_EVENT_SEQUENCE, TelemetryPartitionService
+from core.services.telemetry_rollup_service import TelemetryRollupService
+from core.services.telemetry_snapshot_buffer import TelemetrySnapshotBuffer
+from core.services.scraper_fixtures import get_scraper_command_fixtures, get_scraper_fixtures, to_jsonable
+from core.services.upstream_simulator import FaultProfile, PageVersion, UpstreamSimulator, route_for
+from core.services.scraper_run_stats import collect_run_stats, record_run_stats, run_phase
+from core.services.source_reconciliation_service import SourceReconciliationService
+from core.tasks import finalize_scrape, scrape_unit
 
 
 TEST_CACHES = {
@@ -30,9 +89,10 @@ TEST_CHANNEL_LAYERS = {
 }
 
 
-@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, TELEMETRY_SNAPSHOT_FLUSH_SECONDS=0)
 class DeviceTelemetryAPITestCase(TestCase):
     def setUp(self):
+        self.addCleanup(TelemetrySnapshotBuffer.clear)
         self.client_model = Client.objects.create(name="Cliente QA")
         self.branch = Branch.objects.create(
             client=self.client_model,
@@ -193,6 +253,669 @@ class ScraperHealthServiceTestCase(TestCase):
         self.assertEqual(alert["alert_kind"], "stale")
 
 
+    @patch("core.services.scraper_health_service.call_command")
+    def test_run_registered_records_skip_counters(self, mock_call_command):
+        mock_call_command.side_effect = lambda *_args, **_kwargs: record_run_stats(pages_skipped=1, blocks_skipped=3)
+
+        ScraperHealthService.run_registered("lotoven_triples")
+
+        monitor = ScraperHealth.objects.get(scraper_key="lotoven_triples")
+        self.assertEqual(monitor.last_pages_skipped, 1)
+        self.assertEqual(monitor.last_blocks_skipped, 3)
+
+    @patch("core.services.scraper_health_service.call_command")
+    def test_run_registered_records_run_history_and_metrics(self, mock_call_command):
+        def fake_scrape(*_args, **_kwargs):
+            record_run_stats(rows_inserted=4, rows_changed=1, bytes_downloaded=2048)
+            with run_phase("parse"):
+                sleep(0.01)
+
+        mock_call_command.side_effect = fake_scrape
+        ScraperHealthService.run_registered("tuazar_triples")
+        mock_call_command.side_effect = RuntimeError("tuazar caido")
+        with self.assertRaises(RuntimeError):
+            ScraperHealthService.run_registered("tuazar_triples")
+
+        ok, failed = ScraperRun.objects.filter(scraper_key="tuazar_triples").order_by("started_at", "pk")
+        self.assertEqual(ok.outcome, ScraperRun.Outcome.SUCCESS)
+        self.assertEqual((ok.rows_inserted, ok.rows_changed, ok.bytes_downloaded), (4, 1, 2048))
+        self.assertGreater(ok.parse_ms, 0)
+        self.assertEqual(failed.outcome, ScraperRun.Outcome.FAILED)
+        self.assertIn("tuazar caido", failed.error_message)
+        self.assertGreaterEqual(
+            REGISTRY.get_sample_value(
+                "scraper_run_duration_seconds_count", {"scraper_key": "tuazar_triples", "outcome": "failed"}
+            ),
+            1,
+        )
+
+        trend = ScraperHealthService.get_run_trend("tuazar_triples")
+        self.assertEqual(trend["runs"], 2)
+        self.assertEqual(trend["failures"], 1)
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class ScraperLockServiceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("core.services.scraper_health_service.call_command")
+    def test_overlapping_run_is_skipped_and_counted(self, mock_call_command):
+        lease = ScraperLockService.acquire("condor_animalitos")
+
+        with self.assertRaises(ScraperLockBusy):
+            ScraperHealthService.run_registered("condor_animalitos")
+        self.assertIsNone(ScrapeFanoutService.start("condor_animalitos"))
+
+        mock_call_command.assert_not_called()
+        monitor = ScraperHealth.objects.get(scraper_key="condor_animalitos")
+        self.assertEqual(monitor.skipped_runs, 2)
+        self.assertIsNotNone(monitor.last_skipped_at)
+        self.assertEqual(monitor.last_status, ScraperHealth.Status.NEVER)
+
+        self.assertTrue(ScraperLockService.release(lease))
+        ScraperHealthService.run_registered("condor_animalitos")
+        mock_call_command.assert_called_once_with("scrape_condor_animalitos")
+        self.assertFalse(ScraperLockService.is_locked("condor_animalitos"))
+
+    def test_only_owner_renews_or_releases_and_expired_lease_is_taken_over(self):
+        lease = ScraperLockService.acquire("tuazar_triples", lease_seconds=1)
+        stranger = ScraperLease("tuazar_triples", "otro-worker", 1)
+
+        self.assertIsNone(ScraperLockService.acquire("tuazar_triples"))
+        self.assertFalse(ScraperLockService.renew(stranger))
+        self.assertFalse(ScraperLockService.release(stranger))
+        self.assertTrue(ScraperLockService.renew(lease))
+
+        sleep(1.1)
+        takeover = ScraperLockService.acquire("tuazar_triples")
+        self.assertIsNotNone(takeover)
+        self.assertFalse(ScraperLockService.release(lease))
+        self.assertEqual(ScraperLockService.holder("tuazar_triples"), takeover.token)
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class ScrapeFanoutServiceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_units_for_splits_lotoven_by_source_page(self):
+        from core.management.commands import scrape_lotoven_tables
+
+        pages = scrape_lotoven_tables.provider_pages()
+        units = ScrapeFanoutService.units_for("lotoven_triples")
+
+        self.assertEqual(len(units), len(pages))
+        self.assertEqual([unit.options["url"] for unit in units], list(pages))
+        self.assertEqual(len({unit.key for unit in units}), len(units))
+        for unit in units:
+            self.assertTrue(unit.key.startswith("lotoven_triples:"))
+            self.assertEqual(unit.providers, tuple(spec.name for spec in pages[unit.options["url"]]))
+            self.assertEqual(ScrapeFanoutService.get_unit(unit.key), unit)
+
+        (tuazar,) = ScrapeFanoutService.units_for("tuazar_triples")
+        self.assertEqual(tuazar.key, "tuazar_triples:resultados")
+        self.assertEqual(tuazar.options, {})
+        with self.assertRaises(KeyError):
+            ScrapeFanoutService.get_unit("tuazar_triples:otra")
+
+    @patch("core.services.scrape_fanout_service.call_command")
+    def test_run_unit_updates_unit_health(self, mock_call_command):
+        unit = ScrapeFanoutService.units_for("lotoven_triples")[0]
+        mock_call_command.side_effect = lambda *_args, **_kwargs: record_run_stats(rows_inserted=3)
+
+        result = ScrapeFanoutService.run_unit(unit.key)
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(mock_call_command.call_args.kwargs["url"], unit.options["url"])
+        monitor = ScraperUnitHealth.objects.get(unit_key=unit.key)
+        self.assertEqual(monitor.last_status, ScraperHealth.Status.SUCCESS)
+        self.assertEqual(monitor.last_rows_written, 3)
+        self.assertEqual(monitor.providers, ", ".join(unit.providers))
+
+        mock_call_command.side_effect = ValueError("tabla rota")
+        with self.assertRaises(ValueError):
+            ScrapeFanoutService.run_unit(unit.key, attempt=2)
+
+        monitor.refresh_from_db()
+        self.assertEqual(monitor.last_status, ScraperHealth.Status.FAILED)
+        self.assertEqual(monitor.last_error_message, "tabla rota")
+        self.assertEqual(monitor.consecutive_failures, 1)
+        self.assertEqual(monitor.last_attempts, 2)
+        self.assertIsNotNone(monitor.last_success_at)
+
+    @override_settings(SCRAPER_UNIT_MAX_RETRIES=2)
+    @patch.object(ScrapeFanoutService, "retry_countdown", return_value=0)
+    @patch("core.services.scrape_fanout_service.call_command")
+    def test_scrape_unit_retries_network_errors_only(self, mock_call_command, _countdown):
+        mock_call_command.side_effect = requests.ConnectionError("timeout")
+        result = scrape_unit.apply(args=["tuazar_triples:resultados"]).get()
+
+        self.assertFalse(result["ok"])
+        self.assertEqual(result["attempts"], 3)
+        self.assertEqual(mock_call_command.call_count, 3)
+        self.assertIn("ConnectionError", result["error"])
+
+        mock_call_command.reset_mock()
+        mock_call_command.side_effect = ValueError("html inesperado")
+        result = scrape_unit.apply(args=["tuazar_triples:resultados"]).get()
+
+        self.assertFalse(result["ok"])
+        self.assertEqual(result["attempts"], 1)
+        self.assertEqual(mock_call_command.call_count, 1)
+        monitor = ScraperUnitHealth.objects.get(unit_key="tuazar_triples:resultados")
+        self.assertEqual(monitor.consecutive_failures, 4)
+
+    @patch("core.services.scrape_fanout_service.ResultsCacheService.invalidate")
+    def test_finalize_scrape_combines_failures_and_invalidates_once(self, mock_invalidate):
+        started = ScrapeFanoutService.start("lotoven_triples")
+        self.assertIsNotNone(started)
+        lease, units = started
+        results = [
+            {"unit": units[0].key, "ok": True, "cache_kinds": [TRIPLES], "stats": {"rows_inserted": 2}},
+            {"unit": units[1].key, "ok": True, "cache_kinds": [TRIPLES], "stats": {"rows_changed": 1}},
+            ScrapeFanoutService.failed_result(units[2].key, requests.Timeout("lento"), attempts=4),
+            ScrapeFanoutService.failed_result(units[3].key, ValueError("sin tabla"), attempts=1),
+            None,
+        ]
+
+        summary = finalize_scrape(results, "lotoven_triples", lease_token=lease.token)
+
+        mock_invalidate.assert_called_once_with(TRIPLES)
+        self.assertEqual(summary["failed"], [units[2].key, units[3].key])
+        self.assertEqual(summary["units"], 4)
+        monitor = ScraperHealth.objects.get(scraper_key="lotoven_triples")
+        self.assertEqual(monitor.last_status, ScraperHealth.Status.FAILED)
+        self.assertIn(f"{units[2].key}: Timeout: lento", monitor.last_error_message)
+        self.assertIn(f"{units[3].key}: ValueError: sin tabla", monitor.last_error_message)
+        self.assertEqual(monitor.last_error_traceback.splitlines(), [
+            f"{units[2].key}: Timeout: lento",
+            f"{units[3].key}: ValueError: sin tabla",
+        ])
+        run = ScraperRun.objects.get(scraper_key="lotoven_triples")
+        self.assertEqual((run.rows_inserted, run.rows_changed), (2, 1))
+        self.assertFalse(ScraperLockService.is_locked("lotoven_triples"))
+
+
+CONDOR_HTML = """
+<div class="row">
+  <div class="col-sm-6" id="resultado-de-condor-gana-de-hoy">
+    <ul class="step">
+      <li class="step-item"><h4>9:00 am</h4><p class="step-text">62 Cachicamo</p><img src="/img/62.webp"></li>
+      <li class="step-item"><h4>11:00 pm</h4><p class="step-text">5 Leon</p><img src="/img/5.webp"></li>
+    </ul>
+  </div>
+  <div class="col-sm-6"><ul class="step"></ul></div>
+</div>
+"""
+
+
+class FakeResponse:
+    def __init__(self, text="", status_code=200, headers=None):
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.elapsed = timedelta(milliseconds=5)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeRedis:
+    """Lo mínimo de redis.Redis que usa TelemetryRollupService (hashes en memoria)."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def hincrby(self, key, field, amount=1):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = bucket.get(field, 0) + amount
+
+    def expire(self, key, seconds):
+        pass
+
+    def execute(self):
+        pass
+
+    def scan_iter(self, match, count=None):
+        return [key.encode() for key in list(self.hashes) if fnmatch.fnmatch(key, match)]
+
+    def rename(self, key, target):
+        key = key.decode() if isinstance(key, bytes) else key
+        if key not in self.hashes:
+            raise RedisResponseError("no such key")
+        self.hashes[target] = self.hashes.pop(key)
+
+    def hgetall(self, key):
+        return {field.encode(): str(value).encode() for field, value in self.hashes.get(key, {}).items()}
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class ScraperFetchServiceTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        ProviderRegistry.invalidate()
+
+    @override_settings(SCRAPER_PAGE_CACHE_TTL_SECONDS=0)
+    @patch("core.services.scraper_fetch_service.requests.get")
+    def test_conditional_fetch_sends_validators_and_handles_not_modified(self, mock_get):
+        url = "https://example.com/resultados/"
+        draw_date = timezone.localdate()
+        mock_get.return_value = FakeResponse("<html>v1</html>", headers={"ETag": '"abc"'})
+        page = ScraperFetchService.fetch(url, timeout=5)
+        ScraperFetchService.remember_block("test:block", "<div>v1</div>", draw_date=draw_date)
+        ScraperFetchService.remember_page(page, draw_date=draw_date, block_scopes=["test:block"])
+
+        self.assertTrue(ScraperFetchService.is_page_fresh(url, draw_date=draw_date))
+
+        mock_get.return_value = FakeResponse("", status_code=304)
+        page = ScraperFetchService.fetch(url, timeout=5, conditional=True)
+
+        self.assertTrue(page.unchanged)
+        self.assertEqual(mock_get.call_args.kwargs["headers"]["If-None-Match"], '"abc"')
+
+    @patch("core.services.scraper_fetch_service.requests.get")
+    def test_shared_page_cache_reuses_compressed_copy_until_forced(self, mock_get):
+        url = "https://example.com/resultados/"
+        mock_get.return_value = FakeResponse("<html>v1</html>" * 50, headers={"ETag": '"abc"'})
+
+        first = ScraperFetchService.fetch(url, timeout=5)
+        second = ScraperFetchService.fetch(url, timeout=5)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(second.html, first.html)
+        self.assertEqual(second.etag, '"abc"')
+        raw = cache.get(ScraperFetchService._shared_key(url))
+        self.assertIsInstance(raw, bytes)
+        self.assertLess(len(raw), len(first.html))
+
+        ScraperFetchService.fetch(url, timeout=5, max_age=0)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @override_settings(SCRAPER_PAGE_CACHE_TTL_SECONDS=0)
+    @patch("core.services.scraper_fetch_service.requests.get")
+    def test_upstream_fetch_records_connect_download_and_bytes(self, mock_get):
+        mock_get.return_value = FakeResponse("<html>v1</html>")
+
+        with collect_run_stats() as stats:
+            ScraperFetchService.fetch("https://example.com/resultados/", timeout=5)
+
+        self.assertEqual(stats.bytes_downloaded, len("<html>v1</html>"))
+        self.assertIn("connect", stats.timings)
+        self.assertIn("download", stats.timings)
+
+    @patch("core.services.scraper_fetch_service.requests.get")
+    def test_concurrent_fetches_of_same_url_are_single_flight(self, mock_get):
+        url = "https://example.com/resultados/"
+
+        def slow_get(*args, **kwargs):
+            sleep(0.3)
+            return FakeResponse("<html>v1</html>")
+
+        mock_get.side_effect = slow_get
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            pages = list(pool.map(lambda _: ScraperFetchService.fetch(url, timeout=5), range(3)))
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual({page.html for page in pages}, {"<html>v1</html>"})
+
+    @override_settings(SCRAPER_PAGE_CACHE_TTL_SECONDS=0, SCRAPER_CIRCUIT_FAILURE_THRESHOLD=2)
+    @patch("core.services.scraper_fetch_service.requests.get")
+    def test_circuit_opens_per_host_fails_fast_and_closes_after_probe(self, mock_get):
+        url = "https://www.lottoresultados.com/resultados/animalitos/condor-gana"
+        mock_get.side_effect = requests.ConnectionError("down")
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                ScraperFetchService.fetch(url, timeout=5)
+
+        with self.assertRaises(UpstreamCircuitOpen):
+            ScraperFetchService.fetch(url, timeout=5)
+        self.assertEqual(mock_get.call_count, 2)
+        alert = ScraperHealthService.get_alert("condor_animalitos")
+        self.assertEqual(alert["alert_kind"], "circuit_open")
+        self.assertTrue(CircuitBreakerService.get_state("tuazar.com").is_closed)
+
+        # Vencido el cooldown: un solo request de prueba; si responde, se cierra.
+        with patch("core.services.circuit_breaker_service.time.time", return_value=datetime.now().timestamp() + 600):
+            self.assertEqual(CircuitBreakerService.get_state("lottoresultados.com").state, "half_open")
+            mock_get.side_effect = None
+            mock_get.return_value = FakeResponse("<html>ok</html>")
+            ScraperFetchService.fetch(url, timeout=5)
+        self.assertTrue(CircuitBreakerService.get_state("lottoresultados.com").is_closed)
+
+    def test_block_with_pending_future_draw_is_rechecked_after_cutoff(self):
+        draw_date = timezone.localdate()
+        ScraperFetchService.remember_block(
+            "test:block",
+            "<div>same</div>",
+            draw_date=draw_date,
+            recheck_after=datetime.strptime("16:00", "%H:%M").time(),
+        )
+
+        self.assertTrue(
+            ScraperFetchService.is_block_unchanged(
+                "test:block",
+                "<div>same</div>",
+                draw_date=draw_date,
+                cutoff_time=datetime.strptime("15:59", "%H:%M").time(),
+            )
+        )
+        self.assertFalse(
+            ScraperFetchService.is_block_unchanged(
+                "test:block",
+                "<div>same</div>",
+                draw_date=draw_date,
+                cutoff_time=datetime.strptime("16:00", "%H:%M").time(),
+            )
+        )
+
+    @patch("core.management.commands.scrape_condor_animalitos.get_business_cutoff_time")
+    @patch("core.services.scraper_fetch_service.requests.get")
+    def test_condor_scraper_skips_unchanged_page(self, mock_get, mock_cutoff):
+        mock_cutoff.return_value = datetime.strptime("12:00", "%H:%M").time()
+        mock_get.return_value = FakeResponse(CONDOR_HTML)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("scrape_condor_animalitos", stdout=StringIO())
+        self.assertEqual(AnimalitoResult.objects.count(), 1)
+
+        AnimalitoResult.objects.all().delete()
+        with collect_run_stats() as stats:
+            call_command("scrape_condor_animalitos", stdout=StringIO())
+
+        self.assertEqual(stats.pages_skipped, 1)
+        self.assertEqual(AnimalitoResult.objects.count(), 0)
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class ProviderRegistryTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        ProviderRegistry.invalidate()
+
+    def test_ensure_dedupes_by_normalized_name_and_caches_in_memory(self):
+        existing = Provider.objects.create(
+            name="La Ricachona",
+            source_url="https://example.com/ricachona",
+            is_active=False,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            providers = ProviderRegistry.ensure(
+                [
+                    ProviderRef(name="La-Ricachona", source_url="https://example.com/otra"),
+                    ProviderRef(name="Triple Táchira A", source_url="https://example.com/tachira"),
+                ]
+            )
+
+        self.assertEqual(providers["La-Ricachona"].pk, existing.pk)
+        self.assertEqual(Provider.objects.count(), 2)
+        existing.refresh_from_db()
+        self.assertTrue(existing.is_active)
+        self.assertEqual(existing.source_url, "https://example.com/ricachona")
+
+        # Tras el commit se recarga una vez; luego todo sale de memoria, sin queries.
+        ProviderRegistry.get("la ricachona")
+        with self.assertNumQueries(0):
+            again = ProviderRegistry.ensure([ProviderRef(name="triple tachira a")])
+        self.assertEqual(again["triple tachira a"].pk, providers["Triple Táchira A"].pk)
+
+    def test_admin_edit_invalidates_registry(self):
+        provider = Provider.objects.create(name="Lotto Activo", source_url="https://example.com/la")
+        self.assertEqual(ProviderRegistry.get_by_id(provider.pk).name, "Lotto Activo")
+
+        provider.name = "Lotto Activo RD"
+        with self.captureOnCommitCallbacks(execute=True):
+            provider.save()
+
+        self.assertEqual(ProviderRegistry.get_by_id(provider.pk).name, "Lotto Activo RD")
+        self.assertEqual(ProviderRegistry.get("lotto activo rd").pk, provider.pk)
+
+    def test_admin_form_rejects_duplicate_or_empty_normalized_name(self):
+        existing = Provider.objects.create(name="La Ricachona", source_url="https://example.com/ricachona")
+        ProviderForm = modelform_factory(Provider, fields=["name", "source_url", "is_active", "logo_url"])
+
+        duplicate = ProviderForm(data={"name": "LA-RICACHONA", "source_url": "https://example.com/otra"})
+        self.assertFalse(duplicate.is_valid())
+        self.assertIn("La Ricachona", duplicate.errors["name"][0])
+
+        empty = ProviderForm(data={"name": "¡¿--?!", "source_url": "https://example.com/otra"})
+        self.assertFalse(empty.is_valid())
+        self.assertIn("name", empty.errors)
+
+        # Editar el mismo provider no choca consigo mismo.
+        same = ProviderForm(
+            data={"name": "La Ricachona ", "source_url": "https://example.com/ricachona", "is_active": True},
+            instance=existing,
+        )
+        self.assertTrue(same.is_valid(), same.errors)
+        self.assertEqual(Provider.objects.count(), 1)
+
+    @override_settings(SCRAPER_PROVIDER_ALIASES={"Lotto Activo Internacional": "Lotto Activo"})
+    def test_aliases_resolve_to_canonical_provider(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            providers = ProviderRegistry.ensure(
+                [
+                    ProviderRef(name="LOTTO ACTIVO INTERNACIONAL", source_url="https://example.com/otra"),
+                    ProviderRef(name="Lotto Activo", source_url="https://example.com/la"),
+                ]
+            )
+
+        self.assertEqual(Provider.objects.count(), 1)
+        provider = Provider.objects.get()
+        self.assertEqual(provider.name, "Lotto Activo")
+        self.assertEqual(providers["LOTTO ACTIVO INTERNACIONAL"].pk, provider.pk)
+        self.assertEqual(ProviderRegistry.get("Lotto Activo Internacional").pk, provider.pk)
+
+
+class HtmlParserServiceTestCase(TestCase):
+    def test_targeted_parsing_matches_full_html_parser_output(self):
+        for fixture in get_scraper_fixtures():
+            html = fixture.read_html()
+            with parser_options(backend=HTML_PARSER, targeted=False):
+                expected = fixture.parse(html)
+            self.assertTrue(expected, fixture.name)
+
+            for backend in available_backends():
+                for targeted in (False, True):
+                    with self.subTest(fixture=fixture.name, backend=backend, targeted=targeted):
+                        with parser_options(backend=backend, targeted=targeted):
+                            self.assertEqual(fixture.parse(html), expected)
+
+    def test_benchmark_command_reports_equivalence(self):
+        out = StringIO()
+        call_command("benchmark_html_parsers", iterations=1, only="condor_gana", stdout=out)
+        self.assertIn("equal=yes", out.getvalue())
+        self.assertNotIn("equal=NO", out.getvalue())
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class ScraperRegressionCorpusTestCase(TestCase):
+    def setUp(self):
+        ProviderRegistry.invalidate()
+
+    def test_parse_output_matches_expected_json(self):
+        for fixture in get_scraper_fixtures():
+            with self.subTest(fixture=fixture.name):
+                self.assertEqual(to_jsonable(fixture.parse(fixture.read_html())), fixture.load_expected())
+
+    def test_scrape_records_phase_timings_without_network_inside_transaction(self):
+        fixture = next(f for f in get_scraper_command_fixtures() if f.name == "tuazar_tables")
+        depth_at_fetch = []
+        original_fetch = ScraperFetchService.fetch
+
+        def fetch(*args, **kwargs):
+            depth_at_fetch.append(len(connection.atomic_blocks))
+            return original_fetch(*args, **kwargs)
+
+        with ScraperFetchService.serve_offline(fixture.read_pages()), pinned_business_cutoff(time(23, 59)):
+            with patch.object(ScraperFetchService, "fetch", side_effect=fetch):
+                outer_depth = len(connection.atomic_blocks)
+                ScraperHealthService.run_registered("tuazar_triples", stdout=StringIO())
+
+        monitor = ScraperHealth.objects.get(scraper_key="tuazar_triples")
+        self.assertEqual(set(monitor.last_run_timings), {"fetch", "parse", "transaction", "cache"})
+        self.assertTrue(CurrentResult.objects.exists())
+        run = ScraperRun.objects.get(scraper_key="tuazar_triples")
+        self.assertGreater(run.rows_inserted, 0)
+        self.assertGreater(run.transaction_ms, 0)
+        # TestCase ya abre atomics externos: el fetch no debe correr dentro de uno del scraper.
+        self.assertEqual(depth_at_fetch, [outer_depth])
+
+    @override_settings(SCRAPER_PARSE_POOL_SIZE=1)
+    def test_parse_pool_matches_inline_and_feeds_scrape(self):
+        from core.management.commands import scrape_tuazar_tables
+
+        fixture = next(f for f in get_scraper_command_fixtures() if f.name == "tuazar_tables")
+        html = fixture.read_pages()[scrape_tuazar_tables.TUAZAR_URL]
+        try:
+            pooled = ParsePoolService.result(ParsePoolService.submit(scrape_tuazar_tables.extract_blocks, html))
+            with ScraperFetchService.serve_offline(fixture.read_pages()), pinned_business_cutoff(time(23, 59)):
+                call_command(fixture.command_name, stdout=StringIO(), **fixture.options)
+        finally:
+            ParsePoolService.shutdown()
+
+        self.assertEqual(pooled, scrape_tuazar_tables.extract_blocks(html))
+        self.assertTrue(CurrentResult.objects.exists())
+
+    def test_benchmark_runs_commands_offline_and_rolls_back(self):
+        out = StringIO()
+        with patch("core.services.scraper_fetch_service.requests.get") as mock_get:
+            call_command("benchmark_scrapers", iterations=1, runs=1, stdout=out)
+
+        mock_get.assert_not_called()
+        self.assertIn("insert lotoven_tables", out.getvalue())
+        self.assertIn("rerun condor_animalitos", out.getvalue())
+        self.assertFalse(CurrentResult.objects.exists())
+        self.assertFalse(AnimalitoResult.objects.exists())
+        self.assertFalse(Provider.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class UpstreamSimulatorTestCase(TestCase):
+    URL = "https://www.tuazar.com/loteria/resultados/"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fetch_goes_to_simulator_and_follows_timeline(self):
+        routes = {
+            route_for(self.URL): [
+                PageVersion(0, "tuazar_resultados.html"),
+                PageVersion(3600, "condor_gana.html"),
+            ]
+        }
+        with UpstreamSimulator(routes) as simulator, self.settings(SCRAPER_UPSTREAM_OVERRIDE=simulator.base_url):
+            page = ScraperFetchService.fetch(self.URL, timeout=5)
+            with self.assertRaises(requests.HTTPError):
+                ScraperFetchService.fetch("https://lotoven.com/no-grabada/", timeout=5)
+
+        self.assertEqual(page.url, self.URL)
+        self.assertIn("resultados", page.html)
+        self.assertTrue(page.etag)
+        self.assertEqual(simulator.stats.by_status, {"200": 1, "404": 1})
+        self.assertIn(f"{route_for(self.URL)}#0", simulator.stats.first_served)
+
+    def test_injected_errors_surface_as_http_errors(self):
+        routes = {route_for(self.URL): [PageVersion(0, "tuazar_resultados.html")]}
+        profile = FaultProfile(error_rate=1.0)
+        with UpstreamSimulator(routes, profile=profile) as simulator, self.settings(
+            SCRAPER_UPSTREAM_OVERRIDE=simulator.base_url
+        ):
+            with self.assertRaises(requests.HTTPError):
+                ScraperFetchService.fetch(self.URL, timeout=5)
+        self.assertEqual(simulator.stats.by_status, {"503": 1})
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class ScrapeScheduleServiceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        ProviderRegistry.invalidate()
+        self.today = timezone.localdate()
+
+    def _at(self, hour, minute, second=0):
+        return timezone.make_aware(datetime.combine(self.today, time(hour, minute, second)))
+
+    def _tick(self, now):
+        dispatched = []
+        decisions = ScrapeScheduleService.tick(dispatch=lambda key, options: dispatched.append((key, options)), now=now)
+        return {d.scraper_key: d for d in decisions}, dispatched
+
+    def test_polls_after_expected_draw_until_result_appears(self):
+        provider = Provider.objects.create(
+            name="Triple Caracas A",
+            source_url="https://lotoven.com/loteria/triplecaracas/resultados/",
+        )
+        decisions, dispatched = self._tick(self._at(13, 2))
+        self.assertEqual(decisions["lotoven_triples"].reason, "draw_pending")
+        self.assertEqual(decisions["lotoven_triples"].pending_draws, (time(13, 0),))
+        self.assertIn(("lotoven_triples", {}), dispatched)
+
+        decisions, dispatched = self._tick(self._at(13, 2, 30))
+        self.assertEqual(decisions["lotoven_triples"].reason, "waiting")
+        self.assertNotIn("lotoven_triples", [key for key, _ in dispatched])
+
+        decisions, dispatched = self._tick(self._at(13, 3, 0))
+        self.assertEqual(decisions["lotoven_triples"].reason, "draw_pending")
+
+        CurrentResult.objects.create(provider=provider, draw_date=self.today, draw_time=time(13, 0), winning_number="123")
+        decisions, dispatched = self._tick(self._at(13, 4))
+        self.assertEqual(decisions["lotoven_triples"].reason, "waiting")
+        self.assertEqual(decisions["lotoven_triples"].pending_draws, ())
+
+    def test_learns_draw_times_from_archive_and_passes_poll_options(self):
+        provider = Provider.objects.create(name="Lotto Activo", source_url="https://lotoven.com/animalitos/lottoactivo/")
+        AnimalitoArchive.objects.create(
+            provider=provider,
+            draw_date=self.today - timedelta(days=1),
+            draw_time=time(10, 0),
+            animal_number="5",
+            animal_name="Leon",
+            animal_image_url="https://lotoven.com/5.png",
+        )
+        cache.set(f"{ScrapeScheduleService.LAST_DISPATCH_PREFIX}:lotoven_animalitos", self._at(9, 50).timestamp())
+
+        decisions, dispatched = self._tick(self._at(10, 1, 30))
+
+        self.assertEqual(decisions["lotoven_animalitos"].pending_draws, (time(10, 0),))
+        self.assertIn(("lotoven_animalitos", {"poll": True}), dispatched)
+        self.assertEqual(self._tick(self._at(23, 30))[0]["lotoven_animalitos"].reason, "closed")
+
+    def test_learns_draw_times_from_observations_older_than_the_archive(self):
+        provider = Provider.objects.create(name="Triple Zamorano", source_url="https://tuazar.com/loteria/zamorano/")
+        # Hace 5 días: el archivo (solo ayer) ya no lo tiene, ResultObservation sí.
+        ResultObservation.objects.create(
+            result_kind=ResultObservation.Kind.TRIPLES,
+            source="tuazar",
+            provider=provider,
+            draw_date=self.today - timedelta(days=5),
+            draw_time=time(16, 0),
+            value="456",
+            observed_at=timezone.now(),
+        )
+
+        with self.settings(SCRAPER_CALENDAR_LOOKBACK_DAYS=7):
+            calendar = ScrapeScheduleService.build_calendar(ScrapeScheduleService.SOURCES["tuazar_triples"], self.today)
+        self.assertEqual(calendar, {provider.pk: frozenset({time(16, 0)})})
+
+        cache.clear()
+        with self.settings(SCRAPER_CALENDAR_LOOKBACK_DAYS=3):
+            calendar = ScrapeScheduleService.build_calendar(ScrapeScheduleService.SOURCES["tuazar_triples"], self.today)
+        self.assertEqual(calendar, {})
+
+
 class ScraperNotificationServiceTestCase(TestCase):
     @override_settings(SCRAPER_ALERT_EMAILS=["ops@example.com"], DEFAULT_FROM_EMAIL="noreply@example.com")
     @patch("core.services.scraper_notification_service.send_mail")
@@ -259,6 +982,243 @@ class ResultWindowServiceTestCase(TestCase):
         )
 
 
+class ResultWriteServiceTestCase(TestCase):
+    def setUp(self):
+        self.provider = Provider.objects.create(
+            name="Triple Caracas A",
+            source_url="https://example.com/provider",
+            is_active=True,
+        )
+        self.draw_date = timezone.localdate()
+
+    def _time(self, raw):
+        return datetime.strptime(raw, "%H:%M").time()
+
+    def test_apply_diffs_existing_rows_and_counts_changes(self):
+        for raw, number in (("13:00", "111"), ("16:30", "222"), ("19:10", "333"), ("21:00", "444")):
+            CurrentResult.objects.create(
+                provider=self.provider,
+                draw_date=self.draw_date,
+                draw_time=self._time(raw),
+                winning_number=number,
+                extra={"signo": "TAU"},
+            )
+
+        batch = ResultWriteBatch(model=CurrentResult, draw_date=self.draw_date)
+        batch.add(self.provider, self._time("13:00"), winning_number="111")
+        batch.add(self.provider, self._time("16:30"), winning_number="999")
+        batch.add(self.provider, self._time("10:00"), winning_number="555")
+        batch.window(
+            self.provider,
+            cutoff_time=self._time("20:00"),
+            allowed_times=[self._time(raw) for raw in ("10:00", "13:00", "16:30", "21:00")],
+        )
+
+        # SELECT + INSERT + UPDATE + DELETE, sin importar cuántas filas.
+        with self.assertNumQueries(4):
+            summary = ResultWriteService.apply(batch)
+
+        self.assertEqual((summary.inserted, summary.changed, summary.unchanged, summary.deleted), (1, 1, 1, 2))
+        rows = dict(
+            CurrentResult.objects.filter(provider=self.provider, draw_date=self.draw_date)
+            .values_list("draw_time", "winning_number")
+        )
+        self.assertEqual(
+            rows,
+            {self._time("10:00"): "555", self._time("13:00"): "111", self._time("16:30"): "999"},
+        )
+        # Campos no declarados por la fila (extra) no se tocan.
+        self.assertEqual(
+            CurrentResult.objects.get(provider=self.provider, draw_time=self._time("16:30")).extra,
+            {"signo": "TAU"},
+        )
+
+    def test_apply_without_changes_only_reads(self):
+        CurrentResult.objects.create(
+            provider=self.provider,
+            draw_date=self.draw_date,
+            draw_time=self._time("13:00"),
+            winning_number="111",
+        )
+        batch = ResultWriteBatch(model=CurrentResult, draw_date=self.draw_date)
+        batch.add(self.provider, self._time("13:00"), winning_number="111")
+        batch.window(self.provider, cutoff_time=self._time("20:00"))
+
+        with self.assertNumQueries(1):
+            summary = ResultWriteService.apply(batch)
+
+        self.assertEqual(summary.unchanged, 1)
+        self.assertEqual(summary.inserted + summary.changed + summary.deleted, 0)
+
+
+class SourceReconciliationServiceTestCase(TestCase):
+    def setUp(self):
+        self.provider = Provider.objects.create(name="Triple Gana", source_url="https://example.com/tg")
+        self.draw_date = timezone.localdate()
+        self.draw_time = time(13, 0)
+
+    def _apply(self, source, number, **window):
+        batch = ResultWriteBatch(model=CurrentResult, draw_date=self.draw_date, source=source)
+        batch.add(self.provider, self.draw_time, winning_number=number)
+        if window:
+            batch.window(self.provider, **window)
+        return ResultWriteService.apply(batch)
+
+    def test_first_source_wins_and_late_disagreement_is_flagged(self):
+        self._apply("tuazar_triples", "123")
+        summary = self._apply("lotoven_triples", "124")
+
+        self.assertEqual(summary.other_source, 1)
+        self.assertEqual(CurrentResult.objects.get().winning_number, "123")
+        observations = {obs.source: obs for obs in ResultObservation.objects.all()}
+        self.assertTrue(observations["tuazar_triples"].accepted)
+        self.assertFalse(observations["lotoven_triples"].accepted)
+        self.assertTrue(all(obs.disagrees for obs in observations.values()))
+        self.assertLessEqual(
+            observations["tuazar_triples"].observed_at, observations["lotoven_triples"].observed_at
+        )
+
+        # La fuente perdedora tampoco borra la fila ganadora con su ventana.
+        summary = self._apply("lotoven_triples", "124", cutoff_time=time(12, 0))
+        self.assertEqual(summary.deleted, 0)
+        self.assertTrue(CurrentResult.objects.exists())
+
+    def test_agreeing_sources_record_publish_lag(self):
+        self._apply("lotoven_triples", "555")
+        self._apply("tuazar_triples", "555")
+
+        self.assertFalse(ResultObservation.objects.filter(disagrees=True).exists())
+        report = SourceReconciliationService.lag_report(since=self.draw_date)
+        self.assertEqual(
+            {(row.source, row.wins) for row in report},
+            {("lotoven_triples", 1), ("tuazar_triples", 0)},
+        )
+        self.assertTrue(all(row.avg_lag_seconds is not None for row in report))
+
+        out = StringIO()
+        call_command("report_source_lag", stdout=out)
+        self.assertIn("FASTEST Triple Gana", out.getvalue())
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class NumberStatsServiceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(TelemetrySnapshotBuffer.clear)
+        self.provider = Provider.objects.create(name="Lotto Rey", source_url="https://example.com/rey")
+        self.today = timezone.localdate()
+        # Días 10 y 11 del mes pasado: mismo mes y fuera de la ventana "fría".
+        self.day1 = (self.today.replace(day=1) - timedelta(days=1)).replace(day=10)
+        self.day2 = self.day1 + timedelta(days=1)
+
+    def _archive(self, day, *numbers):
+        for hour, number in enumerate(numbers, start=8):
+            ResultArchive.objects.update_or_create(
+                provider=self.provider,
+                draw_date=day,
+                draw_time=time(hour, 0),
+                defaults={"winning_number": number},
+            )
+
+    def _month_counts(self, month):
+        return dict(
+            NumberFrequency.objects.filter(
+                period=NumberFrequency.Period.MONTH, period_start=month.replace(day=1)
+            ).values_list("number", "count")
+        )
+
+    def test_record_day_applies_only_the_difference(self):
+        self._archive(self.day1, "123", "123", "555")
+        self._archive(self.day2, "123")
+
+        self.assertEqual(NumberStatsService.record_day(TRIPLES, self.day1), 2)
+        self.assertEqual(NumberStatsService.record_day(TRIPLES, self.day1), 0)
+        NumberStatsService.record_day(TRIPLES, self.day2)
+        # Corrección del upstream en un día ya archivado.
+        self._archive(self.day1, "123", "777", "555")
+        NumberStatsService.record_day(TRIPLES, self.day1)
+
+        self.assertEqual(self._month_counts(self.day1), {"123": 2, "555": 1, "777": 1})
+        seen = {row.number: row for row in NumberLastSeen.objects.all()}
+        self.assertEqual(seen["123"].last_seen, self.day2)
+        self.assertEqual(seen["123"].total_count, 2)
+        self.assertEqual(seen["777"].last_seen, self.day1)
+
+    def test_backfill_rebuilds_from_history_and_archive(self):
+        self._archive(self.day1, "123", "555")
+        self._archive(self.day2, "123")
+        with tempfile.TemporaryDirectory() as history_dir, self.settings(RESULT_HISTORY_DIR=history_dir):
+            ResultHistoryStore.export(TRIPLES, ResultArchive.objects.filter(draw_date=self.day1))
+            ResultArchive.objects.filter(draw_date=self.day1).delete()
+            call_command("backfill_number_stats", kind=TRIPLES, stdout=StringIO())
+
+        daily = dict(
+            NumberFrequency.objects.filter(period=NumberFrequency.Period.DAY)
+            .values("period_start")
+            .annotate(n=Sum("count"))
+            .values_list("period_start", "n")
+        )
+        self.assertEqual(daily, {self.day1: 2, self.day2: 1})
+        self.assertEqual(self._month_counts(self.day1), {"123": 2, "555": 1})
+        self.assertEqual(NumberLastSeen.objects.get(number="555").last_seen, self.day1)
+        self.assertEqual(NumberLastSeen.objects.get(number="123").total_count, 2)
+        self.assertEqual(NumberOccurrence.objects.filter(number="123").count(), 2)
+
+    def _register_device(self):
+        client_model = Client.objects.create(name="Cliente QA")
+        branch = Branch.objects.create(
+            client=client_model, name="Sucursal QA", is_active=True, paid_until=timezone.now() + timedelta(days=30)
+        )
+        Device.objects.create(device_id="tv-qa-001", activation_code="COD123", is_active=True, branch=branch)
+
+    def test_stats_endpoint_serves_hot_and_cold_numbers(self):
+        self._register_device()
+        self._archive(self.day1, "123", "123", "555")
+        NumberStatsService.record_day(TRIPLES, self.day1)
+        url = f"/api/stats/numbers/?code=COD123&provider={self.provider.name}&month={self.day1:%Y-%m}&days=5"
+
+        response = self.client.get(url, REMOTE_ADDR="10.10.10.20")
+        with patch.object(NumberStatsService, "hot") as hot:
+            cached = self.client.get(url, REMOTE_ADDR="10.10.10.20")
+        hot.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["hot"][0], {"number": "123", "count": 2})
+        idle = (self.today - self.day1).days
+        self.assertEqual(
+            [(row["number"], row["days"]) for row in response.json()["cold"]], [("123", idle), ("555", idle)]
+        )
+        self.assertEqual(cached.json(), response.json())
+        self.assertEqual(self.client.get(url.replace("days=5", "days=0")).status_code, 400)
+
+    def test_number_history_endpoint_pages_by_keyset(self):
+        self._register_device()
+        other = Provider.objects.create(name="Lotto Activo", source_url="https://example.com/activo")
+        self._archive(self.day1, "123", "555", "123")
+        self._archive(self.day2, "123")
+        ResultArchive.objects.create(provider=other, draw_date=self.day2, draw_time=time(9, 0), winning_number="123")
+        for day in (self.day1, self.day2):
+            NumberIndexService.index_day(TRIPLES, day)
+        url = "/api/history/number/123/?code=COD123&limit=2"
+
+        first = self.client.get(url, REMOTE_ADDR="10.10.10.20").json()
+        second = self.client.get(f"{url}&cursor={first['next']}", REMOTE_ADDR="10.10.10.20").json()
+        only_other = self.client.get(f"{url}&provider={other.id}", REMOTE_ADDR="10.10.10.20").json()
+
+        self.assertEqual(
+            [(row["provider"], row["date"], row["time"]) for row in first["results"] + second["results"]],
+            [
+                ("Lotto Activo", self.day2.isoformat(), "09:00 AM"),
+                ("Lotto Rey", self.day2.isoformat(), "08:00 AM"),
+                ("Lotto Rey", self.day1.isoformat(), "10:00 AM"),
+                ("Lotto Rey", self.day1.isoformat(), "08:00 AM"),
+            ],
+        )
+        self.assertIsNone(second["next"])
+        self.assertEqual(len(only_other["results"]), 1)
+        self.assertEqual(self.client.get(f"{url}&cursor=nope").status_code, 400)
+
+
 class DailyRetentionCommandTestCase(TestCase):
     @patch("core.management.commands.run_daily_retention.call_command")
     def test_run_daily_retention_calls_archive_then_retention(self, mock_call_command):
@@ -278,6 +1238,654 @@ class DailyRetentionCommandTestCase(TestCase):
             ],
         )
 
+    def test_archive_commands_upsert_set_based_and_clear_current(self):
+        provider = Provider.objects.create(name="Lotto Rey", source_url="https://example.com/rey")
+        yesterday = timezone.localdate() - timedelta(days=1)
+        for draw_time, number in ((time(9, 0), "101"), (time(10, 0), "202")):
+            CurrentResult.objects.create(
+                provider=provider, draw_date=yesterday, draw_time=draw_time, winning_number=number, extra={"signo": "LEO"}
+            )
+        ResultArchive.objects.create(provider=provider, draw_date=yesterday, draw_time=time(9, 0), winning_number="999")
+        AnimalitoResult.objects.create(
+            provider=provider,
+            draw_date=yesterday,
+            draw_time=time(9, 0),
+            animal_number="12",
+            animal_name="Caballo",
+            animal_image_url="https://example.com/12.png",
+            provider_logo_url="https://example.com/logo.png",
+        )
+
+        out = StringIO()
+        # SAVEPOINT + (COUNT en SQLite / chequeo de particiones en Postgres) + INSERT ... SELECT
+        # + DELETE + RELEASE, sin importar cuántas filas (estadísticas aparte: NumberStatsServiceTestCase).
+        with (
+            self.assertNumQueries(5),
+            patch.object(NumberStatsService, "record_day"),
+            patch.object(NumberIndexService, "index_day"),
+        ):
+            call_command("archive_daily_triples", stdout=out)
+        call_command("archive_daily_animalitos", stdout=out)
+
+        self.assertIn("created=1, updated=1, total_src=2", out.getvalue())
+        self.assertIn("created=1, updated=0, total_src=1", out.getvalue())
+        archived = {row.draw_time: row for row in ResultArchive.objects.filter(provider=provider)}
+        self.assertEqual(archived[time(9, 0)].winning_number, "101")
+        self.assertEqual(archived[time(10, 0)].extra, {"signo": "LEO"})
+        self.assertEqual(AnimalitoArchive.objects.get().animal_name, "Caballo")
+        self.assertFalse(CurrentResult.objects.exists())
+        self.assertFalse(AnimalitoResult.objects.exists())
+
+    def test_retention_exports_expired_archive_rows_to_history_store(self):
+        provider = Provider.objects.create(name="Lotto Rey", source_url="https://example.com/rey")
+        yesterday = timezone.localdate() - timedelta(days=1)
+        old_day = yesterday - timedelta(days=40)
+        ResultArchive.objects.create(provider=provider, draw_date=yesterday, draw_time=time(9, 0), winning_number="111")
+        ResultArchive.objects.create(provider=provider, draw_date=old_day, draw_time=time(9, 0), winning_number="222")
+        AnimalitoArchive.objects.create(
+            provider=provider,
+            draw_date=yesterday,
+            draw_time=time(9, 0),
+            animal_number="12",
+            animal_name="Caballo",
+            animal_image_url="https://example.com/12.png",
+        )
+
+        with tempfile.TemporaryDirectory() as history_dir, self.settings(RESULT_HISTORY_DIR=history_dir):
+            # Export repetido (retención re-ejecutada): la lectura no duplica.
+            ResultHistoryStore.export(TRIPLES, ResultArchive.objects.filter(draw_date=old_day))
+            call_command("enforce_retention", stdout=StringIO())
+
+            rows = ResultHistoryStore.query(TRIPLES, old_day, yesterday, provider_id=provider.id)
+            other_provider = ResultHistoryStore.query(TRIPLES, old_day, yesterday, provider_id=provider.id + 1)
+            segments = ResultHistoryStore.segments_for(TRIPLES, yesterday, yesterday)
+
+        self.assertEqual(
+            [(row["draw_date"], row["draw_time"], row["winning_number"]) for row in rows],
+            [(old_day.isoformat(), "09:00", "222")],
+        )
+        self.assertEqual(other_provider, [])
+        if old_day.month != yesterday.month:
+            self.assertEqual(segments, [])
+        self.assertEqual(list(ResultArchive.objects.values_list("draw_date", flat=True)), [yesterday])
+
+    def test_rerun_retention_keeps_history_meta_stable(self):
+        provider = Provider.objects.create(name="Lotto Rey", source_url="https://example.com/rey")
+        yesterday = timezone.localdate() - timedelta(days=1)
+        old_day = yesterday - timedelta(days=40)
+        ResultArchive.objects.create(provider=provider, draw_date=yesterday, draw_time=time(9, 0), winning_number="111")
+        for draw_time, number in ((time(9, 0), "222"), (time(10, 0), "333")):
+            ResultArchive.objects.create(provider=provider, draw_date=old_day, draw_time=draw_time, winning_number=number)
+        AnimalitoArchive.objects.create(
+            provider=provider,
+            draw_date=yesterday,
+            draw_time=time(9, 0),
+            animal_number="12",
+            animal_name="Caballo",
+            animal_image_url="https://example.com/12.png",
+        )
+
+        with tempfile.TemporaryDirectory() as history_dir, self.settings(RESULT_HISTORY_DIR=history_dir):
+            # El export queda commiteado y el borrado falla: la próxima corrida exporta lo mismo otra vez.
+            with patch.object(BatchedDeleteService, "delete", side_effect=RuntimeError("corte")):
+                with self.assertRaises(RuntimeError):
+                    call_command("enforce_retention", stdout=StringIO())
+            first = ResultHistoryStore.read_meta(TRIPLES, f"{old_day:%Y-%m}")
+            call_command("enforce_retention", stdout=StringIO())
+            second = ResultHistoryStore.read_meta(TRIPLES, f"{old_day:%Y-%m}")
+            rows = ResultHistoryStore.query(TRIPLES, old_day, old_day)
+
+        self.assertEqual(first, second)
+        self.assertEqual(second["rows"], 2)
+        self.assertEqual((second["min_date"], second["max_date"]), (old_day.isoformat(), old_day.isoformat()))
+        self.assertEqual(len(rows), 2)
+        self.assertFalse(ResultArchive.objects.filter(draw_date=old_day).exists())
+
+    def test_partition_names_round_trip(self):
+        day = datetime(2026, 3, 9).date()
+        name = ResultPartitionService.partition_name(ResultArchive, day)
+
+        self.assertEqual(name, "core_resultarchive_p20260309")
+        self.assertEqual(ResultPartitionService.partition_day(name), day)
+        self.assertIsNone(ResultPartitionService.partition_day(ResultPartitionService.default_partition_name(ResultArchive)))
+
+    def test_manage_result_partitions_is_noop_without_postgres(self):
+        if ResultPartitionService.supported():
+            self.skipTest("Solo aplica fuera de Postgres.")
+        out = StringIO()
+
+        call_command("manage_result_partitions", stdout=out)
+
+        self.assertIn("no es Postgres", out.getvalue())
+        self.assertFalse(ResultPartitionService.is_partitioned(CurrentResult))
+
+
+@skipUnless(connection.vendor == "postgresql", "El particionado solo corre en Postgres.")
+class ResultPartitionPostgresTestCase(TestCase):
+    def setUp(self):
+        self.provider = Provider.objects.create(name="Lotto Rey", source_url="https://example.com/rey")
+        self.today = timezone.localdate()
+
+    def create_row(self, model, day, draw_time=time(9, 0)):
+        if model in (CurrentResult, ResultArchive):
+            return model.objects.create(provider=self.provider, draw_date=day, draw_time=draw_time, winning_number="123")
+        return model.objects.create(
+            provider=self.provider,
+            draw_date=day,
+            draw_time=draw_time,
+            animal_number="12",
+            animal_name="Caballo",
+            animal_image_url="https://example.com/12.png",
+            provider_logo_url="https://example.com/logo.png",
+        )
+
+    def default_rows(self, model):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {ResultPartitionService.default_partition_name(model)}")
+            return cursor.fetchone()[0]
+
+    def test_migration_partitions_tables_with_django_constraint_names(self):
+        for pair in PARTITION_PAIRS.values():
+            for model in (pair.current, pair.archive):
+                with self.subTest(model=model.__name__):
+                    self.assertTrue(ResultPartitionService.is_partitioned(model))
+                    with connection.cursor() as cursor:
+                        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+                    self.assertIn(model._meta.constraints[0].name, constraints)
+                    (pk,) = [c for c in constraints.values() if c["primary_key"]]
+                    self.assertEqual(pk["columns"], ["id", "draw_date"])
+                    fks = [c["foreign_key"] for c in constraints.values() if c["foreign_key"]]
+                    self.assertEqual(fks, [("core_provider", "id")])
+            self.assertEqual(
+                ResultPartitionService.columns(pair.current._meta.db_table),
+                ResultPartitionService.columns(pair.archive._meta.db_table),
+            )
+
+    def test_ensure_rollover_and_drop(self):
+        yesterday = self.today - timedelta(days=1)
+        old_day = self.today - timedelta(days=3)
+        later = self.today + timedelta(days=10)
+        for kind, pair in PARTITION_PAIRS.items():
+            with self.subTest(kind=kind):
+                ResultPartitionService.ensure_partitions(pair.archive, old_day, old_day)
+                archived = self.create_row(pair.archive, old_day)
+                # La migración solo crea hoy + 7 días: ayer y `later` caen en DEFAULT.
+                pending = self.create_row(pair.current, yesterday)
+                fresh = self.create_row(pair.current, later)
+                self.assertGreater(fresh.pk, pending.pk)
+                self.assertEqual(self.default_rows(pair.current), 2)
+
+                created = ResultPartitionService.ensure_partitions(pair.current, yesterday, later)
+
+                self.assertIn(ResultPartitionService.partition_name(pair.current, yesterday), created)
+                self.assertIn(ResultPartitionService.partition_name(pair.current, later), created)
+                self.assertEqual(self.default_rows(pair.current), 0)
+                self.assertEqual(pair.current.objects.get(pk=fresh.pk).draw_date, later)
+
+                # Un default distinto en la partición de origen: no hay ATTACH.
+                source = ResultPartitionService.partition_name(pair.current, yesterday)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ALTER TABLE {source} ALTER COLUMN draw_time SET DEFAULT '00:00'")
+                self.assertFalse(ResultPartitionService.rollover(kind, yesterday))
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ALTER TABLE {source} ALTER COLUMN draw_time DROP DEFAULT")
+
+                self.assertTrue(ResultPartitionService.rollover(kind, yesterday))
+                self.assertFalse(pair.current.objects.filter(draw_date=yesterday).exists())
+                self.assertEqual(pair.archive.objects.get(draw_date=yesterday).pk, pending.pk)
+                self.assertFalse(ResultPartitionService.rollover(kind, yesterday))
+
+                dropped = ResultPartitionService.drop_partitions(pair.archive, yesterday)
+                self.assertEqual(dropped, [ResultPartitionService.partition_name(pair.archive, old_day)])
+                self.assertFalse(pair.archive.objects.filter(pk=archived.pk).exists())
+                self.assertTrue(pair.archive.objects.filter(draw_date=yesterday).exists())
+
+
+class TelemetryPartitionServiceTestCase(TestCase):
+    @override_settings(TELEMETRY_PARTITION_INTERVAL="week")
+    def test_weekly_periods_start_on_monday_utc(self):
+        wednesday = datetime(2026, 3, 11).date()
+
+        start = TelemetryPartitionService.period_start(wednesday)
+        lower, upper = TelemetryPartitionService.bounds(start)
+
+        self.assertEqual(start, datetime(2026, 3, 9).date())
+        self.assertEqual(lower.isoformat(), "2026-03-09T00:00:00+00:00")
+        self.assertEqual(upper - lower, timedelta(days=7))
+
+    def test_only_fully_expired_partitions_are_dropped(self):
+        days = [datetime(2026, 3, day).date() for day in (8, 9, 10)]
+        names = {day: f"core_devicetelemetryevent_p{day:%Y%m%d}" for day in days}
+        cutoff = datetime(2026, 3, 10, 6, 0, tzinfo=dt_timezone.utc)
+
+        with patch.object(TelemetryPartitionService, "partitions", return_value=names):
+            expired = TelemetryPartitionService.expired_partitions(cutoff)
+
+        self.assertEqual(expired, [names[days[0]], names[days[1]]])
+
+    def test_manage_telemetry_partitions_is_noop_without_postgres(self):
+        if ResultPartitionService.supported():
+            self.skipTest("Solo aplica fuera de Postgres.")
+        out = StringIO()
+
+        call_command("manage_telemetry_partitions", stdout=out)
+
+        self.assertIn("no es Postgres", out.getvalue())
+        self.assertFalse(TelemetryPartitionService.is_partitioned())
+
+
+@skipUnless(connection.vendor == "postgresql", "El particionado solo corre en Postgres.")
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, TELEMETRY_PARTITION_INTERVAL="day")
+class TelemetryPartitionPostgresTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        client_model = Client.objects.create(name="Cliente QA")
+        branch = Branch.objects.create(
+            client=client_model,
+            name="Sucursal QA",
+            is_active=True,
+            paid_until=timezone.now() + timedelta(days=30),
+        )
+        self.device = Device.objects.create(
+            device_id="tv-qa-partition",
+            activation_code="PART1",
+            is_active=True,
+            branch=branch,
+        )
+
+    def default_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {ResultPartitionService.default_partition_name(DeviceTelemetryEvent)}")
+            return cursor.fetchone()[0]
+
+    def test_migration_partitions_table_with_django_names(self):
+        table = DeviceTelemetryEvent._meta.db_table
+        self.assertTrue(TelemetryPartitionService.is_partitioned())
+        columns = {column[0]: column for column in ResultPartitionService.columns(table)}
+        self.assertIn(TELEMETRY_EVENT_SEQUENCE, columns["id"][3])
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        (pk,) = [c for c in constraints.values() if c["primary_key"]]
+        self.assertEqual(pk["columns"], ["id", "created_at"])
+        fks = [c["foreign_key"] for c in constraints.values() if c["foreign_key"]]
+        self.assertEqual(fks, [("core_device", "id")])
+        for index in DeviceTelemetryEvent._meta.indexes:
+            self.assertIn(index.name, constraints)
+
+    def test_insert_ensure_and_drop(self):
+        now = timezone.now()
+        today = now.astimezone(dt_timezone.utc).date()
+        old_day = (now - timedelta(days=10)).astimezone(dt_timezone.utc).date()
+        TelemetryPartitionService.ensure_partitions(old_day, old_day)
+        old = DeviceTelemetryEvent.objects.create(device=self.device, event_type="LOAD_ERROR")
+        DeviceTelemetryEvent.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=10))
+
+        # El ORM sigue insertando: id de la secuencia y FK a core_device.
+        event = DeviceTelemetryEvent.objects.create(device=self.device, event_type="HEARTBEAT")
+        self.assertGreater(event.pk, old.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DeviceTelemetryEvent.objects.create(device_id=self.device.pk + 1000, event_type="CUSTOM")
+            connection.check_constraints()
+
+        # Fuera de las particiones creadas cae en DEFAULT; ensure_partitions lo mueve.
+        later = today + timedelta(days=10)
+        DeviceTelemetryEvent.objects.filter(pk=event.pk).update(created_at=now + timedelta(days=10))
+        self.assertEqual(self.default_rows(), 1)
+        created = TelemetryPartitionService.ensure_partitions(today, later)
+        self.assertIn(ResultPartitionService.partition_name(DeviceTelemetryEvent, later), created)
+        self.assertEqual(self.default_rows(), 0)
+        self.assertTrue(DeviceTelemetryEvent.objects.filter(pk=event.pk).exists())
+
+        dropped = TelemetryPartitionService.drop_partitions(now - timedelta(days=3))
+        self.assertEqual(dropped, [ResultPartitionService.partition_name(DeviceTelemetryEvent, old_day)])
+        self.assertFalse(DeviceTelemetryEvent.objects.filter(pk=old.pk).exists())
+        self.assertTrue(DeviceTelemetryEvent.objects.filter(pk=event.pk).exists())
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class TelemetryRollupServiceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(TelemetrySnapshotBuffer.clear)
+        client_model = Client.objects.create(name="Cliente QA")
+        branch = Branch.objects.create(
+            client=client_model,
+            name="Sucursal QA",
+            is_active=True,
+            paid_until=timezone.now() + timedelta(days=30),
+        )
+        self.device = Device.objects.create(
+            device_id="tv-qa-rollup",
+            activation_code="ROL123",
+            is_active=True,
+            branch=branch,
+        )
+
+    def test_every_event_type_is_counted_without_redis_client(self):
+        for event_type in ("APP_START", "APP_START", "HEARTBEAT"):
+            DeviceTelemetryService.record_event(device=self.device, event_type=event_type, ip_address=None)
+
+        self.assertFalse(DeviceTelemetryEvent.objects.exists())
+        self.assertEqual(
+            TelemetryRollupService.totals(since=timezone.now() - timedelta(hours=1), device_id=self.device.pk),
+            {"APP_START": 2, "HEARTBEAT": 1},
+        )
+
+    def test_flush_moves_redis_counters_into_rollup_rows(self):
+        redis = FakeRedis()
+        at = datetime(2026, 3, 9, 14, 35, tzinfo=dt_timezone.utc)
+        with patch.object(TelemetryRollupService, "_client", return_value=redis):
+            for _ in range(3):
+                TelemetryRollupService.increment(device_id=self.device.pk, event_type="APP_RESUME", at=at)
+            TelemetryRollupService.increment(device_id=self.device.pk + 999, event_type="APP_RESUME", at=at)
+            first = TelemetryRollupService.flush()
+            TelemetryRollupService.increment(device_id=self.device.pk, event_type="APP_RESUME", at=at)
+            second = TelemetryRollupService.flush()
+
+        rollup = DeviceTelemetryRollup.objects.get()
+        self.assertEqual((first.hashes, first.rows, first.events), (1, 1, 4))
+        self.assertEqual((second.hashes, second.rows), (1, 1))
+        self.assertEqual((rollup.hour, rollup.event_type, rollup.count), (at.replace(minute=0), "APP_RESUME", 4))
+        self.assertEqual(redis.hashes, {})
+
+    def test_flush_resumes_leftover_keys_without_double_counting(self):
+        redis = FakeRedis()
+        at = datetime(2026, 3, 9, 14, 35, tzinfo=dt_timezone.utc)
+        # Corte antes del commit: la key renombrada quedó sin sumar.
+        leftover = f"{TelemetryRollupService.PREFIX}:flush:2026030914:abc"
+        redis.hashes[leftover] = {f"{self.device.pk}:APP_START": 2}
+        with patch.object(TelemetryRollupService, "_client", return_value=redis):
+            TelemetryRollupService.increment(device_id=self.device.pk, event_type="APP_START", at=at)
+            # Corte entre el commit y el DELETE de la key.
+            with patch.object(redis, "delete", side_effect=ConnectionError("redis caido")):
+                with self.assertRaises(ConnectionError):
+                    TelemetryRollupService.flush()
+            resumed = TelemetryRollupService.flush()
+
+        self.assertEqual(resumed.skipped, 1)
+        self.assertEqual(resumed.hashes, 1)
+        self.assertEqual(DeviceTelemetryRollup.objects.get().count, 3)
+        self.assertEqual(TelemetryRollupFlush.objects.count(), 2)
+        self.assertEqual(redis.hashes, {})
+
+    def test_increment_falls_back_to_database_when_redis_fails(self):
+        redis = FakeRedis()
+        at = datetime(2026, 3, 9, 14, 35, tzinfo=dt_timezone.utc)
+        # Pipeline real: los comandos viajan recién en execute(), que falla.
+        broken_pipe = Mock()
+        broken_pipe.execute.side_effect = ConnectionError("redis caido")
+        with patch.object(TelemetryRollupService, "_client", return_value=redis):
+            with patch.object(redis, "pipeline", return_value=broken_pipe):
+                TelemetryRollupService.increment(device_id=self.device.pk, event_type="APP_PAUSE", at=at)
+            TelemetryRollupService.increment(device_id=self.device.pk, event_type="APP_PAUSE", at=at)
+            TelemetryRollupService.flush()
+
+        rollup = DeviceTelemetryRollup.objects.get()
+        self.assertEqual((rollup.hour, rollup.event_type, rollup.count), (at.replace(minute=0), "APP_PAUSE", 2))
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, TELEMETRY_SNAPSHOT_FLUSH_SECONDS=60)
+class TelemetrySnapshotBufferTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(TelemetrySnapshotBuffer.clear)
+        client_model = Client.objects.create(name="Cliente QA")
+        branch = Branch.objects.create(
+            client=client_model,
+            name="Sucursal QA",
+            is_active=True,
+            paid_until=timezone.now() + timedelta(days=30),
+        )
+        self.devices = [
+            Device.objects.create(
+                device_id=f"tv-qa-snap-{index}",
+                activation_code=f"SNP{index}",
+                is_active=True,
+                branch=branch,
+            )
+            for index in range(2)
+        ]
+
+    def test_updates_are_merged_per_device_and_written_in_one_flush(self):
+        first, second = self.devices
+        # Sin Redis el rollup horario escribe directo en la base: queda fuera del conteo.
+        with patch.object(TelemetryRollupService, "increment"), self.assertNumQueries(0):
+            DeviceTelemetryService.record_heartbeat(device=first, ip_address="10.0.0.1")
+            DeviceTelemetryService.record_event(
+                device=first, event_type="LOAD_SUCCESS", ip_address="10.0.0.2", metadata={"app_version": "2.1"}
+            )
+            DeviceTelemetryService.record_heartbeat(device=second, ip_address="10.0.0.9")
+
+        self.assertEqual(DeviceTelemetrySnapshot.objects.count(), 0)
+        self.assertEqual(DeviceTelemetryService.current_snapshot(device=first).last_ip_address, "10.0.0.2")
+
+        summary = TelemetrySnapshotBuffer.flush()
+
+        snapshot = DeviceTelemetrySnapshot.objects.get(device=first)
+        self.assertEqual((summary.devices, summary.created, summary.updated), (2, 2, 2))
+        self.assertEqual((snapshot.last_ip_address, snapshot.app_version), ("10.0.0.2", "2.1"))
+        self.assertIsNotNone(snapshot.last_load_success_at)
+        self.assertEqual(DeviceTelemetrySnapshot.objects.get(device=second).last_ip_address, "10.0.0.9")
+
+    def test_no_op_updates_and_fresh_heartbeats_are_not_written(self):
+        device = self.devices[0]
+        metadata = {"android_version": "9", "build": "a1"}
+        DeviceTelemetryService.record_event(device=device, event_type="WEBVIEW_INFO", ip_address="10.0.0.1", metadata=metadata)
+        DeviceTelemetryService.record_heartbeat(device=device, ip_address="10.0.0.1")
+        TelemetrySnapshotBuffer.flush()
+        written = DeviceTelemetrySnapshot.objects.get(device=device).updated_at
+
+        DeviceTelemetryService.record_event(
+            device=device, event_type="WEBVIEW_INFO", ip_address="10.0.0.1", metadata=dict(metadata)
+        )
+        DeviceTelemetryService.record_heartbeat(device=device, ip_address="10.0.0.1")
+        summary = TelemetrySnapshotBuffer.flush()
+
+        self.assertEqual((summary.updated, summary.skipped), (0, 1))
+        self.assertEqual(DeviceTelemetrySnapshot.objects.get(device=device).updated_at, written)
+
+    @override_settings(TELEMETRY_SNAPSHOT_FLUSH_SECONDS=0)
+    def test_zero_window_writes_through(self):
+        DeviceTelemetryService.record_heartbeat(device=self.devices[0], ip_address="10.0.0.1")
+
+        self.assertEqual(TelemetrySnapshotBuffer.pending(self.devices[0].pk), {})
+        self.assertEqual(DeviceTelemetrySnapshot.objects.get().last_ip_address, "10.0.0.1")
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, TELEMETRY_SNAPSHOT_FLUSH_SECONDS=0.1)
+class TelemetrySnapshotFlusherTestCase(TransactionTestCase):
+    # El hilo de vuelco usa su propia conexión: necesita ver filas commiteadas.
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(TelemetrySnapshotBuffer.clear)
+        client_model = Client.objects.create(name="Cliente QA")
+        branch = Branch.objects.create(
+            client=client_model,
+            name="Sucursal QA",
+            is_active=True,
+            paid_until=timezone.now() + timedelta(days=30),
+        )
+        self.device = Device.objects.create(
+            device_id="tv-qa-flusher",
+            activation_code="FLSH1",
+            is_active=True,
+            branch=branch,
+        )
+
+    def test_pending_change_is_flushed_without_another_merge(self):
+        # Se espera al hilo sin consultar la tabla: SQLite la bloquea mientras él escribe.
+        written = threading.Event()
+        write = TelemetrySnapshotBuffer._write
+
+        def tracked_write(changes):
+            try:
+                return write(changes)
+            finally:
+                written.set()
+
+        with patch.object(TelemetrySnapshotBuffer, "_write", side_effect=tracked_write):
+            DeviceTelemetryService.record_heartbeat(device=self.device, ip_address="10.0.0.7")
+            self.assertTrue(written.wait(timeout=5))
+
+        self.assertEqual(DeviceTelemetrySnapshot.objects.get(device=self.device).last_ip_address, "10.0.0.7")
+        self.assertEqual(TelemetrySnapshotBuffer.pending(self.device.pk), {})
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class BatchedDeleteServiceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        for index in range(7):
+            ScraperRun.objects.create(
+                scraper_key="old" if index < 5 else "keep",
+                outcome=ScraperRun.Outcome.SUCCESS,
+                started_at=now,
+                finished_at=now,
+            )
+
+    def test_deletes_matching_rows_in_pk_batches(self):
+        seen = []
+
+        result = BatchedDeleteService.delete(
+            ScraperRun.objects.filter(scraper_key="old"), batch_size=2, progress=lambda r: seen.append(r.deleted)
+        )
+
+        self.assertEqual((result.deleted, result.batches, result.complete), (5, 3, True))
+        self.assertEqual(seen, [2, 4, 5])
+        self.assertEqual(set(ScraperRun.objects.values_list("scraper_key", flat=True)), {"keep"})
+
+    def test_time_budget_leaves_checkpoint_and_next_run_resumes(self):
+        qs = ScraperRun.objects.filter(scraper_key="old")
+
+        with patch("core.services.batched_delete_service.monotonic", side_effect=[0, 0, 100]):
+            partial = BatchedDeleteService.delete(qs, label="runs", batch_size=2, deadline=1)
+        checkpoint = cache.get("batched_delete:runs")
+        rest = BatchedDeleteService.delete(qs, label="runs", batch_size=2)
+
+        self.assertEqual((partial.deleted, partial.complete), (4, False))
+        self.assertEqual(checkpoint, partial.last_pk)
+        self.assertIsNone(cache.get("batched_delete:runs"))
+        self.assertEqual((rest.deleted, rest.batches, rest.complete), (1, 1, True))
+        self.assertFalse(qs.exists())
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, RESULT_HISTORY_DIR="")
+class RetentionBatchedDeleteTestCase(TransactionTestCase):
+    """Sin el atomic del TestCase: muestra que cada lote de enforce_retention commitea solo."""
+
+    def setUp(self):
+        cache.clear()
+        old = timezone.now() - timedelta(days=90)
+        for _ in range(5):
+            ScraperRun.objects.create(
+                scraper_key="old", outcome=ScraperRun.Outcome.SUCCESS, started_at=old, finished_at=old
+            )
+        self.clock = [0.0]
+        self.sleeps = []
+
+    def _sleep(self, seconds):
+        # Solo se duerme fuera de una transacción: el lote anterior ya commiteó.
+        self.sleeps.append((seconds, connection.in_atomic_block, ScraperRun.objects.count()))
+        self.clock[0] += seconds
+
+    def _run(self, *args):
+        out = StringIO()
+        with patch("core.services.batched_delete_service.sleep", side_effect=self._sleep), patch(
+            "core.services.batched_delete_service.monotonic", side_effect=lambda: self.clock[0]
+        ):
+            call_command("enforce_retention", "--skip-safety-checks", "--batch-size", "2", *args, stdout=out)
+        return out.getvalue()
+
+    def test_each_batch_commits_and_sleeps_between_batches(self):
+        output = self._run("--sleep", "0.5")
+
+        self.assertEqual(self.sleeps, [(0.5, False, 3), (0.5, False, 1)])
+        self.assertIn("ScraperRun: deleted 5 rows", output)
+        self.assertFalse(ScraperRun.objects.exists())
+
+    def test_time_budget_stops_between_batches_and_resumes(self):
+        output = self._run("--sleep", "1", "--time-budget", "1.5")
+
+        self.assertIn("ScraperRun: deleted 4 rows (time budget reached, resumes next run)", output)
+        self.assertEqual(ScraperRun.objects.count(), 1)
+
+        self.clock[0] = 0.0
+        output = self._run("--sleep", "1", "--time-budget", "1.5")
+
+        self.assertIn("ScraperRun: deleted 1 rows", output)
+        self.assertFalse(ScraperRun.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class DedupeServiceTestCase(TestCase):
+    KEYS = ("device_id", "event_type")
+
+    def setUp(self):
+        cache.clear()
+        client_model = Client.objects.create(name="Cliente QA")
+        branch = Branch.objects.create(
+            client=client_model,
+            name="Sucursal QA",
+            is_active=True,
+            paid_until=timezone.now() + timedelta(days=30),
+        )
+        self.device = Device.objects.create(
+            device_id="tv-qa-dedupe",
+            activation_code="DED123",
+            is_active=True,
+            branch=branch,
+        )
+        now = timezone.now()
+        self.ids = {}
+        for name, event_type, minutes in [
+            ("error_old", DeviceTelemetryEvent.EventType.LOAD_ERROR, 30),
+            ("error_new", DeviceTelemetryEvent.EventType.LOAD_ERROR, 5),
+            ("error_mid", DeviceTelemetryEvent.EventType.LOAD_ERROR, 10),
+            ("start_only", DeviceTelemetryEvent.EventType.APP_START, 1),
+        ]:
+            event = DeviceTelemetryEvent.objects.create(device=self.device, event_type=event_type)
+            DeviceTelemetryEvent.objects.filter(pk=event.pk).update(created_at=now - timedelta(minutes=minutes))
+            self.ids[name] = event.pk
+
+    def _remaining(self):
+        return set(DeviceTelemetryEvent.objects.values_list("pk", flat=True))
+
+    def test_summary_counts_groups_and_surplus_rows(self):
+        summary = DedupeService.summary(DeviceTelemetryEvent, keys=self.KEYS)
+
+        self.assertEqual((summary.groups, summary.rows), (1, 2))
+
+    def test_delete_keeps_newest_per_group_in_chunks(self):
+        progress = []
+
+        deleted = DedupeService.delete(
+            DeviceTelemetryEvent, keys=self.KEYS, chunk_size=1, progress=progress.append
+        )
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(progress, [1, 2])
+        self.assertEqual(self._remaining(), {self.ids["error_new"], self.ids["start_only"]})
+
+    def test_fallback_without_window_functions_matches(self):
+        with patch.object(connection.features, "supports_over_clause", False):
+            doomed = set(
+                DedupeService.duplicates(DeviceTelemetryEvent, keys=self.KEYS, keep="oldest").values_list(
+                    "pk", flat=True
+                )
+            )
+            DedupeService.delete(DeviceTelemetryEvent, keys=self.KEYS, keep="oldest")
+
+        self.assertEqual(doomed, {self.ids["error_new"], self.ids["error_mid"]})
+        self.assertEqual(self._remaining(), {self.ids["error_old"], self.ids["start_only"]})
+
+    def test_dry_run_command_reports_without_deleting(self):
+        out = StringIO()
+
+        call_command("dedupe_current_results", "--dry-run", stdout=out)
+
+        self.assertIn("DRY RUN: groups_with_dupes=0, would_delete=0", out.getvalue())
+
 
 class PurgeTelemetryEventsCommandTestCase(TestCase):
     def setUp(self):